@@ -1,12 +1,56 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import declarative_base, sessionmaker
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session, declarative_base, sessionmaker
+from starlette.concurrency import run_in_threadpool
+
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./backend/data.db")
+
+# ASYNC_DB=1 serves requests from an aiosqlite engine; otherwise every
+# route runs its queries on the threadpool with the classic sync engine.
+ASYNC_DB = os.getenv("ASYNC_DB", "0") == "1"
+
+# WAL lets readers proceed while /seed or an ingest holds the write lock.
+# Set SQLITE_TUNING=0 to keep SQLite's defaults.
+SQLITE_TUNING = os.getenv("SQLITE_TUNING", "1") != "0"
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "mmap_size": 256 * 1024 * 1024,
+    "cache_size": -64 * 1024,  # negative = KiB, i.e. 64 MiB
+    "busy_timeout": 5000,
+}
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
 
-DATABASE_URL = "sqlite:///./backend/data.db"
 
 engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+if SQLITE_TUNING:
+    event.listen(engine, "connect", _apply_sqlite_pragmas)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+async_engine = None
+AsyncSessionLocal = None
+if ASYNC_DB:
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    async_engine = create_async_engine(
+        DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://", 1),
+        pool_size=int(os.getenv("DB_POOL_SIZE", "10")),
+        max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "20")),
+    )
+    if SQLITE_TUNING:
+        event.listen(async_engine.sync_engine, "connect", _apply_sqlite_pragmas)
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 
 def get_db():
     db = SessionLocal()
@@ -14,3 +58,50 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_session():
+    """Yield an ``AsyncSession`` in async mode, else a regular ``Session``.
+
+    Routes never touch the session directly; they hand it to ``run_db``
+    together with one of the (synchronous) service functions.
+    """
+    if AsyncSessionLocal is None:
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+    else:
+        async with AsyncSessionLocal() as db:
+            yield db
+
+
+async def run_db(db, fn, *args, **kwargs):
+    """Run ``fn(session, *args, **kwargs)``, a function that queries.
+
+    Async sessions run it through ``AsyncSession.run_sync`` so the queries
+    go over aiosqlite; sync sessions fall back to the threadpool, which is
+    what FastAPI did for the old ``def`` routes.  ``run_sync`` calls ``fn``
+    in a greenlet on the event loop's own thread, so only the query I/O is
+    awaited: anything CPU-bound in ``fn`` blocks every other request.  Keep
+    ``fn`` to the reads and hand pandas / numpy / model work to
+    ``run_compute``.
+    """
+    if isinstance(db, Session):
+        return await run_in_threadpool(fn, db, *args, **kwargs)
+    return await db.run_sync(fn, *args, **kwargs)
+
+
+# CPU-bound work that follows the reads (feature building, as-of joins,
+# predict_proba) runs on a small dedicated executor, so a burst of dashboard
+# polls can starve neither the event loop nor FastAPI's threadpool.
+_compute_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("INFERENCE_WORKERS", "2")),
+    thread_name_prefix="compute",
+)
+
+
+async def run_compute(fn, *args):
+    """Run ``fn(*args)`` on the compute executor, off the event loop."""
+    return await asyncio.get_running_loop().run_in_executor(_compute_executor, fn, *args)
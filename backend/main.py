@@ -4,27 +4,40 @@ load_dotenv()
 import logging
 import os
 from contextlib import asynccontextmanager
-from datetime import datetime, timedelta
+from datetime import datetime
 
 from fastapi import Depends, FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
 
-from backend.db import Base, SessionLocal, engine, get_db
+from backend.db import Base, SessionLocal, async_engine, engine, get_db, get_session, run_db
+from backend.migrations import run_migrations
 from backend.models import Headline
 from backend.schemas import HeadlineOut, KPIOut, PriceSeriesOut
-from backend.services.news_service import compute_sentiment_vs_price_change, get_headlines
-from backend.services.prediction_service import get_model_report, predict_market_direction
+from backend.services import model_registry
+from backend.services.forecast_service import forecast_prices_async
+from backend.services.headline_rollup import get_prediction_history
+from backend.services.kpi_service import compute_kpis_async
+from backend.services.news_service import compute_sentiment_vs_price_change_async, get_headlines
+from backend.services.prediction_service import (
+    get_model_prediction_history,
+    get_model_report,
+    get_prediction_cache_stats,
+    predict_market_directions_async,
+)
 from backend.services.price_service import get_prices_for_range
-from backend.services.seed import seed_database
+from backend.services.seed import SUPPORTED_COMMODITIES, seed_database
 
 logger = logging.getLogger(__name__)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Auto-seed the database on startup when it is empty."""
+    """Bring the schema up to date, auto-seed the database when it is empty
+    and start loading the trained models in the background."""
     Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    model_registry.warm_up()
     db = SessionLocal()
     try:
         headline_count = db.query(Headline).count()
@@ -37,6 +50,8 @@ async def lifespan(app: FastAPI):
     finally:
         db.close()
     yield
+    if async_engine is not None:
+        await async_engine.dispose()
 
 
 app = FastAPI(title="SIGNAL — Shell Intelligence API", version="2.0.0", lifespan=lifespan)
@@ -68,115 +83,121 @@ app.add_middleware(
 )
 
 @app.get("/health")
-def health_check():
+async def health_check():
     return {"status": "ok"}
 
 
+# /seed stays a sync route: it makes blocking HTTP calls to the upstream
+# data sources and does a bulk write, both of which belong on the threadpool.
 @app.post("/seed")
 def seed(db: Session = Depends(get_db)):
     return seed_database(db)
 
 
 @app.get("/headlines", response_model=list[HeadlineOut])
-def list_headlines(
+async def list_headlines(
     commodity: str = Query(default="WTI"),
     limit: int = Query(default=50, ge=1, le=300),
     since: datetime | None = Query(default=None),
-    db: Session = Depends(get_db),
+    db=Depends(get_session),
 ):
-    return get_headlines(db, commodity=commodity.upper(), limit=limit, since=since)
+    return await run_db(db, get_headlines, commodity=commodity.upper(), limit=limit, since=since)
+
+
+def _headline_by_id(db: Session, headline_id: str) -> Headline | None:
+    return db.query(Headline).filter(Headline.id == headline_id).first()
 
 
 @app.get("/headlines/{headline_id}", response_model=HeadlineOut)
-def get_headline(headline_id: str, db: Session = Depends(get_db)):
-    headline = db.query(Headline).filter(Headline.id == headline_id).first()
+async def get_headline(headline_id: str, db=Depends(get_session)):
+    headline = await run_db(db, _headline_by_id, headline_id)
     if not headline:
         raise HTTPException(status_code=404, detail="Headline not found")
     return headline
 
 
 @app.get("/prices", response_model=PriceSeriesOut)
-def get_prices(
+async def get_prices(
     commodity: str = Query(default="WTI"),
     range: str = Query(default="7d", pattern="^(7d|14d|30d)$"),
-    db: Session = Depends(get_db),
+    db=Depends(get_session),
 ):
-    points = get_prices_for_range(db, commodity.upper(), range)
+    points = await run_db(db, get_prices_for_range, commodity.upper(), range)
     return {"commodity": commodity.upper(), "points": points}
 
 
 @app.get("/kpis", response_model=KPIOut)
-def get_kpis(commodity: str = Query(default="WTI"), db: Session = Depends(get_db)):
+async def get_kpis(commodity: str = Query(default="WTI"), db=Depends(get_session)):
     commodity = commodity.upper()
-    since = datetime.utcnow() - timedelta(hours=24)
-
-    recent = (
-        db.query(Headline)
-        .filter(Headline.commodity == commodity, Headline.published_at >= since)
-        .order_by(Headline.published_at.desc())
-        .all()
-    )
-
-    # If no headlines in the last 24h, fall back to the most recent headlines
-    # so the dashboard KPI cards always show meaningful data.
-    if not recent:
-        recent = (
-            db.query(Headline)
-            .filter(Headline.commodity == commodity)
-            .order_by(Headline.published_at.desc())
-            .limit(50)
-            .all()
-        )
+    return (await compute_kpis_async(db, [commodity]))[commodity]
 
-    avg_sentiment = round(sum(h.sentiment_score for h in recent) / len(recent), 3) if recent else 0
-    high_impact = len([h for h in recent if h.impact_score >= 70])
-    latest = recent[0] if recent else None
 
-    # Call the trained AI model for a real prediction
-    model_pred = None
-    model_conf = None
-    model_prob_up = None
-    try:
-        result = predict_market_direction(db, commodity=commodity)
-        model_pred = result["prediction"]
-        model_conf = result["confidence"]
-        model_prob_up = result["probability_up"]
-    except Exception:
-        logger.warning("AI model prediction failed for KPIs — using headline-based fallback", exc_info=True)
-
-    return {
-        "avg_sentiment_24h": avg_sentiment,
-        "high_impact_count_24h": high_impact,
-        "last_prediction": model_pred or (latest.pred_label if latest else None),
-        "last_confidence": model_conf or (latest.pred_confidence if latest else None),
-        "total_headlines_24h": len(recent),
-        "model_prediction": model_pred,
-        "model_confidence": model_conf,
-        "model_probability_up": model_prob_up,
-    }
+@app.get("/kpis/batch", response_model=dict[str, KPIOut])
+async def get_kpis_batch(
+    commodities: str = Query(default="WTI,BRENT,NATGAS"),
+    db=Depends(get_session),
+):
+    """Return KPIs for several commodities (comma-separated) in one call,
+    sharing a single headline aggregation query and model inference pass."""
+    requested = list(dict.fromkeys(c.strip().upper() for c in commodities.split(",") if c.strip()))
+    if not requested:
+        raise HTTPException(status_code=422, detail="No commodities requested")
+    return await compute_kpis_async(db, requested)
 
 
 @app.get("/analytics/sentiment-price")
-def sentiment_price_analytics(
+async def sentiment_price_analytics(
     commodity: str = Query(default="WTI"),
-    db: Session = Depends(get_db),
+    limit: int = Query(default=120, ge=1, le=10000),
+    db=Depends(get_session),
 ):
-    return compute_sentiment_vs_price_change(db, commodity.upper())
+    return await compute_sentiment_vs_price_change_async(db, commodity.upper(), limit=limit)
 
 
 @app.get("/predict")
-def predict(
+async def predict(
     commodity: str = Query(default="WTI"),
-    db: Session = Depends(get_db),
+    db=Depends(get_session),
 ):
     """Run the trained AI model (from train_model.py) on live DB data
     and return the market-direction prediction with confidence."""
+    commodity = commodity.upper()
+    try:
+        results = await predict_market_directions_async(db, [commodity], strict=True)
+        return results[commodity]
+    except (FileNotFoundError, ValueError) as exc:
+        raise HTTPException(status_code=503, detail=str(exc))
+
+
+@app.get("/forecast")
+async def forecast(
+    commodities: str = Query(default=",".join(SUPPORTED_COMMODITIES)),
+    db=Depends(get_session),
+):
+    """Return next-session price forecasts ($/bbl) from the Price Forecast
+    Engine (train_price_model.py) for several commodities (comma-separated),
+    built from live DB data with one model call for all of them."""
+    requested = list(dict.fromkeys(c.strip().upper() for c in commodities.split(",") if c.strip()))
+    if not requested:
+        raise HTTPException(status_code=422, detail="No commodities requested")
     try:
-        return predict_market_direction(db, commodity=commodity.upper())
+        return await forecast_prices_async(db, requested)
     except (FileNotFoundError, ValueError) as exc:
         raise HTTPException(status_code=503, detail=str(exc))
 
 
+@app.get("/predict/cache-stats")
+def prediction_cache_stats():
+    """Return hit/miss counters for the in-process prediction cache."""
+    return get_prediction_cache_stats()
+
+
+@app.get("/models")
+def models_status():
+    """Return the loaded and published version of each served model."""
+    return model_registry.status()
+
+
 @app.get("/model-report")
 def model_report():
     """Return the training metrics and feature importances of the
@@ -204,52 +225,18 @@ def holdout_predictions():
 
 
 @app.get("/prediction-history")
-def prediction_history(
+async def prediction_history(
     commodity: str = Query(default="WTI"),
-    limit: int = Query(default=30, ge=1, le=100),
-    db: Session = Depends(get_db),
+    limit: int = Query(default=30, ge=1, le=10000),
+    source: str = Query(default="headlines", pattern="^(headlines|model)$"),
+    db=Depends(get_session),
 ):
     """Return aggregated daily prediction history — the average confidence
     and dominant prediction direction for each day, useful for charting
-    model performance over time."""
-    from sqlalchemy import String as SAString, func, case
-
-    commodity = commodity.upper()
-    # Use func.date() instead of cast(..., Date) — SQLite has no native
-    # DATE type and cast produces values that trip up SQLAlchemy's
-    # type processor (TypeError: fromisoformat: argument must be str).
-    # Explicitly set type_=SAString so SQLAlchemy does NOT try to run
-    # the DateTime result processor on the plain date string returned
-    # by SQLite's date() function.
-    day = func.date(Headline.published_at, type_=SAString)
-    rows = (
-        db.query(
-            day.label("date"),
-            func.avg(Headline.pred_confidence).label("avg_confidence"),
-            func.avg(Headline.sentiment_score).label("avg_sentiment"),
-            func.count(Headline.id).label("count"),
-            # Count UP/DOWN predictions per day
-            func.sum(case((Headline.pred_label == "UP", 1), else_=0)).label("up_count"),
-            func.sum(case((Headline.pred_label == "DOWN", 1), else_=0)).label("down_count"),
-        )
-        .filter(Headline.commodity == commodity)
-        .group_by(day)
-        .order_by(day.desc())
-        .limit(limit)
-        .all()
-    )
-
-    result = []
-    for row in reversed(rows):
-        dominant = "UP" if (row.up_count or 0) >= (row.down_count or 0) else "DOWN"
-        result.append({
-            "date": str(row.date),
-            "dominant_prediction": dominant,
-            "avg_confidence": round(float(row.avg_confidence or 0), 3),
-            "avg_sentiment": round(float(row.avg_sentiment or 0), 3),
-            "headline_count": int(row.count or 0),
-            "up_count": int(row.up_count or 0),
-            "down_count": int(row.down_count or 0),
-        })
-
-    return result
+    model performance over time.  Served from the daily_headline_stats
+    rollup, so at most ``limit`` rows are read.  ``source=model`` returns
+    the direction model's own per-day output instead, as backfilled by
+    ``scripts/score_history.py``."""
+    if source == "model":
+        return await run_db(db, get_model_prediction_history, commodity.upper(), limit)
+    return await run_db(db, get_prediction_history, commodity.upper(), limit)
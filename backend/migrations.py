@@ -0,0 +1,100 @@
+"""Lightweight schema migrations for the SQLite database.
+
+``Base.metadata.create_all`` only creates missing tables, so schema changes
+to existing tables (new indexes, dropped indexes, back-fills) never reach a
+``backend/data.db`` created by an older checkout.  Each entry in
+``MIGRATIONS`` is applied once, in order, and SQLite's ``PRAGMA
+user_version`` records how many have run.  Steps are plain SQL strings or
+callables taking the open connection; every step must be safe to run on a
+database that ``create_all`` has just built from the current models.
+
+Run automatically on API startup; to migrate by hand::
+
+    python -m backend.migrations
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Callable
+
+from sqlalchemy import Connection, Engine
+
+from backend.models import DailyHeadlineStats, ModelPrediction
+from backend.services.headline_rollup import rebuild_daily_headline_stats
+
+log = logging.getLogger(__name__)
+
+Step = str | Callable[[Connection], None]
+
+MIGRATIONS: list[tuple[str, list[Step]]] = [
+    (
+        "composite (commodity, time) indexes",
+        [
+            "CREATE INDEX IF NOT EXISTS ix_headlines_commodity_published_at "
+            "ON headlines (commodity, published_at DESC)",
+            "CREATE INDEX IF NOT EXISTS ix_headlines_commodity_day_preds "
+            "ON headlines (commodity, date(published_at), pred_label, pred_confidence, sentiment_score, id)",
+            "CREATE INDEX IF NOT EXISTS ix_price_points_commodity_timestamp "
+            "ON price_points (commodity, timestamp)",
+            # Superseded by the composites above, which lead with commodity.
+            "DROP INDEX IF EXISTS ix_headlines_commodity",
+            "DROP INDEX IF EXISTS ix_price_points_commodity",
+            "ANALYZE",
+        ],
+    ),
+    (
+        "daily_headline_stats rollup",
+        [
+            lambda conn: DailyHeadlineStats.__table__.create(conn, checkfirst=True),
+            lambda conn: rebuild_daily_headline_stats(conn),
+            # /prediction-history reads the rollup now.
+            "DROP INDEX IF EXISTS ix_headlines_commodity_day_preds",
+        ],
+    ),
+    (
+        "unique (commodity, timestamp) on price_points",
+        [
+            # Keep the most recently inserted bar of any duplicate.
+            "DELETE FROM price_points WHERE id NOT IN "
+            "(SELECT max(id) FROM price_points GROUP BY commodity, timestamp)",
+            "CREATE UNIQUE INDEX IF NOT EXISTS ux_price_points_commodity_timestamp "
+            "ON price_points (commodity, timestamp)",
+            "DROP INDEX IF EXISTS ix_price_points_commodity_timestamp",
+        ],
+    ),
+    (
+        "model_predictions table",
+        [
+            lambda conn: ModelPrediction.__table__.create(conn, checkfirst=True),
+        ],
+    ),
+]
+
+
+def schema_version(conn: Connection) -> int:
+    return conn.exec_driver_sql("PRAGMA user_version").scalar() or 0
+
+
+def run_migrations(engine: Engine) -> int:
+    """Apply pending migrations and return the resulting schema version."""
+    with engine.begin() as conn:
+        version = schema_version(conn)
+        for number, (description, steps) in enumerate(MIGRATIONS[version:], start=version + 1):
+            log.info("Applying migration %d: %s", number, description)
+            for step in steps:
+                if callable(step):
+                    step(conn)
+                else:
+                    conn.exec_driver_sql(step)
+            # PRAGMA does not take bound parameters.
+            conn.exec_driver_sql(f"PRAGMA user_version = {int(number)}")
+            version = number
+    return version
+
+
+if __name__ == "__main__":
+    from backend.db import engine
+
+    logging.basicConfig(level=logging.INFO)
+    print(f"Schema version: {run_migrations(engine)}")
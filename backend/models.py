@@ -1,4 +1,4 @@
-from sqlalchemy import Column, DateTime, Float, Integer, String
+from sqlalchemy import Column, DateTime, Float, Index, Integer, String
 
 from .db import Base
 
@@ -11,18 +11,67 @@ class Headline(Base):
     title = Column(String, nullable=False)
     source = Column(String, nullable=False)
     url = Column(String, nullable=False)
-    commodity = Column(String, index=True, nullable=False)
+    commodity = Column(String, nullable=False)
     sentiment_score = Column(Float, nullable=False)
     event_type = Column(String, nullable=False)
     impact_score = Column(Float, nullable=False)
     pred_label = Column(String, nullable=False)
     pred_confidence = Column(Float, nullable=False)
 
+    __table_args__ = (
+        # Every hot headline query filters one commodity and walks it by time.
+        Index("ix_headlines_commodity_published_at", "commodity", published_at.desc()),
+    )
+
 
 class PricePoint(Base):
     __tablename__ = "price_points"
 
     id = Column(Integer, primary_key=True, index=True)
-    commodity = Column(String, index=True, nullable=False)
+    commodity = Column(String, nullable=False)
     timestamp = Column(DateTime, index=True, nullable=False)
     close = Column(Float, nullable=False)
+
+    __table_args__ = (
+        # One bar per (commodity, timestamp); bulk loads upsert on it.
+        Index("ux_price_points_commodity_timestamp", "commodity", "timestamp", unique=True),
+    )
+
+
+class DailyHeadlineStats(Base):
+    """Per-commodity daily headline rollup behind /prediction-history.
+
+    Kept in step with ``headlines`` by ``backend/services/headline_rollup.py``.
+    """
+
+    __tablename__ = "daily_headline_stats"
+
+    commodity = Column(String, primary_key=True)
+    date = Column(String, primary_key=True)  # "YYYY-MM-DD", as SQLite's date()
+    headline_count = Column(Integer, nullable=False, default=0)
+    sentiment_sum = Column(Float, nullable=False, default=0.0)
+    avg_sentiment = Column(Float, nullable=False, default=0.0)
+    confidence_sum = Column(Float, nullable=False, default=0.0)
+    up_count = Column(Integer, nullable=False, default=0)
+    down_count = Column(Integer, nullable=False, default=0)
+    neutral_count = Column(Integer, nullable=False, default=0)
+
+
+class ModelPrediction(Base):
+    """Per-day model output over the stored history.
+
+    Written in bulk by ``scripts/score_history.py``; one row per
+    (model, commodity, trading day), upserted on rescoring.
+    """
+
+    __tablename__ = "model_predictions"
+
+    model = Column(String, primary_key=True)  # registry name, e.g. "direction"
+    commodity = Column(String, primary_key=True)
+    date = Column(String, primary_key=True)  # "YYYY-MM-DD"
+    model_version = Column(String, nullable=False)
+    probability_up = Column(Float, nullable=False)
+    prediction = Column(String, nullable=False)  # UP / DOWN / UNCERTAIN
+    confidence = Column(Float, nullable=False)
+    threshold = Column(Float, nullable=False)
+    scored_at = Column(DateTime, nullable=False)
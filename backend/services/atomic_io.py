@@ -0,0 +1,45 @@
+"""Atomic file writes for the on-disk caches and the model registry.
+
+Each write goes to a temp file in the target's directory and is then
+``os.replace``-d over the target, so readers only ever see the old file
+or the complete new one. If the write or the rename fails the temp file
+is removed before the error propagates, so a full disk or a failing
+serialiser does not leave ``.tmp-*`` files behind.
+"""
+
+from __future__ import annotations
+
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Callable
+
+
+def _replace_with(path: Path, write: Callable[[str], None], suffix: str = "") -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-", suffix=suffix)
+    os.close(fd)
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def atomic_write(path: Path, data: bytes) -> None:
+    """Write ``data`` to ``path`` atomically."""
+
+    def write(tmp: str) -> None:
+        with open(tmp, "wb") as fh:
+            fh.write(data)
+
+    _replace_with(path, write)
+
+
+def atomic_write_parquet(path: Path, df: Any) -> None:
+    """Write the DataFrame ``df`` to ``path`` as Parquet, atomically."""
+    _replace_with(path, lambda tmp: df.to_parquet(tmp, index=False), suffix=".parquet")
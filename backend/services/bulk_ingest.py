@@ -0,0 +1,151 @@
+"""Bulk ingest for price bars and headlines.
+
+ORM ``add_all`` builds one object and one INSERT per row, and the old
+``load_price_data.py`` loop issued one ``INSERT OR IGNORE`` per
+``iterrows()`` row.  Everything here goes through SQLAlchemy Core
+``executemany`` in batches of ``batch_size`` rows (``BULK_BATCH_SIZE``,
+default 5000) with upsert semantics:
+
+* price bars upsert on the unique ``(commodity, timestamp)`` index, so a
+  re-download of an overlapping window updates ``close`` in place;
+* headlines upsert on their ``id``;
+* model predictions upsert on ``(model, commodity, date)``, so rescoring a
+  date range replaces its rows.
+
+Core writes bypass the ORM session hooks, so callers get the rollup and
+cache bookkeeping done here instead: headline loads rebuild the affected
+``daily_headline_stats`` partitions in the same transaction, and every load
+reports the touched commodities to ``feature_state`` (which also drops the
+prediction cache).
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+from collections.abc import Iterable, Iterator
+from itertools import islice
+
+from sqlalchemy import Engine, delete
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from backend.models import Headline, ModelPrediction, PricePoint
+from backend.services import feature_state
+from backend.services.headline_rollup import rebuild_daily_headline_stats
+
+log = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", "5000"))
+
+_PRICE_TABLE = PricePoint.__table__
+_HEADLINE_TABLE = Headline.__table__
+_HEADLINE_COLUMNS = [c.key for c in _HEADLINE_TABLE.columns]
+_PREDICTION_TABLE = ModelPrediction.__table__
+
+_price_upsert = sqlite_insert(_PRICE_TABLE)
+_PRICE_UPSERT = _price_upsert.on_conflict_do_update(
+    index_elements=["commodity", "timestamp"],
+    set_={"close": _price_upsert.excluded.close},
+)
+_headline_upsert = sqlite_insert(_HEADLINE_TABLE)
+_HEADLINE_UPSERT = _headline_upsert.on_conflict_do_update(
+    index_elements=["id"],
+    set_={name: _headline_upsert.excluded[name] for name in _HEADLINE_COLUMNS if name != "id"},
+)
+_prediction_upsert = sqlite_insert(_PREDICTION_TABLE)
+_PREDICTION_UPSERT = _prediction_upsert.on_conflict_do_update(
+    index_elements=["model", "commodity", "date"],
+    set_={c.key: _prediction_upsert.excluded[c.key] for c in _PREDICTION_TABLE.columns if not c.primary_key},
+)
+
+
+def _batches(rows: Iterable[dict], batch_size: int) -> Iterator[list[dict]]:
+    it = iter(rows)
+    while batch := list(islice(it, batch_size)):
+        yield batch
+
+
+def price_rows(points: Iterable[PricePoint]) -> list[dict]:
+    """Plain row dicts for (transient) ``PricePoint`` objects."""
+    return [{"commodity": p.commodity, "timestamp": p.timestamp, "close": p.close} for p in points]
+
+
+def headline_rows(headlines: Iterable[Headline]) -> list[dict]:
+    """Plain row dicts for (transient) ``Headline`` objects."""
+    return [{name: getattr(h, name) for name in _HEADLINE_COLUMNS} for h in headlines]
+
+
+def upsert_price_points(conn, rows: Iterable[dict], batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """Upsert price rows on ``conn`` (a ``Session`` or ``Connection``) without committing."""
+    written = 0
+    for batch in _batches(rows, batch_size):
+        conn.execute(_PRICE_UPSERT, batch)
+        written += len(batch)
+    return written
+
+
+def upsert_headlines(conn, rows: Iterable[dict], batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """Upsert headline rows on ``conn`` and refresh their rollup partitions."""
+    written = 0
+    commodities: set[str] = set()
+    for batch in _batches(rows, batch_size):
+        conn.execute(_HEADLINE_UPSERT, batch)
+        commodities.update(row["commodity"] for row in batch)
+        written += len(batch)
+    for commodity in commodities:
+        rebuild_daily_headline_stats(conn, commodity)
+    return written
+
+
+def upsert_model_predictions(conn, rows: Iterable[dict], batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """Upsert ``model_predictions`` rows on ``conn`` without committing."""
+    written = 0
+    for batch in _batches(rows, batch_size):
+        conn.execute(_PREDICTION_UPSERT, batch)
+        written += len(batch)
+    return written
+
+
+def load_price_points(engine: Engine, rows: Iterable[dict], batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """Upsert a (possibly very large) stream of price rows, one transaction per batch."""
+    written = 0
+    commodities: set[str] = set()
+    for batch in _batches(rows, batch_size):
+        with engine.begin() as conn:
+            conn.execute(_PRICE_UPSERT, batch)
+        commodities.update(row["commodity"] for row in batch)
+        written += len(batch)
+    feature_state.notify_bulk_write(commodities)
+    return written
+
+
+def replace_commodity_partition(
+    db: Session,
+    commodity: str,
+    headlines: list[dict] | None = None,
+    prices: list[dict] | None = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> dict[str, int]:
+    """Atomically swap one commodity's headlines and/or prices for new rows.
+
+    Other commodities are untouched, so a reseed never leaves the tables
+    empty for readers.  Passing ``None`` leaves that table alone.
+    """
+    counts = {"headlines": 0, "price_points": 0}
+    try:
+        if headlines is not None:
+            db.execute(delete(_HEADLINE_TABLE).where(_HEADLINE_TABLE.c.commodity == commodity))
+            counts["headlines"] = upsert_headlines(db, headlines, batch_size)
+            if not headlines:
+                rebuild_daily_headline_stats(db, commodity)
+        if prices is not None:
+            db.execute(delete(_PRICE_TABLE).where(_PRICE_TABLE.c.commodity == commodity))
+            counts["price_points"] = upsert_price_points(db, prices, batch_size)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    feature_state.notify_bulk_write({commodity})
+    log.info("Replaced %s partition: %s", commodity, counts)
+    return counts
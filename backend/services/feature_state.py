@@ -0,0 +1,419 @@
+"""Incremental feature state for the direction model.
+
+``prediction_service._build_feature_df_from_db`` rebuilds 60 days of daily
+bars and reruns every EWM / rolling recursion of ``signal_features`` on
+each request, only to keep the last row.  This module keeps, per commodity,
+the running state of those recursions (EMA12/26, MACD signal, Wilder RSI
+gain/loss, and the short rolling-window buffers) so that the latest feature
+vector can be produced in O(1).
+
+The state is fed by SQLAlchemy session events: every committed
+``PricePoint`` / ``Headline`` insert is folded in without touching the rest
+of the history.  Anything the O(1) path cannot express — back-filled prices,
+updates or deletes, the 60-day window sliding past the oldest bar, or rows
+written by another process — marks the commodity for a rebuild, which
+replays the window through the same update code.
+
+The arithmetic deliberately mirrors pandas (``ewm(adjust=False)``,
+``rolling().mean()/std()``, ``pct_change``) so results match the pandas path
+to floating-point tolerance.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import statistics
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Any, Callable
+
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session
+
+from backend.models import Headline, PricePoint
+
+log = logging.getLogger(__name__)
+
+# Must match the look-back used by prediction_service._build_feature_df_from_db.
+WINDOW_DAYS = 60
+MIN_PRICE_POINTS = 5
+
+_ALPHA_12 = 2.0 / (12 + 1)
+_ALPHA_26 = 2.0 / (26 + 1)
+_ALPHA_9 = 2.0 / (9 + 1)
+_ALPHA_RSI = 1.0 / (1 + 13)
+
+
+def _ewm_step(weighted: float, value: float, alpha: float) -> float:
+    """One step of pandas' ``ewm(adjust=False).mean()`` recursion."""
+    if weighted == value:
+        return weighted
+    old_wt = 1.0 - alpha
+    return (old_wt * weighted + alpha * value) / (old_wt + alpha)
+
+
+@dataclass
+class _Recursions:
+    """Everything the feature formulas need from bars before the last one."""
+
+    bars: int = 0
+    ema12: float = math.nan
+    ema26: float = math.nan
+    macd_signal: float = math.nan
+    avg_gain: float = math.nan
+    avg_loss: float = math.nan
+    prices: deque = field(default_factory=lambda: deque(maxlen=4))
+    returns: deque = field(default_factory=lambda: deque(maxlen=4))
+    volatilities: deque = field(default_factory=lambda: deque(maxlen=4))
+
+    def copy(self) -> "_Recursions":
+        return _Recursions(
+            self.bars, self.ema12, self.ema26, self.macd_signal,
+            self.avg_gain, self.avg_loss,
+            deque(self.prices, maxlen=4),
+            deque(self.returns, maxlen=4),
+            deque(self.volatilities, maxlen=4),
+        )
+
+    def advance(self, price: float) -> dict[str, float]:
+        """Fold one daily close into the recursions; return that bar's values."""
+        prev = self.prices[-1] if self.prices else math.nan
+        ret = price / prev - 1 if self.bars else math.nan
+        returns = [*self.returns, ret]
+        volatility = statistics.stdev(returns) if len(returns) == 5 and self.bars >= 5 else math.nan
+
+        if self.bars == 0:
+            self.ema12 = self.ema26 = price
+            self.macd_signal = 0.0
+        else:
+            self.ema12 = _ewm_step(self.ema12, price, _ALPHA_12)
+            self.ema26 = _ewm_step(self.ema26, price, _ALPHA_26)
+            self.macd_signal = _ewm_step(self.macd_signal, self.ema12 - self.ema26, _ALPHA_9)
+
+            delta = price - prev
+            gain, loss = max(delta, 0.0), -min(delta, 0.0)
+            if self.bars == 1:
+                self.avg_gain, self.avg_loss = gain, loss
+            else:
+                self.avg_gain = _ewm_step(self.avg_gain, gain, _ALPHA_RSI)
+                self.avg_loss = _ewm_step(self.avg_loss, loss, _ALPHA_RSI)
+
+        bar = {
+            "price": price,
+            "price_lag_1": prev,
+            "price_lag_2": self.prices[-2] if len(self.prices) >= 2 else math.nan,
+            "return_1": ret,
+            "volatility_5": volatility,
+            "volatility_window": [*self.volatilities, volatility],
+            "price_window": [*self.prices, price],
+        }
+
+        self.bars += 1
+        self.prices.append(price)
+        self.returns.append(ret)
+        self.volatilities.append(volatility)
+        return bar
+
+
+@dataclass
+class CommodityFeatureState:
+    """Running feature state for one commodity over the serving window."""
+
+    commodity: str
+    window_start: datetime | None = None
+    committed: _Recursions = field(default_factory=_Recursions)
+    last_date: date | None = None
+    last_timestamp: datetime | None = None
+    last_price: float = math.nan
+    recent_dates: deque = field(default_factory=lambda: deque(maxlen=3))
+    news: dict[date, list[float]] = field(default_factory=dict)
+    max_price_ts: datetime | None = None
+    max_headline_ts: datetime | None = None
+    stale: bool = False
+
+    @property
+    def bars(self) -> int:
+        return self.committed.bars + (1 if self.last_date is not None else 0)
+
+    # ── Updates ──────────────────────────────────────────────────────────
+
+    def add_price(self, timestamp: datetime, close: float) -> None:
+        day = timestamp.date()
+        self.max_price_ts = max(self.max_price_ts or timestamp, timestamp)
+        if self.window_start is None:
+            self.window_start = timestamp
+
+        if self.last_date is None or day > self.last_date:
+            if self.last_date is not None:
+                self.committed.advance(self.last_price)
+            self.last_date = day
+            self.last_timestamp = timestamp
+            self.last_price = close
+            self.recent_dates.append(day)
+        elif day == self.last_date:
+            # groupby("date").last() keeps the latest timestamp of the day.
+            if timestamp >= self.last_timestamp:
+                self.last_timestamp = timestamp
+                self.last_price = close
+        else:
+            self.stale = True
+
+    def add_headline(self, published_at: datetime, sentiment: float) -> None:
+        self.max_headline_ts = max(self.max_headline_ts or published_at, published_at)
+        counts = self.news.setdefault(published_at.date(), [0, 0.0])
+        counts[0] += 1
+        counts[1] += sentiment
+
+    # ── Read ─────────────────────────────────────────────────────────────
+
+    def _tone(self, day: date | None) -> tuple[int, float]:
+        counts = self.news.get(day) if day is not None else None
+        if not counts:
+            return 0, 0.0
+        return counts[0], counts[1] / counts[0]
+
+    def latest_features(self) -> dict[str, Any] | None:
+        """Return the last row of the ``signal_features`` direction set for this commodity.
+
+        ``None`` means the O(1) state cannot answer (too little data, or the
+        last row contains NaN and pandas would fall back to an earlier row).
+        """
+        if self.stale or self.last_date is None or self.bars < MIN_PRICE_POINTS:
+            return None
+
+        state = self.committed.copy()
+        bar = state.advance(self.last_price)
+        price = bar["price"]
+        lag_1, lag_2 = bar["price_lag_1"], bar["price_lag_2"]
+        window = bar["price_window"]
+        ma_3 = sum(window[-3:]) / 3 if len(window) >= 3 else math.nan
+        ma_5 = sum(window) / 5 if len(window) == 5 else math.nan
+        volatility = bar["volatility_5"]
+        vol_window = bar["volatility_window"]
+        vol_mean = (
+            sum(vol_window) / 5
+            if len(vol_window) == 5 and not any(math.isnan(v) for v in vol_window)
+            else math.nan
+        )
+
+        dates = list(self.recent_dates)
+        article_count, tone = self._tone(dates[-1])
+        tones = [self._tone(d)[1] for d in dates]
+        tone_ma_3 = sum(tones) / 3 if len(tones) == 3 else math.nan
+        tone_prev = tones[-2] if len(tones) >= 2 else math.nan
+
+        return_1 = bar["return_1"]
+        return_2 = price / lag_2 - 1
+        macd = state.ema12 - state.ema26
+        macd_hist = macd - state.macd_signal
+        rsi = (
+            100 - (100 / (1 + state.avg_gain / state.avg_loss))
+            if state.avg_loss != 0
+            else math.nan
+        )
+        rsi_norm = (rsi - 50) / 50
+        month = self.last_date.month
+
+        row = {
+            "price": price,
+            "price_lag_1": lag_1,
+            "price_lag_2": lag_2,
+            "price_change_1": price - lag_1,
+            "return_1": return_1,
+            "price_ma_3": ma_3,
+            "price_ma_5": ma_5,
+            "volatility_5": volatility,
+            "article_count": article_count,
+            "avg_tone": tone,
+            "neg_tone_flag": int(tone < 0),
+            "strong_neg_tone": int(tone < -0.5),
+            "volatility_spike": int(volatility > vol_mean),
+            "down_momentum": int(price < lag_1),
+            "price_diff_1": price - lag_1,
+            "price_diff_2": lag_1 - lag_2,
+            "tone_ma_3": tone_ma_3,
+            "tone_x_volatility": tone * volatility,
+            "return_2": return_2,
+            "trend_strength": ma_3 - ma_5,
+            "acceleration": return_1 - return_2,
+            "tone_change": tone - tone_prev,
+            "momentum_3": price - lag_2,
+            "price_vs_ma5": price / ma_5 - 1,
+            "ma3_vs_ma5": ma_3 / ma_5 - 1,
+            "macd": macd,
+            "macd_signal": state.macd_signal,
+            "macd_hist": macd_hist,
+            "price_vs_ema12": state.ema12 / price - 1,
+            "ema12_vs_ema26": state.ema12 / state.ema26 - 1,
+            "rsi": rsi,
+            "rsi_norm": rsi_norm,
+            "rsi_overbought": int(rsi > 70),
+            "rsi_oversold": int(rsi < 30),
+            "month_sin": math.sin(2 * math.pi * month / 12),
+            "month_cos": math.cos(2 * math.pi * month / 12),
+            "macd_x_tone": macd_hist * tone,
+            "rsi_x_tone": rsi_norm * tone,
+            "macd_x_vol": macd_hist * volatility,
+        }
+
+        if any(isinstance(v, float) and math.isnan(v) for v in row.values()):
+            return None
+        return row
+
+
+# ── Cache ────────────────────────────────────────────────────────────────
+
+_lock = threading.RLock()
+_states: dict[str, CommodityFeatureState] = {}
+_change_listeners: list[Callable[[set[str]], None]] = []
+
+
+def data_watermark(db: Session, commodity: str) -> tuple[datetime | None, datetime | None]:
+    """Return (max PricePoint.timestamp, max Headline.published_at) for a commodity."""
+    max_price = (
+        db.query(func.max(PricePoint.timestamp))
+        .filter(PricePoint.commodity == commodity)
+        .scalar()
+    )
+    max_headline = (
+        db.query(func.max(Headline.published_at))
+        .filter(Headline.commodity == commodity)
+        .scalar()
+    )
+    return max_price, max_headline
+
+
+def _rebuild(db: Session, commodity: str, cutoff: datetime, watermark: tuple) -> CommodityFeatureState:
+    """Replay the serving window through the incremental update path."""
+    state = CommodityFeatureState(commodity)
+
+    prices = (
+        db.query(PricePoint.timestamp, PricePoint.close)
+        .filter(PricePoint.commodity == commodity, PricePoint.timestamp >= cutoff)
+        .order_by(PricePoint.timestamp.asc())
+        .all()
+    )
+    for timestamp, close in prices:
+        state.add_price(timestamp, close)
+
+    headlines = (
+        db.query(Headline.published_at, Headline.sentiment_score)
+        .filter(Headline.commodity == commodity, Headline.published_at >= cutoff)
+        .all()
+    )
+    for published_at, sentiment in headlines:
+        state.add_headline(published_at, sentiment)
+
+    # Record the DB watermark so rows the window excludes are not mistaken
+    # for out-of-band writes on the next read.  It was read before the
+    # replay: a row committed since then only makes the next read rebuild.
+    state.max_price_ts, state.max_headline_ts = watermark
+    return state
+
+
+def latest_features(db: Session, commodity: str, watermark: tuple | None = None) -> dict[str, Any] | None:
+    """Return the latest engineered feature row for ``commodity``.
+
+    Rebuilds the commodity's state only when it is missing or stale;
+    otherwise the answer comes straight from the running recursions.
+    Pass ``watermark`` when the caller has just read ``data_watermark``.
+    """
+    commodity = commodity.upper()
+    cutoff = datetime.utcnow() - timedelta(days=WINDOW_DAYS)
+    if watermark is None:
+        watermark = data_watermark(db, commodity)
+
+    with _lock:
+        state = _states.get(commodity)
+        if (
+            state is None
+            or state.stale
+            or (state.window_start is not None and state.window_start < cutoff)
+            or (state.max_price_ts, state.max_headline_ts) != watermark
+        ):
+            state = _rebuild(db, commodity, cutoff, watermark)
+            _states[commodity] = state
+        return state.latest_features()
+
+
+def add_change_listener(listener: Callable[[set[str]], None]) -> None:
+    """Call ``listener(commodities)`` after a commit that wrote price/headline rows."""
+    _change_listeners.append(listener)
+
+
+def invalidate(commodity: str | None = None) -> None:
+    """Drop cached state for one commodity, or for all of them."""
+    with _lock:
+        if commodity is None:
+            _states.clear()
+        else:
+            _states.pop(commodity.upper(), None)
+
+
+def notify_bulk_write(commodities: set[str]) -> None:
+    """Report rows written outside the ORM session (Core bulk loads).
+
+    Those writes never reach the session hooks below, so the affected
+    states are dropped and the change listeners are called directly.
+    """
+    touched = {str(c).upper() for c in commodities}
+    with _lock:
+        for commodity in touched:
+            _states.pop(commodity, None)
+    if touched:
+        for listener in _change_listeners:
+            listener(touched)
+
+
+# ── Session hooks ────────────────────────────────────────────────────────
+# New rows are collected at flush time and applied only once the
+# transaction commits, so rolled-back inserts never reach the cache.
+
+_PENDING_KEY = "feature_state_pending"
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changes(session: Session, flush_context) -> None:
+    pending = session.info.setdefault(_PENDING_KEY, {"new": [], "invalidate": set()})
+    for obj in session.new:
+        if isinstance(obj, PricePoint):
+            pending["new"].append(("price", obj.commodity, obj.timestamp, obj.close))
+        elif isinstance(obj, Headline):
+            pending["new"].append(("headline", obj.commodity, obj.published_at, obj.sentiment_score))
+    for obj in (*session.dirty, *session.deleted):
+        if isinstance(obj, (PricePoint, Headline)):
+            pending["invalidate"].add(obj.commodity)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_changes(session: Session) -> None:
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+
+    with _lock:
+        for commodity in pending["invalidate"]:
+            _states.pop(str(commodity).upper(), None)
+
+        for kind, commodity, timestamp, value in pending["new"]:
+            state = _states.get(str(commodity).upper())
+            if state is None:
+                continue
+            if kind == "price":
+                state.add_price(timestamp, value)
+            else:
+                state.add_headline(timestamp, value)
+
+    touched = {str(c).upper() for c in pending["invalidate"]}
+    touched.update(str(commodity).upper() for _, commodity, _, _ in pending["new"])
+    if touched:
+        for listener in _change_listeners:
+            listener(touched)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,301 @@
+"""Local feature store shared by training and serving.
+
+Engineered features are materialised into columnar snapshots, one Parquet
+file per commodity under ``<FEATURE_STORE_DIR>/<feature set>/<version>/``,
+so every stored row is keyed by (commodity, date, feature-set version).  The
+version hashes ``signal_features.REGISTRY_VERSION`` with the set's column
+list: changing either starts a new snapshot instead of mixing old and new
+values.
+
+* Training calls ``load_features(feature_set, base)``.  The snapshot is
+  reused while the inputs it was built from are unchanged (a content
+  fingerprint in ``manifest.json``) and rebuilt otherwise, then joined to
+  ``base`` point-in-time: each row gets the newest stored row of its
+  commodity dated on or before it, never a later one.
+* Serving calls ``latest(feature_set, commodity)``, a dict lookup in an
+  in-memory index of each commodity's newest row (persisted as
+  ``latest.json``).  Rows computed from live DB data are recorded with
+  ``put_latest`` together with the data watermark they were computed at,
+  so a lookup is only trusted while the watermark still matches.  The
+  request only updates the in-memory index; ``latest.json`` is rewritten
+  by a background flush at most every ``FEATURE_STORE_FLUSH_SECONDS``
+  (and at exit, or on ``flush()``).
+
+Set ``FEATURE_STORE=0`` to bypass the store (training computes features
+directly; serving never reads or records rows).
+"""
+
+from __future__ import annotations
+
+import atexit
+import hashlib
+import json
+import logging
+import os
+import threading
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+import pandas as pd
+
+from backend.services import signal_features
+from backend.services.atomic_io import atomic_write, atomic_write_parquet
+
+log = logging.getLogger(__name__)
+
+_ROOT = Path(__file__).resolve().parent.parent.parent  # repo root
+STORE_DIR = Path(os.getenv("FEATURE_STORE_DIR", str(_ROOT / "data" / "feature_store")))
+ENABLED = os.getenv("FEATURE_STORE", "1") != "0"
+FLUSH_SECONDS = float(os.getenv("FEATURE_STORE_FLUSH_SECONDS", "1"))
+
+FEATURE_SETS = {
+    "direction": signal_features.DIRECTION_FEATURES,
+    "price": signal_features.PRICE_FEATURES,
+}
+
+KEYS = ["commodity", "date"]
+
+
+def version(feature_set: str) -> str:
+    payload = json.dumps([signal_features.REGISTRY_VERSION, FEATURE_SETS[feature_set]])
+    return hashlib.sha256(payload.encode()).hexdigest()[:12]
+
+
+def _set_dir(feature_set: str) -> Path:
+    return STORE_DIR / feature_set / version(feature_set)
+
+
+# ── Snapshots (training) ─────────────────────────────────────────────────
+
+
+def fingerprint(feature_set: str, base: pd.DataFrame) -> str:
+    """Content hash of the ``base`` columns a snapshot is computed from."""
+    names = FEATURE_SETS[feature_set]
+    used = signal_features.required_inputs(names, base.columns) | set(KEYS)
+    columns = [c for c in base.columns if c in used]
+    hashed = pd.util.hash_pandas_object(base[columns], index=False).to_numpy()
+    return hashlib.sha256(json.dumps(columns).encode() + hashed.tobytes()).hexdigest()
+
+
+def manifest(feature_set: str) -> dict | None:
+    try:
+        return json.loads((_set_dir(feature_set) / "manifest.json").read_text())
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def materialize(feature_set: str, base: pd.DataFrame) -> pd.DataFrame:
+    """Compute ``feature_set`` for every row of ``base`` (per commodity) and
+    store it as the set's snapshot; returns the snapshot frame."""
+    names = FEATURE_SETS[feature_set]
+    features = signal_features.compute_features(base, names, by="commodity")
+    snapshot = pd.concat([base[KEYS], features], axis=1)
+    snapshot = snapshot.sort_values(KEYS, kind="stable").reset_index(drop=True)
+
+    directory = _set_dir(feature_set)
+    files = {}
+    for commodity, rows in snapshot.groupby("commodity", sort=True):
+        files[commodity] = f"{commodity}.parquet"
+        atomic_write_parquet(directory / files[commodity], rows)
+    entry = {
+        "feature_set": feature_set,
+        "version": version(feature_set),
+        "features": names,
+        "fingerprint": fingerprint(feature_set, base),
+        "files": files,
+        "rows": len(snapshot),
+        "created": datetime.utcnow().isoformat(),
+    }
+    atomic_write(directory / "manifest.json", json.dumps(entry, indent=2).encode())
+    for stale in directory.glob("*.parquet"):
+        if stale.name not in files.values():
+            stale.unlink()
+
+    newest = snapshot.groupby("commodity", sort=False).tail(1)
+    _record_latest(
+        feature_set,
+        {r["commodity"]: _latest_row(r["date"], {n: r[n] for n in names}) for r in newest.to_dict("records")},
+        keep_newer=True,
+    )
+    flush(feature_set)
+    log.info("Materialised %s features v%s: %d rows", feature_set, entry["version"], len(snapshot))
+    return snapshot
+
+
+def read(
+    feature_set: str,
+    commodities: list[str] | None = None,
+    as_of: Any = None,
+) -> pd.DataFrame:
+    """The stored snapshot, optionally for some commodities and only rows
+    dated on or before ``as_of``."""
+    entry = manifest(feature_set)
+    if entry is None:
+        raise FileNotFoundError(f"No {feature_set!r} snapshot at {_set_dir(feature_set)}")
+    wanted = entry["files"] if commodities is None else {c: entry["files"][c] for c in commodities if c in entry["files"]}
+    filters = [("date", "<=", pd.Timestamp(as_of))] if as_of is not None else None
+    frames = [pd.read_parquet(_set_dir(feature_set) / name, filters=filters) for name in wanted.values()]
+    if not frames:
+        return pd.DataFrame(columns=KEYS + entry["features"])
+    return pd.concat(frames, ignore_index=True)
+
+
+def point_in_time(labels: pd.DataFrame, snapshot: pd.DataFrame) -> pd.DataFrame:
+    """``labels`` with the snapshot columns it lacks, each row taking the
+    newest snapshot row of its commodity dated on or before it."""
+    columns = [c for c in snapshot.columns if c not in labels.columns]
+    if not columns:
+        return labels
+    left = labels.reset_index(names="_row").sort_values("date", kind="stable")
+    right = snapshot[KEYS + columns].sort_values("date", kind="stable")
+    joined = pd.merge_asof(left, right, on="date", by="commodity", direction="backward")
+    joined = joined.sort_values("_row").set_index("_row")
+    joined.index.name = labels.index.name
+    return joined
+
+
+def load_features(feature_set: str, base: pd.DataFrame) -> pd.DataFrame:
+    """``base`` with ``feature_set`` joined from the store, materialising
+    the snapshot first if it is missing or was built from other inputs."""
+    if not ENABLED:
+        return signal_features.add_features(base, FEATURE_SETS[feature_set], by="commodity")
+    entry = manifest(feature_set)
+    commodities = sorted(base["commodity"].unique())
+    if entry is not None and entry["fingerprint"] == fingerprint(feature_set, base):
+        log.info("Feature store hit: %s v%s", feature_set, entry["version"])
+        snapshot = read(feature_set, commodities)
+    else:
+        snapshot = materialize(feature_set, base)
+    return point_in_time(base, snapshot)
+
+
+# ── Latest rows (serving) ────────────────────────────────────────────────
+
+
+@dataclass
+class LatestRow:
+    date: str | None
+    values: dict[str, float]
+    watermark: list[str | None] | None = None
+
+
+_latest: dict[str, dict[str, LatestRow]] = {}
+_latest_mtime: dict[str, float] = {}
+_latest_lock = threading.Lock()
+# Rows recorded in this process but not yet in latest.json, and the timer
+# that will write them.  _flush_lock keeps one writer per process.
+_pending: dict[str, dict[str, LatestRow]] = {}
+_flush_timers: dict[str, threading.Timer] = {}
+_flush_lock = threading.Lock()
+
+
+def watermark_key(watermark: tuple) -> list[str | None]:
+    """JSON form of ``feature_state.data_watermark`` output."""
+    return [w.isoformat() if w is not None else None for w in watermark]
+
+
+def _latest_index(feature_set: str) -> dict[str, LatestRow]:
+    # Caller holds _latest_lock.  One stat per lookup picks up rows other
+    # processes recorded.
+    path = _set_dir(feature_set) / "latest.json"
+    try:
+        mtime = path.stat().st_mtime
+    except FileNotFoundError:
+        return _latest.setdefault(feature_set, {})
+    if _latest_mtime.get(feature_set) != mtime:
+        try:
+            raw = json.loads(path.read_text())
+        except ValueError:
+            raw = {}
+        _latest[feature_set] = {c: LatestRow(**row) for c, row in raw.items()}
+        _latest[feature_set].update(_pending.get(feature_set, {}))
+        _latest_mtime[feature_set] = mtime
+    return _latest[feature_set]
+
+
+def latest(feature_set: str, commodity: str) -> LatestRow | None:
+    """The newest stored row for ``commodity``, or ``None``."""
+    if not ENABLED:
+        return None
+    with _latest_lock:
+        return _latest_index(feature_set).get(commodity.upper())
+
+
+def put_latest(
+    feature_set: str,
+    commodity: str,
+    date: Any,
+    values: dict[str, Any],
+    watermark: list[str | None] | None = None,
+) -> LatestRow:
+    """Record ``values`` as the newest row for ``commodity``; returns it."""
+    row = _latest_row(date, values, watermark)
+    if ENABLED:
+        _record_latest(feature_set, {commodity.upper(): row})
+        _schedule_flush(feature_set)
+    return row
+
+
+def _latest_row(date: Any, values: dict[str, Any], watermark: list[str | None] | None = None) -> LatestRow:
+    return LatestRow(
+        date=pd.Timestamp(date).date().isoformat() if date is not None else None,
+        values={k: float(v) for k, v in values.items()},
+        watermark=watermark,
+    )
+
+
+def _record_latest(feature_set: str, rows: dict[str, LatestRow], keep_newer: bool = False) -> None:
+    """Merge ``rows`` into the in-memory index and queue them for
+    ``latest.json``.  With ``keep_newer`` a row dated after the incoming one
+    (e.g. recorded live) is kept."""
+    with _latest_lock:
+        index = _latest_index(feature_set)
+        pending = _pending.setdefault(feature_set, {})
+        for commodity, row in rows.items():
+            current = index.get(commodity)
+            if keep_newer and current is not None and (current.date or "") > (row.date or ""):
+                continue
+            index[commodity] = pending[commodity] = row
+
+
+def _schedule_flush(feature_set: str) -> None:
+    with _latest_lock:
+        if feature_set in _flush_timers:
+            return
+        timer = threading.Timer(FLUSH_SECONDS, flush, args=(feature_set,))
+        timer.daemon = True
+        _flush_timers[feature_set] = timer
+    timer.start()
+
+
+def flush(feature_set: str | None = None) -> None:
+    """Write rows recorded since the last flush to ``latest.json``, for one
+    feature set or all of them."""
+    for name in [feature_set] if feature_set else list(FEATURE_SETS):
+        with _flush_lock:
+            with _latest_lock:
+                timer = _flush_timers.pop(name, None)
+                if timer is not None:
+                    timer.cancel()
+                if not _pending.get(name):
+                    continue
+                # re-read first so rows other processes recorded are kept
+                index = _latest_index(name)
+                written = _pending.pop(name)
+                data = json.dumps({c: asdict(r) for c, r in index.items()}, indent=2).encode()
+            path = _set_dir(name) / "latest.json"
+            try:
+                atomic_write(path, data)
+            except OSError:
+                log.warning("Could not write %s; keeping its rows queued", path, exc_info=True)
+                with _latest_lock:
+                    for commodity, row in written.items():
+                        _pending.setdefault(name, {}).setdefault(commodity, row)
+                continue
+            with _latest_lock:
+                _latest_mtime[name] = path.stat().st_mtime
+
+
+atexit.register(flush)
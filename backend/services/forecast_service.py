@@ -0,0 +1,238 @@
+"""Forecast service — live next-session price forecasts from the Price
+Forecast Engine (train_price_model.py).
+
+The deployed regressor comes from the model registry together with the
+feature list, target mode and optional scaler it was trained with.  Live DB
+data is shaped like the daily training table — one row per trading day
+holding the day's last close, with headline count and mean sentiment
+forward-filled over days without news — and the model's columns are
+computed through the shared ``signal_features`` registry, every commodity
+in one grouped pass.
+
+The newest feature row per commodity is kept in the feature store under
+the data watermark it was computed at.  Until a new price or headline
+arrives, a forecast for every commodity costs two grouped watermark
+queries, a dict lookup per commodity and one ``predict`` call.
+"""
+
+from __future__ import annotations
+
+import logging
+from datetime import datetime, timedelta
+from typing import Any
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from backend.db import run_compute, run_db
+from backend.models import Headline, PricePoint
+from backend.services import feature_store, model_registry, signal_features
+
+log = logging.getLogger(__name__)
+
+# Two years of daily bars (~500 trading days).  The EWM columns (EMA12/26,
+# MACD signal, Wilder RSI) start from the window's first close; after ~500
+# steps that seed's weight (0.93**500 ~ 1e-16) is below float precision, so
+# they equal the full-history training table.  A row is complete once the
+# 20-day volatility has its 21 days.
+WINDOW_DAYS = 730
+SENTIMENT = ["article_count", "avg_tone"]
+HORIZONS = {"future_price_3": 3}
+
+
+def reconstruct_price(raw_preds: np.ndarray, current_prices: np.ndarray, target_mode: str) -> np.ndarray:
+    """Model output as $/bbl, as ``train_price_model.reconstruct_price``."""
+    if target_mode == "price_change":
+        return current_prices + raw_preds
+    if target_mode == "next_day_return":
+        return current_prices * (1.0 + raw_preds)
+    return raw_preds
+
+
+# ── Live features ────────────────────────────────────────────────────────
+
+
+def _watermarks(db: Session, commodities: list[str]) -> dict[str, tuple]:
+    """``feature_state.data_watermark`` for several commodities, two queries."""
+    prices = dict(
+        db.query(PricePoint.commodity, func.max(PricePoint.timestamp))
+        .filter(PricePoint.commodity.in_(commodities))
+        .group_by(PricePoint.commodity)
+        .all()
+    )
+    headlines = dict(
+        db.query(Headline.commodity, func.max(Headline.published_at))
+        .filter(Headline.commodity.in_(commodities))
+        .group_by(Headline.commodity)
+        .all()
+    )
+    return {c: (prices.get(c), headlines.get(c)) for c in commodities}
+
+
+def _read_daily(db: Session, commodities: list[str]) -> tuple[list, list]:
+    """The serving window's price rows and per-day headline aggregates —
+    the DB half of ``_daily_frame``."""
+    cutoff = datetime.utcnow() - timedelta(days=WINDOW_DAYS)
+    prices = (
+        db.query(PricePoint.commodity, PricePoint.timestamp, PricePoint.close)
+        .filter(PricePoint.commodity.in_(commodities), PricePoint.timestamp >= cutoff)
+        .order_by(PricePoint.timestamp.asc())
+        .all()
+    )
+    day = func.date(Headline.published_at)
+    news = (
+        db.query(Headline.commodity, day, func.count(), func.avg(Headline.sentiment_score))
+        .filter(Headline.commodity.in_(commodities), Headline.published_at >= cutoff)
+        .group_by(Headline.commodity, day)
+        .all()
+    )
+    return prices, news
+
+
+def _daily_frame(prices: list, news: list) -> pd.DataFrame:
+    """One row per commodity and trading day over the serving window,
+    sorted by commodity and date, from the rows ``_read_daily`` returned."""
+    prices = pd.DataFrame(prices, columns=["commodity", "timestamp", "price"])
+    prices["date"] = pd.to_datetime(prices["timestamp"]).dt.normalize()
+    # the day's last close, as the training table's daily bars
+    daily = prices.groupby(["commodity", "date"], sort=True)["price"].last().reset_index()
+
+    news = pd.DataFrame(news, columns=["commodity", "date", *SENTIMENT])
+    news["date"] = pd.to_datetime(news["date"])
+
+    df = daily.merge(news, on=["commodity", "date"], how="left")
+    # Non-news days carry the most recent signal; before the first headline
+    # in the window sentiment is neutral.
+    df[SENTIMENT] = df.groupby("commodity")[SENTIMENT].ffill().fillna(0.0)
+    return df
+
+
+def _stored_rows(
+    db: Session,
+    commodities: list[str],
+    columns: list[str],
+) -> tuple[dict[str, feature_store.LatestRow], dict[str, list[str | None]]]:
+    """The feature store's rows still valid at each commodity's watermark,
+    and every commodity's watermark."""
+    marks = {c: feature_store.watermark_key(w) for c, w in _watermarks(db, commodities).items()}
+    rows = {}
+    for commodity in commodities:
+        stored = feature_store.latest("price", commodity)
+        if stored is not None and stored.watermark == marks[commodity] and all(n in stored.values for n in columns):
+            rows[commodity] = stored
+    return rows, marks
+
+
+def _computed_rows(
+    inputs: tuple[list, list],
+    columns: list[str],
+    marks: dict[str, list[str | None]],
+) -> dict[str, feature_store.LatestRow]:
+    """The newest complete feature row of each commodity in ``inputs`` that
+    has one, recorded in the feature store."""
+    rows = {}
+    base = _daily_frame(*inputs)
+    try:
+        features = signal_features.compute_features(base, columns, by="commodity")
+    except KeyError as exc:
+        raise ValueError(f"Missing features for model input: {exc}") from exc
+    complete = pd.concat([base[["commodity", "date"]], features], axis=1).dropna(subset=columns)
+    for record in complete.groupby("commodity", sort=False).tail(1).to_dict("records"):
+        commodity = record["commodity"]
+        values = {n: record[n] for n in columns}
+        rows[commodity] = feature_store.put_latest("price", commodity, record["date"], values, marks[commodity])
+    return rows
+
+
+# ── Forecasts ────────────────────────────────────────────────────────────
+
+
+def _prepare_forecast(db: Session, commodities: list[str], strict: bool = False) -> dict[str, Any]:
+    """Pin the model version, look up the stored feature rows and read what
+    the missing ones are built from (all DB work)."""
+    loaded = model_registry.get("price")
+    columns = list(dict.fromkeys([*loaded.feature_names, "price"]))
+    rows, marks = _stored_rows(db, commodities, columns)
+    missing = [c for c in commodities if c not in rows]
+    return {
+        "loaded": loaded,
+        "columns": columns,
+        "commodities": commodities,
+        "strict": strict,
+        "rows": rows,
+        "marks": marks,
+        "inputs": _read_daily(db, missing) if missing else None,
+    }
+
+
+def _finish_forecast(prepared: dict[str, Any]) -> dict[str, dict[str, Any]]:
+    """Build the missing feature rows, then one ``predict`` call for every
+    commodity, mapped back to $/bbl."""
+    loaded: model_registry.LoadedModel = prepared["loaded"]
+    commodities, rows = prepared["commodities"], dict(prepared["rows"])
+    if prepared["inputs"] is not None:
+        rows.update(_computed_rows(prepared["inputs"], prepared["columns"], prepared["marks"]))
+    skipped = [c for c in commodities if c not in rows]
+    if skipped:
+        if prepared["strict"]:
+            raise ValueError(
+                f"Not enough price history for {', '.join(skipped)} to build the "
+                f"forecast features — need 21 trading days in the last {WINDOW_DAYS} "
+                "days.  Run /seed first."
+            )
+        log.warning("Skipping %s in forecast: not enough price history", ", ".join(skipped))
+    order = [c for c in commodities if c in rows]
+    if not order:
+        return {}
+
+    X = np.array([[rows[c].values[n] for n in loaded.feature_names] for c in order], dtype=np.float64)
+    if loaded.scaler is not None:
+        X = loaded.scaler.transform(X)
+    current = np.array([rows[c].values["price"] for c in order])
+    target = loaded.meta.get("target", "next_price")
+    forecast = reconstruct_price(loaded.predictor.predict(X), current, target)
+
+    now = datetime.utcnow().isoformat()
+    return {
+        commodity: {
+            "commodity": commodity,
+            "as_of": rows[commodity].date,
+            "current_price": round(float(price), 4),
+            "forecast_price": round(float(predicted), 4),
+            "change": round(float(predicted - price), 4),
+            "change_pct": round(float(predicted / price - 1) * 100, 4),
+            "horizon_sessions": HORIZONS.get(target, 1),
+            "target": target,
+            "model_type": type(loaded.model).__name__,
+            "model_version": loaded.version,
+            "timestamp": now,
+        }
+        for commodity, price, predicted in zip(order, current, forecast)
+    }
+
+
+def forecast_prices(
+    db: Session,
+    commodities: list[str],
+    strict: bool = False,
+) -> dict[str, dict[str, Any]]:
+    """Next-session price forecasts for ``commodities``.
+
+    Commodities without enough price history are logged and left out,
+    or raise ``ValueError`` with ``strict``; a missing model raises
+    ``FileNotFoundError``.
+    """
+    return _finish_forecast(_prepare_forecast(db, [c.upper() for c in commodities], strict))
+
+
+async def forecast_prices_async(
+    db,
+    commodities: list[str],
+    strict: bool = False,
+) -> dict[str, dict[str, Any]]:
+    """Async ``forecast_prices`` for a sync or async session; building
+    feature rows and the model call run on the compute executor."""
+    prepared = await run_db(db, _prepare_forecast, [c.upper() for c in commodities], strict)
+    return await run_compute(_finish_forecast, prepared)
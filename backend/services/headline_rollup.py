@@ -0,0 +1,207 @@
+"""Daily headline rollup (``daily_headline_stats``) for /prediction-history.
+
+Grouping the whole ``headlines`` table by ``date(published_at)`` on every
+request costs time proportional to the stored history.  Instead one row per
+(commodity, day) holds the running count, sentiment and confidence sums and
+the UP/DOWN/NEUTRAL tallies, so the endpoint reads at most ``limit`` rows.
+
+The rollup is maintained inside the writing transaction: an ``after_flush``
+hook turns every inserted, deleted or edited ``Headline`` into per-day
+deltas and applies them with one ``INSERT … ON CONFLICT DO UPDATE``, so a
+rollback discards them together with the headlines.  Bulk ``query.delete()``
+and rows written outside the ORM bypass the hook; use
+``rebuild_daily_headline_stats`` (``scripts/rebuild_headline_stats.py``)
+after those.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import String, case, delete, event, func, inspect, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from backend.models import DailyHeadlineStats, Headline
+
+_TRACKED = ("commodity", "published_at", "sentiment_score", "pred_label", "pred_confidence")
+_LABEL_COLUMNS = {"UP": "up_count", "DOWN": "down_count", "NEUTRAL": "neutral_count"}
+_SUM_COLUMNS = (
+    "headline_count",
+    "sentiment_sum",
+    "confidence_sum",
+    "up_count",
+    "down_count",
+    "neutral_count",
+)
+
+
+def _day(published_at: datetime) -> str:
+    return published_at.date().isoformat()
+
+
+def _add(deltas: dict, values: dict, sign: int) -> None:
+    """Fold one headline (given as column values) into ``deltas``."""
+    row = deltas[(values["commodity"], _day(values["published_at"]))]
+    row["headline_count"] += sign
+    row["sentiment_sum"] += sign * (values["sentiment_score"] or 0.0)
+    row["confidence_sum"] += sign * (values["pred_confidence"] or 0.0)
+    label_column = _LABEL_COLUMNS.get(values["pred_label"])
+    if label_column:
+        row[label_column] += sign
+
+
+def _old_values(obj: Headline) -> dict | None:
+    """Column values before this flush, or None if nothing tracked changed."""
+    state = inspect(obj)
+    old = {}
+    changed = False
+    for name in _TRACKED:
+        history = state.attrs[name].history
+        if history.deleted:
+            old[name] = history.deleted[0]
+            changed = True
+        else:
+            old[name] = getattr(obj, name)
+    return old if changed else None
+
+
+def apply_deltas(connection, deltas: dict) -> None:
+    """Upsert per-day ``deltas`` into ``daily_headline_stats``."""
+    rows = [
+        {"commodity": commodity, "date": day, **values}
+        for (commodity, day), values in deltas.items()
+        if any(values.values())
+    ]
+    if not rows:
+        return
+
+    table = DailyHeadlineStats.__table__
+    stmt = sqlite_insert(table)
+    updates = {name: table.c[name] + stmt.excluded[name] for name in _SUM_COLUMNS}
+    updates["avg_sentiment"] = case(
+        (updates["headline_count"] > 0, updates["sentiment_sum"] / updates["headline_count"]),
+        else_=0.0,
+    )
+    for row in rows:
+        row["avg_sentiment"] = row["sentiment_sum"] / row["headline_count"] if row["headline_count"] > 0 else 0.0
+    connection.execute(
+        stmt.on_conflict_do_update(index_elements=["commodity", "date"], set_=updates),
+        rows,
+    )
+    connection.execute(delete(table).where(table.c.headline_count <= 0))
+
+
+_ROLLUP_COLUMNS = [
+    "commodity",
+    "date",
+    "headline_count",
+    "sentiment_sum",
+    "avg_sentiment",
+    "confidence_sum",
+    *_LABEL_COLUMNS.values(),
+]
+
+
+def aggregate_from_headlines(commodity: str | None = None):
+    """SELECT producing rollup rows (in ``_ROLLUP_COLUMNS`` order) from ``headlines``."""
+    day = func.date(Headline.published_at, type_=String)
+    count = func.count(Headline.id)
+    sentiment_sum = func.coalesce(func.sum(Headline.sentiment_score), 0.0)
+    aggregate = select(
+        Headline.commodity,
+        day,
+        count,
+        sentiment_sum,
+        sentiment_sum / count,
+        func.coalesce(func.sum(Headline.pred_confidence), 0.0),
+        *(func.sum(case((Headline.pred_label == label, 1), else_=0)) for label in _LABEL_COLUMNS),
+    ).group_by(Headline.commodity, day)
+    if commodity is not None:
+        aggregate = aggregate.where(Headline.commodity == commodity)
+    return aggregate
+
+
+def rebuild_daily_headline_stats(connection, commodity: str | None = None) -> int:
+    """Recompute the rollup from ``headlines``; returns the number of days written.
+
+    ``connection`` may be a ``Session`` or a Core ``Connection``.
+    """
+    table = DailyHeadlineStats.__table__
+    clear = delete(table)
+    if commodity is not None:
+        clear = clear.where(table.c.commodity == commodity)
+
+    connection.execute(clear)
+    result = connection.execute(
+        table.insert().from_select(_ROLLUP_COLUMNS, aggregate_from_headlines(commodity))
+    )
+    return result.rowcount
+
+
+def find_drift(connection, commodity: str | None = None, tolerance: float = 1e-6) -> list[str]:
+    """Compare the stored rollup with a fresh aggregate; return mismatching keys."""
+    table = DailyHeadlineStats.__table__
+    stored_query = select(*(table.c[name] for name in _ROLLUP_COLUMNS))
+    if commodity is not None:
+        stored_query = stored_query.where(table.c.commodity == commodity)
+
+    stored = {(row[0], row[1]): row[2:] for row in connection.execute(stored_query)}
+    fresh = {(row[0], row[1]): row[2:] for row in connection.execute(aggregate_from_headlines(commodity))}
+
+    drift = []
+    for key in sorted(stored.keys() | fresh.keys()):
+        a, b = stored.get(key), fresh.get(key)
+        if a is None or b is None or any(abs(x - y) > tolerance for x, y in zip(a, b)):
+            drift.append(f"{key[0]} {key[1]}: stored={a} expected={b}")
+    return drift
+
+
+def get_prediction_history(db: Session, commodity: str, limit: int = 30) -> list[dict]:
+    """Daily prediction history for ``commodity``, oldest first, from the rollup."""
+    rows = (
+        db.query(DailyHeadlineStats)
+        .filter(DailyHeadlineStats.commodity == commodity)
+        .order_by(DailyHeadlineStats.date.desc())
+        .limit(limit)
+        .all()
+    )
+
+    result = []
+    for row in reversed(rows):
+        dominant = "UP" if row.up_count >= row.down_count else "DOWN"
+        result.append({
+            "date": row.date,
+            "dominant_prediction": dominant,
+            "avg_confidence": round(row.confidence_sum / row.headline_count, 3),
+            "avg_sentiment": round(row.avg_sentiment, 3),
+            "headline_count": row.headline_count,
+            "up_count": row.up_count,
+            "down_count": row.down_count,
+        })
+
+    return result
+
+
+# ── Session hook ─────────────────────────────────────────────────────────
+
+@event.listens_for(Session, "after_flush")
+def _maintain_rollup(session: Session, flush_context) -> None:
+    deltas: dict = defaultdict(lambda: dict.fromkeys(_SUM_COLUMNS, 0))
+    for obj in session.new:
+        if isinstance(obj, Headline):
+            _add(deltas, {name: getattr(obj, name) for name in _TRACKED}, +1)
+    for obj in session.deleted:
+        if isinstance(obj, Headline):
+            old = _old_values(obj) or {name: getattr(obj, name) for name in _TRACKED}
+            _add(deltas, old, -1)
+    for obj in session.dirty:
+        if isinstance(obj, Headline) and obj not in session.deleted:
+            old = _old_values(obj)
+            if old is not None:
+                _add(deltas, old, -1)
+                _add(deltas, {name: getattr(obj, name) for name in _TRACKED}, +1)
+
+    if deltas:
+        apply_deltas(session.connection(), deltas)
@@ -0,0 +1,172 @@
+"""On-disk response cache for the upstream data pulls (FRED, EIA, NewsAPI).
+
+Responses are stored content-addressed: the gzip-compressed body lives in
+``blobs/<sha256 of body>.gz`` and a small JSON entry per request (keyed by
+source, URL and non-secret query parameters) records the content hash,
+``ETag`` / ``Last-Modified`` validators and when it was last confirmed.
+
+Each source has its own freshness window (``HTTP_CACHE_TTL_<SOURCE>``
+seconds, defaults in ``DEFAULT_TTLS``):
+
+* within the window the cached body is returned with no network traffic;
+* after it, a conditional GET (``If-None-Match`` / ``If-Modified-Since``)
+  is sent and a ``304`` re-confirms the cached body;
+* if the upstream is down (including an open circuit breaker in
+  ``http_fetch``), a stale cached body is served rather than nothing.
+
+``cached_frame`` memoises the parsed form of a body as Parquet under
+``parsed/``, so a warm cache skips both the download and the CSV/JSON parse.
+Set ``HTTP_CACHE=0`` to bypass the cache entirely.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable
+
+import pandas as pd
+
+from backend.services import http_fetch
+from backend.services.atomic_io import atomic_write, atomic_write_parquet
+
+log = logging.getLogger(__name__)
+
+_ROOT = Path(__file__).resolve().parent.parent.parent  # repo root
+CACHE_DIR = Path(os.getenv("HTTP_CACHE_DIR", str(_ROOT / "data" / "cache" / "http")))
+ENABLED = os.getenv("HTTP_CACHE", "1") != "0"
+
+# Seconds a cached response is served without revalidation.
+DEFAULT_TTLS = {
+    "fred": 12 * 3600,  # daily series, published once a day
+    "eia": 12 * 3600,
+    "newsapi": 15 * 60,
+}
+
+# Query parameters that carry credentials never become part of a cache key.
+_SECRET_PARAMS = {"api_key", "apikey", "apiKey", "key", "token"}
+
+
+@dataclass
+class CachedResponse:
+    content: bytes
+    content_hash: str
+    from_cache: bool
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8")
+
+    def json(self) -> Any:
+        return json.loads(self.content)
+
+
+def ttl_for(source: str) -> float:
+    override = os.getenv(f"HTTP_CACHE_TTL_{source.upper()}")
+    return float(override) if override is not None else DEFAULT_TTLS.get(source, 0)
+
+
+def _cache_key(source: str, url: str, params: dict | None) -> str:
+    public = sorted((k, str(v)) for k, v in (params or {}).items() if k not in _SECRET_PARAMS)
+    return hashlib.sha256(json.dumps([source, url, public]).encode()).hexdigest()
+
+
+def _entry_path(key: str) -> Path:
+    return CACHE_DIR / "entries" / f"{key}.json"
+
+
+def _blob_path(content_hash: str) -> Path:
+    return CACHE_DIR / "blobs" / content_hash[:2] / f"{content_hash}.gz"
+
+
+def _load_entry(key: str) -> dict | None:
+    try:
+        entry = json.loads(_entry_path(key).read_text())
+    except (FileNotFoundError, ValueError):
+        return None
+    return entry if _blob_path(entry["content_hash"]).exists() else None
+
+
+def _read_blob(entry: dict) -> CachedResponse:
+    content = gzip.decompress(_blob_path(entry["content_hash"]).read_bytes())
+    return CachedResponse(content, entry["content_hash"], from_cache=True)
+
+
+def fetch(
+    source: str,
+    url: str,
+    *,
+    params: dict | None = None,
+    headers: dict | None = None,
+    timeout: float | None = None,
+) -> CachedResponse:
+    """GET through the cache; network access goes via ``http_fetch.fetch``."""
+    if not ENABLED:
+        response = http_fetch.fetch(source, url, params=params, headers=headers, timeout=timeout)
+        return CachedResponse(response.content, hashlib.sha256(response.content).hexdigest(), False)
+
+    key = _cache_key(source, url, params)
+    entry = _load_entry(key)
+    if entry is not None and time.time() - entry["checked_at"] < ttl_for(source):
+        return _read_blob(entry)
+
+    conditional = dict(headers or {})
+    if entry is not None:
+        if entry.get("etag"):
+            conditional["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            conditional["If-Modified-Since"] = entry["last_modified"]
+
+    try:
+        response = http_fetch.fetch(source, url, params=params, headers=conditional, timeout=timeout)
+    except http_fetch.requests.RequestException as exc:
+        if entry is None:
+            raise
+        log.warning("%s unavailable (%s); serving cached copy from %s", source, exc,
+                    time.strftime("%Y-%m-%d %H:%M", time.localtime(entry["checked_at"])))
+        return _read_blob(entry)
+
+    if response.status_code == 304 and entry is not None:
+        entry["checked_at"] = time.time()
+        atomic_write(_entry_path(key), json.dumps(entry).encode())
+        return _read_blob(entry)
+
+    content = response.content
+    content_hash = hashlib.sha256(content).hexdigest()
+    blob = _blob_path(content_hash)
+    if not blob.exists():
+        atomic_write(blob, gzip.compress(content))
+    entry = {
+        "source": source,
+        "url": url,
+        "content_hash": content_hash,
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "checked_at": time.time(),
+    }
+    atomic_write(_entry_path(key), json.dumps(entry).encode())
+    return CachedResponse(content, content_hash, from_cache=False)
+
+
+def cached_frame(
+    response: CachedResponse,
+    parser: str,
+    parse: Callable[[bytes], pd.DataFrame],
+) -> pd.DataFrame:
+    """Parse ``response`` with ``parse``, memoised as Parquet per body and parser name."""
+    if not ENABLED:
+        return parse(response.content)
+
+    path = CACHE_DIR / "parsed" / f"{response.content_hash}-{parser}.parquet"
+    if path.exists():
+        return pd.read_parquet(path)
+
+    df = parse(response.content)
+    atomic_write_parquet(path, df)
+    return df
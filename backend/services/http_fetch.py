@@ -0,0 +1,171 @@
+"""Shared HTTP client for the upstream data sources (NewsAPI, FRED, EIA).
+
+Every fetch goes through one pooled ``requests.Session`` and gets:
+
+* a per-host concurrency limit (``FETCH_MAX_PER_HOST``), so fanning out
+  all seed requests at once never opens more than a few sockets per host;
+* retries with exponential backoff and jitter on connection errors,
+  timeouts, 429 and 5xx (``FETCH_RETRIES``, ``FETCH_BACKOFF`` seconds);
+* a circuit breaker per source: after ``BREAKER_FAILURES`` consecutive
+  failed fetches the source is skipped for ``BREAKER_RESET_SECONDS`` and
+  calls raise ``CircuitOpenError`` at once, so callers fall straight back
+  to synthetic data instead of waiting out another timeout.
+
+``CircuitOpenError`` subclasses ``requests.RequestException`` so existing
+``except requests.RequestException`` fallbacks handle it unchanged.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+log = logging.getLogger(__name__)
+
+FETCH_TIMEOUT = float(os.getenv("FETCH_TIMEOUT", "10"))
+FETCH_RETRIES = int(os.getenv("FETCH_RETRIES", "2"))
+FETCH_BACKOFF = float(os.getenv("FETCH_BACKOFF", "0.5"))
+FETCH_MAX_PER_HOST = int(os.getenv("FETCH_MAX_PER_HOST", "4"))
+BREAKER_FAILURES = int(os.getenv("BREAKER_FAILURES", "3"))
+BREAKER_RESET_SECONDS = float(os.getenv("BREAKER_RESET_SECONDS", "60"))
+
+_RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(requests.RequestException):
+    """Raised instead of calling a source whose circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker with a single half-open probe."""
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self.opened_at is None:
+                return "closed"
+            if time.monotonic() - self.opened_at >= self.reset_timeout:
+                return "half-open"
+            return "open"
+
+    def before_call(self) -> None:
+        """Raise ``CircuitOpenError`` unless a call may go through now."""
+        with self._lock:
+            if self.opened_at is None:
+                return
+            if time.monotonic() - self.opened_at >= self.reset_timeout and not self._probing:
+                self._probing = True  # let exactly one caller test the upstream
+                return
+        raise CircuitOpenError(f"{self.name} circuit is open — skipping upstream call")
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self._probing or self.failures >= self.failure_threshold:
+                log.warning("Opening %s circuit after %d failure(s)", self.name, self.failures)
+                self.opened_at = time.monotonic()
+            self._probing = False
+
+
+_session: requests.Session | None = None
+_session_lock = threading.Lock()
+_host_limits: dict[str, threading.BoundedSemaphore] = {}
+_breakers: dict[str, CircuitBreaker] = {}
+_registry_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """The process-wide pooled session (created on first use)."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=8, pool_maxsize=max(FETCH_MAX_PER_HOST, 4))
+            _session.mount("http://", adapter)
+            _session.mount("https://", adapter)
+        return _session
+
+
+def breaker(source: str) -> CircuitBreaker:
+    with _registry_lock:
+        if source not in _breakers:
+            _breakers[source] = CircuitBreaker(source, BREAKER_FAILURES, BREAKER_RESET_SECONDS)
+        return _breakers[source]
+
+
+def _host_limit(url: str) -> threading.BoundedSemaphore:
+    host = urlsplit(url).netloc
+    with _registry_lock:
+        if host not in _host_limits:
+            _host_limits[host] = threading.BoundedSemaphore(FETCH_MAX_PER_HOST)
+        return _host_limits[host]
+
+
+def reset() -> None:
+    """Forget breaker state and drop the pooled session (tests, reseeding)."""
+    global _session
+    with _registry_lock:
+        _breakers.clear()
+        _host_limits.clear()
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+
+
+def _retryable(exc: requests.RequestException) -> bool:
+    if isinstance(exc, (requests.ConnectionError, requests.Timeout)):
+        return True
+    response = getattr(exc, "response", None)
+    return response is not None and response.status_code in _RETRY_STATUS
+
+
+def fetch(source: str, url: str, *, timeout: float | None = None, **kwargs) -> requests.Response:
+    """GET ``url`` on behalf of ``source`` with pooling, retry and the breaker.
+
+    Returns the successful response; raises the last ``RequestException``
+    (or ``CircuitOpenError``) otherwise.
+    """
+    cb = breaker(source)
+    cb.before_call()
+
+    limit = _host_limit(url)
+    attempt = 0
+    while True:
+        try:
+            with limit:
+                response = get_session().get(url, timeout=timeout or FETCH_TIMEOUT, **kwargs)
+            response.raise_for_status()
+        except requests.RequestException as exc:
+            if attempt < FETCH_RETRIES and _retryable(exc):
+                delay = FETCH_BACKOFF * (2 ** attempt) * (0.5 + random.random())
+                log.info("%s fetch failed (%s); retry %d in %.2fs", source, exc, attempt + 1, delay)
+                time.sleep(delay)
+                attempt += 1
+                continue
+            cb.record_failure()
+            raise
+        cb.record_success()
+        return response
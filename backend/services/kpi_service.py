@@ -0,0 +1,153 @@
+import logging
+from datetime import datetime, timedelta
+
+from sqlalchemy import case, func, literal, null, select, union_all
+from sqlalchemy.orm import Session
+
+from backend.db import run_db
+from backend.models import Headline
+from backend.services.prediction_service import predict_market_directions, predict_market_directions_async
+
+logger = logging.getLogger(__name__)
+
+HIGH_IMPACT_THRESHOLD = 70
+FALLBACK_HEADLINES = 50
+
+
+def _headline_stats(db: Session, commodities: list[str], since: datetime) -> dict[str, dict]:
+    """Aggregate the KPI headline stats for every commodity in one query.
+
+    Each commodity contributes three UNION ALL arms, every one a bounded
+    search of the (commodity, published_at) index: the 24h window, the
+    "latest 50" fallback used when a commodity has no headlines in the last
+    24h, and the newest headline's stored prediction.  Nothing older than
+    the window or the fallback is read.
+    """
+    high_impact = case((Headline.impact_score >= HIGH_IMPACT_THRESHOLD, 1), else_=0)
+    arms = []
+    for commodity in commodities:
+        newest_first = (
+            select(Headline.sentiment_score, Headline.impact_score, Headline.pred_label, Headline.pred_confidence)
+            .where(Headline.commodity == commodity)
+            .order_by(Headline.published_at.desc())
+        )
+        fallback = newest_first.limit(FALLBACK_HEADLINES).subquery()
+        latest = newest_first.limit(1).subquery()
+        arms += [
+            select(
+                literal(commodity).label("commodity"),
+                literal("recent").label("arm"),
+                func.count().label("n"),
+                func.avg(Headline.sentiment_score).label("avg"),
+                func.coalesce(func.sum(high_impact), 0).label("high"),
+                null().label("label"),
+                null().label("confidence"),
+            ).where(Headline.commodity == commodity, Headline.published_at >= since),
+            select(
+                literal(commodity),
+                literal("fallback"),
+                func.count(),
+                func.avg(fallback.c.sentiment_score),
+                func.coalesce(
+                    func.sum(case((fallback.c.impact_score >= HIGH_IMPACT_THRESHOLD, 1), else_=0)), 0
+                ),
+                null(),
+                null(),
+            ),
+            select(
+                literal(commodity), literal("latest"), literal(1), null(), null(),
+                latest.c.pred_label, latest.c.pred_confidence,
+            ),
+        ]
+    if not arms:
+        return {}
+
+    arm_rows: dict[str, dict] = {}
+    for row in db.execute(union_all(*arms)):
+        arm_rows.setdefault(row.commodity, {})[row.arm] = row
+
+    stats = {}
+    for commodity, by_arm in arm_rows.items():
+        recent, fallback_row = by_arm["recent"], by_arm["fallback"]
+        if not fallback_row.n:
+            continue  # no headlines at all
+        # If no headlines in the last 24h, fall back to the most recent
+        # headlines so the dashboard KPI cards always show meaningful data.
+        row = recent if recent.n else fallback_row
+        count, avg, high = row.n, row.avg, row.high
+        latest_row = by_arm.get("latest")
+
+        stats[commodity] = {
+            "count": int(count or 0),
+            "avg_sentiment": round(float(avg), 3) if count else 0,
+            "high_impact": int(high or 0),
+            "latest_label": latest_row.label if latest_row else None,
+            "latest_confidence": latest_row.confidence if latest_row else None,
+        }
+
+    return stats
+
+
+def compute_kpis(
+    db: Session,
+    commodities: list[str],
+    predictions: dict[str, dict] | None = None,
+) -> dict[str, dict]:
+    """Return the KPI card payload for each commodity.
+
+    Headline stats come from one grouped SQL query and all model
+    inferences share a single ``predict_proba`` pass, so the cost of a
+    batch is roughly that of one commodity.  Pass ``predictions`` to reuse
+    model output computed elsewhere.
+    """
+    since = datetime.utcnow() - timedelta(hours=24)
+    stats = _headline_stats(db, commodities, since)
+
+    # Call the trained AI model for real predictions
+    if predictions is None:
+        try:
+            predictions = predict_market_directions(db, commodities)
+        except Exception:
+            logger.warning("AI model prediction failed for KPIs — using headline-based fallback", exc_info=True)
+            predictions = {}
+    return _kpi_payload(commodities, stats, predictions)
+
+
+def _kpi_payload(
+    commodities: list[str],
+    stats: dict[str, dict],
+    predictions: dict[str, dict],
+) -> dict[str, dict]:
+    """Merge the headline stats and model output into the KPI cards."""
+    kpis = {}
+    for commodity in commodities:
+        s = stats.get(commodity, {})
+        pred = predictions.get(commodity, {})
+        model_pred = pred.get("prediction")
+        model_conf = pred.get("confidence")
+
+        kpis[commodity] = {
+            "avg_sentiment_24h": s.get("avg_sentiment", 0),
+            "high_impact_count_24h": s.get("high_impact", 0),
+            "last_prediction": model_pred or s.get("latest_label"),
+            "last_confidence": model_conf or s.get("latest_confidence"),
+            "total_headlines_24h": s.get("count", 0),
+            "model_prediction": model_pred,
+            "model_confidence": model_conf,
+            "model_probability_up": pred.get("probability_up"),
+        }
+
+    return kpis
+
+
+async def compute_kpis_async(db, commodities: list[str]) -> dict[str, dict]:
+    """``compute_kpis`` for async routes: only the queries go through
+    ``run_db``; feature building and inference run on the compute executor."""
+    try:
+        predictions = await predict_market_directions_async(db, commodities)
+    except Exception:
+        logger.warning("AI model prediction failed for KPIs — using headline-based fallback", exc_info=True)
+        predictions = {}
+    since = datetime.utcnow() - timedelta(hours=24)
+    stats = await run_db(db, _headline_stats, commodities, since)
+    return _kpi_payload(commodities, stats, predictions)
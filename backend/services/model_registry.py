@@ -0,0 +1,371 @@
+"""Model registry — versioned model artifacts for serving, loaded lazily and
+swapped in place when a new version is published.
+
+Layout (``MODEL_REGISTRY_DIR``, default ``models/registry``)::
+
+    models/registry/
+        direction/
+            20261018T104900Z-3f2a9c1b/
+                model.joblib     the estimator, uncompressed so it can be mmapped
+                scaler.joblib    optional
+                meta.json        feature names plus whatever the trainer records
+            CURRENT              name of the live version, replaced atomically
+        price/
+            ...
+
+Trainers call ``publish(name, model, feature_names, ...)``.  Serving calls
+``get(name)`` and gets back an immutable ``LoadedModel``; a request keeps
+using the object it was handed, so swapping in a newer version never
+changes the model under an in-flight request.
+
+``get`` re-reads ``CURRENT`` at most every ``MODEL_REGISTRY_POLL`` seconds.
+When it names a new version, that version is loaded on a background thread
+while the old one keeps serving, and swapped in once ready (a version that
+fails to load is logged and the old one stays).  Only a request arriving
+before anything is loaded waits for a load; ``warm_up()`` starts those
+loads when the app starts.
+
+``MODEL_MMAP=r`` loads artifacts with ``joblib.load(mmap_mode="r")``, so
+NumPy arrays in the pickle are mapped from the page cache and shared
+between worker processes instead of copied into each.  It is off by
+default: scikit-learn trees copy their node arrays out of the mapping when
+unpickled, so for the forests served here it only adds load time (87 vs
+48 ms for the 500-tree direction model); it pays off for artifacts whose
+weight sits in plain arrays.
+
+Tree ensembles are compiled to packed node arrays when a version is
+loaded (``tree_compiler``), and requests predict through
+``LoadedModel.predictor`` instead of the estimator's own predict stack.
+``MODEL_COMPILE=0`` serves the estimators as they are.
+
+Until a model has been published, the flat files older trainers wrote
+(``models/prediction_model.joblib`` etc.) are served as version
+``legacy-<mtime>``, and rewriting them is picked up the same way.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+import joblib
+
+from backend.services import tree_compiler
+from backend.services.atomic_io import atomic_write
+
+log = logging.getLogger(__name__)
+
+# ── Configuration ────────────────────────────────────────────────────────
+_ROOT = Path(__file__).resolve().parent.parent.parent  # repo root
+_MODELS = _ROOT / "models"
+REGISTRY_DIR = Path(os.getenv("MODEL_REGISTRY_DIR", str(_MODELS / "registry")))
+POLL_SECONDS = float(os.getenv("MODEL_REGISTRY_POLL", "2"))
+KEEP_VERSIONS = int(os.getenv("MODEL_REGISTRY_KEEP", "5"))
+MMAP_MODE = os.getenv("MODEL_MMAP") or None
+COMPILE = os.getenv("MODEL_COMPILE", "1") != "0"
+
+# Flat files written before the registry existed, and the trainer that
+# produces each model.
+_LEGACY = {
+    "direction": {
+        "model": _MODELS / "prediction_model.joblib",
+        "scaler": _MODELS / "scaler.joblib",
+        "features": _MODELS / "feature_names.json",
+        "trainer": "train_model.py",
+    },
+    "price": {
+        "bundle": _MODELS / "price_forecast_model.joblib",
+        "trainer": "train_price_model.py",
+    },
+}
+MODEL_NAMES = list(_LEGACY)
+
+
+@dataclass(frozen=True)
+class LoadedModel:
+    """One version of a model, ready to predict with.
+
+    ``predictor`` has the model's predict methods: its compiled form, or
+    the model itself when it is not a tree ensemble.
+    """
+
+    name: str
+    version: str
+    model: Any
+    feature_names: list[str]
+    scaler: Any = None
+    meta: dict[str, Any] = field(default_factory=dict)
+    loaded_at: str = ""
+    load_ms: float = 0.0
+    predictor: Any = None
+
+    def __post_init__(self):
+        if self.predictor is None:
+            object.__setattr__(self, "predictor", self.model)
+
+
+# ── Publishing (training) ────────────────────────────────────────────────
+
+
+def publish(
+    name: str,
+    model: Any,
+    feature_names: list[str],
+    scaler: Any = None,
+    meta: dict[str, Any] | None = None,
+    root: Path | None = None,
+) -> str:
+    """Write a new version of ``name`` and make it the live one.
+
+    The version directory is assembled under a temporary name and renamed
+    into place before ``CURRENT`` is switched, so a reader never sees a
+    partial version.  Returns the new version id.
+    """
+    base = (root or REGISTRY_DIR) / name
+    version = f"{datetime.utcnow():%Y%m%dT%H%M%SZ}-{uuid.uuid4().hex[:8]}"
+    staging = base / f".tmp-{version}"
+    staging.mkdir(parents=True)
+
+    joblib.dump(model, staging / "model.joblib")
+    if scaler is not None:
+        joblib.dump(scaler, staging / "scaler.joblib")
+    entry = {
+        "name": name,
+        "version": version,
+        "features": list(feature_names),
+        "created": datetime.utcnow().isoformat(),
+        **(meta or {}),
+    }
+    (staging / "meta.json").write_text(json.dumps(entry, indent=2, default=str))
+
+    os.rename(staging, base / version)
+    atomic_write(base / "CURRENT", version.encode())
+    _prune(base, keep=KEEP_VERSIONS, current=version)
+    log.info("Published %s model %s", name, version)
+    return version
+
+
+def _prune(base: Path, keep: int, current: str) -> None:
+    # Version ids sort by publish time.  Processes still holding an old
+    # version keep their open mappings after the files are unlinked.
+    versions = sorted(p.name for p in base.iterdir() if p.is_dir() and not p.name.startswith("."))
+    for old in versions[:-keep] if keep > 0 else []:
+        if old != current:
+            shutil.rmtree(base / old, ignore_errors=True)
+
+
+# ── Serving ──────────────────────────────────────────────────────────────
+
+
+class ModelRegistry:
+    """Loaded versions of each model, checked against ``CURRENT`` on use."""
+
+    def __init__(
+        self,
+        root: Path = REGISTRY_DIR,
+        poll: float = POLL_SECONDS,
+        mmap_mode: str | None = MMAP_MODE,
+        compile_trees: bool = COMPILE,
+    ):
+        self.root = Path(root)
+        self.poll = poll
+        self.mmap_mode = mmap_mode
+        self.compile_trees = compile_trees
+        self._loaded: dict[str, LoadedModel] = {}
+        self._checked: dict[str, float] = {}
+        self._pending: set[str] = set()
+        self._failed: dict[str, str] = {}
+        self._locks: dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    # ── Versions ─────────────────────────────────────────────────────────
+
+    def current_version(self, name: str) -> str | None:
+        """The version ``get`` should serve, or ``None`` if there is none."""
+        try:
+            return (self.root / name / "CURRENT").read_text().strip()
+        except FileNotFoundError:
+            pass
+        legacy = _LEGACY.get(name, {})
+        path = legacy.get("model") or legacy.get("bundle")
+        try:
+            return f"legacy-{path.stat().st_mtime_ns}" if path is not None else None
+        except FileNotFoundError:
+            return None
+
+    def get(self, name: str) -> LoadedModel:
+        """The live version of ``name``.
+
+        Raises ``FileNotFoundError`` when the model has never been trained.
+        """
+        current = self._loaded.get(name)
+        now = time.monotonic()
+        if current is not None and now - self._checked.get(name, float("-inf")) < self.poll:
+            return current
+        self._checked[name] = now
+
+        version = self.current_version(name)
+        if current is not None:
+            if version is not None and version != current.version and self._failed.get(name) != version:
+                self._load_in_background(name, version)
+            return current
+        if version is None:
+            trainer = _LEGACY.get(name, {}).get("trainer", "the trainer")
+            raise FileNotFoundError(
+                f"No trained {name!r} model in {self.root / name} or {_MODELS}.  "
+                f"Run `python {trainer}` first."
+            )
+        return self._load(name, version)
+
+    def warm_up(self, names: list[str] | None = None) -> list[threading.Thread]:
+        """Start loading every available model in the background."""
+        threads = []
+        for name in names or MODEL_NAMES:
+            version = self.current_version(name)
+            if version is not None:
+                thread = self._load_in_background(name, version)
+                if thread is not None:
+                    threads.append(thread)
+        return threads
+
+    def status(self) -> dict[str, dict[str, Any]]:
+        out = {}
+        for name in MODEL_NAMES:
+            loaded = self._loaded.get(name)
+            out[name] = {
+                "version": loaded.version if loaded else None,
+                "available": self.current_version(name),
+                "loading": name in self._pending,
+                "loaded_at": loaded.loaded_at if loaded else None,
+                "load_ms": loaded.load_ms if loaded else None,
+                "model_type": type(loaded.model).__name__ if loaded else None,
+                "compiled": loaded.predictor is not loaded.model if loaded else None,
+            }
+        return out
+
+    # ── Loading ──────────────────────────────────────────────────────────
+
+    def _name_lock(self, name: str) -> threading.Lock:
+        with self._lock:
+            return self._locks.setdefault(name, threading.Lock())
+
+    def load(self, name: str, version: str, compile_trees: bool | None = None) -> LoadedModel:
+        """Read one given version of ``name`` without making it the live one,
+        e.g. to pin a batch job to the version it started with.
+
+        ``compile_trees`` defaults to the registry's setting.
+        """
+        t0 = time.perf_counter()
+        if version.startswith("legacy-"):
+            fields = self._read_legacy(name)
+        else:
+            fields = self._read_version(self.root / name / version)
+        if self.compile_trees if compile_trees is None else compile_trees:
+            fields["predictor"] = tree_compiler.compile_for_serving(fields["model"])
+        return LoadedModel(
+            name=name,
+            version=version,
+            loaded_at=datetime.utcnow().isoformat(),
+            load_ms=round((time.perf_counter() - t0) * 1e3, 1),
+            **fields,
+        )
+
+    def _load(self, name: str, version: str) -> LoadedModel:
+        # Serialised per model: a request that arrives during warm-up waits
+        # for that load instead of starting a second one.
+        with self._name_lock(name):
+            current = self._loaded.get(name)
+            if current is not None and current.version == version:
+                return current
+            loaded = self.load(name, version)
+            self._loaded[name] = loaded  # the swap: one reference assignment
+            log.info("Loaded %s model %s in %.0f ms", name, version, loaded.load_ms)
+            return loaded
+
+    def _load_in_background(self, name: str, version: str) -> threading.Thread | None:
+        with self._lock:
+            if name in self._pending:
+                return None
+            self._pending.add(name)
+
+        def run():
+            try:
+                self._load(name, version)
+            except Exception:
+                self._failed[name] = version  # not retried until another version appears
+                log.exception("Could not load %s model %s; still serving %s",
+                              name, version, getattr(self._loaded.get(name), "version", None))
+            finally:
+                with self._lock:
+                    self._pending.discard(name)
+
+        thread = threading.Thread(target=run, name=f"model-load-{name}", daemon=True)
+        thread.start()
+        return thread
+
+    def _read_version(self, directory: Path) -> dict[str, Any]:
+        meta = json.loads((directory / "meta.json").read_text())
+        scaler_path = directory / "scaler.joblib"
+        return {
+            "model": joblib.load(directory / "model.joblib", mmap_mode=self.mmap_mode),
+            "scaler": joblib.load(scaler_path, mmap_mode=self.mmap_mode) if scaler_path.exists() else None,
+            "feature_names": meta.pop("features"),
+            "meta": meta,
+        }
+
+    def _read_legacy(self, name: str) -> dict[str, Any]:
+        legacy = _LEGACY[name]
+        if "bundle" in legacy:
+            bundle = dict(joblib.load(legacy["bundle"], mmap_mode=self.mmap_mode))
+            return {
+                "model": bundle.pop("model"),
+                "scaler": bundle.pop("scaler", None),
+                "feature_names": bundle.pop("features"),
+                "meta": bundle,
+            }
+        if not legacy["features"].exists():
+            raise FileNotFoundError(
+                f"Feature names not found at {legacy['features']}.  "
+                f"Regenerate with {legacy['trainer']}."
+            )
+        return {
+            "model": joblib.load(legacy["model"], mmap_mode=self.mmap_mode),
+            "scaler": joblib.load(legacy["scaler"], mmap_mode=self.mmap_mode) if legacy["scaler"].exists() else None,
+            "feature_names": json.loads(legacy["features"].read_text()),
+        }
+
+
+_registry = ModelRegistry()
+
+
+def get(name: str) -> LoadedModel:
+    """The live version of model ``name`` (see ``ModelRegistry.get``)."""
+    return _registry.get(name)
+
+
+def current_version(name: str) -> str | None:
+    """The version ``get`` would serve, without loading it."""
+    return _registry.current_version(name)
+
+
+def load_version(name: str, version: str, compile_trees: bool | None = None) -> LoadedModel:
+    """One given version of ``name``, left out of serving (see
+    ``ModelRegistry.load``)."""
+    return _registry.load(name, version, compile_trees)
+
+
+def warm_up(names: list[str] | None = None) -> list[threading.Thread]:
+    return _registry.warm_up(names)
+
+
+def status() -> dict[str, dict[str, Any]]:
+    return _registry.status()
@@ -1,19 +1,23 @@
 from datetime import datetime, timedelta
+from functools import lru_cache
 import os
 import random
-import re
 import uuid
 
-import requests
+import numpy as np
 from dotenv import load_dotenv
+from sqlalchemy import func
 from sqlalchemy.orm import Session
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
 
+from backend.db import run_compute, run_db
 from backend.models import Headline, PricePoint
+from backend.services import http_cache, sentiment_service, text_normalizer
 
 load_dotenv()
 
 NEWS_API_KEY = os.getenv("NEWS_API_KEY")
+# Overridable so seeding can be exercised against a local stub server.
+NEWS_API_URL = os.getenv("NEWS_API_URL", "https://newsapi.org/v2/everything")
 
 SOURCES = ["Reuters", "Bloomberg", "WSJ", "FT", "CNBC", "MarketWatch"]
 EVENT_TYPES = ["Geopolitics", "Supply", "Demand", "Macro"]
@@ -91,62 +95,30 @@ RELEVANCE_TERMS = [
     "lng",
 ]
 
-analyzer = SentimentIntensityAnalyzer()
+_KEYWORD_MATCHER = text_normalizer.KeywordMatcher(
+    [keyword for keywords in EVENT_KEYWORDS.values() for keyword in keywords] + RELEVANCE_TERMS
+)
 
 
 def preprocess_text(text: str) -> str:
-    text = str(text).lower()
-
-    text = re.sub(r"<[^>]+>", " ", text)
-
-    text = re.sub(r"\bu\.s\.\b", " us ", text)
-    text = re.sub(r"\bu\.s\b", " us ", text)
-    text = re.sub(r"\buk\b", " uk ", text)
-
-    text = re.sub(r"\bbrent crude\b", " brent ", text)
-    text = re.sub(r"\bwti crude\b", " wti ", text)
-    text = re.sub(r"\bwest texas intermediate\b", " wti ", text)
-    text = re.sub(r"\bhenry hub\b", " henry_hub ", text)
-    text = re.sub(r"\bnatural gas\b", " natural_gas ", text)
-    text = re.sub(r"\bcrude oil\b", " crude_oil ", text)
-    text = re.sub(r"\boil prices\b", " oil_price ", text)
-    text = re.sub(r"\bgas prices\b", " gas_price ", text)
-
-    text = re.sub(r"\binterest rates\b", " interest_rate ", text)
-    text = re.sub(r"\brate cut\b", " rate_cut ", text)
-    text = re.sub(r"\brate cuts\b", " rate_cut ", text)
-    text = re.sub(r"\brate hike\b", " rate_hike ", text)
-    text = re.sub(r"\brate hikes\b", " rate_hike ", text)
-
-    text = re.sub(r"\bproduction cuts\b", " production_cut ", text)
-    text = re.sub(r"\bproduction cut\b", " production_cut ", text)
-    text = re.sub(r"\boutput cuts\b", " output_cut ", text)
-    text = re.sub(r"\boutput cut\b", " output_cut ", text)
-    text = re.sub(r"\bsupply disruptions\b", " supply_disruption ", text)
-    text = re.sub(r"\bsupply disruption\b", " supply_disruption ", text)
-    text = re.sub(r"\bshipping disruptions\b", " shipping_disruption ", text)
-    text = re.sub(r"\bshipping disruption\b", " shipping_disruption ", text)
-    text = re.sub(r"\bpipeline outage\b", " pipeline_outage ", text)
-    text = re.sub(r"\bpipeline outages\b", " pipeline_outage ", text)
-    text = re.sub(r"\brefinery outage\b", " refinery_outage ", text)
-    text = re.sub(r"\brefinery outages\b", " refinery_outage ", text)
-    text = re.sub(r"\binventory build\b", " inventory_build ", text)
-    text = re.sub(r"\binventory draw\b", " inventory_draw ", text)
-
-    text = re.sub(r"[^a-z0-9\s$%._\-]", " ", text)
-    text = re.sub(r"\s+", " ", text)
-
-    return text.strip()
+    return text_normalizer.normalize(text)
 
 
-def classify_event_type(text: str) -> tuple[str, list[str]]:
-    text_lower = text.lower()
+@lru_cache(maxsize=4096)
+def _keyword_hits(text_lower: str) -> frozenset[str]:
+    # classify_event_type and calculate_relevance_score are called back to
+    # back on the same cleaned title; this lets them share one scan.
+    return frozenset(_KEYWORD_MATCHER.find(text_lower))
+
 
+def _event_type_from_matches(found: set[str]) -> tuple[str, list[str]]:
     best_type = "Other"
     best_matches: list[str] = []
+    if not found:
+        return best_type, best_matches
 
     for event_type, keywords in EVENT_KEYWORDS.items():
-        current_matches = [keyword for keyword in keywords if keyword in text_lower]
+        current_matches = [keyword for keyword in keywords if keyword in found]
         if len(current_matches) > len(best_matches):
             best_type = event_type
             best_matches = current_matches
@@ -154,13 +126,34 @@ def classify_event_type(text: str) -> tuple[str, list[str]]:
     return best_type, best_matches
 
 
-def calculate_relevance_score(text: str) -> float:
-    text_lower = text.lower()
-    matches = sum(1 for term in RELEVANCE_TERMS if term in text_lower)
+def _relevance_from_matches(found: set[str]) -> float:
+    matches = sum(1 for term in RELEVANCE_TERMS if term in found)
     score = matches / len(RELEVANCE_TERMS)
     return round(min(score * 3, 1.0), 3)
 
 
+def classify_event_type(text: str) -> tuple[str, list[str]]:
+    return _event_type_from_matches(_keyword_hits(text.lower()))
+
+
+def calculate_relevance_score(text: str) -> float:
+    return _relevance_from_matches(_keyword_hits(text.lower()))
+
+
+def analyze_titles(titles: list[str]) -> list[tuple[str, str, list[str], float]]:
+    """Batch ``preprocess_text`` + ``classify_event_type`` + ``calculate_relevance_score``.
+
+    Returns ``(clean_text, event_type, matched_keywords, relevance_score)``
+    per title, scanning each distinct cleaned title once for all keywords.
+    """
+    cleaned = text_normalizer.normalize_batch(titles)
+    found = _KEYWORD_MATCHER.find_batch(cleaned)
+    return [
+        (clean, *_event_type_from_matches(matches), _relevance_from_matches(matches))
+        for clean, matches in zip(cleaned, found)
+    ]
+
+
 def calculate_impact_score(sentiment: float, relevance_score: float, keyword_matches: list[str]) -> float:
     keyword_boost = min(len(keyword_matches) * 8, 24)
     sentiment_component = abs(sentiment) * 55
@@ -229,8 +222,9 @@ def fetch_real_headlines(commodity: str, page_size: int = 40) -> list[Headline]:
 
     query = NEWS_QUERY_MAP.get(commodity, commodity)
 
-    response = requests.get(
-        "https://newsapi.org/v2/everything",
+    response = http_cache.fetch(
+        "newsapi",
+        NEWS_API_URL,
         params={
             "q": query,
             "language": "en",
@@ -242,13 +236,11 @@ def fetch_real_headlines(commodity: str, page_size: int = 40) -> list[Headline]:
             "X-Api-Key": NEWS_API_KEY,
             "X-No-Cache": "true",
         },
-        timeout=20,
     )
-    response.raise_for_status()
     data = response.json()
 
     articles = data.get("articles", [])
-    headlines: list[Headline] = []
+    parsed: list[tuple[str, str, str, datetime]] = []
 
     for article in articles:
         title = (article.get("title") or "").strip()
@@ -266,10 +258,14 @@ def fetch_real_headlines(commodity: str, page_size: int = 40) -> list[Headline]:
         except Exception:
             continue
 
-        clean_title = preprocess_text(title)
-        sentiment = analyzer.polarity_scores(clean_title)["compound"]
-        event_type, matched_keywords = classify_event_type(clean_title)
-        relevance_score = calculate_relevance_score(clean_title)
+        parsed.append((title, url, source_name, published_at))
+
+    headlines: list[Headline] = []
+    analyses = analyze_titles([title for title, *_ in parsed])
+    sentiments = sentiment_service.score_texts([clean_title for clean_title, *_ in analyses])
+
+    for (title, url, source_name, published_at), analysis, sentiment in zip(parsed, analyses, sentiments):
+        clean_title, event_type, matched_keywords, relevance_score = analysis
         impact_score = calculate_impact_score(sentiment, relevance_score, matched_keywords)
         pred_label, pred_confidence = _heuristic_prediction(sentiment, impact_score)
 
@@ -306,53 +302,88 @@ def get_headlines(
     return query.order_by(Headline.published_at.desc()).limit(limit).all()
 
 
-def compute_sentiment_vs_price_change(db: Session, commodity: str) -> list[dict]:
+def compute_sentiment_vs_price_change(db: Session, commodity: str, limit: int = 120) -> list[dict]:
+    """Pair each recent headline with the price move that followed it.
+
+    The commodity's price series is loaded once and every headline is
+    attached to its "price at or before publish" and the next price after
+    that with a single vectorized ``searchsorted`` as-of lookup, so the
+    number of queries stays at two no matter how large ``limit`` is, and
+    only prices from the oldest headline's onward are read.
+    """
+    return _pair_with_price_moves(*_read_sentiment_price_rows(db, commodity, limit))
+
+
+def _read_sentiment_price_rows(db: Session, commodity: str, limit: int = 120) -> tuple[list, list]:
+    """The newest ``limit`` headlines and the prices they can be matched to —
+    the DB half of ``compute_sentiment_vs_price_change``."""
     headlines = (
-        db.query(Headline)
+        db.query(
+            Headline.published_at,
+            Headline.title,
+            Headline.sentiment_score,
+            Headline.pred_label,
+        )
         .filter(Headline.commodity == commodity)
         .order_by(Headline.published_at.desc())
-        .limit(120)
+        .limit(limit)
         .all()
     )
 
-    results = []
+    if not headlines:
+        return [], []
+
+    # Only prices from the last one at or before the oldest headline onward
+    # can be matched (the fallback, the latest price, is in that range too),
+    # so the commodity's older history is never read.
+    oldest = min(h.published_at for h in headlines)
+    anchor = (
+        db.query(func.max(PricePoint.timestamp))
+        .filter(PricePoint.commodity == commodity, PricePoint.timestamp <= oldest)
+        .scalar_subquery()
+    )
+    prices = (
+        db.query(PricePoint.timestamp, PricePoint.close)
+        .filter(PricePoint.commodity == commodity, PricePoint.timestamp >= func.coalesce(anchor, oldest))
+        .order_by(PricePoint.timestamp.asc())
+        .all()
+    )
+    return headlines, prices
 
-    for h in headlines:
-        current_price = (
-            db.query(PricePoint)
-            .filter(
-                PricePoint.commodity == commodity,
-                PricePoint.timestamp <= h.published_at,
-            )
-            .order_by(PricePoint.timestamp.desc())
-            .first()
-        )
 
-        if not current_price or not current_price.close:
-            current_price = (
-                db.query(PricePoint)
-                .filter(PricePoint.commodity == commodity)
-                .order_by(PricePoint.timestamp.desc())
-                .first()
-            )
+def _pair_with_price_moves(headlines: list, prices: list) -> list[dict]:
+    """The as-of join of ``compute_sentiment_vs_price_change`` over rows
+    already read; numpy only, no DB access."""
+    if not headlines or not prices:
+        return []
 
-        if not current_price or not current_price.close:
-            continue
+    timestamps = np.array([p.timestamp for p in prices], dtype="datetime64[us]")
+    closes = np.array([p.close or 0.0 for p in prices], dtype=float)
+    published = np.array([h.published_at for h in headlines], dtype="datetime64[us]")
+    last = len(prices) - 1
 
-        next_price = (
-            db.query(PricePoint)
-            .filter(
-                PricePoint.commodity == commodity,
-                PricePoint.timestamp > current_price.timestamp,
-            )
-            .order_by(PricePoint.timestamp.asc())
-            .first()
-        )
+    # As-of join: index of the last price at or before each publish time.
+    current_idx = np.searchsorted(timestamps, published, side="right") - 1
+
+    # No earlier price (or a zero close) falls back to the latest price.
+    fallback = (current_idx < 0) | (closes[np.clip(current_idx, 0, None)] == 0)
+    current_idx = np.where(fallback, last, current_idx)
+    valid = closes[current_idx] != 0
 
-        if not next_price:
-            next_price = current_price
+    # The next price is the first one strictly after the matched timestamp;
+    # when there is none the headline is paired with its own price (0% move).
+    next_idx = np.searchsorted(timestamps, timestamps[current_idx], side="right")
+    next_idx = np.where(next_idx > last, current_idx, next_idx)
 
-        pct = ((next_price.close - current_price.close) / current_price.close) * 100 if current_price.close else 0
+    current_close = closes[current_idx]
+    safe_close = np.where(valid, current_close, 1.0)
+    pct = (closes[next_idx] - current_close) / safe_close * 100
+
+    results = []
+
+    for h, ok, change in zip(headlines, valid.tolist(), pct.tolist()):
+        if not ok:
+            continue
 
         results.append(
             {
@@ -360,8 +391,15 @@ def compute_sentiment_vs_price_change(db: Session, commodity: str) -> list[dict]
                 "title": h.title,
                 "sentiment_score": h.sentiment_score,
                 "pred_label": h.pred_label,
-                "next_price_change": round(pct, 4),
+                "next_price_change": round(change, 4),
             }
         )
 
     return results
+
+
+async def compute_sentiment_vs_price_change_async(db, commodity: str, limit: int = 120) -> list[dict]:
+    """``compute_sentiment_vs_price_change`` for a sync or async session;
+    the as-of join runs on the compute executor."""
+    headlines, prices = await run_db(db, _read_sentiment_price_rows, commodity, limit)
+    return await run_compute(_pair_with_price_moves, headlines, prices)
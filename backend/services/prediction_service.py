@@ -2,84 +2,51 @@
 provides market-direction predictions for the SIGNAL dashboard.
 
 The trained RandomForest (or whichever variant was selected via
-``python train_model.py --model <type>``) is persisted as
-``models/prediction_model.joblib``.  This module mirrors the exact
-feature-engineering pipeline from ``train_model.py`` so that live data
-passes through the same transformations before reaching the model.
+``python train_model.py --model <type>``) is published to the model
+registry (``model_registry``), which loads it — compiled to packed tree
+arrays when it is a tree ensemble — and swaps in new versions without a
+restart.  Live data goes through the same feature registry as
+training (``signal_features``), computing only the columns the model was
+trained on; the newest row per
+commodity is kept in the feature store, so a request whose data has not
+changed is a lookup plus the model call.
 """
 
 from __future__ import annotations
 
 import json
 import logging
-import math
 import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Any
 
-import joblib
 import numpy as np
 import pandas as pd
 from sqlalchemy.orm import Session
 
-from backend.models import Headline, PricePoint
+from backend.db import run_compute, run_db
+from backend.models import Headline, ModelPrediction, PricePoint
+from backend.services import feature_state, feature_store, model_registry, signal_features
 
 log = logging.getLogger(__name__)
 
 # ── Paths ────────────────────────────────────────────────────────────────
 _ROOT = Path(__file__).resolve().parent.parent.parent  # repo root
-_MODEL_PATH = _ROOT / "models" / "prediction_model.joblib"
-_SCALER_PATH = _ROOT / "models" / "scaler.joblib"
-_FEATURES_PATH = _ROOT / "models" / "feature_names.json"
 _REPORT_PATH = _ROOT / "models" / "model_report.json"
 
-# ── Lazy-loaded singletons ───────────────────────────────────────────────
-_model = None
-_scaler = None
-_feature_names: list[str] | None = None
-
-
-def _load_model():
-    """Load the trained model, scaler (if any), and expected feature names."""
-    global _model, _scaler, _feature_names  # noqa: PLW0603
-
-    if not _MODEL_PATH.exists():
-        raise FileNotFoundError(
-            f"Trained model not found at {_MODEL_PATH}.  "
-            "Run `python train_model.py` first."
-        )
-
-    _model = joblib.load(_MODEL_PATH)
-    log.info("Loaded model from %s", _MODEL_PATH)
-
-    if _SCALER_PATH.exists():
-        _scaler = joblib.load(_SCALER_PATH)
-        log.info("Loaded scaler from %s", _SCALER_PATH)
-
-    if _FEATURES_PATH.exists():
-        with open(_FEATURES_PATH) as f:
-            _feature_names = json.load(f)
-        log.info("Loaded %d feature names", len(_feature_names))
-    else:
-        raise FileNotFoundError(
-            f"Feature names not found at {_FEATURES_PATH}.  "
-            "Regenerate with train_model.py."
-        )
-
 
 def get_model():
-    """Return the loaded model (lazy-init on first call)."""
-    if _model is None:
-        _load_model()
-    return _model
+    """Return the live direction model (loaded by the model registry)."""
+    return model_registry.get("direction").model
 
 
 def get_feature_names() -> list[str]:
-    if _feature_names is None:
-        _load_model()
-    assert _feature_names is not None
-    return _feature_names
+    return model_registry.get("direction").feature_names
 
 
 def get_model_report() -> dict[str, Any]:
@@ -90,103 +57,16 @@ def get_model_report() -> dict[str, Any]:
     raise FileNotFoundError(f"Model report not found at {_REPORT_PATH}")
 
 
-# ── Feature engineering (mirrors train_model.py exactly) ─────────────────
-
-def _engineer_features(df: pd.DataFrame) -> pd.DataFrame:
-    """Apply the same feature engineering as train_model.py.
-
-    Expects a DataFrame with at least: price, price_lag_1, price_lag_2,
-    price_ma_3, price_ma_5, avg_tone, volatility_5, article_count, date.
-    """
-    df = df.copy()
-
-    # Downside pressure features
-    df["neg_tone_flag"] = (df["avg_tone"] < 0).astype(int)
-    df["strong_neg_tone"] = (df["avg_tone"] < -0.5).astype(int)
-
-    # Volatility direction signal
-    df["volatility_spike"] = (
-        df["volatility_5"] > df["volatility_5"].rolling(5).mean()
-    ).astype(int)
-
-    # Price drop signal
-    df["down_momentum"] = (df["price"] < df["price_lag_1"]).astype(int)
-
-    # Price difference features
-    df["price_diff_1"] = df["price"] - df["price_lag_1"]
-    df["price_diff_2"] = df["price_lag_1"] - df["price_lag_2"]
-
-    # Sentiment rolling features
-    df["tone_ma_3"] = df["avg_tone"].rolling(3).mean()
-    df["tone_x_volatility"] = df["avg_tone"] * df["volatility_5"]
-
-    # Short-term momentum
-    df["return_1"] = df["price"].pct_change()
-    df["return_2"] = df["price"].pct_change(2)
-
-    # Trend strength
-    df["trend_strength"] = df["price_ma_3"] - df["price_ma_5"]
-
-    # Acceleration
-    df["acceleration"] = df["return_1"] - df["return_2"]
-
-    # Sentiment change
-    df["tone_change"] = df["avg_tone"] - df["avg_tone"].shift(1)
-
-    # 3-period momentum
-    df["momentum_3"] = df["price"] - df["price_lag_2"]
-
-    # Stationary ratio features
-    df["price_vs_ma5"] = df["price"] / df["price_ma_5"] - 1
-    df["ma3_vs_ma5"] = df["price_ma_3"] / df["price_ma_5"] - 1
-
-    # MACD
-    _ema12 = df["price"].ewm(span=12, adjust=False).mean()
-    _ema26 = df["price"].ewm(span=26, adjust=False).mean()
-    df["macd"] = _ema12 - _ema26
-    df["macd_signal"] = df["macd"].ewm(span=9, adjust=False).mean()
-    df["macd_hist"] = df["macd"] - df["macd_signal"]
-    df["price_vs_ema12"] = _ema12 / df["price"] - 1
-    df["ema12_vs_ema26"] = _ema12 / _ema26 - 1
-
-    # RSI
-    _delta = df["price"].diff()
-    _avg_gain = _delta.clip(lower=0).ewm(com=13, adjust=False).mean()
-    _avg_loss = (-_delta.clip(upper=0)).ewm(com=13, adjust=False).mean()
-    df["rsi"] = 100 - (100 / (1 + _avg_gain / _avg_loss.replace(0, float("nan"))))
-    df["rsi_norm"] = (df["rsi"] - 50) / 50
-    df["rsi_overbought"] = (df["rsi"] > 70).astype(int)
-    df["rsi_oversold"] = (df["rsi"] < 30).astype(int)
-
-    # Cyclical calendar encoding
-    df["date"] = pd.to_datetime(df["date"])
-    df["month_sin"] = df["date"].dt.month.apply(
-        lambda m: math.sin(2 * math.pi * m / 12)
-    )
-    df["month_cos"] = df["date"].dt.month.apply(
-        lambda m: math.cos(2 * math.pi * m / 12)
-    )
-
-    # Sentiment × technical interactions
-    df["macd_x_tone"] = df["macd_hist"] * df["avg_tone"]
-    df["rsi_x_tone"] = df["rsi_norm"] * df["avg_tone"]
-    df["macd_x_vol"] = df["macd_hist"] * df["volatility_5"]
-
-    return df
-
-
-def _build_feature_df_from_db(db: Session, commodity: str = "WTI") -> pd.DataFrame:
-    """Build a time-series DataFrame from DB price + headline data.
-
-    Returns a DataFrame with one row per day, containing the base features
-    needed by ``_engineer_features``.
-    """
+def _read_feature_inputs(db: Session, commodity: str) -> tuple[list, list]:
+    """The serving window's ``(timestamp, close)`` price rows and
+    ``(published_at, sentiment_score)`` headline rows — the DB half of
+    ``_build_feature_df_from_db``."""
     commodity = commodity.upper()
 
     # Get price history (last 60 days to have enough for rolling windows)
-    cutoff = datetime.utcnow() - timedelta(days=60)
+    cutoff = datetime.utcnow() - timedelta(days=feature_state.WINDOW_DAYS)
     prices = (
-        db.query(PricePoint)
+        db.query(PricePoint.timestamp, PricePoint.close)
         .filter(PricePoint.commodity == commodity, PricePoint.timestamp >= cutoff)
         .order_by(PricePoint.timestamp.asc())
         .all()
@@ -198,6 +78,17 @@ def _build_feature_df_from_db(db: Session, commodity: str = "WTI") -> pd.DataFra
             f"got {len(prices)}.  Run /seed first."
         )
 
+    headlines = (
+        db.query(Headline.published_at, Headline.sentiment_score)
+        .filter(Headline.commodity == commodity, Headline.published_at >= cutoff)
+        .all()
+    )
+    return prices, headlines
+
+
+def _feature_frame(prices: list, headlines: list) -> pd.DataFrame:
+    """The daily frame of ``_build_feature_df_from_db`` from the rows
+    ``_read_feature_inputs`` returned; pandas only, no DB access."""
     # Build daily price DataFrame
     price_records = [{"date": p.timestamp.date(), "price": p.close} for p in prices]
     pdf = pd.DataFrame(price_records)
@@ -214,12 +105,6 @@ def _build_feature_df_from_db(db: Session, commodity: str = "WTI") -> pd.DataFra
     pdf["volatility_5"] = pdf["return_1"].rolling(5).std()
 
     # Aggregate daily news sentiment
-    headlines = (
-        db.query(Headline)
-        .filter(Headline.commodity == commodity, Headline.published_at >= cutoff)
-        .all()
-    )
-
     if headlines:
         hdf = pd.DataFrame([
             {"date": h.published_at.date(), "sentiment": h.sentiment_score}
@@ -246,56 +131,121 @@ def _build_feature_df_from_db(db: Session, commodity: str = "WTI") -> pd.DataFra
     return df
 
 
-def predict_market_direction(
-    db: Session,
-    commodity: str = "WTI",
-    threshold: float = 0.75,
-) -> dict[str, Any]:
-    """Run the trained model on live DB data and return a prediction.
+def _build_feature_df_from_db(db: Session, commodity: str = "WTI") -> pd.DataFrame:
+    """Build a time-series DataFrame from DB price + headline data.
 
-    Returns a dict with:
-        - prediction: "UP" | "DOWN" | "UNCERTAIN"
-        - confidence: float (probability of the predicted class)
-        - probability_up: float (raw P(UP))
-        - features_used: int (number of features)
-        - model_type: str
-        - timestamp: str (ISO)
+    Returns a DataFrame with one row per day, containing the base features
+    the ``signal_features`` registry derives the model inputs from.
+    """
+    return _feature_frame(*_read_feature_inputs(db, commodity))
+
+
+def _latest_feature_row(
+    db: Session,
+    commodity: str,
+    feature_names: list[str],
+    watermark: tuple | None = None,
+) -> pd.DataFrame:
+    """Return the most recent engineered feature row (1 × n_features).
+
+    A feature-store lookup when the store holds a row computed at the
+    current data watermark; otherwise the row is computed and recorded
+    there for the next request (and for other worker processes).  Pass
+    the commodity's ``feature_state.data_watermark`` if already read.
     """
-    model = get_model()
-    feature_names = get_feature_names()
+    if watermark is None:
+        watermark = feature_state.data_watermark(db, commodity.upper())
+    row = _stored_feature_row(commodity, feature_names, watermark)
+    if row is None:
+        row = _compute_feature_row(db, commodity, feature_names, watermark)
+        _store_feature_row(commodity, row, watermark)
+    return row
+
+
+def _stored_feature_row(commodity: str, feature_names: list[str], watermark: tuple) -> pd.DataFrame | None:
+    """The feature store's row for ``commodity`` if it was computed at ``watermark``."""
+    stored = feature_store.latest("direction", commodity)
+    if stored is None or stored.watermark != feature_store.watermark_key(watermark):
+        return None
+    if not all(n in stored.values for n in feature_names):
+        return None
+    return pd.DataFrame([[stored.values[n] for n in feature_names]], columns=feature_names)
+
+
+def _store_feature_row(commodity: str, row: pd.DataFrame, watermark: tuple) -> None:
+    feature_store.put_latest(
+        "direction", commodity, watermark[0], row.iloc[0].to_dict(), feature_store.watermark_key(watermark)
+    )
 
-    # Build features from DB data
-    df = _build_feature_df_from_db(db, commodity)
-    df = _engineer_features(df)
+
+def _incremental_feature_row(
+    db: Session,
+    commodity: str,
+    feature_names: list[str],
+    watermark: tuple | None = None,
+) -> pd.DataFrame | None:
+    """The row from the incremental feature state, or ``None`` when it cannot answer."""
+    features = feature_state.latest_features(db, commodity, watermark)
+    if features is not None and all(name in features for name in feature_names):
+        return pd.DataFrame([[features[name] for name in feature_names]], columns=feature_names)
+    return None
+
+
+def _feature_row(df: pd.DataFrame, feature_names: list[str]) -> pd.DataFrame:
+    """The last complete row of ``feature_names`` computed over ``df``."""
+    # Only the features the model expects, in the correct order
+    try:
+        features = signal_features.compute_features(df, feature_names)
+    except KeyError as exc:
+        raise ValueError(f"Missing features for model input: {exc}") from exc
 
     # Drop NaN rows (from rolling windows)
-    df = df.dropna()
+    features = features.dropna()
 
-    if df.empty:
+    if features.empty:
         raise ValueError(
             "No valid feature rows after engineering — "
             "not enough historical data in the DB."
         )
 
     # Take the most recent row
-    latest = df.iloc[[-1]]
+    return features.iloc[[-1]]
+
+
+def _compute_feature_row(
+    db: Session,
+    commodity: str,
+    feature_names: list[str],
+    watermark: tuple | None = None,
+) -> pd.DataFrame:
+    """Compute the most recent feature row from the DB.
+
+    Served from the incremental feature state when it can answer; the full
+    pandas rebuild is the fallback and the reference implementation.
+    """
+    row = _incremental_feature_row(db, commodity, feature_names, watermark)
+    if row is not None:
+        return row
+    return _feature_row(_build_feature_df_from_db(db, commodity), feature_names)
 
-    # Select only the features the model expects, in the correct order
-    try:
-        X = latest[feature_names]
-    except KeyError as exc:
-        missing = set(feature_names) - set(latest.columns)
-        raise ValueError(
-            f"Missing features for model input: {missing}"
-        ) from exc
 
+def _predict_probabilities(loaded: model_registry.LoadedModel, X: pd.DataFrame) -> np.ndarray:
+    """Return P(UP) for every row of ``X`` with a single ``predict_proba`` call."""
     # Apply scaler if present (for logistic regression variant)
-    if _scaler is not None:
-        X = pd.DataFrame(_scaler.transform(X), columns=feature_names)
+    if loaded.scaler is not None:
+        X = pd.DataFrame(loaded.scaler.transform(X), columns=loaded.feature_names)
 
-    # Predict
-    prob_up = float(model.predict_proba(X)[0, 1])
+    return loaded.predictor.predict_proba(X)[:, 1]
 
+
+def _direction_result(
+    prob_up: float,
+    threshold: float,
+    commodity: str,
+    model,
+    feature_names: list[str],
+) -> dict[str, Any]:
+    """Map P(UP) onto the UP / DOWN / UNCERTAIN confidence bands."""
     if prob_up >= threshold:
         label = "UP"
         confidence = prob_up
@@ -315,3 +265,284 @@ def predict_market_direction(
         "model_type": type(model).__name__,
         "timestamp": datetime.utcnow().isoformat(),
     }
+
+
+def direction_bands(prob_up: np.ndarray, threshold: float) -> tuple[np.ndarray, np.ndarray]:
+    """``_direction_result``'s label and confidence for a whole array of P(UP)."""
+    prob_up = np.asarray(prob_up, dtype=np.float64)
+    label = np.where(prob_up >= threshold, "UP", np.where(prob_up <= 1.0 - threshold, "DOWN", "UNCERTAIN"))
+    confidence = np.where(label == "DOWN", 1.0 - prob_up, np.where(label == "UP", prob_up, np.maximum(prob_up, 1.0 - prob_up)))
+    return label, confidence
+
+
+def get_model_prediction_history(db: Session, commodity: str, limit: int = 30) -> list[dict[str, Any]]:
+    """The direction model's stored per-day output (``scripts/score_history.py``),
+    oldest first, in /prediction-history's shape."""
+    rows = (
+        db.query(ModelPrediction)
+        .filter(ModelPrediction.model == "direction", ModelPrediction.commodity == commodity)
+        .order_by(ModelPrediction.date.desc())
+        .limit(limit)
+        .all()
+    )
+    return [
+        {
+            "date": row.date,
+            "dominant_prediction": row.prediction,
+            "avg_confidence": round(row.confidence, 3),
+            "probability_up": round(row.probability_up, 4),
+            "model_version": row.model_version,
+        }
+        for row in reversed(rows)
+    ]
+
+
+# ── Prediction cache ─────────────────────────────────────────────────────
+# Predictions only change when the model version or the underlying data does,
+# so results are memoised on (commodity, threshold, model version, newest
+# price timestamp, newest headline timestamp).  Entries are evicted LRU,
+# optionally expire after PREDICTION_CACHE_TTL seconds, and are dropped
+# explicitly by /seed and whenever a session commits new price/headline rows.
+
+class PredictionCache:
+    """Thread-safe LRU cache with optional TTL and hit/miss counters."""
+
+    def __init__(self, max_size: int = 256, ttl: float | None = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict[tuple, tuple[float, dict[str, Any]]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: tuple) -> dict[str, Any] | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl is not None and time.monotonic() - entry[0] > self.ttl:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(entry[1])
+
+    def put(self, key: tuple, value: dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic(), dict(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, commodities: set[str] | None = None) -> None:
+        """Drop every entry, or only those for the given commodities."""
+        with self._lock:
+            if commodities is None:
+                self._entries.clear()
+                return
+            for key in [k for k in self._entries if k[0] in commodities]:
+                del self._entries[key]
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl,
+            }
+
+
+_prediction_cache = PredictionCache(
+    max_size=int(os.getenv("PREDICTION_CACHE_SIZE", "256")),
+    ttl=float(os.getenv("PREDICTION_CACHE_TTL", "0")) or None,
+)
+feature_state.add_change_listener(_prediction_cache.invalidate)
+
+
+def _cache_key(commodity: str, threshold: float, model_version: str, watermark: tuple) -> tuple:
+    max_price_ts, max_headline_ts = watermark
+    return (commodity, threshold, model_version, max_price_ts, max_headline_ts)
+
+
+def _cached_result(key: tuple) -> dict[str, Any] | None:
+    """A cached prediction, stamped with the time it is served rather than
+    the time it was first computed."""
+    cached = _prediction_cache.get(key)
+    if cached is not None:
+        cached["timestamp"] = datetime.utcnow().isoformat()
+    return cached
+
+
+def invalidate_prediction_cache(commodity: str | None = None) -> None:
+    """Drop cached predictions for one commodity, or all of them."""
+    _prediction_cache.invalidate(None if commodity is None else {commodity.upper()})
+
+
+def get_prediction_cache_stats() -> dict[str, Any]:
+    """Return hit/miss counters and occupancy of the prediction cache."""
+    return _prediction_cache.stats()
+
+
+def predict_market_direction(
+    db: Session,
+    commodity: str = "WTI",
+    threshold: float = 0.75,
+) -> dict[str, Any]:
+    """Run the trained model on live DB data and return a prediction.
+
+    Returns a dict with:
+        - prediction: "UP" | "DOWN" | "UNCERTAIN"
+        - confidence: float (probability of the predicted class)
+        - probability_up: float (raw P(UP))
+        - features_used: int (number of features)
+        - model_type: str
+        - timestamp: str (ISO, when the prediction is served; cached
+          results are re-stamped)
+    """
+    # One version for the whole request, even if a newer one is swapped in
+    loaded = model_registry.get("direction")
+
+    # one watermark read serves the cache key, the feature store and the
+    # incremental state
+    watermark = feature_state.data_watermark(db, commodity.upper())
+    key = _cache_key(commodity.upper(), threshold, loaded.version, watermark)
+    cached = _cached_result(key)
+    if cached is not None:
+        return cached
+
+    X = _latest_feature_row(db, commodity, loaded.feature_names, watermark)
+    prob_up = float(_predict_probabilities(loaded, X)[0])
+
+    result = _direction_result(prob_up, threshold, commodity, loaded.model, loaded.feature_names)
+    _prediction_cache.put(key, result)
+    return result
+
+
+@dataclass
+class _DirectionBatch:
+    """Everything a batch prediction needs once the DB reads are done."""
+
+    threshold: float
+    loaded: model_registry.LoadedModel
+    results: dict[str, dict[str, Any]] = field(default_factory=dict)
+    keys: dict[str, tuple] = field(default_factory=dict)
+    rows: list[pd.DataFrame] = field(default_factory=list)
+    built: list[str] = field(default_factory=list)
+    order: list[str] = field(default_factory=list)
+    # commodities whose row needs the pandas rebuild: the rows read for it
+    # and the watermark they were read at
+    inputs: dict[str, tuple[tuple[list, list], tuple]] = field(default_factory=dict)
+    strict: bool = False
+
+
+def _prepare_direction_batch(
+    db: Session,
+    commodities: list[str],
+    threshold: float,
+    strict: bool = False,
+) -> _DirectionBatch:
+    """Read cached results and feature rows for every commodity.
+
+    Only DB work and lookups happen here: a row neither the feature store
+    nor the incremental state can answer is left to
+    ``_finish_direction_batch`` as the price and headline rows it is built
+    from.  With ``strict`` a commodity whose features cannot be built
+    raises ``ValueError`` instead of being skipped.
+    """
+    batch = _DirectionBatch(threshold, model_registry.get("direction"), order=list(commodities), strict=strict)
+    names = batch.loaded.feature_names
+    for commodity in commodities:
+        # read once: it keys the cache, the feature store and the incremental state
+        watermark = feature_state.data_watermark(db, commodity.upper())
+        batch.keys[commodity] = _cache_key(commodity.upper(), threshold, batch.loaded.version, watermark)
+        cached = _cached_result(batch.keys[commodity])
+        if cached is not None:
+            batch.results[commodity] = cached
+            continue
+        try:
+            row = _stored_feature_row(commodity, names, watermark)
+            if row is None:
+                row = _incremental_feature_row(db, commodity, names, watermark)
+                if row is not None:
+                    _store_feature_row(commodity, row, watermark)
+            if row is None:
+                batch.inputs[commodity] = (_read_feature_inputs(db, commodity), watermark)
+                continue
+            batch.rows.append(row)
+            batch.built.append(commodity)
+        except ValueError:
+            if strict:
+                raise
+            log.warning("Skipping %s in batch prediction", commodity, exc_info=True)
+    return batch
+
+
+def _finish_direction_batch(batch: _DirectionBatch) -> dict[str, dict[str, Any]]:
+    """Build the rows left by ``_prepare_direction_batch``, run the single
+    stacked ``predict_proba`` call and fill the cache."""
+    for commodity, (inputs, watermark) in batch.inputs.items():
+        try:
+            row = _feature_row(_feature_frame(*inputs), batch.loaded.feature_names)
+        except ValueError:
+            if batch.strict:
+                raise
+            log.warning("Skipping %s in batch prediction", commodity, exc_info=True)
+            continue
+        _store_feature_row(commodity, row, watermark)
+        batch.rows.append(row)
+        batch.built.append(commodity)
+
+    if batch.rows:
+        X = pd.concat(batch.rows, ignore_index=True)
+        probs = _predict_probabilities(batch.loaded, X)
+        for commodity, prob_up in zip(batch.built, probs):
+            result = _direction_result(
+                float(prob_up), batch.threshold, commodity, batch.loaded.model, batch.loaded.feature_names
+            )
+            _prediction_cache.put(batch.keys[commodity], result)
+            batch.results[commodity] = result
+
+    return {c: batch.results[c] for c in batch.order if c in batch.results}
+
+
+def predict_market_directions(
+    db: Session,
+    commodities: list[str],
+    threshold: float = 0.75,
+) -> dict[str, dict[str, Any]]:
+    """Predict several commodities with one stacked ``predict_proba`` call.
+
+    Commodities whose features cannot be built (e.g. not enough price
+    history) are logged and left out of the result; the model itself
+    failing to load raises exactly like ``predict_market_direction``.
+    """
+    return _finish_direction_batch(_prepare_direction_batch(db, commodities, threshold))
+
+
+# ── Async entry point ────────────────────────────────────────────────────
+# In async mode the DB reads run through ``run_db``; building any feature
+# rows that need pandas and the ``predict_proba`` call run on the compute
+# executor, so a burst of dashboard polls cannot block the event loop.
+
+
+async def predict_market_directions_async(
+    db,
+    commodities: list[str],
+    threshold: float = 0.75,
+    strict: bool = False,
+) -> dict[str, dict[str, Any]]:
+    """Async ``predict_market_directions`` for a sync or async session.
+
+    ``strict=True`` raises ``ValueError`` like ``predict_market_direction``
+    instead of skipping commodities without enough data.
+    """
+    batch = await run_db(db, _prepare_direction_batch, commodities, threshold, strict)
+    return await run_compute(_finish_direction_batch, batch)
@@ -1,12 +1,13 @@
 from datetime import datetime, timedelta
 from io import StringIO
+import os
 import random
 
 import pandas as pd
-import requests
 from sqlalchemy.orm import Session
 
 from backend.models import PricePoint
+from backend.services import http_cache
 
 
 RANGE_TO_DAYS = {
@@ -15,6 +16,9 @@ RANGE_TO_DAYS = {
     "30d": 30,
 }
 
+# Overridable so seeding can be exercised against a local stub server.
+FRED_CSV_URL = os.getenv("FRED_CSV_URL", "https://fred.stlouisfed.org/graph/fredgraph.csv")
+
 SERIES_MAP = {
     "WTI": "DCOILWTICO",
     "BRENT": "DCOILBRENTEU",
@@ -29,12 +33,8 @@ BASE_PRICES = {
 }
 
 
-def fetch_fred_series_csv(series_id: str) -> pd.DataFrame:
-    url = f"https://fred.stlouisfed.org/graph/fredgraph.csv?id={series_id}"
-    response = requests.get(url, timeout=20)
-    response.raise_for_status()
-
-    df = pd.read_csv(StringIO(response.text))
+def _parse_fred_csv(content: bytes) -> pd.DataFrame:
+    df = pd.read_csv(StringIO(content.decode("utf-8")))
     df.columns = ["date", "value"]
 
     df["date"] = pd.to_datetime(df["date"], errors="coerce")
@@ -44,6 +44,11 @@ def fetch_fred_series_csv(series_id: str) -> pd.DataFrame:
     return df
 
 
+def fetch_fred_series_csv(series_id: str) -> pd.DataFrame:
+    response = http_cache.fetch("fred", FRED_CSV_URL, params={"id": series_id})
+    return http_cache.cached_frame(response, "fred-csv", _parse_fred_csv)
+
+
 def fetch_real_price_points(commodity: str, days: int = 45) -> list[PricePoint]:
     commodity = commodity.upper()
     series_id = SERIES_MAP[commodity]
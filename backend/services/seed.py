@@ -1,9 +1,10 @@
 import logging
+from concurrent.futures import Future, ThreadPoolExecutor
 
 import requests
 from sqlalchemy.orm import Session
 
-from backend.models import Headline, PricePoint
+from backend.services.bulk_ingest import headline_rows, price_rows, replace_commodity_partition
 from backend.services.news_service import fetch_real_headlines, generate_headlines
 from backend.services.price_service import fetch_real_price_points, generate_price_points
 
@@ -12,19 +13,34 @@ logger = logging.getLogger(__name__)
 SUPPORTED_COMMODITIES = ["WTI", "BRENT", "NATGAS"]
 
 
-def seed_database(db: Session) -> dict:
-    # clear old data
-    db.query(Headline).delete()
-    db.query(PricePoint).delete()
+def _fetch_all() -> tuple[dict[str, Future], dict[str, Future]]:
+    """Start every NewsAPI and FRED request at once.
+
+    ``http_fetch`` bounds the per-host concurrency and trips a source's
+    circuit breaker after repeated failures, so the slowest upstream caps
+    the wait instead of the sum of all of them.
+    """
+    with ThreadPoolExecutor(max_workers=2 * len(SUPPORTED_COMMODITIES), thread_name_prefix="seed-fetch") as pool:
+        headline_futures = {
+            c: pool.submit(fetch_real_headlines, commodity=c, page_size=40) for c in SUPPORTED_COMMODITIES
+        }
+        price_futures = {
+            c: pool.submit(fetch_real_price_points, commodity=c, days=45) for c in SUPPORTED_COMMODITIES
+        }
+    return headline_futures, price_futures
+
 
+def seed_database(db: Session) -> dict:
     total_headlines = 0
     total_prices = 0
     used_fallback = False
 
+    headline_futures, price_futures = _fetch_all()
+
     for commodity in SUPPORTED_COMMODITIES:
         # Attempt REAL news, fall back to synthetic
         try:
-            headlines = fetch_real_headlines(commodity=commodity, page_size=40)
+            headlines = headline_futures[commodity].result()
         except (ValueError, requests.RequestException, OSError) as exc:
             logger.warning("Real headlines unavailable for %s (%s), using synthetic data", commodity, exc)
             headlines = generate_headlines(commodity=commodity, count=40)
@@ -32,19 +48,22 @@ def seed_database(db: Session) -> dict:
 
         # Attempt REAL prices, fall back to synthetic
         try:
-            prices = fetch_real_price_points(commodity=commodity, days=45)
+            prices = price_futures[commodity].result()
         except (ValueError, requests.RequestException, OSError) as exc:
             logger.warning("Real prices unavailable for %s (%s), using synthetic data", commodity, exc)
             prices = generate_price_points(commodity=commodity, days=45)
             used_fallback = True
 
-        db.add_all(headlines)
-        db.add_all(prices)
-
-        total_headlines += len(headlines)
-        total_prices += len(prices)
+        # Swap this commodity's old rows for the new ones in one transaction
+        counts = replace_commodity_partition(
+            db,
+            commodity,
+            headlines=headline_rows(headlines),
+            prices=price_rows(prices),
+        )
 
-    db.commit()
+        total_headlines += counts["headlines"]
+        total_prices += counts["price_points"]
 
     return {
         "status": "seeded",
@@ -0,0 +1,214 @@
+"""Batched headline sentiment scoring.
+
+Everything that turns headline text into a sentiment score goes through
+``score_texts``:
+
+* the scorer sits behind one small interface (``SentimentScorer``: a
+  ``name`` and ``score_batch(texts) -> scores``); VADER is the default and
+  ``set_scorer`` swaps in another;
+* scores are memoised in an LRU keyed by a hash of the scorer name and the
+  exact text scored (``SENTIMENT_CACHE_SIZE`` entries), and each batch is
+  de-duplicated first — wire stories repeat heavily;
+* batches with at least ``SENTIMENT_PARALLEL_MIN`` uncached texts are split
+  across a process pool of ``SENTIMENT_WORKERS`` processes (default: one
+  per core); smaller ones are scored in-process, where pool overhead would
+  dominate.
+
+Callers that pass normalised text (``news_service.preprocess_text``) share
+cache entries across case and markup variants of the same story.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor
+from typing import Protocol
+
+log = logging.getLogger(__name__)
+
+SENTIMENT_WORKERS = int(os.getenv("SENTIMENT_WORKERS", "0")) or os.cpu_count() or 1
+SENTIMENT_PARALLEL_MIN = int(os.getenv("SENTIMENT_PARALLEL_MIN", "2000"))
+SENTIMENT_CACHE_SIZE = int(os.getenv("SENTIMENT_CACHE_SIZE", "100000"))
+
+
+class SentimentScorer(Protocol):
+    name: str
+
+    def score_batch(self, texts: list[str]) -> list[float]:
+        """One score in [-1, 1] per text, in order."""
+        ...
+
+
+class VaderScorer:
+    """VADER compound polarity score."""
+
+    name = "vader"
+
+    def __init__(self):
+        self._analyzer = None
+
+    def __getstate__(self):
+        return {"_analyzer": None}  # rebuilt lazily in each worker process
+
+    def score_batch(self, texts: list[str]) -> list[float]:
+        if self._analyzer is None:
+            from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+
+            self._analyzer = SentimentIntensityAnalyzer()
+        polarity = self._analyzer.polarity_scores
+        return [polarity(text)["compound"] for text in texts]
+
+
+class _ScoreCache:
+    """Thread-safe LRU of text hash -> score with hit/miss counters."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: OrderedDict[bytes, float] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, keys: list[bytes]) -> list[float | None]:
+        with self._lock:
+            found = []
+            for key in keys:
+                score = self._entries.get(key)
+                if score is not None:
+                    self._entries.move_to_end(key)
+                found.append(score)
+            hits = sum(score is not None for score in found)
+            self.hits += hits
+            self.misses += len(keys) - hits
+            return found
+
+    def put_many(self, items: list[tuple[bytes, float]]) -> None:
+        with self._lock:
+            for key, score in items:
+                self._entries[key] = score
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+            }
+
+
+_scorer: SentimentScorer = VaderScorer()
+_cache = _ScoreCache(SENTIMENT_CACHE_SIZE)
+_pool: ProcessPoolExecutor | None = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+# ── Process pool ─────────────────────────────────────────────────────────
+
+_worker_scorer: SentimentScorer | None = None
+
+
+def _init_worker(scorer: SentimentScorer) -> None:
+    global _worker_scorer
+    _worker_scorer = scorer
+
+
+def _score_chunk(texts: list[str]) -> list[float]:
+    return _worker_scorer.score_batch(texts)
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False, cancel_futures=True)
+            # spawn, not fork: the API process runs threads (uvicorn, inference).
+            log.info("Starting %d sentiment worker processes (%s)", workers, _scorer.name)
+            _pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(_scorer,),
+            )
+            _pool_workers = workers
+        return _pool
+
+
+def shutdown() -> None:
+    """Stop the worker pool (it is recreated on the next large batch)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool = None
+
+
+# ── Public API ───────────────────────────────────────────────────────────
+
+
+def get_scorer() -> SentimentScorer:
+    return _scorer
+
+
+def set_scorer(scorer: SentimentScorer) -> None:
+    """Swap the scorer; drops the memo cache and the worker pool."""
+    global _scorer
+    shutdown()
+    _scorer = scorer
+    _cache.clear()
+
+
+def _key(text: str) -> bytes:
+    return hashlib.blake2b(f"{_scorer.name}\x00{text}".encode(), digest_size=16).digest()
+
+
+def score_texts(texts: Sequence[str], workers: int | None = None) -> list[float]:
+    """Score ``texts`` in order, using the cache and, for big batches, the pool."""
+    texts = [str(text) for text in texts]
+    distinct = list(dict.fromkeys(texts))
+    keys = {text: _key(text) for text in distinct}
+    scores = dict(zip(distinct, _cache.get_many(list(keys.values()))))
+
+    todo = [text for text in distinct if scores[text] is None]
+    if todo:
+        workers = workers or SENTIMENT_WORKERS
+        if workers > 1 and len(todo) >= SENTIMENT_PARALLEL_MIN:
+            # a few chunks per worker keeps them busy without per-text IPC
+            size = -(-len(todo) // (workers * 4))
+            chunks = [todo[i:i + size] for i in range(0, len(todo), size)]
+            results = [s for chunk in _get_pool(workers).map(_score_chunk, chunks) for s in chunk]
+        else:
+            results = _scorer.score_batch(todo)
+        scores.update(zip(todo, results))
+        _cache.put_many([(keys[text], score) for text, score in zip(todo, results)])
+
+    return [scores[text] for text in texts]
+
+
+def score_text(text: str) -> float:
+    return score_texts([text])[0]
+
+
+def cache_stats() -> dict:
+    return _cache.stats()
+
+
+def clear_cache() -> None:
+    _cache.clear()
@@ -0,0 +1,401 @@
+"""Technical and sentiment features shared by training and serving.
+
+One vectorised NumPy implementation of every engineered column used by the
+direction model (train_model.py, prediction_service), the price forecaster
+(train_price_model.py) and the daily training table
+(scripts/build_daily_training_table.py).
+
+Features are declared in a registry: each has a name, the columns it is
+computed from and a function of those columns' arrays.  ``compute_features``
+resolves only what the requested names need, so serving can ask for exactly
+the columns in ``models/feature_names.json``.  Columns already present in the
+input frame are used as they are rather than recomputed — training tables
+ship with lags, moving averages and volatilities precomputed.  Passing
+``by="commodity"`` computes every series feature per commodity in a single
+vectorised pass, so windows never straddle two commodities.
+
+Rolling windows follow pandas' defaults (NaN until the window is full, NaN
+if it holds a NaN); means and standard deviations run on pandas' own rolling
+kernels so they are bit-identical.  EWMs follow ``ewm(adjust=False)`` as a
+linear filter and ``pct_change`` divides by the value ``k`` rows back, so
+those match the pandas formulations they replace to floating-point rounding.
+Calendar encodings are table lookups, bit-identical to ``math.sin``/``math.cos``.
+"""
+
+from __future__ import annotations
+
+import math
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from pandas.api.indexers import BaseIndexer
+from scipy.signal import lfilter
+
+
+@dataclass(frozen=True)
+class Feature:
+    name: str
+    inputs: tuple[str, ...]
+    fn: Callable[..., np.ndarray]
+
+
+FEATURES: dict[str, Feature] = {}
+
+# Bump when a registered formula changes.  It is part of every feature-set
+# version in feature_store, so stored snapshots are rebuilt, not reused.
+REGISTRY_VERSION = 1
+
+
+def feature(name: str, *inputs: str):
+    """Register ``fn(*input_arrays) -> array`` as feature ``name``."""
+
+    def register(fn):
+        FEATURES[name] = Feature(name, inputs, fn)
+        return fn
+
+    return register
+
+
+# ── Array primitives ─────────────────────────────────────────────────────
+# ``pos`` is each row's offset within its group (e.g. commodity), or None
+# for a single series.  Lags and windows never reach back past the first
+# row of a row's own group, and EWMs restart there.
+
+
+class _GroupWindow(BaseIndexer):
+    """Trailing ``window_size`` rows, clipped at the start of each row's group.
+
+    pandas' rolling kernels restart their running sums wherever a window
+    stops overlapping the previous one, so every group comes out exactly as
+    if it had been rolled on its own.
+    """
+
+    def get_window_bounds(self, num_values=0, min_periods=None, center=None, closed=None, step=None):
+        end = np.arange(1, num_values + 1, dtype=np.int64)
+        start = np.maximum(end - self.window_size, end - 1 - self.pos)
+        return start, end
+
+
+def _nans(n: int) -> np.ndarray:
+    return np.full(n, np.nan)
+
+
+def shift(x: np.ndarray, k: int, pos: np.ndarray | None = None) -> np.ndarray:
+    out = _nans(len(x))
+    if k < len(x):
+        out[k:] = x[:len(x) - k]
+    if pos is not None:
+        out[pos < k] = np.nan
+    return out
+
+
+def diff(x: np.ndarray, k: int = 1, pos: np.ndarray | None = None) -> np.ndarray:
+    return x - shift(x, k, pos)
+
+
+def pct_change(x: np.ndarray, k: int, pos: np.ndarray | None = None) -> np.ndarray:
+    return x / shift(x, k, pos) - 1
+
+
+def rolling(x: np.ndarray, window: int, how: str, pos: np.ndarray | None = None) -> np.ndarray:
+    """``Series.rolling(window).<how>()`` for mean, std (ddof=1), min and max."""
+    if how in ("mean", "std"):
+        # pandas' online sums round differently from a per-window sum, and
+        # lbfgs-fitted models (Huber) amplify even last-bit differences
+        bounds = window if pos is None else _GroupWindow(window_size=window, pos=pos)
+        return getattr(pd.Series(x, copy=False).rolling(bounds, min_periods=window), how)().to_numpy()
+    out = _nans(len(x))
+    if len(x) >= window:
+        out[window - 1:] = getattr(sliding_window_view(x, window), how)(axis=1)
+    if pos is not None:
+        out[pos < window - 1] = np.nan
+    return out
+
+
+def ewm_mean(x: np.ndarray, alpha: float, pos: np.ndarray | None = None) -> np.ndarray:
+    """``Series.ewm(alpha=alpha, adjust=False).mean()`` as a linear filter.
+
+    Each group is left-aligned at its first non-NaN value into one row of
+    a groups × rows matrix, and a single ``lfilter`` call runs along the
+    rows, seeded per row — so every group restarts without a Python loop.
+    """
+    out = _nans(len(x))
+    valid = ~np.isnan(x)
+    if not valid.any():
+        return out
+    if pos is None:
+        pos = np.arange(len(x))
+    group = np.cumsum(pos == 0) - 1
+    first = np.minimum.reduceat(np.where(valid, pos, len(x)), np.flatnonzero(pos == 0))
+    lag = pos - first[group]
+    if (valid != (lag >= 0)).any():
+        # pandas re-weights across interior gaps; not worth replicating
+        return pd.Series(x).groupby(group).ewm(alpha=alpha, adjust=False).mean().to_numpy()
+    rows, cols = group[valid], lag[valid]
+    series = np.zeros((group[-1] + 1, cols.max() + 1))
+    series[rows, cols] = x[valid]
+    smoothed = series.copy()
+    if series.shape[1] > 1:
+        smoothed[:, 1:], _ = lfilter(
+            [alpha], [1.0, alpha - 1.0], series[:, 1:], axis=1, zi=(1 - alpha) * series[:, :1]
+        )
+    out[valid] = smoothed[rows, cols]
+    return out
+
+
+def _flag(mask: np.ndarray) -> np.ndarray:
+    return mask.astype(np.int64)
+
+
+def _cyclic(values: np.ndarray, table: np.ndarray) -> np.ndarray:
+    """Look up ``table[values]``; NaN (from NaT dates) stays NaN."""
+    values = np.asarray(values, dtype=np.float64)
+    missing = np.isnan(values)
+    out = table[np.where(missing, 0, values).astype(np.int64)]
+    out[missing] = np.nan
+    return out
+
+
+_MONTH_SIN = np.array([math.sin(2 * math.pi * m / 12) for m in range(13)])
+_MONTH_COS = np.array([math.cos(2 * math.pi * m / 12) for m in range(13)])
+_DOW_SIN = np.array([math.sin(2 * math.pi * d / 5) for d in range(7)])
+_DOW_COS = np.array([math.cos(2 * math.pi * d / 5) for d in range(7)])
+
+
+# ── Registry ─────────────────────────────────────────────────────────────
+# Raw inputs: price, avg_tone, article_count, date, commodity.  Series
+# features also take POS, the row offsets described above.
+
+POS = "_pos"
+
+for _k in range(1, 11):
+    feature(f"price_lag_{_k}", "price", POS)(lambda p, pos, k=_k: shift(p, k, pos))
+for _k in (1, 2, 3, 5, 10):
+    feature(f"return_{_k}", "price", POS)(lambda p, pos, k=_k: pct_change(p, k, pos))
+for _w in (3, 5, 10, 20):
+    feature(f"price_ma_{_w}", "price", POS)(lambda p, pos, w=_w: rolling(p, w, "mean", pos))
+for _w in (5, 10, 20):
+    feature(f"volatility_{_w}", "return_1", POS)(lambda r, pos, w=_w: rolling(r, w, "std", pos))
+for _w in (3, 5, 10):
+    feature(f"tone_ma_{_w}", "avg_tone", POS)(lambda t, pos, w=_w: rolling(t, w, "mean", pos))
+for _w in (5, 10):
+    feature(f"article_count_ma_{_w}", "article_count", POS)(lambda a, pos, w=_w: rolling(a, w, "mean", pos))
+
+feature("price_change_1", "price", "price_lag_1")(lambda p, l1: p - l1)
+feature("price_change_2", "price_lag_1", "price_lag_2")(lambda l1, l2: l1 - l2)
+feature("price_diff_1", "price", "price_lag_1")(lambda p, l1: p - l1)
+feature("price_diff_2", "price_lag_1", "price_lag_2")(lambda l1, l2: l1 - l2)
+feature("momentum_3", "price", "price_lag_2")(lambda p, l2: p - l2)
+feature("momentum_5", "price", "price_lag_4")(lambda p, l4: p - l4)
+feature("acceleration", "return_1", "return_2")(lambda r1, r2: r1 - r2)
+feature("trend_strength", "price_ma_3", "price_ma_5")(lambda m3, m5: m3 - m5)
+feature("trend_10", "price_ma_5", "price_ma_10")(lambda m5, m10: m5 - m10)
+feature("price_vs_ma5", "price", "price_ma_5")(lambda p, m: p / m - 1)
+feature("price_vs_ma10", "price", "price_ma_10")(lambda p, m: p / m - 1)
+feature("price_vs_ma20", "price", "price_ma_20")(lambda p, m: p / m - 1)
+feature("ma3_vs_ma5", "price_ma_3", "price_ma_5")(lambda m3, m5: m3 / m5 - 1)
+
+# Downside pressure and sentiment
+feature("neg_tone_flag", "avg_tone")(lambda t: _flag(t < 0))
+feature("strong_neg_tone", "avg_tone")(lambda t: _flag(t < -0.5))
+feature("down_momentum", "price", "price_lag_1")(lambda p, l1: _flag(p < l1))
+feature("volatility_spike", "volatility_5", POS)(lambda v, pos: _flag(v > rolling(v, 5, "mean", pos)))
+feature("tone_change", "avg_tone", POS)(lambda t, pos: diff(t, 1, pos))
+feature("tone_x_volatility", "avg_tone", "volatility_5")(lambda t, v: t * v)
+
+# Bollinger bands (20-day)
+feature("_bb_std", "price", POS)(lambda p, pos: rolling(p, 20, "std", pos))
+feature("bb_upper", "price_ma_20", "_bb_std")(lambda m, s: m + 2 * s)
+feature("bb_lower", "price_ma_20", "_bb_std")(lambda m, s: m - 2 * s)
+feature("bb_width", "bb_upper", "bb_lower", "price_ma_20")(lambda u, lo, m: (u - lo) / m)
+feature("bb_position", "price", "bb_upper", "bb_lower")(lambda p, u, lo: (p - lo) / (u - lo + 1e-9))
+
+# MACD
+feature("_ema12", "price", POS)(lambda p, pos: ewm_mean(p, 2 / 13, pos))
+feature("_ema26", "price", POS)(lambda p, pos: ewm_mean(p, 2 / 27, pos))
+feature("macd", "_ema12", "_ema26")(lambda e12, e26: e12 - e26)
+feature("macd_signal", "macd", POS)(lambda m, pos: ewm_mean(m, 2 / 10, pos))
+feature("macd_hist", "macd", "macd_signal")(lambda m, s: m - s)
+feature("price_vs_ema12", "_ema12", "price")(lambda e12, p: e12 / p - 1)
+feature("ema12_vs_ema26", "_ema12", "_ema26")(lambda e12, e26: e12 / e26 - 1)
+
+
+# RSI (Wilder smoothing, com=13)
+@feature("rsi", "price", POS)
+def _rsi(price, pos):
+    delta = diff(price, 1, pos)
+    avg_gain = ewm_mean(np.maximum(delta, 0), 1 / 14, pos)
+    avg_loss = ewm_mean(-np.minimum(delta, 0), 1 / 14, pos)
+    return 100 - (100 / (1 + avg_gain / np.where(avg_loss == 0, np.nan, avg_loss)))
+
+
+feature("rsi_norm", "rsi")(lambda r: (r - 50) / 50)
+feature("rsi_overbought", "rsi")(lambda r: _flag(r > 70))
+feature("rsi_oversold", "rsi")(lambda r: _flag(r < 30))
+
+# Stochastic oscillator (14-day)
+feature("_low_14", "price", POS)(lambda p, pos: rolling(p, 14, "min", pos))
+feature("_high_14", "price", POS)(lambda p, pos: rolling(p, 14, "max", pos))
+feature("stoch_k", "price", "_low_14", "_high_14")(lambda p, lo, hi: 100 * (p - lo) / (hi - lo + 1e-9))
+feature("stoch_d", "stoch_k", POS)(lambda k, pos: rolling(k, 3, "mean", pos))
+
+# Sentiment × technical interactions
+feature("macd_x_tone", "macd_hist", "avg_tone")(lambda h, t: h * t)
+feature("rsi_x_tone", "rsi_norm", "avg_tone")(lambda r, t: r * t)
+feature("macd_x_vol", "macd_hist", "volatility_5")(lambda h, v: h * v)
+feature("rsi_x_vol", "rsi_norm", "volatility_5")(lambda r, v: r * v)
+
+# Calendar (date is resolved to a DatetimeIndex)
+feature("_month", "date")(lambda d: d.month.to_numpy())
+feature("day_of_week", "date")(lambda d: d.dayofweek.to_numpy())
+feature("month_sin", "_month")(lambda m: _cyclic(m, _MONTH_SIN))
+feature("month_cos", "_month")(lambda m: _cyclic(m, _MONTH_COS))
+feature("dow_sin", "day_of_week")(lambda d: _cyclic(d, _DOW_SIN))
+feature("dow_cos", "day_of_week")(lambda d: _cyclic(d, _DOW_COS))
+
+feature("is_wti", "commodity")(lambda c: _flag(c == "WTI"))
+
+
+# ── Feature sets ─────────────────────────────────────────────────────────
+# In the column order each consumer has always produced.
+
+DIRECTION_FEATURES = [
+    "neg_tone_flag", "strong_neg_tone", "volatility_spike", "down_momentum",
+    "price_diff_1", "price_diff_2", "tone_ma_3", "tone_x_volatility",
+    "return_1", "return_2", "trend_strength", "acceleration", "tone_change",
+    "momentum_3", "price_vs_ma5", "ma3_vs_ma5",
+    "macd", "macd_signal", "macd_hist", "price_vs_ema12", "ema12_vs_ema26",
+    "rsi", "rsi_norm", "rsi_overbought", "rsi_oversold",
+    "month_sin", "month_cos", "macd_x_tone", "rsi_x_tone", "macd_x_vol",
+]
+
+PRICE_FEATURES = [
+    "neg_tone_flag", "strong_neg_tone", "volatility_spike", "down_momentum",
+    "price_diff_1", "price_diff_2",
+    "return_1", "return_2", "return_3", "return_5", "return_10",
+    "price_ma_3", "price_ma_5", "price_ma_10", "price_ma_20",
+    "volatility_5", "volatility_10", "volatility_20",
+    "tone_ma_3", "tone_x_volatility", "tone_ma_5", "tone_ma_10",
+    "trend_strength", "trend_10", "acceleration", "tone_change",
+    "momentum_3", "momentum_5",
+    "price_vs_ma5", "ma3_vs_ma5", "price_vs_ma10", "price_vs_ma20",
+    "bb_upper", "bb_lower", "bb_width", "bb_position",
+    "macd", "macd_signal", "macd_hist", "price_vs_ema12", "ema12_vs_ema26",
+    "rsi", "rsi_norm", "rsi_overbought", "rsi_oversold", "stoch_k", "stoch_d",
+    "month_sin", "month_cos", "dow_sin", "dow_cos",
+    "macd_x_tone", "rsi_x_tone", "macd_x_vol", "rsi_x_vol", "is_wti",
+]
+
+DAILY_TABLE_FEATURES = [
+    *(f"price_lag_{k}" for k in range(1, 11)),
+    "return_1", "return_2", "return_3", "return_5", "return_10",
+    "price_change_1", "price_change_2",
+    "price_ma_3", "price_ma_5", "price_ma_10", "price_ma_20",
+    "volatility_5", "volatility_10", "volatility_20",
+    "article_count_ma_5", "article_count_ma_10", "tone_ma_5", "tone_ma_10",
+    "day_of_week", "dow_sin", "dow_cos",
+]
+
+
+# ── Evaluation ───────────────────────────────────────────────────────────
+
+
+def _input_array(df: pd.DataFrame, name: str):
+    column = df[name]
+    if name == "date":
+        return pd.DatetimeIndex(pd.to_datetime(column))
+    if name == "commodity":
+        return column.to_numpy()
+    return column.to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def _group_layout(keys: pd.Series) -> tuple[np.ndarray | None, np.ndarray]:
+    """Row order that makes each group contiguous (``None`` if it already
+    is) and every row's offset within its group, in that order."""
+    codes, _ = pd.factorize(keys, use_na_sentinel=False)
+    order = np.argsort(codes, kind="stable")
+    if (order == np.arange(len(order))).all():
+        order = None
+    else:
+        codes = codes[order]
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]]) if len(codes) else np.array([], dtype=np.int64)
+    lengths = np.diff(np.r_[starts, len(codes)])
+    pos = np.arange(len(codes)) - np.repeat(starts, lengths)
+    return order, pos
+
+
+def _resolve(df: pd.DataFrame, names: Iterable[str], pos: np.ndarray | None = None) -> dict[str, np.ndarray]:
+    values: dict[str, np.ndarray] = {POS: pos}
+
+    def get(name: str):
+        if name not in values:
+            if name in df.columns:
+                values[name] = _input_array(df, name)
+            elif name in FEATURES:
+                spec = FEATURES[name]
+                values[name] = spec.fn(*(get(i) for i in spec.inputs))
+            else:
+                raise KeyError(f"{name!r} is neither a registered feature nor an input column")
+        return values[name]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for name in names:
+            get(name)
+    return values
+
+
+def compute_features(df: pd.DataFrame, names: Iterable[str], by: str | None = None) -> pd.DataFrame:
+    """A frame (same index as ``df``) holding exactly ``names``, in order.
+
+    Columns of ``df`` are passed through unchanged; everything else is
+    computed from the registry along with whatever it depends on.
+
+    With ``by`` (e.g. ``"commodity"``) the frame holds several series: lags,
+    windows and EWMs are computed per group, in one pass over the rows with
+    each group made contiguous.  Rows keep their frame order within a group,
+    so sort by date first.
+    """
+    names = list(names)
+    missing = [n for n in names if n not in df.columns]
+    order, pos = _group_layout(df[by]) if by is not None and missing else (None, None)
+    values = _resolve(df if order is None else df.take(order), missing, pos)
+    if order is not None:
+        restore = np.empty_like(order)
+        restore[order] = np.arange(len(order))
+        values = {n: values[n][restore] for n in missing}
+    return pd.DataFrame(
+        {n: df[n] if n in df.columns else values[n] for n in names},
+        index=df.index,
+    )
+
+
+def add_features(df: pd.DataFrame, names: Iterable[str], by: str | None = None) -> pd.DataFrame:
+    """``df`` with whichever of ``names`` it lacks appended (in one concat)."""
+    missing = [n for n in dict.fromkeys(names) if n not in df.columns]
+    if not missing:
+        return df
+    return pd.concat([df, compute_features(df, missing, by)], axis=1)
+
+
+def required_inputs(names: Iterable[str], columns: Iterable[str] = ()) -> set[str]:
+    """Raw input columns needed to compute ``names`` from scratch.
+
+    With ``columns`` (a frame's columns) the walk stops at any name among
+    them, as ``compute_features`` reads those instead of recomputing them:
+    the result is every column of that frame the features are built from.
+    """
+    columns = set(columns)
+    needed: set[str] = set()
+    stack = list(names)
+    while stack:
+        name = stack.pop()
+        if name in columns:
+            needed.add(name)
+        elif name in FEATURES:
+            stack.extend(FEATURES[name].inputs)
+        elif name != POS:
+            needed.add(name)
+    return needed
@@ -0,0 +1,538 @@
+"""Tree compiler — fitted tree ensembles flattened into packed NumPy node
+arrays for fast inference without the estimators' own predict stack.
+
+``RandomForestClassifier.predict_proba`` on one row walks 500 trees through
+Python-level dispatch and a joblib thread pool; most of the ~30 ms goes to
+overhead, not to the comparisons.  ``compile_model`` copies every tree of a
+fitted model into one set of flat arrays (split feature, threshold, missing
+direction, child indices, leaf value) and predicts by advancing all
+(row, tree) cursors one level per step with array gathers — a few dozen
+vectorised steps, whatever the batch size.
+
+Supported models:
+
+* scikit-learn ``RandomForest*`` / ``ExtraTrees*`` / ``DecisionTree*``
+* scikit-learn ``GradientBoosting*`` and ``HistGradientBoosting*``
+* ``XGBRegressor`` / ``XGBClassifier`` (``gbtree`` booster)
+* ``LGBMRegressor`` / ``LGBMClassifier``
+* ``Stacking*`` — tree base learners are compiled; the others (the scaled
+  Ridge pipeline) and the meta-learner run as they are
+
+Classifiers are binary only for the boosted models, as everything trained
+here.  Each library's split rule is reproduced exactly, including the
+input precision it compares in (float32 for scikit-learn trees and
+XGBoost, float64 for HistGBM and LightGBM) and where missing values go,
+so every row reaches the same leaves.  The leaf values are then summed in
+float64, with the constant each booster adds (init estimator, baseline)
+read back by scoring one probe row; the result differs from the
+library's own by float rounding only (~1e-15).  XGBoost adds its base
+score and leaf values in float32, tree by tree, and applies its sigmoid
+in float32; that is done the same way here, so its output matches
+exactly.  Anything else — categorical splits, multi-class boosting, other
+link functions — raises ``ValueError``; ``compile_for_serving`` then keeps
+the original model.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import Any
+
+import numpy as np
+import pandas as pd
+from scipy.special import expit
+
+log = logging.getLogger(__name__)
+
+# Rows × trees advanced together; bounds the cursor arrays to a few MB.
+CHUNK_CURSORS = 1 << 18
+COMPACT_EVERY = 4
+
+_IDENTITY_LOSSES = {"squared_error", "absolute_error", "huber", "quantile"}
+_XGB_IDENTITY = {"reg:squarederror", "reg:absoluteerror", "reg:pseudohubererror", "reg:quantileerror"}
+_LGBM_IDENTITY = {"regression", "regression_l1", "huber", "fair", "quantile"}
+
+
+# ── Packed trees ─────────────────────────────────────────────────────────
+
+
+@dataclass(frozen=True)
+class PackedTrees:
+    """Every tree of an ensemble in one set of node arrays.
+
+    A row goes to the left child when ``x <= threshold``, or when ``x`` is
+    NaN and ``missing_left`` is set.  Each tree is laid out breadth-first
+    with siblings adjacent, so the next node is ``left + went_right``.
+    Features are numbered from 1: column 0 of the traversal matrix is a
+    -inf sentinel that every leaf splits on, sending the cursor to its own
+    index, so finished cursors stay put without a branch.
+    """
+
+    feature: np.ndarray  # intp [n_nodes], 1-based; 0 at leaves
+    threshold: np.ndarray  # float64 [n_nodes]
+    missing_left: np.ndarray  # bool [n_nodes]
+    left: np.ndarray  # intp [n_nodes]; the right child is left + 1, leaves point at themselves
+    value: np.ndarray  # float64 [n_nodes, n_outputs]
+    roots: np.ndarray  # intp [n_trees]
+    depth: int
+    float32_inputs: bool
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.feature)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in (self.feature, self.threshold, self.missing_left, self.left, self.value))
+
+    def leaves(self, X: np.ndarray) -> np.ndarray:
+        """Leaf node reached in every tree, ``[n_rows, n_trees]``."""
+        dtype = np.float32 if self.float32_inputs else np.float64
+        n_rows, n_features = X.shape
+        padded = np.empty((n_rows, n_features + 1), dtype=dtype)
+        padded[:, 0] = -np.inf
+        padded[:, 1:] = X
+        flat = padded.ravel()
+        has_nan = bool(np.isnan(flat).any())
+        out = np.repeat(self.roots[None, :], n_rows, axis=0).ravel()
+        node = out.copy()
+        position = np.arange(len(out))
+        offset = position // self.n_trees * (n_features + 1)
+        for step in range(self.depth):
+            feature = self.feature[node]
+            if step % COMPACT_EVERY == COMPACT_EVERY - 1:
+                # retire cursors that have reached a leaf
+                live = feature != 0
+                if not live.all():
+                    out[position[~live]] = node[~live]
+                    position, node, offset, feature = position[live], node[live], offset[live], feature[live]
+            x = flat[offset + feature]
+            go_right = x > self.threshold[node]
+            if has_nan:
+                go_right |= np.isnan(x) & ~self.missing_left[node]
+            node = self.left[node] + go_right
+        out[position] = node
+        return out.reshape(n_rows, self.n_trees)
+
+    def aggregate(self, X: np.ndarray, how: str) -> np.ndarray:
+        """Sum or mean of the leaf values over trees, ``[n_rows, n_outputs]``,
+        in row chunks of at most ``CHUNK_CURSORS`` cursors."""
+        out = np.empty((len(X), self.value.shape[1]))
+        step = max(1, CHUNK_CURSORS // max(self.n_trees, 1))
+        for start in range(0, len(X), step):
+            leaves = self.leaves(X[start:start + step])
+            out[start:start + step] = self.value[leaves].sum(axis=1)
+        if how == "mean":
+            out /= self.n_trees
+        return out
+
+    def sum_float32(self, X: np.ndarray, start: np.ndarray) -> np.ndarray:
+        """``start`` plus every tree's leaf value, added one tree at a time in
+        float32 as XGBoost does, ``[n_rows, 1]``."""
+        out = np.empty((len(X), 1), dtype=np.float32)
+        step = max(1, CHUNK_CURSORS // max(self.n_trees, 1))
+        for start_row in range(0, len(X), step):
+            leaves = self.leaves(X[start_row:start_row + step])
+            terms = np.empty((len(leaves), self.n_trees + 1), dtype=np.float32)
+            terms[:, 0] = start[0]
+            terms[:, 1:] = self.value[leaves, 0]
+            # cumsum adds left to right; a sum() would add pairwise
+            out[start_row:start_row + step, 0] = np.cumsum(terms, axis=1, dtype=np.float32)[:, -1]
+        return out
+
+
+def _breadth_first(left: np.ndarray, right: np.ndarray) -> tuple[np.ndarray, int]:
+    """Old node ids in breadth-first order with siblings adjacent, and the
+    tree depth."""
+    levels = [np.array([0])]
+    while True:
+        internal = levels[-1][left[levels[-1]] >= 0]
+        if not len(internal):
+            return np.concatenate(levels), len(levels) - 1
+        levels.append(np.column_stack([left[internal], right[internal]]).ravel())
+
+
+def _pack(trees: list[dict[str, np.ndarray]], float32_inputs: bool) -> PackedTrees:
+    """Concatenate per-tree node arrays (local child indices, -1 at leaves)."""
+    feature, threshold, missing, left, value, roots = [], [], [], [], [], []
+    depth, base = 0, 0
+    for tree in trees:
+        order, tree_depth = _breadth_first(tree["left"], tree["right"])
+        renumber = np.empty(len(tree["left"]), dtype=np.intp)
+        renumber[order] = np.arange(len(order))
+        children = tree["left"][order]
+        leaf = children < 0
+        left.append(np.where(leaf, np.arange(len(order)), renumber[children]) + base)
+        feature.append(np.where(leaf, 0, tree["feature"][order] + 1))
+        threshold.append(np.where(leaf, 0.0, tree["threshold"][order]))
+        missing.append(np.asarray(tree["missing_left"], dtype=bool)[order] & ~leaf)
+        value.append(np.asarray(tree["value"], dtype=np.float64).reshape(len(tree["left"]), -1)[order])
+        roots.append(base)
+        depth = max(depth, tree_depth)
+        base += len(order)
+    return PackedTrees(
+        feature=np.concatenate(feature).astype(np.intp),
+        threshold=np.concatenate(threshold).astype(np.float64),
+        missing_left=np.concatenate(missing),
+        left=np.concatenate(left).astype(np.intp),
+        value=np.concatenate(value),
+        roots=np.array(roots, dtype=np.intp),
+        depth=depth,
+        float32_inputs=float32_inputs,
+    )
+
+
+# ── Per-library extraction ───────────────────────────────────────────────
+
+
+def _sklearn_tree(tree, scale: float = 1.0, proba: bool = False) -> dict[str, np.ndarray]:
+    value = tree.value[:, 0, :]
+    if proba:
+        # DecisionTreeClassifier.predict_proba normalises each leaf
+        total = value.sum(axis=1, keepdims=True)
+        value = value / np.where(total == 0.0, 1.0, total)
+    missing = getattr(tree, "missing_go_to_left", None)
+    return {
+        "feature": tree.feature,
+        "threshold": tree.threshold,
+        "missing_left": np.zeros(tree.node_count, dtype=bool) if missing is None else missing,
+        "left": tree.children_left,
+        "right": tree.children_right,
+        "value": value * scale,
+    }
+
+
+def _hist_tree(predictor) -> dict[str, np.ndarray]:
+    nodes = predictor.nodes
+    if nodes["is_categorical"].any():
+        raise ValueError("categorical HistGradientBoosting splits are not supported")
+    leaf = nodes["is_leaf"].astype(bool)
+    return {
+        "feature": nodes["feature_idx"],
+        "threshold": nodes["num_threshold"],
+        "missing_left": nodes["missing_go_to_left"],
+        "left": np.where(leaf, -1, nodes["left"].astype(np.int64)),
+        "right": np.where(leaf, -1, nodes["right"].astype(np.int64)),
+        "value": nodes["value"],
+    }
+
+
+def _xgb_trees(model) -> list[dict[str, np.ndarray]]:
+    raw = json.loads(bytes(model.get_booster().save_raw("json")))
+    booster = raw["learner"]["gradient_booster"]
+    if booster["name"] != "gbtree":
+        raise ValueError(f"XGBoost booster {booster['name']!r} is not supported")
+    trees, info = booster["model"]["trees"], booster["model"]["tree_info"]
+    if any(info):
+        raise ValueError("multi-class XGBoost models are not supported")
+    best = getattr(model, "best_iteration", None)
+    if best is not None:
+        per_round = int(booster["model"]["gbtree_model_param"].get("num_parallel_tree", 1))
+        trees = trees[: (best + 1) * per_round]
+
+    out = []
+    for tree in trees:
+        if any(tree.get("split_type", [])):
+            raise ValueError("categorical XGBoost splits are not supported")
+        left = np.array(tree["left_children"], dtype=np.int64)
+        split = np.array(tree["split_conditions"], dtype=np.float32)
+        # XGBoost goes left when float32(x) < split; as "<=", that is the
+        # next float32 below the split value.
+        threshold = np.nextafter(split, np.float32(-np.inf)).astype(np.float64)
+        out.append({
+            "feature": np.array(tree["split_indices"], dtype=np.int64),
+            "threshold": threshold,
+            "missing_left": np.array(tree["default_left"], dtype=bool),
+            "left": left,
+            "right": np.array(tree["right_children"], dtype=np.int64),
+            "value": np.where(left < 0, split.astype(np.float64), 0.0),  # leaf weight sits in split_conditions
+        })
+    return out
+
+
+def _xgb_base_margin(model, n_features: int) -> np.ndarray:
+    """The margin XGBoost starts every row from, as float32.  The saved
+    ``base_score`` is rounded (and a probability for binary:logistic), so
+    it is read from a copy of the booster whose leaves are all zero."""
+    import xgboost
+
+    raw = json.loads(bytes(model.get_booster().save_raw("json")))
+    for tree in raw["learner"]["gradient_booster"]["model"]["trees"]:
+        leaf = np.array(tree["left_children"]) < 0
+        tree["split_conditions"] = np.where(leaf, 0.0, tree["split_conditions"]).tolist()
+    booster = xgboost.Booster(model_file=bytearray(json.dumps(raw).encode()))
+    margin = booster.inplace_predict(np.zeros((1, n_features)), predict_type="margin")
+    return np.asarray(margin, dtype=np.float32).ravel()[:1]
+
+
+def _lgbm_trees(dump: dict) -> list[dict[str, np.ndarray]]:
+    if dump.get("num_tree_per_iteration", 1) != 1:
+        raise ValueError("multi-class LightGBM models are not supported")
+    out = []
+    for info in dump["tree_info"]:
+        feature, threshold, missing, left, right, value = [], [], [], [], [], []
+        stack = [(info["tree_structure"], None, None)]
+        while stack:
+            node, parent, side = stack.pop()
+            i = len(feature)
+            if parent is not None:
+                (left if side == 0 else right)[parent] = i
+            left.append(-1)
+            right.append(-1)
+            if "leaf_value" in node:
+                if "leaf_coeff" in node:
+                    raise ValueError("LightGBM linear trees are not supported")
+                feature.append(0)
+                threshold.append(0.0)
+                missing.append(False)
+                value.append(node["leaf_value"])
+                continue
+            if node["decision_type"] != "<=":
+                raise ValueError("categorical LightGBM splits are not supported")
+            if node["missing_type"] == "Zero":
+                raise ValueError("LightGBM zero_as_missing splits are not supported")
+            feature.append(node["split_feature"])
+            threshold.append(node["threshold"])
+            # missing_type None: NaN is read as 0.0
+            missing.append(node["default_left"] if node["missing_type"] == "NaN" else 0.0 <= node["threshold"])
+            value.append(0.0)
+            stack.append((node["right_child"], i, 1))
+            stack.append((node["left_child"], i, 0))
+        out.append({
+            "feature": np.array(feature, dtype=np.int64),
+            "threshold": np.array(threshold, dtype=np.float64),
+            "missing_left": np.array(missing, dtype=bool),
+            "left": np.array(left, dtype=np.int64),
+            "right": np.array(right, dtype=np.int64),
+            "value": np.array(value, dtype=np.float64),
+        })
+    return out
+
+
+# ── Compiled models ──────────────────────────────────────────────────────
+
+
+@dataclass(frozen=True)
+class CompiledModel:
+    """A compiled tree ensemble with the estimator's predict methods.
+
+    Takes arrays or DataFrames with the training columns, in order.
+    """
+
+    source: str
+    trees: PackedTrees
+    n_features: int
+    aggregate: str = "sum"  # "mean" for forests, "float32" for XGBoost (offset first)
+    offset: np.ndarray = field(default_factory=lambda: np.zeros(1))
+    link: str = "identity"  # "identity" | "sigmoid" | "proba"
+    sigmoid_scale: float = 1.0
+    classes_: np.ndarray | None = None
+
+    def _raw(self, X) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"{self.source} expects {self.n_features} features, got shape {X.shape}")
+        if self.aggregate == "float32":
+            return self.trees.sum_float32(X, self.offset)
+        return self.trees.aggregate(X, self.aggregate) + self.offset
+
+    def decision_function(self, X) -> np.ndarray:
+        if self.link == "proba":
+            raise AttributeError(f"{self.source} has no decision_function")
+        return self._raw(X)[:, 0]
+
+    def predict_proba(self, X) -> np.ndarray:
+        if self.classes_ is None:
+            raise AttributeError(f"{self.source} has no predict_proba")
+        raw = self._raw(X)
+        if self.link == "proba":
+            return raw
+        # a float32 margin (XGBoost) keeps the sigmoid in float32 as well
+        p = expit(self.sigmoid_scale * raw[:, 0])
+        return np.column_stack([1.0 - p, p])
+
+    def predict(self, X) -> np.ndarray:
+        if self.classes_ is not None:
+            return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+        raw = self._raw(X)
+        return raw[:, 0] if raw.shape[1] == 1 else raw
+
+
+@dataclass(frozen=True)
+class CompiledStack:
+    """A stacking ensemble whose tree base learners are compiled."""
+
+    source: str
+    model: Any
+    estimators: list
+    passthrough: bool
+
+    @property
+    def classes_(self):
+        return getattr(self.model, "classes_", None)
+
+    def transform(self, X) -> np.ndarray:
+        # as _BaseStacking._concatenate_predictions
+        features = []
+        for est, method in zip(self.estimators, self.model.stack_method_):
+            preds = getattr(est, method)(X if not isinstance(est, CompiledModel) else np.asarray(X, dtype=np.float64))
+            if preds.ndim == 1:
+                features.append(preds.reshape(-1, 1))
+            elif method == "predict_proba" and len(self.classes_) == 2:
+                features.append(preds[:, 1:])
+            else:
+                features.append(preds)
+        if self.passthrough:
+            features.append(np.asarray(X, dtype=np.float64))
+        return np.hstack(features)
+
+    def predict(self, X) -> np.ndarray:
+        preds = self.model.final_estimator_.predict(self.transform(X))
+        if self.classes_ is not None:
+            return self.model._label_encoder.inverse_transform(preds)
+        return preds
+
+    def predict_proba(self, X) -> np.ndarray:
+        return self.model.final_estimator_.predict_proba(self.transform(X))
+
+    def decision_function(self, X) -> np.ndarray:
+        return self.model.final_estimator_.decision_function(self.transform(X))
+
+
+def _probe(model, n_features: int):
+    """One all-zero row, named when the model was fitted on a DataFrame."""
+    names = getattr(model, "feature_names_in_", None)
+    if names is not None:
+        return pd.DataFrame(np.zeros((1, len(names))), columns=list(names))
+    return np.zeros((1, n_features))
+
+
+def _calibrated(model, trees: PackedTrees, n_features: int, margin, **kwargs) -> CompiledModel:
+    """A boosted model whose constant term is ``margin(probe) - Σ trees(probe)``."""
+    probe = _probe(model, n_features)
+    tree_sum = trees.aggregate(np.asarray(probe, dtype=np.float64), "sum")[0]
+    offset = np.atleast_1d(np.asarray(margin(probe), dtype=np.float64).ravel()) - tree_sum
+    return CompiledModel(type(model).__name__, trees, n_features, offset=offset, **kwargs)
+
+
+def _binary_classes(model) -> np.ndarray:
+    if len(model.classes_) != 2:
+        raise ValueError(f"multi-class {type(model).__name__} models are not supported")
+    return model.classes_
+
+
+def compile_model(model: Any) -> CompiledModel | CompiledStack:
+    """Compile a fitted tree ensemble; ``ValueError`` if it is not one."""
+    name = type(model).__name__
+    module = type(model).__module__
+
+    if name in ("StackingRegressor", "StackingClassifier"):
+        estimators = []
+        for est in model.estimators_:
+            try:
+                estimators.append(compile_model(est))
+            except ValueError:
+                estimators.append(est)  # e.g. the scaled Ridge pipeline
+        if not any(isinstance(e, CompiledModel) for e in estimators):
+            raise ValueError(f"{name} has no tree base learners to compile")
+        return CompiledStack(name, model, estimators, bool(model.passthrough))
+
+    if module.startswith("sklearn.ensemble._forest") or module.startswith("sklearn.tree"):
+        classifier = hasattr(model, "classes_")
+        if getattr(model, "n_outputs_", 1) != 1:
+            raise ValueError(f"multi-output {name} models are not supported")
+        estimators = model.estimators_ if hasattr(model, "estimators_") else [model]
+        trees = _pack([_sklearn_tree(e.tree_, proba=classifier) for e in estimators], float32_inputs=True)
+        return CompiledModel(
+            name, trees, model.n_features_in_, aggregate="mean", offset=np.zeros(trees.value.shape[1]),
+            link="proba" if classifier else "identity", classes_=model.classes_ if classifier else None,
+        )
+
+    if name in ("GradientBoostingRegressor", "GradientBoostingClassifier"):
+        classifier = name.endswith("Classifier")
+        if classifier:
+            classes = _binary_classes(model)
+        elif model.loss not in _IDENTITY_LOSSES:
+            raise ValueError(f"{name}(loss={model.loss!r}) is not supported")
+        trees = _pack(
+            [_sklearn_tree(e.tree_, scale=model.learning_rate) for e in model.estimators_[:, 0]],
+            float32_inputs=True,
+        )
+        return _calibrated(
+            model, trees, model.n_features_in_,
+            model.decision_function if classifier else model.predict,
+            link="sigmoid" if classifier else "identity", classes_=classes if classifier else None,
+        )
+
+    if name in ("HistGradientBoostingRegressor", "HistGradientBoostingClassifier"):
+        classifier = name.endswith("Classifier")
+        if classifier:
+            classes = _binary_classes(model)
+        elif model.loss not in _IDENTITY_LOSSES:
+            raise ValueError(f"{name}(loss={model.loss!r}) is not supported")
+        trees = _pack([_hist_tree(p) for (p,) in model._predictors], float32_inputs=False)
+        return _calibrated(
+            model, trees, model.n_features_in_,
+            model.decision_function if classifier else model.predict,
+            link="sigmoid" if classifier else "identity", classes_=classes if classifier else None,
+        )
+
+    if module.startswith("xgboost"):
+        objective = json.loads(model.get_booster().save_config())["learner"]["objective"]["name"]
+        classifier = objective == "binary:logistic"
+        if classifier:
+            classes = _binary_classes(model)
+        elif objective not in _XGB_IDENTITY:
+            raise ValueError(f"XGBoost objective {objective!r} is not supported")
+        trees = _pack(_xgb_trees(model), float32_inputs=True)
+        return CompiledModel(
+            name, trees, model.n_features_in_, aggregate="float32",
+            offset=_xgb_base_margin(model, model.n_features_in_),
+            link="sigmoid" if classifier else "identity", classes_=classes if classifier else None,
+        )
+
+    if module.startswith("lightgbm"):
+        dump = model.booster_.dump_model()
+        objective, *params = dump["objective"].split()
+        classifier = objective == "binary"
+        scale = 1.0
+        if classifier:
+            classes = _binary_classes(model)
+            scale = float(dict(p.split(":") for p in params).get("sigmoid", 1.0))
+        elif objective not in _LGBM_IDENTITY:
+            raise ValueError(f"LightGBM objective {objective!r} is not supported")
+        trees = _pack(_lgbm_trees(dump), float32_inputs=False)
+        if dump.get("average_output"):
+            return CompiledModel(
+                name, trees, model.n_features_in_, aggregate="mean", offset=np.zeros(1),
+                link="sigmoid" if classifier else "identity", sigmoid_scale=scale,
+                classes_=classes if classifier else None,
+            )
+        return _calibrated(
+            model, trees, model.n_features_in_,
+            lambda X: model.predict(X, raw_score=True),
+            link="sigmoid" if classifier else "identity", sigmoid_scale=scale,
+            classes_=classes if classifier else None,
+        )
+
+    raise ValueError(f"{name} is not a supported tree ensemble")
+
+
+def compile_for_serving(model: Any) -> Any:
+    """``compile_model(model)``, or ``model`` itself when it cannot be compiled."""
+    try:
+        compiled = compile_model(model)
+    except ValueError as exc:
+        log.info("Serving %s uncompiled: %s", type(model).__name__, exc)
+        return model
+    except Exception:
+        log.exception("Could not compile %s; serving it uncompiled", type(model).__name__)
+        return model
+    log.info("Compiled %s for serving", type(model).__name__)
+    return compiled
@@ -0,0 +1,536 @@
+"""
+backtest.py
+===========
+Walk-forward backtest — SIGNAL: A Shell Intelligence System
+------------------------------------------------------------
+Replays the Direction Signal Engine (train_model.py) and the Price
+Forecast Engine (train_price_model.py) through history the way they would
+have been run live: retrained every --retrain period on everything known
+at that point, then trading the following period on their signals.
+
+Each model's table is prepared exactly as its trainer prepares it
+(``build_dataset``); commodities are pooled for training, as there.
+Training rows whose target looks past a window's cut-off are left out of
+that window (a horizon-long embargo), so no fit sees prices it would not
+have had.  Windows are fitted in parallel processes sharing a --jobs core
+budget, from memory-mapped fold arrays (training_harness.py).
+
+Every fitted window is cached under --cache-dir, keyed on the model
+configuration and a hash of its training rows.  Rerunning after new data
+arrives refits only the windows whose training set changed (the new
+ones); changing --threshold, --min-move or --cost-bps refits nothing.
+
+Positions
+---------
+  direction  +1 when P(UP) >= --threshold, -1 when P(UP) <= 1 - threshold,
+             flat in between (train_model.py's confidence bands)
+  price      the sign of the forecast move from today's price, flat when it
+             is within --min-move
+
+A position taken on day t earns the commodity's return from t to the next
+row; --cost-bps is charged on every unit of position change.  P&L, equity
+and drawdown are computed for all rows at once, per (model, commodity).
+
+Usage
+-----
+    python backtest.py [--models direction,price] [--table PATH] [--commodities WTI,BRENT]
+                       [--retrain QS] [--min-train 2] [--start 2020-01-01]
+                       [--direction-model forest] [--threshold 0.75]
+                       [--price-model HistGBM] [--price-target next_price] [--min-move 0.0]
+                       [--cost-bps 0] [--jobs N] [--refit]
+                       [--cache-dir outputs/backtest/cache] [--out outputs/backtest]
+
+Outputs
+-------
+  outputs/backtest/positions.csv  — per model, commodity and day: signal, position, return, P&L, equity
+  outputs/backtest/summary.csv    — per model and commodity: return, Sharpe, hit rate, drawdown, turnover
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+import joblib
+import numpy as np
+import pandas as pd
+from threadpoolctl import threadpool_limits
+
+import train_model
+import train_price_model
+from training_harness import TrainingHarness
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s [%(levelname)s] %(message)s",
+)
+log = logging.getLogger(__name__)
+
+DIRECTION_TABLE = "data/processed/model_training_table.parquet"
+DEFAULT_CACHE_DIR = "outputs/backtest/cache"
+DEFAULT_OUT_DIR = "outputs/backtest"
+
+
+# ---------------------------------------------------------------------------
+# Replay inputs
+# ---------------------------------------------------------------------------
+
+@dataclass
+class Replay:
+    """One model's walk-forward inputs, row-aligned: ``rows`` carries date,
+    commodity, price, ``next_return`` (the return a position on that row
+    earns) and ``label_date`` (the last day its target looks at)."""
+
+    kind: str                # "direction" or "price"
+    name: str                # train_model --model / train_price_model candidate
+    target: str
+    horizon: int
+    rows: pd.DataFrame
+    X: pd.DataFrame
+    y: np.ndarray
+    row_hash: np.ndarray     # one uint64 per (features, target) row
+    _price_params: str | None = field(default=None, repr=False)
+
+    @property
+    def scale(self) -> bool:
+        if self.kind == "direction":
+            return self.name == "logistic"
+        return self.name in train_price_model.LINEAR_MODELS
+
+    def estimator(self, y_train: np.ndarray, threads: int = 1):
+        """The unfitted model, configured as its trainer configures it."""
+        if self.kind == "direction":
+            model = train_model.build_model(self.name, pd.Series(y_train))
+            if threads > 1 and "n_jobs" in model.get_params():
+                model.set_params(n_jobs=threads)  # as make_models() does for RF/XGBoost
+            return model
+        return train_price_model.make_models(n_jobs=threads)[self.name]
+
+    def params(self, y_train: np.ndarray) -> str:
+        """The estimator's configuration as JSON, for cache keys.  Thread
+        counts are left at 1: they never change a fit."""
+        if self.kind == "direction":
+            return json.dumps(self.estimator(y_train).get_params(), sort_keys=True, default=repr)
+        if self._price_params is None:
+            self._price_params = json.dumps(self.estimator(y_train).get_params(), sort_keys=True, default=repr)
+        return self._price_params
+
+
+def prepare(kind: str, name: str, base: pd.DataFrame, target: str | None = None) -> Replay:
+    """Build ``kind``'s dataset from the base table with its trainer's code.
+
+    Rows stay in the table's order (date order within each commodity, as
+    the trainers expect), so the feature store serves the trainers' snapshot.
+    """
+    base = base.reset_index(drop=True)
+    if kind == "direction":
+        df, X, y = train_model.build_dataset(base.copy())
+        y, target, horizon = y.to_numpy(), "target_up_down", train_model.TARGET_HORIZON
+    else:
+        df, X, y, _ = train_price_model.build_dataset(base.copy(), target)
+        horizon = train_price_model.TARGET_HORIZON[target]
+
+    by = base.groupby("commodity", sort=False)
+    market = pd.DataFrame({
+        "date": base["date"],
+        "commodity": base["commodity"],
+        "price": base["price"],
+        "next_return": by["price"].shift(-1) / base["price"] - 1,
+        "label_date": by["date"].shift(-horizon),
+    })
+    row_hash = pd.util.hash_pandas_object(X.assign(__target__=y), index=False).to_numpy()
+    return Replay(kind, name, target, horizon, market.loc[X.index].reset_index(drop=True),
+                  X.reset_index(drop=True), np.asarray(y), row_hash)
+
+
+def walk_forward(
+    replay: Replay,
+    retrain: str,
+    min_train_years: float,
+    start: str | None = None,
+) -> list[tuple[pd.Timestamp, np.ndarray, np.ndarray]]:
+    """``(cut-off, train_idx, test_idx)`` per window.
+
+    Cut-offs fall on the --retrain schedule from ``start`` (default: the
+    first day plus ``min_train_years``); each window trades the days up to
+    the next cut-off and trains on every row whose target is known before
+    its own.
+    """
+    dates = pd.DatetimeIndex(replay.rows["date"])
+    label_dates = pd.DatetimeIndex(replay.rows["label_date"])
+    first = pd.Timestamp(start) if start else dates.min() + pd.DateOffset(months=round(12 * min_train_years))
+    edges = [first] + [d for d in pd.date_range(first, dates.max(), freq=retrain) if d > first]
+    edges.append(dates.max() + pd.Timedelta(days=1))
+
+    windows = []
+    for cutoff, end in zip(edges[:-1], edges[1:]):
+        test_idx = np.flatnonzero((dates >= cutoff) & (dates < end))
+        train_idx = np.flatnonzero(label_dates < cutoff)  # NaT compares False
+        if not len(test_idx):
+            continue
+        if replay.kind == "direction" and len(np.unique(replay.y[train_idx])) < 2:
+            log.warning("%s: skipping the window from %s — one class in its training rows", replay.kind, cutoff.date())
+            continue
+        windows.append((cutoff, train_idx, test_idx))
+    return windows
+
+
+def window_key(replay: Replay, train_idx: np.ndarray) -> str:
+    """Cache key: model configuration plus a hash of the training rows."""
+    return hashlib.sha1(json.dumps({
+        "model": f"{replay.kind}/{replay.name}",
+        "target": replay.target,
+        "params": replay.params(replay.y[train_idx]),
+        "columns": list(replay.X.columns),
+        "scale": replay.scale,
+        "data": hashlib.sha1(np.ascontiguousarray(replay.row_hash[train_idx]).tobytes()).hexdigest(),
+    }, sort_keys=True).encode()).hexdigest()[:16]
+
+
+# ---------------------------------------------------------------------------
+# Parallel window fits
+# ---------------------------------------------------------------------------
+#
+# Same scheme as train_price_model.run_cv(): every window to fit is a task
+# in a process pool sized from the --jobs core budget, with an equal thread
+# share each (threadpoolctl), reading its training rows from a
+# TrainingHarness memory map.  Windows found in the cache are not fitted.
+
+_wf_data: dict = {}
+
+
+def _init_wf_worker(replay: Replay, harness: TrainingHarness, threads: int) -> None:
+    _wf_data.update(replay=replay, harness=harness, threads=threads)
+
+
+def fit_window(fold: int, train_idx: np.ndarray, path: str) -> dict:
+    """Fit one window, write it to the cache and return it."""
+    replay, harness, threads = _wf_data["replay"], _wf_data["harness"], _wf_data["threads"]
+    scaler = None
+    if replay.scale:
+        scaler, X_train, _ = harness.scaled(fold)
+    else:
+        X_train, _ = harness.fold(fold)
+        if replay.kind == "direction":
+            X_train = harness.frame(X_train)  # as train_model.py fits it
+
+    with threadpool_limits(limits=threads):
+        model = replay.estimator(replay.y[train_idx], threads)
+        model.fit(X_train, replay.y[train_idx])
+
+    bundle = {"model": model, "scaler": scaler}
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    joblib.dump(bundle, f"{path}.{os.getpid()}.tmp")
+    os.replace(f"{path}.{os.getpid()}.tmp", path)
+    return bundle
+
+
+def fit_windows(
+    replay: Replay,
+    windows: list,
+    cache_dir: str,
+    jobs: int,
+    refit: bool = False,
+) -> tuple[list[dict], int]:
+    """The fitted model of every window, from the cache where possible;
+    returns ``(bundles, windows fitted)``."""
+    folder = os.path.join(cache_dir, f"{replay.kind}-{replay.name}")
+    paths = [os.path.join(folder, f"{window_key(replay, train_idx)}.joblib") for _, train_idx, _ in windows]
+    bundles: list[dict | None] = [None] * len(windows)
+    for i, path in enumerate(paths):
+        if not refit and os.path.exists(path):
+            bundles[i] = joblib.load(path)
+    todo = [i for i, bundle in enumerate(bundles) if bundle is None]
+    if not todo:
+        return bundles, 0
+
+    splits = [(windows[i][1], windows[i][2]) for i in todo]
+    tasks = [(fold, windows[i][1], paths[i]) for fold, i in enumerate(todo, start=1)]
+    # Largest training sets first.
+    order = sorted(range(len(tasks)), key=lambda t: len(tasks[t][1]), reverse=True)
+    processes = max(1, min(jobs, len(tasks)))
+    threads = max(1, jobs // processes)
+    with TrainingHarness(replay.X, splits, scale=replay.scale) as harness:
+        if processes == 1:
+            _init_wf_worker(replay, harness, threads)
+            fitted = {t: fit_window(*tasks[t]) for t in order}
+        else:
+            with ProcessPoolExecutor(
+                max_workers=processes,
+                initializer=_init_wf_worker,
+                initargs=(replay, harness, threads),
+            ) as pool:
+                fitted = dict(zip(order, pool.map(fit_window, *zip(*(tasks[t] for t in order)))))
+    for t, i in enumerate(todo):
+        bundles[i] = fitted[t]
+    return bundles, len(todo)
+
+
+# ---------------------------------------------------------------------------
+# Signals, positions and P&L
+# ---------------------------------------------------------------------------
+
+def window_signal(replay: Replay, bundle: dict, test_idx: np.ndarray) -> np.ndarray:
+    """P(UP) for the direction model, the forecast absolute price for the
+    price model, over one window's rows in a single call."""
+    rows = replay.X.iloc[test_idx]
+    if bundle["scaler"] is not None:
+        matrix = bundle["scaler"].transform(rows)
+    elif replay.kind == "direction":
+        matrix = rows
+    else:
+        matrix = rows.to_numpy(dtype=np.float64)
+    if replay.kind == "direction":
+        return bundle["model"].predict_proba(matrix)[:, 1]
+    prices = replay.rows["price"].to_numpy()[test_idx]
+    return train_price_model.reconstruct_price(bundle["model"].predict(matrix), prices, replay.target)
+
+
+def to_positions(replay: Replay, signal: np.ndarray, threshold: float, min_move: float) -> np.ndarray:
+    """-1 / 0 / +1 from a signal (see the module docstring)."""
+    if replay.kind == "direction":
+        return np.where(signal >= threshold, 1, np.where(signal <= 1.0 - threshold, -1, 0))
+    move = signal / replay.rows["price"].to_numpy() - 1
+    return np.where(move > min_move, 1, np.where(move < -min_move, -1, 0))
+
+
+def add_pnl(trades: pd.DataFrame, cost_bps: float = 0.0) -> pd.DataFrame:
+    """Trade size, P&L, equity and drawdown for every row of every
+    (model, commodity) series at once; rows must be in date order per series."""
+    keys = [trades["model"], trades["commodity"]]
+    previous = trades["position"].groupby(keys, sort=False).shift(1, fill_value=0)
+    trades["trade"] = (trades["position"] - previous).abs()
+    trades["pnl"] = trades["position"] * trades["next_return"] - trades["trade"] * cost_bps / 1e4
+    trades["equity"] = (1.0 + trades["pnl"]).groupby(keys, sort=False).cumprod()
+    # Peaks count from the starting capital of 1, so a first-day loss is a drawdown.
+    peak = trades["equity"].groupby(keys, sort=False).cummax().clip(lower=1.0)
+    trades["drawdown"] = 1.0 - trades["equity"] / peak
+    return trades
+
+
+def summarize(trades: pd.DataFrame) -> pd.DataFrame:
+    """Per (model, commodity) performance of an ``add_pnl`` frame."""
+    active = trades["position"] != 0
+    frame = trades.assign(
+        active=active,
+        hit=active & (np.sign(trades["position"]) == np.sign(trades["next_return"])),
+        traded=trades["trade"] > 0,
+        hold_log=np.log1p(trades["next_return"]),
+    )
+    out = frame.groupby(["model", "commodity"], sort=True).agg(
+        start=("date", "min"),
+        end=("date", "max"),
+        days=("date", "size"),
+        final_equity=("equity", "last"),
+        max_drawdown=("drawdown", "max"),
+        mean_pnl=("pnl", "mean"),
+        std_pnl=("pnl", "std"),
+        calls=("active", "sum"),
+        hits=("hit", "sum"),
+        exposure=("active", "mean"),
+        trades=("traded", "sum"),
+        turnover=("trade", "mean"),
+        hold_log=("hold_log", "sum"),
+    )
+    years = (out["end"] - out["start"]).dt.days.clip(lower=1) / 365.25
+    per_year = out["days"] / years
+    out["total_return"] = out["final_equity"] - 1
+    out["annual_return"] = out["final_equity"].clip(lower=0) ** (1 / years) - 1
+    out["sharpe"] = out["mean_pnl"] / out["std_pnl"].replace(0, np.nan) * np.sqrt(per_year)
+    out["hit_rate"] = out["hits"] / out["calls"].replace(0, np.nan)
+    out["annual_turnover"] = out["turnover"] * per_year
+    out["buy_hold_return"] = np.expm1(out["hold_log"])
+    columns = [
+        "start", "end", "days", "total_return", "annual_return", "sharpe", "max_drawdown",
+        "hit_rate", "calls", "exposure", "trades", "turnover", "annual_turnover", "buy_hold_return",
+    ]
+    return out[columns].reset_index()
+
+
+# ---------------------------------------------------------------------------
+# Driver
+# ---------------------------------------------------------------------------
+
+def replay_model(
+    replay: Replay,
+    retrain: str = "QS",
+    min_train_years: float = 2.0,
+    start: str | None = None,
+    threshold: float = 0.75,
+    min_move: float = 0.0,
+    cache_dir: str = DEFAULT_CACHE_DIR,
+    jobs: int = 1,
+    refit: bool = False,
+) -> tuple[pd.DataFrame, dict]:
+    """Walk ``replay`` forward; returns its trades (before P&L) and run stats."""
+    t0 = time.perf_counter()
+    windows = walk_forward(replay, retrain, min_train_years, start)
+    if not windows:
+        raise ValueError(
+            f"No walk-forward windows for the {replay.kind} model: history ends before "
+            "the first cut-off (lower --min-train or set --start)"
+        )
+    bundles, fitted = fit_windows(replay, windows, cache_dir, jobs, refit)
+
+    signal = np.full(len(replay.rows), np.nan)
+    cutoffs = np.full(len(replay.rows), np.datetime64("NaT"), dtype="datetime64[ns]")
+    for (cutoff, _, test_idx), bundle in zip(windows, bundles):
+        signal[test_idx] = window_signal(replay, bundle, test_idx)
+        cutoffs[test_idx] = cutoff.to_datetime64()
+
+    tested = ~np.isnan(signal)
+    trades = replay.rows.loc[tested, ["date", "commodity", "next_return"]].copy()
+    trades.insert(0, "model", f"{replay.kind}/{replay.name}")
+    trades["window"] = cutoffs[tested]
+    trades["signal"] = signal[tested]
+    trades["position"] = to_positions(replay, signal, threshold, min_move)[tested]
+    trades = trades.dropna(subset=["next_return"])  # no next price to earn yet
+    stats = {
+        "model": f"{replay.kind}/{replay.name}",
+        "windows": len(windows),
+        "fitted": fitted,
+        "cached": len(windows) - fitted,
+        "seconds": round(time.perf_counter() - t0, 2),
+    }
+    return trades, stats
+
+
+def backtest(
+    tables: dict[str, pd.DataFrame],
+    direction_model: str = "forest",
+    price_model: str = "HistGBM",
+    price_target: str = "next_price",
+    retrain: str = "QS",
+    min_train_years: float = 2.0,
+    start: str | None = None,
+    threshold: float = 0.75,
+    min_move: float = 0.0,
+    cost_bps: float = 0.0,
+    cache_dir: str = DEFAULT_CACHE_DIR,
+    jobs: int = 1,
+    refit: bool = False,
+) -> tuple[pd.DataFrame, pd.DataFrame, list[dict]]:
+    """Backtest each model in ``tables`` (``{"direction": base, "price": base}``)
+    on its base table; returns ``(trades, summary, run stats)``."""
+    names = {"direction": direction_model, "price": price_model}
+    all_trades, all_stats = [], []
+    for kind, base in tables.items():
+        replay = prepare(kind, names[kind], base, price_target if kind == "price" else None)
+        trades, stats = replay_model(
+            replay, retrain, min_train_years, start, threshold, min_move, cache_dir, jobs, refit,
+        )
+        log.info(
+            "%s: %d windows (%d fitted, %d cached) in %.1fs",
+            stats["model"], stats["windows"], stats["fitted"], stats["cached"], stats["seconds"],
+        )
+        all_trades.append(trades)
+        all_stats.append(stats)
+    trades = pd.concat(all_trades, ignore_index=True)
+    trades = add_pnl(trades.sort_values(["model", "commodity", "date"], kind="stable", ignore_index=True), cost_bps)
+    return trades, summarize(trades), all_stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--models", default="direction,price", help="Models to replay (default: direction,price).")
+    parser.add_argument(
+        "--table", default=None,
+        help=(
+            "Base table for every model (Parquet file or partitioned directory).  Default: "
+            f"each model's training table — {DIRECTION_TABLE} for direction, the daily table for price."
+        ),
+    )
+    parser.add_argument("--commodities", default=None, help="Comma-separated (default: all in the table).")
+    parser.add_argument(
+        "--retrain", default="QS",
+        help="Retrain cadence as a pandas frequency: QS quarterly, MS monthly, W-MON weekly, YS yearly (default: QS).",
+    )
+    parser.add_argument(
+        "--min-train", type=float, default=2.0,
+        help="Years of history before the first window, unless --start is given (default: 2).",
+    )
+    parser.add_argument("--start", default=None, help="First traded day, YYYY-MM-DD.")
+    parser.add_argument(
+        "--direction-model", default="forest",
+        choices=["gradient", "logistic", "forest", "tabpfn", "xgboost"],
+    )
+    parser.add_argument(
+        "--threshold", type=float, default=0.75,
+        help="Direction confidence band, as train_model.py --threshold (default: 0.75).",
+    )
+    parser.add_argument("--price-model", default="HistGBM", help="train_price_model.py candidate (default: HistGBM).")
+    parser.add_argument(
+        "--price-target", default="next_price",
+        choices=list(train_price_model.TARGET_HORIZON),
+        help="train_price_model.py --target (default: next_price).",
+    )
+    parser.add_argument(
+        "--min-move", type=float, default=0.0,
+        help="Smallest forecast move (fraction of price) the price model trades on (default: 0).",
+    )
+    parser.add_argument("--cost-bps", type=float, default=0.0, help="Cost per unit of position change, in bp.")
+    parser.add_argument(
+        "--jobs", type=int, default=os.cpu_count() or 1,
+        help="Core budget for window fits (default: all cores); --jobs 1 fits in-process.",
+    )
+    parser.add_argument("--refit", action="store_true", help="Refit every window, ignoring (and replacing) the cache.")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--out", default=DEFAULT_OUT_DIR)
+    args = parser.parse_args()
+    started = time.perf_counter()
+
+    kinds = [k.strip() for k in args.models.split(",") if k.strip()]
+    unknown = set(kinds) - {"direction", "price"}
+    if unknown:
+        parser.error(f"unknown --models: {', '.join(sorted(unknown))}")
+
+    wanted = [c.strip().upper() for c in args.commodities.split(",")] if args.commodities else None
+    tables = {}
+    for kind in kinds:
+        if args.table:
+            df = pd.read_parquet(args.table)
+        elif kind == "direction":
+            df = pd.read_parquet(DIRECTION_TABLE)
+        else:
+            df = train_price_model.load_training_table()
+        tables[kind] = df[df["commodity"].isin(wanted)] if wanted else df
+
+    trades, summary, _ = backtest(
+        tables,
+        direction_model=args.direction_model,
+        price_model=args.price_model,
+        price_target=args.price_target,
+        retrain=args.retrain,
+        min_train_years=args.min_train,
+        start=args.start,
+        threshold=args.threshold,
+        min_move=args.min_move,
+        cost_bps=args.cost_bps,
+        cache_dir=args.cache_dir,
+        jobs=max(1, args.jobs),
+        refit=args.refit,
+    )
+
+    os.makedirs(args.out, exist_ok=True)
+    trades.to_csv(os.path.join(args.out, "positions.csv"), index=False)
+    summary.to_csv(os.path.join(args.out, "summary.csv"), index=False)
+
+    print("\n" + "=" * 50)
+    print("WALK-FORWARD BACKTEST")
+    print("=" * 50)
+    print(f"Retrain cadence: {args.retrain}  |  threshold: {args.threshold:.2f}  |  cost: {args.cost_bps:g} bp\n")
+    shown = summary.assign(
+        start=summary["start"].dt.date,
+        end=summary["end"].dt.date,
+    )
+    with pd.option_context("display.width", 200, "display.max_columns", None, "display.float_format", "{:.3f}".format):
+        print(shown.drop(columns=["turnover"]).to_string(index=False))
+    print(f"\nPositions and P&L written to {args.out}/ ({time.perf_counter() - started:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
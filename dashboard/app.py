@@ -18,7 +18,7 @@ from components.theme import (
     inject_shell_css,
 )
 from components.sidebar import render_sidebar
-from components.api import fetch_kpis, fetch_headlines, safe_fetch, default_since_iso
+from components.api import fetch_kpis_batch, fetch_headlines, safe_fetch, default_since_iso
 
 # ── Page Config ──────────────────────────────────────────────────────
 st.set_page_config(
@@ -64,8 +64,11 @@ st.markdown("### Market Overview")
 commodities = ["WTI", "BRENT", "NATGAS"]
 cols = st.columns(len(commodities))
 
+batch, batch_err = safe_fetch(fetch_kpis_batch, tuple(commodities))
+
 for i, c in enumerate(commodities):
-    kpis, err = safe_fetch(fetch_kpis, c)
+    kpis = (batch or {}).get(c)
+    err = batch_err or (None if kpis else "no data returned")
     with cols[i]:
         if err:
             st.markdown(
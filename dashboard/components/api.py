@@ -40,6 +40,12 @@ def fetch_kpis(commodity: str) -> dict:
     return _get("/kpis", {"commodity": commodity})
 
 
+@st.cache_data(ttl=60)
+def fetch_kpis_batch(commodities: tuple[str, ...]) -> dict:
+    """KPIs for several commodities in a single request, keyed by commodity."""
+    return _get("/kpis/batch", {"commodities": ",".join(commodities)})
+
+
 @st.cache_data(ttl=60)
 def fetch_analytics(commodity: str) -> list[dict]:
     return _get("/analytics/sentiment-price", {"commodity": commodity})
@@ -16,7 +16,7 @@ _CRITICAL_IMPACT_THRESHOLD = 5
 _ELEVATED_SENT_THRESHOLD = 0.3
 _ELEVATED_IMPACT_THRESHOLD = 3
 
-from components.api import fetch_headlines, fetch_kpis, safe_fetch, default_since_iso
+from components.api import fetch_headlines, fetch_kpis_batch, safe_fetch, default_since_iso
 from components.charts import risk_meter
 from components.sidebar import render_sidebar
 from components.theme import (
@@ -52,9 +52,11 @@ st.markdown("### Market Status Board")
 commodities = ["WTI", "BRENT", "NATGAS"]
 cols = st.columns(len(commodities))
 
+batch, err = safe_fetch(fetch_kpis_batch, tuple(commodities))
+
 all_kpis = {}
 for i, c in enumerate(commodities):
-    kpis, err = safe_fetch(fetch_kpis, c)
+    kpis = (batch or {}).get(c)
     all_kpis[c] = kpis
     with cols[i]:
         if err or not kpis:
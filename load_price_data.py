@@ -1,11 +1,11 @@
-from datetime import datetime
-import sqlite3
+import argparse
 
 import pandas as pd
 import yfinance as yf
 
-
-DB_PATH = "backend/data.db"
+from backend.db import Base, engine
+from backend.migrations import run_migrations
+from backend.services.bulk_ingest import DEFAULT_BATCH_SIZE, load_price_points
 
 # Yahoo Finance tickers
 TICKERS = {
@@ -15,26 +15,6 @@ TICKERS = {
 }
 
 
-def create_pricepoint_table(conn: sqlite3.Connection) -> None:
-    conn.execute(
-        """
-        CREATE TABLE IF NOT EXISTS pricepoint (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            commodity TEXT NOT NULL,
-            timestamp TEXT NOT NULL,
-            close REAL NOT NULL
-        )
-        """
-    )
-    conn.execute(
-        """
-        CREATE UNIQUE INDEX IF NOT EXISTS idx_pricepoint_unique
-        ON pricepoint (commodity, timestamp)
-        """
-    )
-    conn.commit()
-
-
 def download_prices(ticker: str, period: str = "60d", interval: str = "1h") -> pd.DataFrame:
     df = yf.download(ticker, period=period, interval=interval, auto_adjust=False, progress=False)
 
@@ -59,46 +39,39 @@ def download_prices(ticker: str, period: str = "60d", interval: str = "1h") -> p
     return df
 
 
-def insert_prices(conn: sqlite3.Connection, commodity: str, df: pd.DataFrame) -> int:
-    inserted = 0
-
-    for _, row in df.iterrows():
-        timestamp_value = row.iloc[0]
-        close_value = row.iloc[1]
-
-        timestamp_str = pd.Timestamp(timestamp_value).strftime("%Y-%m-%d %H:%M:%S")
-        close_price = float(close_value)
-
-        cur = conn.execute(
-            """
-            INSERT OR IGNORE INTO pricepoint (commodity, timestamp, close)
-            VALUES (?, ?, ?)
-            """,
-            (commodity, timestamp_str, close_price),
-        )
-        inserted += cur.rowcount
-
-    conn.commit()
-    return inserted
+def insert_prices(commodity: str, df: pd.DataFrame, batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    # Positional access: newer yfinance returns MultiIndex columns.
+    # Timestamps are tz-aware UTC; price_points stores naive UTC.
+    timestamps = pd.to_datetime(df.iloc[:, 0], utc=True).dt.tz_convert(None).dt.to_pydatetime()
+    closes = df.iloc[:, 1].astype(float).tolist()
+    rows = (
+        {"commodity": commodity, "timestamp": ts, "close": close}
+        for ts, close in zip(timestamps, closes)
+    )
+    return load_price_points(engine, rows, batch_size=batch_size)
 
 
 def main() -> None:
-    conn = sqlite3.connect(DB_PATH)
-    create_pricepoint_table(conn)
+    parser = argparse.ArgumentParser(description="Load Yahoo Finance prices into price_points.")
+    parser.add_argument("--period", default="60d", help="yfinance period, e.g. 60d, 2y (hourly data is capped at 730d).")
+    parser.add_argument("--interval", default="1h")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
 
-    total_inserted = 0
+    total_written = 0
 
     for commodity, ticker in TICKERS.items():
         print(f"Downloading {commodity} from {ticker}...")
-        df = download_prices(ticker)
-        added = insert_prices(conn, commodity, df)
-        total_inserted += added
-        print(f"Inserted {added} rows for {commodity}")
+        df = download_prices(ticker, period=args.period, interval=args.interval)
+        written = insert_prices(commodity, df, batch_size=args.batch_size)
+        total_written += written
+        print(f"Upserted {written} rows for {commodity}")
 
-    conn.close()
-    print(f"Done. Total new rows inserted: {total_inserted}")
+    print(f"Done. Total rows upserted: {total_written}")
 
 
 if __name__ == "__main__":
     main()
-
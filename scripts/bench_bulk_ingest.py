@@ -0,0 +1,133 @@
+"""
+bench_bulk_ingest.py
+====================
+Rows/sec for loading hourly price bars: the original ``load_price_data.py``
+loop (``df.iterrows()`` + one ``INSERT OR IGNORE`` per row) against the
+batched Core upsert in backend/services/bulk_ingest.py.
+
+Each size loads hourly bars spread across the ``TICKERS`` commodities into
+a fresh throw-away database with the current schema, then re-loads the
+same rows to time the upsert (conflict) path.  The legacy loop is only run
+up to --legacy-max rows.
+
+Usage
+-----
+    python scripts/bench_bulk_ingest.py [--sizes 10000 100000 1000000]
+                                        [--batch-size 5000] [--legacy-max 100000]
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, func, select  # noqa: E402
+
+from backend.db import Base  # noqa: E402
+from backend.migrations import run_migrations  # noqa: E402
+from backend.models import PricePoint  # noqa: E402
+from backend.services.bulk_ingest import load_price_points  # noqa: E402
+
+COMMODITIES = ["WTI", "BRENT", "HENRY_HUB"]  # load_price_data.TICKERS
+
+
+def make_frames(n_rows: int) -> dict[str, pd.DataFrame]:
+    """Hourly random-walk bars, split evenly across the commodities."""
+    rng = np.random.default_rng(0)
+    per = n_rows // len(COMMODITIES)
+    start = datetime(2020, 1, 1)
+    frames = {}
+    for commodity in COMMODITIES:
+        frames[commodity] = pd.DataFrame({
+            "timestamp": pd.date_range(start, periods=per, freq="h", tz="UTC"),
+            "close": 70 + np.cumsum(rng.normal(0, 0.3, per)),
+        })
+    return frames
+
+
+def legacy_insert(db_path: str, commodity: str, df: pd.DataFrame) -> int:
+    """The original per-row loop, pointed at price_points."""
+    conn = sqlite3.connect(db_path)
+    inserted = 0
+    for _, row in df.iterrows():
+        timestamp_str = pd.Timestamp(row.iloc[0]).strftime("%Y-%m-%d %H:%M:%S")
+        cur = conn.execute(
+            "INSERT OR IGNORE INTO price_points (commodity, timestamp, close) VALUES (?, ?, ?)",
+            (commodity, timestamp_str, float(row.iloc[1])),
+        )
+        inserted += cur.rowcount
+    conn.commit()
+    conn.close()
+    return inserted
+
+
+def bulk_rows(commodity: str, df: pd.DataFrame):
+    timestamps = df["timestamp"].dt.tz_convert(None).dt.to_pydatetime()
+    return (
+        {"commodity": commodity, "timestamp": ts, "close": close}
+        for ts, close in zip(timestamps, df["close"].tolist())
+    )
+
+
+def fresh_db(tmp: str, name: str):
+    path = os.path.join(tmp, name)
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    return path, engine
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--legacy-max", type=int, default=100_000)
+    args = parser.parse_args()
+
+    print(f"{'rows':>9} {'legacy rows/s':>14} {'bulk rows/s':>12} {'upsert rows/s':>14} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            frames = make_frames(size)
+            n = sum(len(df) for df in frames.values())
+
+            legacy_rate = None
+            if size <= args.legacy_max:
+                path, engine = fresh_db(tmp, f"legacy_{size}.db")
+                engine.dispose()
+                t0 = time.perf_counter()
+                for commodity, df in frames.items():
+                    legacy_insert(path, commodity, df)
+                legacy_rate = n / (time.perf_counter() - t0)
+
+            _, engine = fresh_db(tmp, f"bulk_{size}.db")
+            t0 = time.perf_counter()
+            for commodity, df in frames.items():
+                load_price_points(engine, bulk_rows(commodity, df), batch_size=args.batch_size)
+            bulk_rate = n / (time.perf_counter() - t0)
+
+            t0 = time.perf_counter()
+            for commodity, df in frames.items():
+                load_price_points(engine, bulk_rows(commodity, df), batch_size=args.batch_size)
+            upsert_rate = n / (time.perf_counter() - t0)
+
+            with engine.connect() as conn:
+                stored = conn.execute(select(func.count()).select_from(PricePoint)).scalar()
+            engine.dispose()
+            if stored != n:
+                raise SystemExit(f"Expected {n} rows after re-load, found {stored}")
+
+            legacy = f"{legacy_rate:>14,.0f}" if legacy_rate else f"{'skipped':>14}"
+            speedup = f"{bulk_rate / legacy_rate:>7.1f}x" if legacy_rate else f"{'-':>8}"
+            print(f"{n:>9,} {legacy} {bulk_rate:>12,.0f} {upsert_rate:>14,.0f} {speedup}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+bench_gdelt_ingest.py
+=====================
+Time and peak memory of building news_features from GDELT 1.0 daily
+exports: the original load-everything pipeline (full ``read_csv`` per file,
+row-wise ``.apply`` actor filter, one big ``concat``) against the streaming
+ingester in scripts/build_real_news_features.py.
+
+Synthetic 58-column exports are written to a temporary directory (mostly
+non-oil actors, some oil-related ones, missing actor names and a few
+unparseable numbers, with events dated up to a week before the export
+day as in real GDELT files).  Each pipeline runs in its own subprocess so
+peak RSS (Linux ``VmHWM``) is measured independently; the two outputs must
+agree (avg_tone to 1e-9) before results are printed.
+
+Usage
+-----
+    python scripts/bench_gdelt_ingest.py [--files 12] [--rows 200000] [--workers 0]
+"""
+
+import argparse
+import glob
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+SCRIPTS = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, SCRIPTS)
+
+import build_real_news_features as streaming  # noqa: E402
+
+ACTORS = [
+    "UNITED STATES", "POLICE", "GOVERNMENT", "CHINA", "RUSSIA", "PRESIDENT", "COMPANY", "SCHOOL",
+    "OPEC", "OIL MINISTRY", "ENERGY DEPARTMENT", "GAS COMPANY", "PETROLEUM CORPORATION", "REFINERY WORKER",
+]
+ACTOR_WEIGHTS = np.array([20, 15, 15, 10, 10, 8, 8, 6, 1, 1, 1, 1, 1, 1], dtype=float)
+
+
+def write_exports(directory: str, files: int, rows: int) -> None:
+    rng = np.random.default_rng(0)
+    p = ACTOR_WEIGHTS / ACTOR_WEIGHTS.sum()
+    for f in range(files):
+        day = pd.Timestamp("2025-01-01") + pd.Timedelta(days=f)
+        dates = (day - pd.to_timedelta(rng.integers(0, 7, rows), unit="D")).strftime("%Y%m%d")
+        cols = {c: rng.integers(0, 1000, rows) for c in range(58)}
+        cols[0] = np.arange(rows) + f * rows
+        cols[1] = dates
+        cols[5] = rng.choice(ACTORS, rows, p=p).astype(object)
+        cols[15] = rng.choice(ACTORS, rows, p=p).astype(object)
+        cols[5][rng.random(rows) < 0.2] = None
+        cols[15][rng.random(rows) < 0.3] = None
+        cols[30] = np.round(rng.uniform(-10, 10, rows), 1).astype(object)
+        cols[30][rng.random(rows) < 0.001] = "n/a"
+        cols[31] = rng.integers(1, 60, rows)
+        pd.DataFrame(cols).to_csv(os.path.join(directory, f"{day:%Y%m%d}.export.CSV"), sep="\t", header=False, index=False)
+
+
+def legacy_build(raw_dir: str) -> pd.DataFrame:
+    """The original build_real_news_features.py body."""
+    all_data = []
+    for file in glob.glob(os.path.join(raw_dir, "*.CSV")):
+        df = pd.read_csv(file, sep="\t", header=None, low_memory=False)
+        df = df.iloc[:, [1, 5, 15, 30, 31]].copy()
+        df.columns = ["SQLDATE", "Actor1Name", "Actor2Name", "GoldsteinScale", "NumMentions"]
+        df["date"] = pd.to_datetime(df["SQLDATE"], format="%Y%m%d", errors="coerce")
+        df["Actor1Name"] = df["Actor1Name"].astype(str)
+        df["Actor2Name"] = df["Actor2Name"].astype(str)
+        df["GoldsteinScale"] = pd.to_numeric(df["GoldsteinScale"], errors="coerce")
+        df["NumMentions"] = pd.to_numeric(df["NumMentions"], errors="coerce")
+        keywords = streaming.KEYWORDS
+
+        def is_oil_related(text):
+            text = str(text).lower()
+            return any(k in text for k in keywords)
+
+        df = df[df["Actor1Name"].apply(is_oil_related) | df["Actor2Name"].apply(is_oil_related)].copy()
+        if not df.empty:
+            all_data.append(df)
+
+    df = pd.concat(all_data, ignore_index=True)
+    df["positive_flag"] = (df["GoldsteinScale"] > 0).astype(int)
+    df["negative_flag"] = (df["GoldsteinScale"] < 0).astype(int)
+    df["high_impact_flag"] = (df["NumMentions"] >= 20).astype(int)
+    daily = df.groupby("date").agg(
+        article_count=("NumMentions", "sum"),
+        avg_tone=("GoldsteinScale", "mean"),
+        positive_count=("positive_flag", "sum"),
+        negative_count=("negative_flag", "sum"),
+        high_impact_count=("high_impact_flag", "sum"),
+    ).reset_index()
+    daily["commodity"] = "WTI"
+    daily = daily[["date", "commodity", "article_count", "avg_tone",
+                   "positive_count", "negative_count", "high_impact_count"]].dropna()
+    return daily.sort_values("date").reset_index(drop=True)
+
+
+def run_child(mode: str, raw_dir: str, output: str, workers: int) -> None:
+    t0 = time.perf_counter()
+    if mode == "legacy":
+        daily = legacy_build(raw_dir)
+    else:
+        daily = streaming.build_news_features(streaming.list_raw_files(raw_dir), workers or None)
+    elapsed = time.perf_counter() - t0
+    daily.to_parquet(output, index=False)
+    # VmHWM, not RUSAGE_SELF: Linux carries the pre-exec (parent's) high-water
+    # mark into ru_maxrss.  Pool workers are covered by RUSAGE_CHILDREN.
+    with open("/proc/self/status") as fh:
+        own_kb = next(int(line.split()[1]) for line in fh if line.startswith("VmHWM"))
+    peak_kb = max(own_kb, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    print(json.dumps({"seconds": elapsed, "peak_mb": peak_kb / 1024}))
+
+
+def run(mode: str, raw_dir: str, output: str, workers: int) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-W", "ignore", __file__, "--child", mode, "--raw-dir", raw_dir,
+         "--output", output, "--workers", str(workers)],
+        check=True, capture_output=True, text=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=12)
+    parser.add_argument("--rows", type=int, default=200_000, help="Events per export (a real day is ~100k-250k).")
+    parser.add_argument("--workers", type=int, default=0, help="Streaming processes (0 = one per core).")
+    parser.add_argument("--child", choices=["legacy", "streaming"], help=argparse.SUPPRESS)
+    parser.add_argument("--raw-dir", help=argparse.SUPPRESS)
+    parser.add_argument("--output", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.raw_dir, args.output, args.workers)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        raw = os.path.join(tmp, "raw")
+        os.makedirs(raw)
+        print(f"Writing {args.files} synthetic exports x {args.rows:,} events ...")
+        write_exports(raw, args.files, args.rows)
+        size_mb = sum(os.path.getsize(p) for p in glob.glob(os.path.join(raw, "*"))) / 2**20
+
+        results = {}
+        for mode in ("legacy", "streaming"):
+            results[mode] = run(mode, raw, os.path.join(tmp, f"{mode}.parquet"), args.workers)
+
+        legacy = pd.read_parquet(os.path.join(tmp, "legacy.parquet"))
+        new = pd.read_parquet(os.path.join(tmp, "streaming.parquet"))
+        pd.testing.assert_frame_equal(legacy, new, check_dtype=False, rtol=1e-9, atol=1e-9)
+
+        print(f"outputs match ({len(new)} days) from {size_mb:,.0f} MB of exports, cpu count {os.cpu_count()}\n")
+        print(f"{'pipeline':<10} {'seconds':>8} {'rows/s':>11} {'peak RSS MB':>12}")
+        total_rows = args.files * args.rows
+        for mode, r in results.items():
+            print(f"{mode:<10} {r['seconds']:>8.2f} {total_rows / r['seconds']:>11,.0f} {r['peak_mb']:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+bench_sentiment_price.py
+========================
+Benchmarks /analytics/sentiment-price: the original per-headline query loop
+(two or three PricePoint queries per headline) against the set-based as-of
+join in backend/services/news_service.py.
+
+Both implementations run against the same throw-away SQLite database and
+their outputs are compared row for row before timings are reported.
+
+Usage
+-----
+    python scripts/bench_sentiment_price.py [--sizes 120 1000 10000] [--repeat 3]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from backend.db import Base  # noqa: E402
+from backend.models import Headline, PricePoint  # noqa: E402
+from backend.services import news_service  # noqa: E402
+
+COMMODITY = "WTI"
+
+
+def populate(session, n_headlines: int, n_days: int, seed: int = 7) -> None:
+    """Insert ``n_headlines`` headlines spread over ``n_days`` of hourly prices."""
+    rng = random.Random(seed)
+    end = datetime(2026, 1, 1)
+    start = end - timedelta(days=n_days)
+
+    price = 70.0
+    prices = []
+    for hour in range(n_days * 24):
+        price = max(20.0, price + rng.gauss(0, 0.4))
+        prices.append(
+            PricePoint(commodity=COMMODITY, timestamp=start + timedelta(hours=hour), close=round(price, 2))
+        )
+
+    headlines = []
+    span = int((end - start).total_seconds())
+    for i in range(n_headlines):
+        # A few headlines predate the price series to exercise the fallback.
+        offset = rng.randint(-3600 * 6, span)
+        headlines.append(
+            Headline(
+                id=str(uuid.uuid4()),
+                published_at=start + timedelta(seconds=offset),
+                title=f"{COMMODITY} headline {i}",
+                source="Bench",
+                url=f"https://example.com/{i}",
+                commodity=COMMODITY,
+                sentiment_score=round(rng.uniform(-1, 1), 3),
+                event_type="Supply",
+                impact_score=50.0,
+                pred_label=rng.choice(["UP", "DOWN", "NEUTRAL"]),
+                pred_confidence=0.6,
+            )
+        )
+
+    session.add_all(prices)
+    session.add_all(headlines)
+    session.commit()
+
+
+def legacy(db, commodity: str, limit: int) -> list[dict]:
+    """The original per-headline loop, with its hard-coded limit of 120 lifted."""
+    headlines = (
+        db.query(Headline)
+        .filter(Headline.commodity == commodity)
+        .order_by(Headline.published_at.desc())
+        .limit(limit)
+        .all()
+    )
+
+    results = []
+
+    for h in headlines:
+        current_price = (
+            db.query(PricePoint)
+            .filter(
+                PricePoint.commodity == commodity,
+                PricePoint.timestamp <= h.published_at,
+            )
+            .order_by(PricePoint.timestamp.desc())
+            .first()
+        )
+
+        if not current_price or not current_price.close:
+            current_price = (
+                db.query(PricePoint)
+                .filter(PricePoint.commodity == commodity)
+                .order_by(PricePoint.timestamp.desc())
+                .first()
+            )
+
+        if not current_price or not current_price.close:
+            continue
+
+        next_price = (
+            db.query(PricePoint)
+            .filter(
+                PricePoint.commodity == commodity,
+                PricePoint.timestamp > current_price.timestamp,
+            )
+            .order_by(PricePoint.timestamp.asc())
+            .first()
+        )
+
+        if not next_price:
+            next_price = current_price
+
+        pct = ((next_price.close - current_price.close) / current_price.close) * 100 if current_price.close else 0
+
+        results.append(
+            {
+                "published_at": h.published_at.isoformat() if h.published_at else None,
+                "title": h.title,
+                "sentiment_score": h.sentiment_score,
+                "pred_label": h.pred_label,
+                "next_price_change": round(pct, 4),
+            }
+        )
+
+    return results
+
+
+def timed(fn, repeat: int) -> tuple[float, list[dict]]:
+    best = float("inf")
+    result: list[dict] = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[120, 1000, 10000])
+    parser.add_argument("--days", type=int, default=365, help="Days of hourly prices to load.")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(bind=engine)
+
+        with Session() as session:
+            populate(session, max(args.sizes), args.days)
+
+        print(f"{'headlines':>10} {'loop (s)':>10} {'as-of (s)':>10} {'speedup':>8}")
+        for size in args.sizes:
+            with Session() as session:
+                t_old, old = timed(lambda: legacy(session, COMMODITY, size), args.repeat)
+                t_new, new = timed(
+                    lambda: news_service.compute_sentiment_vs_price_change(session, COMMODITY, limit=size),
+                    args.repeat,
+                )
+            if old != new:
+                raise SystemExit(f"Result mismatch at {size} headlines")
+            print(f"{size:>10} {t_old:>10.4f} {t_new:>10.4f} {t_old / t_new:>7.1f}x")
+
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+bench_sentiment_scoring.py
+==========================
+Throughput of headline sentiment scoring through
+backend/services/sentiment_service.py for batches of 1k, 10k and 100k
+titles at 1, 4 and N (= cpu count) worker processes.
+
+Titles are the synthetic seed titles plus the real NewsAPI titles in
+data/processed/news_table.parquet, each made unique with a suffix, so the
+"cold" column measures scoring with an empty memo cache.  The "warm"
+column re-scores the same batch (all cache hits); "wire" scores a batch
+in which every title appears ~10 times, as syndicated stories do.
+
+Pool start-up is excluded (the pool is started before timing); the first
+row of each worker count also checks that pooled scores equal in-process
+VADER scores.
+
+Usage
+-----
+    python scripts/bench_sentiment_scoring.py [--sizes 1000 10000 100000] [--workers 1 4 0]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from backend.services import news_service, sentiment_service  # noqa: E402
+
+NEWS_TABLE = os.path.join(ROOT, "data", "processed", "news_table.parquet")
+
+
+def title_pool() -> list[str]:
+    titles = [h.title for c in ("WTI", "BRENT", "NATGAS") for h in news_service.generate_headlines(c, count=500)]
+    if os.path.exists(NEWS_TABLE):
+        titles += pd.read_parquet(NEWS_TABLE)["title"].dropna().astype(str).tolist()
+    return titles
+
+
+def timed(texts: list[str], workers: int) -> tuple[float, list[float]]:
+    t0 = time.perf_counter()
+    scores = sentiment_service.score_texts(texts, workers=workers)
+    return len(texts) / (time.perf_counter() - t0), scores
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 0], help="0 means os.cpu_count().")
+    args = parser.parse_args()
+
+    sentiment_service.SENTIMENT_PARALLEL_MIN = 1  # always use the pool when workers > 1
+    rng = random.Random(0)
+    pool = title_pool()
+    reference = sentiment_service.VaderScorer()
+    print(f"cpu count: {os.cpu_count()}\n")
+    print(f"{'titles':>8} {'workers':>8} {'cold titles/s':>14} {'warm titles/s':>14} {'wire titles/s':>14}")
+
+    for workers in args.workers:
+        workers = workers or os.cpu_count() or 1
+        if workers > 1:
+            sentiment_service.score_texts([f"warm-up {i}" for i in range(workers)], workers=workers)
+        for n, size in enumerate(args.sizes):
+            texts = [f"{rng.choice(pool)} ({i})" for i in range(size)]
+            stories = [f"{rng.choice(pool)} ({i})" for i in range(max(size // 10, 1))]
+            wire = [stories[i % len(stories)] for i in range(size)]
+            rng.shuffle(wire)
+
+            sentiment_service.clear_cache()
+            cold, scores = timed(texts, workers)
+            if n == 0 and scores != reference.score_batch(texts):
+                raise SystemExit(f"Scores from {workers} worker(s) differ from in-process VADER")
+            warm, _ = timed(texts, workers)
+            sentiment_service.clear_cache()
+            wire_rate, _ = timed(wire, workers)
+            print(f"{size:>8,} {workers:>8} {cold:>14,.0f} {warm:>14,.0f} {wire_rate:>14,.0f}")
+    sentiment_service.shutdown()
+
+
+if __name__ == "__main__":
+    main()
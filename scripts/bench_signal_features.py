@@ -0,0 +1,442 @@
+"""
+bench_signal_features.py
+========================
+Parity check and timing for the shared feature registry
+(backend/services/signal_features.py) against the pandas blocks it
+replaced: train_model.py / prediction_service._engineer_features,
+train_price_model.engineer_features and the per-commodity loop of
+build_daily_training_table.py (copied verbatim below).
+
+A synthetic ten-year daily table (random-walk price, news activity with
+gaps) is built once.  Every registry column must match the legacy column —
+same NaN mask, values within --tolerance — before timings (best of
+--repeat) are printed.  The serving case is the 60-day window the
+prediction service builds per request, computing only the model's inputs;
+the panel case stacks --tickers such tables and compares a per-ticker loop
+over the legacy code with one grouped ``by="commodity"`` pass.
+
+Usage
+-----
+    python scripts/bench_signal_features.py [--years 10] [--tickers 30] [--repeat 20]
+        [--tolerance 1e-9]
+"""
+
+import argparse
+import math
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.services.signal_features import (  # noqa: E402
+    DAILY_TABLE_FEATURES,
+    DIRECTION_FEATURES,
+    PRICE_FEATURES,
+    add_features,
+    compute_features,
+)
+
+SERVING_WINDOW = 60
+
+
+# ── Legacy implementations ───────────────────────────────────────────────
+
+
+def legacy_direction(df: pd.DataFrame) -> pd.DataFrame:
+    """The original prediction_service._engineer_features (train_model.py's
+    block).
+
+    Expects a DataFrame with at least: price, price_lag_1, price_lag_2,
+    price_ma_3, price_ma_5, avg_tone, volatility_5, article_count, date.
+    """
+    df = df.copy()
+
+    # Downside pressure features
+    df["neg_tone_flag"] = (df["avg_tone"] < 0).astype(int)
+    df["strong_neg_tone"] = (df["avg_tone"] < -0.5).astype(int)
+
+    # Volatility direction signal
+    df["volatility_spike"] = (
+        df["volatility_5"] > df["volatility_5"].rolling(5).mean()
+    ).astype(int)
+
+    # Price drop signal
+    df["down_momentum"] = (df["price"] < df["price_lag_1"]).astype(int)
+
+    # Price difference features
+    df["price_diff_1"] = df["price"] - df["price_lag_1"]
+    df["price_diff_2"] = df["price_lag_1"] - df["price_lag_2"]
+
+    # Sentiment rolling features
+    df["tone_ma_3"] = df["avg_tone"].rolling(3).mean()
+    df["tone_x_volatility"] = df["avg_tone"] * df["volatility_5"]
+
+    # Short-term momentum
+    df["return_1"] = df["price"].pct_change()
+    df["return_2"] = df["price"].pct_change(2)
+
+    # Trend strength
+    df["trend_strength"] = df["price_ma_3"] - df["price_ma_5"]
+
+    # Acceleration
+    df["acceleration"] = df["return_1"] - df["return_2"]
+
+    # Sentiment change
+    df["tone_change"] = df["avg_tone"] - df["avg_tone"].shift(1)
+
+    # 3-period momentum
+    df["momentum_3"] = df["price"] - df["price_lag_2"]
+
+    # Stationary ratio features
+    df["price_vs_ma5"] = df["price"] / df["price_ma_5"] - 1
+    df["ma3_vs_ma5"] = df["price_ma_3"] / df["price_ma_5"] - 1
+
+    # MACD
+    _ema12 = df["price"].ewm(span=12, adjust=False).mean()
+    _ema26 = df["price"].ewm(span=26, adjust=False).mean()
+    df["macd"] = _ema12 - _ema26
+    df["macd_signal"] = df["macd"].ewm(span=9, adjust=False).mean()
+    df["macd_hist"] = df["macd"] - df["macd_signal"]
+    df["price_vs_ema12"] = _ema12 / df["price"] - 1
+    df["ema12_vs_ema26"] = _ema12 / _ema26 - 1
+
+    # RSI
+    _delta = df["price"].diff()
+    _avg_gain = _delta.clip(lower=0).ewm(com=13, adjust=False).mean()
+    _avg_loss = (-_delta.clip(upper=0)).ewm(com=13, adjust=False).mean()
+    df["rsi"] = 100 - (100 / (1 + _avg_gain / _avg_loss.replace(0, float("nan"))))
+    df["rsi_norm"] = (df["rsi"] - 50) / 50
+    df["rsi_overbought"] = (df["rsi"] > 70).astype(int)
+    df["rsi_oversold"] = (df["rsi"] < 30).astype(int)
+
+    # Cyclical calendar encoding
+    df["date"] = pd.to_datetime(df["date"])
+    df["month_sin"] = df["date"].dt.month.apply(
+        lambda m: math.sin(2 * math.pi * m / 12)
+    )
+    df["month_cos"] = df["date"].dt.month.apply(
+        lambda m: math.cos(2 * math.pi * m / 12)
+    )
+
+    # Sentiment × technical interactions
+    df["macd_x_tone"] = df["macd_hist"] * df["avg_tone"]
+    df["rsi_x_tone"] = df["rsi_norm"] * df["avg_tone"]
+    df["macd_x_vol"] = df["macd_hist"] * df["volatility_5"]
+
+    return df
+
+
+def legacy_price(df: pd.DataFrame) -> pd.DataFrame:
+    """The original train_price_model.engineer_features."""
+    # --- Downside pressure flags ---
+    df["neg_tone_flag"]   = (df["avg_tone"] < 0).astype(int)
+    df["strong_neg_tone"] = (df["avg_tone"] < -0.5).astype(int)
+
+    # --- Volatility spike flag ---
+    if "volatility_5" in df.columns:
+        df["volatility_spike"] = (
+            df["volatility_5"] > df["volatility_5"].rolling(5).mean()
+        ).astype(int)
+
+    # --- Price momentum features ---
+    if "price_lag_1" in df.columns:
+        df["down_momentum"] = (df["price"] < df["price_lag_1"]).astype(int)
+    if "price_lag_1" in df.columns:
+        df["price_diff_1"] = df["price"] - df["price_lag_1"]
+    if "price_lag_1" in df.columns and "price_lag_2" in df.columns:
+        df["price_diff_2"] = df["price_lag_1"] - df["price_lag_2"]
+
+    # --- Ensure return columns exist ---
+    if "return_1" not in df.columns:
+        df["return_1"] = df["price"].pct_change(1)
+    if "return_2" not in df.columns:
+        df["return_2"] = df["price"].pct_change(2)
+    if "return_3" not in df.columns:
+        df["return_3"] = df["price"].pct_change(3)
+    if "return_5" not in df.columns:
+        df["return_5"] = df["price"].pct_change(5)
+    if "return_10" not in df.columns:
+        df["return_10"] = df["price"].pct_change(10)
+
+    # --- Ensure rolling MA / volatility columns exist ---
+    if "price_ma_3" not in df.columns:
+        df["price_ma_3"] = df["price"].rolling(3).mean()
+    if "price_ma_5" not in df.columns:
+        df["price_ma_5"] = df["price"].rolling(5).mean()
+    if "price_ma_10" not in df.columns:
+        df["price_ma_10"] = df["price"].rolling(10).mean()
+    if "price_ma_20" not in df.columns:
+        df["price_ma_20"] = df["price"].rolling(20).mean()
+    if "volatility_5" not in df.columns:
+        df["volatility_5"] = df["return_1"].rolling(5).std()
+    if "volatility_10" not in df.columns:
+        df["volatility_10"] = df["return_1"].rolling(10).std()
+    if "volatility_20" not in df.columns:
+        df["volatility_20"] = df["return_1"].rolling(20).std()
+
+    # --- Sentiment rolling features ---
+    df["tone_ma_3"]  = df["avg_tone"].rolling(3).mean()
+    df["tone_x_volatility"] = df["avg_tone"] * df["volatility_5"]
+    if "tone_ma_5" not in df.columns:
+        df["tone_ma_5"]  = df["avg_tone"].rolling(5).mean()
+    if "tone_ma_10" not in df.columns:
+        df["tone_ma_10"] = df["avg_tone"].rolling(10).mean()
+
+    # --- Trend and acceleration ---
+    df["trend_strength"] = df["price_ma_3"] - df["price_ma_5"]
+    df["trend_10"]       = df["price_ma_5"] - df["price_ma_10"]
+    df["acceleration"]   = df["return_1"] - df["return_2"]
+
+    # --- Sentiment change ---
+    df["tone_change"] = df["avg_tone"] - df["avg_tone"].shift(1)
+
+    # --- 3-period and 5-period momentum (price units) ---
+    if "price_lag_2" in df.columns:
+        df["momentum_3"] = df["price"] - df["price_lag_2"]
+    if "price_lag_4" in df.columns:
+        df["momentum_5"] = df["price"] - df["price_lag_4"]
+    elif "price_lag_2" in df.columns:
+        df["momentum_5"] = df["price"].diff(4)
+
+    # --- Price position relative to moving averages (stationary ratios) ---
+    df["price_vs_ma5"]  = df["price"] / df["price_ma_5"] - 1
+    df["ma3_vs_ma5"]    = df["price_ma_3"] / df["price_ma_5"] - 1
+    df["price_vs_ma10"] = df["price"] / df["price_ma_10"] - 1
+    df["price_vs_ma20"] = df["price"] / df["price_ma_20"] - 1
+
+    # --- Bollinger Bands (20-day) ---
+    _bb_std = df["price"].rolling(20).std()
+    df["bb_upper"]    = df["price_ma_20"] + 2 * _bb_std
+    df["bb_lower"]    = df["price_ma_20"] - 2 * _bb_std
+    df["bb_width"]    = (df["bb_upper"] - df["bb_lower"]) / df["price_ma_20"]
+    df["bb_position"] = (df["price"] - df["bb_lower"]) / (df["bb_upper"] - df["bb_lower"] + 1e-9)
+
+    # --- EWM-based indicators (no NaN row loss) ---
+
+    # MACD
+    _ema12           = df["price"].ewm(span=12, adjust=False).mean()
+    _ema26           = df["price"].ewm(span=26, adjust=False).mean()
+    df["macd"]        = _ema12 - _ema26
+    df["macd_signal"] = df["macd"].ewm(span=9, adjust=False).mean()
+    df["macd_hist"]   = df["macd"] - df["macd_signal"]
+    df["price_vs_ema12"] = _ema12 / df["price"] - 1
+    df["ema12_vs_ema26"] = _ema12 / _ema26 - 1
+
+    # RSI (Wilder EWM smoothing)
+    _delta    = df["price"].diff()
+    _avg_gain = _delta.clip(lower=0).ewm(com=13, adjust=False).mean()
+    _avg_loss = (-_delta.clip(upper=0)).ewm(com=13, adjust=False).mean()
+    df["rsi"]          = 100 - (100 / (1 + _avg_gain / _avg_loss.replace(0, float("nan"))))
+    df["rsi_norm"]     = (df["rsi"] - 50) / 50   # centred on 0
+    df["rsi_overbought"] = (df["rsi"] > 70).astype(int)
+    df["rsi_oversold"]   = (df["rsi"] < 30).astype(int)
+
+    # Stochastic oscillator (14-day) — %K
+    _lo14 = df["price"].rolling(14).min()
+    _hi14 = df["price"].rolling(14).max()
+    df["stoch_k"] = 100 * (df["price"] - _lo14) / (_hi14 - _lo14 + 1e-9)
+    df["stoch_d"] = df["stoch_k"].rolling(3).mean()
+
+    # --- Cyclical calendar encoding ---
+    df["date"] = pd.to_datetime(df["date"])
+    df["month_sin"] = df["date"].dt.month.apply(lambda m: math.sin(2 * math.pi * m / 12))
+    df["month_cos"] = df["date"].dt.month.apply(lambda m: math.cos(2 * math.pi * m / 12))
+
+    # Day-of-week (0=Mon … 4=Fri) — oil markets exhibit weekly seasonality
+    if "dow_sin" not in df.columns:
+        _dow = df["date"].dt.dayofweek
+        df["dow_sin"] = _dow.apply(lambda d: math.sin(2 * math.pi * d / 5))
+        df["dow_cos"] = _dow.apply(lambda d: math.cos(2 * math.pi * d / 5))
+
+    # --- Sentiment × technical interaction features ---
+    df["macd_x_tone"] = df["macd_hist"] * df["avg_tone"]
+    df["rsi_x_tone"]  = df["rsi_norm"]  * df["avg_tone"]
+    df["macd_x_vol"]  = df["macd_hist"] * df["volatility_5"]
+    df["rsi_x_vol"]   = df["rsi_norm"]  * df["volatility_5"]
+
+    # --- Commodity dummy (WTI=1, BRENT=0) ---
+    if "commodity" in df.columns:
+        df["is_wti"] = (df["commodity"] == "WTI").astype(int)
+
+    return df
+
+
+def legacy_daily(merged: pd.DataFrame) -> pd.DataFrame:
+    """The original per-commodity loop body of build_daily_training_table.py."""
+    merged = merged.copy()
+    # ------------------------------------------------------------------ #
+    # Price lag features (1 – 10 trading days)                          #
+    # ------------------------------------------------------------------ #
+    for lag in range(1, 11):
+        merged[f"price_lag_{lag}"] = merged["price"].shift(lag)
+
+    # Return lags (1 – 10 trading days)
+    merged["return_1"]  = merged["price"].pct_change(1)
+    merged["return_2"]  = merged["price"].pct_change(2)
+    merged["return_3"]  = merged["price"].pct_change(3)
+    merged["return_5"]  = merged["price"].pct_change(5)
+    merged["return_10"] = merged["price"].pct_change(10)
+
+    # Price change features
+    merged["price_change_1"] = merged["price"] - merged["price_lag_1"]
+    merged["price_change_2"] = merged["price_lag_1"] - merged["price_lag_2"]
+
+    # ------------------------------------------------------------------ #
+    # Rolling averages (3, 5, 10, 20 trading-day windows)               #
+    # ------------------------------------------------------------------ #
+    merged["price_ma_3"]  = merged["price"].rolling(3).mean()
+    merged["price_ma_5"]  = merged["price"].rolling(5).mean()
+    merged["price_ma_10"] = merged["price"].rolling(10).mean()
+    merged["price_ma_20"] = merged["price"].rolling(20).mean()
+
+    # ------------------------------------------------------------------ #
+    # Rolling volatility (5, 10, 20 windows)                            #
+    # ------------------------------------------------------------------ #
+    merged["volatility_5"]  = merged["return_1"].rolling(5).std()
+    merged["volatility_10"] = merged["return_1"].rolling(10).std()
+    merged["volatility_20"] = merged["return_1"].rolling(20).std()
+
+    # ------------------------------------------------------------------ #
+    # News-activity rolling features                                     #
+    # ------------------------------------------------------------------ #
+    merged["article_count_ma_5"]  = merged["article_count"].rolling(5).mean()
+    merged["article_count_ma_10"] = merged["article_count"].rolling(10).mean()
+    merged["tone_ma_5"]           = merged["avg_tone"].rolling(5).mean()
+    merged["tone_ma_10"]          = merged["avg_tone"].rolling(10).mean()
+
+    # ------------------------------------------------------------------ #
+    # Calendar encoding (day-of-week, month) — purely backward-looking  #
+    # ------------------------------------------------------------------ #
+    merged["day_of_week"] = merged["date"].dt.dayofweek      # 0=Mon … 4=Fri
+    merged["dow_sin"] = merged["day_of_week"].apply(
+        lambda d: math.sin(2 * math.pi * d / 5)
+    )
+    merged["dow_cos"] = merged["day_of_week"].apply(
+        lambda d: math.cos(2 * math.pi * d / 5)
+    )
+    return merged
+
+
+# ── Harness ──────────────────────────────────────────────────────────────
+
+
+def synthetic_table(years: int, seed: int = 0) -> pd.DataFrame:
+    """One commodity's daily table, with the base columns the direction
+    model's training table carries."""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2015-01-01", periods=252 * years)
+    price = 60 * np.exp(np.cumsum(rng.normal(0, 0.02, len(dates))))
+    tone = rng.normal(0, 1.5, len(dates))
+    count = rng.poisson(40, len(dates)).astype(float)
+    # flat prices and missing news days, as in the real history
+    price[rng.random(len(dates)) < 0.03] = np.nan
+    price = pd.Series(price).ffill().to_numpy()
+    gaps = rng.random(len(dates)) < 0.1
+    tone[gaps] = np.nan
+    count[gaps] = np.nan
+    df = pd.DataFrame({
+        "date": dates,
+        "commodity": "WTI",
+        "price": price,
+        "avg_tone": pd.Series(tone).ffill().bfill(),
+        "article_count": pd.Series(count).ffill().bfill(),
+    })
+    # the direction model's table ships these precomputed
+    s = df["price"]
+    df["price_lag_1"] = s.shift(1)
+    df["price_lag_2"] = s.shift(2)
+    df["price_ma_3"] = s.rolling(3).mean()
+    df["price_ma_5"] = s.rolling(5).mean()
+    df["volatility_5"] = s.pct_change().rolling(5).std()
+    return df
+
+
+def check(name: str, legacy: pd.DataFrame, new: pd.DataFrame, columns: list[str], tolerance: float) -> float:
+    worst = 0.0
+    for column in columns:
+        expected = legacy[column].to_numpy(dtype=float)
+        actual = new[column].to_numpy(dtype=float)
+        if not np.array_equal(np.isnan(expected), np.isnan(actual)):
+            raise SystemExit(f"{name}: NaN mask differs for {column}")
+        mask = ~np.isnan(expected)
+        diff = np.abs(actual[mask] - expected[mask]) / np.maximum(1.0, np.abs(expected[mask]))
+        worst = max(worst, float(diff.max(initial=0.0)))
+    if worst > tolerance:
+        raise SystemExit(f"{name}: max relative difference {worst:.3e} exceeds {tolerance:g}")
+    return worst
+
+
+def best_of(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--tickers", type=int, default=30, help="Series in the grouped panel case.")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--tolerance", type=float, default=1e-9)
+    args = parser.parse_args()
+
+    table = synthetic_table(args.years)
+    base = table[["date", "commodity", "price", "avg_tone", "article_count"]]
+    window = table.iloc[-SERVING_WINDOW:].reset_index(drop=True)
+    # a model's feature_names.json: the direction set minus the base columns
+    served = [n for n in DIRECTION_FEATURES if n not in window.columns]
+    panel = pd.concat(
+        [synthetic_table(args.years, seed=i).assign(commodity=f"T{i:02d}") for i in range(args.tickers)],
+        ignore_index=True,
+    )
+
+    cases = {
+        "direction": (
+            lambda: legacy_direction(table),
+            lambda: add_features(table, DIRECTION_FEATURES),
+            DIRECTION_FEATURES,
+        ),
+        "price": (
+            lambda: legacy_price(table.copy()),
+            lambda: add_features(table, PRICE_FEATURES),
+            PRICE_FEATURES,
+        ),
+        "daily table": (
+            lambda: legacy_daily(base),
+            lambda: add_features(base, DAILY_TABLE_FEATURES),
+            DAILY_TABLE_FEATURES,
+        ),
+        "serving (60 rows)": (
+            lambda: legacy_direction(window).dropna().iloc[[-1]][served],
+            lambda: compute_features(window, served).dropna().iloc[[-1]],
+            served,
+        ),
+        f"panel ({args.tickers} series)": (
+            lambda: pd.concat([legacy_price(g.copy()) for _, g in panel.groupby("commodity", sort=False)]),
+            lambda: add_features(panel, PRICE_FEATURES, by="commodity"),
+            PRICE_FEATURES,
+        ),
+    }
+
+    print(f"{len(table)} daily rows, best of {args.repeat}\n")
+    print(f"{'case':<18} {'columns':>7} {'legacy ms':>10} {'registry ms':>12} {'speedup':>8} {'max rel diff':>13}")
+    for name, (legacy_fn, new_fn, columns) in cases.items():
+        worst = check(name, legacy_fn(), new_fn(), columns, args.tolerance)
+        legacy_s = best_of(legacy_fn, args.repeat)
+        new_s = best_of(new_fn, args.repeat)
+        print(
+            f"{name:<18} {len(columns):>7} {legacy_s * 1e3:>10.2f} {new_s * 1e3:>12.2f} "
+            f"{legacy_s / new_s:>7.1f}x {worst:>13.1e}"
+        )
+    print("\nFeature parity check passed.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+bench_text_normalizer.py
+========================
+Parity check and throughput benchmark for the compiled headline text
+pipeline (backend/services/text_normalizer.py) against the original
+per-rule implementation, which is still present verbatim in
+backend/services/news_service_backup.py.
+
+Corpus: --size headlines drawn from the synthetic seed titles, the real
+NewsAPI titles/descriptions in data/processed/news_table.parquet (if
+present) and randomly assembled strings built from rule phrases,
+punctuation, tags and non-ASCII characters.
+
+Every distinct text must give identical ``preprocess_text``,
+``classify_event_type`` and ``calculate_relevance_score`` results before
+any timing is reported.
+
+Usage
+-----
+    python scripts/bench_text_normalizer.py [--size 100000] [--fuzz 20000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from backend.services import news_service, news_service_backup as reference  # noqa: E402
+
+NEWS_TABLE = os.path.join(ROOT, "data", "processed", "news_table.parquet")
+
+FRAGMENTS = [
+    "u.s.", "u.s", "U.S.", "U.S.A.", "uk", "UK-based", "brent", "Brent Crude", "wti", "crude", "oil",
+    "prices", "West Texas Intermediate", "henry", "hub", "Henry Hub", "natural", "gas", "rate", "rates",
+    "cut", "cuts", "hike", "hikes", "interest", "production", "output", "supply", "shipping",
+    "disruption", "disruptions", "pipeline", "refinery", "outage", "outages", "inventory", "build",
+    "draw", "opec", "war", "urban", "fed", "federal", "ban", "lng", "jet fuel", "demand", "growth",
+    "<b>", "</b>", "<a href='x'>", "<", ">", "-", ".", ",", ";", "'", "\"", "$70", "5%", "_", "é",
+    "—", "€", "\n", "\t", "  ",
+]
+
+
+def build_corpus(size: int, fuzz: int, rng: random.Random) -> tuple[list[str], list[str]]:
+    """``size`` titles sampled from a pool of distinct texts, and the pool."""
+    texts = [h.title for c in ("WTI", "BRENT", "NATGAS") for h in news_service.generate_headlines(c, count=500)]
+    if os.path.exists(NEWS_TABLE):
+        news = pd.read_parquet(NEWS_TABLE)
+        for column in ("title", "description", "content"):
+            texts += news[column].dropna().astype(str).tolist()
+    for _ in range(fuzz):
+        parts = rng.choices(FRAGMENTS, k=rng.randint(1, 14))
+        texts.append("".join(p + rng.choice(["", " ", " ", " ", "-", "."]) for p in parts))
+    return [rng.choice(texts) for _ in range(size)], texts
+
+
+def reference_pipeline(title: str):
+    clean = reference.preprocess_text(title)
+    event_type, matches = reference.classify_event_type(clean)
+    return clean, event_type, matches, reference.calculate_relevance_score(clean)
+
+
+def compiled_pipeline(title: str):
+    clean = news_service.preprocess_text(title)
+    event_type, matches = news_service.classify_event_type(clean)
+    return clean, event_type, matches, news_service.calculate_relevance_score(clean)
+
+
+def check_parity(texts: list[str]) -> int:
+    distinct = list(dict.fromkeys(texts))
+    batch = news_service.analyze_titles(distinct)
+    for text, batched in zip(distinct, batch):
+        expected = reference_pipeline(text)
+        # classify/relevance are also called on raw text elsewhere, so check that too
+        expected_raw = (reference.classify_event_type(text), reference.calculate_relevance_score(text))
+        got_raw = (news_service.classify_event_type(text), news_service.calculate_relevance_score(text))
+        if compiled_pipeline(text) != expected or batched != expected or got_raw != expected_raw:
+            raise SystemExit(f"Mismatch for {text!r}:\n  expected {expected}\n  got      {batched}")
+    return len(distinct)
+
+
+def rate(fn, titles: list[str]) -> float:
+    t0 = time.perf_counter()
+    fn(titles)
+    return len(titles) / (time.perf_counter() - t0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=100_000, help="Headlines to time.")
+    parser.add_argument("--fuzz", type=int, default=20_000, help="Randomly assembled texts in the pool.")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    titles, pool = build_corpus(args.size, args.fuzz, rng)
+    print(f"parity: {check_parity(pool):,} distinct texts identical (preprocess, classify, relevance)")
+
+    # Suffixing each title defeats de-duplication and the keyword-hit memo, so
+    # the first three rows time raw per-title work.
+    unique = [f"{title} #{i}" for i, title in enumerate(titles)]
+    rows = [
+        ("original (per-rule re.sub + keyword loops)", lambda ts: [reference_pipeline(t) for t in ts], unique),
+        ("compiled, one title at a time", lambda ts: [compiled_pipeline(t) for t in ts], unique),
+        ("compiled batch, all titles distinct", news_service.analyze_titles, unique),
+        ("compiled batch, corpus duplicates", news_service.analyze_titles, titles),
+    ]
+    baseline = None
+    print(f"\n{'pipeline':<44} {'titles/s':>11} {'speedup':>8}")
+    for name, fn, data in rows:
+        r = rate(fn, data)
+        baseline = baseline or r
+        print(f"{name:<44} {r:>11,.0f} {r / baseline:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+bench_tree_compiler.py
+======================
+Parity check and latency benchmark for the tree compiler
+(backend/services/tree_compiler.py) that the model registry serves
+through.
+
+The direction classifiers of train_model.py (forest, gradient, xgboost)
+and the tree models of train_price_model.py (RandomForest,
+GradientBoosting, HistGBM, XGBoost, LightGBM and the Stacking ensemble)
+are fitted with their training configurations on a synthetic feature
+table.  Each compiled model must match the original — P(UP) for the
+classifiers, the prediction for the regressors — within --tolerance on
+--rows held-out rows, and again with 5 % of the values set to NaN for the
+models that accept missing values.  Then both are timed (best of --repeat)
+at batch sizes 1, 100 and 10 000.
+
+Exits non-zero if any model differs by more than --tolerance.
+
+Usage
+-----
+    python scripts/bench_tree_compiler.py [--features 74] [--train 3000] [--rows 10000]
+        [--repeat 5] [--tolerance 1e-9]
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import train_price_model  # noqa: E402
+from backend.services.tree_compiler import compile_model  # noqa: E402
+
+BATCH_SIZES = [1, 100, 10_000]
+PRICE_MODELS = ["RandomForest", "GradientBoosting", "HistGBM", "XGBoost", "LightGBM", "Stacking"]
+
+
+def synthetic(n_rows: int, n_features: int, seed: int = 0) -> tuple[pd.DataFrame, np.ndarray]:
+    """Features with a weak linear signal, as a named frame, and a noisy
+    next-day price change."""
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n_rows, n_features))
+    # binary flags, like neg_tone_flag / rsi_overbought
+    X[:, ::7] = (X[:, ::7] > 0).astype(float)
+    weights = rng.normal(0, 0.3, n_features)
+    y = X @ weights + rng.normal(0, 1.0, n_rows)
+    return pd.DataFrame(X, columns=[f"f{i:02d}" for i in range(n_features)]), y
+
+
+def direction_models(y_train: pd.Series) -> dict:
+    try:
+        from train_model import build_model
+    except ImportError as exc:
+        print(f"Skipping the direction models: {exc}")
+        return {}
+    return {f"direction/{name}": build_model(name, y_train) for name in ["forest", "gradient", "xgboost"]}
+
+
+def scores(model, X) -> np.ndarray:
+    """P(UP) for a classifier, the prediction for a regressor."""
+    if getattr(model, "classes_", None) is not None:
+        return model.predict_proba(X)[:, 1]
+    return model.predict(X)
+
+
+def best_of(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--features", type=int, default=74)
+    parser.add_argument("--train", type=int, default=3000)
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--tolerance", type=float, default=1e-9)
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.ERROR)
+    warnings.filterwarnings("ignore", category=UserWarning)
+
+    X_train, y_train = synthetic(args.train, args.features)
+    X_test, _ = synthetic(max(args.rows, max(BATCH_SIZES)), args.features, seed=1)
+    X_nan = X_test.mask(np.random.default_rng(2).random(X_test.shape) < 0.05)
+    up = pd.Series((y_train > 0).astype(int))
+
+    models = direction_models(up)
+    price = train_price_model.make_models(n_jobs=-1)
+    models.update({f"price/{name}": price[name] for name in PRICE_MODELS if name in price})
+
+    print(f"{args.train} training rows, {args.features} features, best of {args.repeat}\n")
+    header = "".join(f"{f'batch {n}':>24}" for n in BATCH_SIZES)
+    print(f"{'model':<24} {'max abs diff':>12} {'with NaN':>10}{header}")
+    print(f"{'':<24} {'':>12} {'':>10}" + "".join(f"{'original → compiled ms':>24}" for _ in BATCH_SIZES))
+    failed = []
+    for name, model in models.items():
+        target = up if name.startswith("direction/") else y_train
+        model.fit(X_train, target)
+        compiled = compile_model(model)
+
+        worst = float(np.abs(scores(compiled, X_test.iloc[:args.rows]) - scores(model, X_test.iloc[:args.rows])).max())
+        try:
+            expected = scores(model, X_nan.iloc[:args.rows])
+        except ValueError:  # estimator rejects NaN input
+            worst_nan = None
+        else:
+            worst_nan = float(np.abs(scores(compiled, X_nan.iloc[:args.rows]) - expected).max())
+        if worst > args.tolerance or (worst_nan or 0.0) > args.tolerance:
+            failed.append(name)
+
+        timings = []
+        for n in BATCH_SIZES:
+            batch = X_test.iloc[:n]
+            original = best_of(lambda: scores(model, batch), args.repeat)
+            fast = best_of(lambda: scores(compiled, batch), args.repeat)
+            timings.append(f"{original * 1e3:>9.2f} → {fast * 1e3:>8.2f}")
+        nan_text = "n/a" if worst_nan is None else f"{worst_nan:.1e}"
+        print(f"{name:<24} {worst:>12.1e} {nan_text:>10}" + "".join(f"{t:>24}" for t in timings))
+
+    if failed:
+        raise SystemExit(f"\nCompiled predictions differ by more than {args.tolerance:g}: {', '.join(failed)}")
+    print("\nCompiled model parity check passed.")
+
+
+if __name__ == "__main__":
+    main()
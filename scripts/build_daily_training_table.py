@@ -9,109 +9,167 @@ This is a SEPARATE file from build_training_table.py and writes to a different
 parquet path so that the Direction Signal Engine's model_training_table.parquet
 is never modified.
 
+A full build also stores the table partitioned by commodity and year
+(training_tables.py).  ``--incremental`` then reads only the input days past
+each commodity's high-water mark, recomputes them together with the
+LOOKBACK trailing days the rolling windows need, and appends the finished
+rows as new part files — a new trading day costs milliseconds rather than
+a rebuild.  Input rows dated at or before the high-water mark (back-filled
+prices, late news) are only picked up by a full build.
+
 Output
 ------
-  data/processed/daily_training_table.parquet
+  data/processed/daily_training_table.parquet   (full builds)
+  data/processed/daily_training_table/          (partitioned; full and incremental)
 
 Usage
 -----
-    python scripts/build_daily_training_table.py
+    python scripts/build_daily_training_table.py                 # full rebuild
+    python scripts/build_daily_training_table.py --incremental   # append new days
+    python scripts/build_daily_training_table.py --compact       # merge part files
 """
 
-import math
+import argparse
+import os
+import sys
+import time
+
 import pandas as pd
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.services.signal_features import DAILY_TABLE_FEATURES, add_features  # noqa: E402
+from training_tables import PartitionedTable  # noqa: E402
+
 NEWS_FEATURES = "data/processed/news_features.parquet"
 PRICE_HISTORY = "data/processed/price_history.parquet"
 OUTPUT = "data/processed/daily_training_table.parquet"
+DATASET = "data/processed/daily_training_table"
 
+SENTIMENT = ["article_count", "avg_tone"]
 
-def main():
-    news = pd.read_parquet(NEWS_FEATURES)
-    prices = pd.read_parquet(PRICE_HISTORY)
+# Trading days an update must see before its first new day: price_ma_20 and
+# volatility_20 (20 returns need 21 prices) reach back furthest.
+LOOKBACK = 20
+
+
+def load_inputs(prices_path: str, news_path: str, high_water: dict | None = None):
+    """Price history and news features; with ``high_water``, only the days
+    after it (all days for commodities it does not know)."""
+    filters = None
+    if high_water:
+        since = min(high_water.values())
+        filters = [[("date", ">", since)], [("commodity", "not in", list(high_water))]]
+    prices = pd.read_parquet(prices_path, filters=filters)
+    news = pd.read_parquet(news_path, filters=filters)
 
     news["date"] = pd.to_datetime(news["date"])
     prices["date"] = pd.to_datetime(prices["date"])
 
-    dfs = []
-    for commodity in prices["commodity"].unique():
-        p = prices[prices["commodity"] == commodity].sort_values("date").copy()
-        n = news[news["commodity"] == commodity][["date", "article_count", "avg_tone"]].copy()
-
-        # Left join: every trading day gets a price row; sentiment filled on news days only
-        merged = p.merge(n, on="date", how="left")
-
-        # Forward-fill sentiment so non-news days carry the most recent signal
-        merged[["article_count", "avg_tone"]] = merged[["article_count", "avg_tone"]].ffill()
-
-        # Trim rows before the first news entry (no prior sentiment to carry forward)
-        merged = merged.dropna(subset=["article_count", "avg_tone"])
-
-        # ------------------------------------------------------------------ #
-        # Price lag features (1 – 10 trading days)                          #
-        # ------------------------------------------------------------------ #
-        for lag in range(1, 11):
-            merged[f"price_lag_{lag}"] = merged["price"].shift(lag)
-
-        # Return lags (1 – 10 trading days)
-        merged["return_1"]  = merged["price"].pct_change(1)
-        merged["return_2"]  = merged["price"].pct_change(2)
-        merged["return_3"]  = merged["price"].pct_change(3)
-        merged["return_5"]  = merged["price"].pct_change(5)
-        merged["return_10"] = merged["price"].pct_change(10)
-
-        # Price change features
-        merged["price_change_1"] = merged["price"] - merged["price_lag_1"]
-        merged["price_change_2"] = merged["price_lag_1"] - merged["price_lag_2"]
-
-        # ------------------------------------------------------------------ #
-        # Rolling averages (3, 5, 10, 20 trading-day windows)               #
-        # ------------------------------------------------------------------ #
-        merged["price_ma_3"]  = merged["price"].rolling(3).mean()
-        merged["price_ma_5"]  = merged["price"].rolling(5).mean()
-        merged["price_ma_10"] = merged["price"].rolling(10).mean()
-        merged["price_ma_20"] = merged["price"].rolling(20).mean()
-
-        # ------------------------------------------------------------------ #
-        # Rolling volatility (5, 10, 20 windows)                            #
-        # ------------------------------------------------------------------ #
-        merged["volatility_5"]  = merged["return_1"].rolling(5).std()
-        merged["volatility_10"] = merged["return_1"].rolling(10).std()
-        merged["volatility_20"] = merged["return_1"].rolling(20).std()
-
-        # ------------------------------------------------------------------ #
-        # News-activity rolling features                                     #
-        # ------------------------------------------------------------------ #
-        merged["article_count_ma_5"]  = merged["article_count"].rolling(5).mean()
-        merged["article_count_ma_10"] = merged["article_count"].rolling(10).mean()
-        merged["tone_ma_5"]           = merged["avg_tone"].rolling(5).mean()
-        merged["tone_ma_10"]          = merged["avg_tone"].rolling(10).mean()
-
-        # ------------------------------------------------------------------ #
-        # Calendar encoding (day-of-week, month) — purely backward-looking  #
-        # ------------------------------------------------------------------ #
-        merged["day_of_week"] = merged["date"].dt.dayofweek      # 0=Mon … 4=Fri
-        merged["dow_sin"] = merged["day_of_week"].apply(
-            lambda d: math.sin(2 * math.pi * d / 5)
-        )
-        merged["dow_cos"] = merged["day_of_week"].apply(
-            lambda d: math.cos(2 * math.pi * d / 5)
-        )
-
-        # Future target
-        merged["next_price"] = merged["price"].shift(-1)
-        merged["next_day_return"] = (merged["next_price"] - merged["price"]) / merged["price"]
-        merged["target_up_down"] = (merged["next_day_return"] > 0).astype(int)
-
-        dfs.append(merged)
-
-    df = pd.concat(dfs, ignore_index=True)
-    df = df.sort_values(["commodity", "date"]).reset_index(drop=True)
-    df = df.dropna().reset_index(drop=True)
-
-    df.to_parquet(OUTPUT, index=False)
-
-    print(f"Written {len(df)} rows to {OUTPUT}")
+    if high_water:
+        cutoff = prices["commodity"].map(high_water)
+        prices = prices[~(prices["date"] <= cutoff)]
+    return prices, news[["date", "commodity", *SENTIMENT]]
+
+
+def base_frame(prices: pd.DataFrame, news: pd.DataFrame, carry: pd.DataFrame | None = None) -> pd.DataFrame:
+    """One row per trading day with sentiment, sorted by commodity and date.
+
+    ``carry`` holds earlier rows of this same frame (a stored tail); they
+    seed the forward-fill and the rolling windows of the new days.
+    """
+    # Left join: every trading day gets a price row; sentiment filled on news days only
+    merged = prices.merge(news, on=["commodity", "date"], how="left")
+    if carry is not None:
+        merged = pd.concat([carry, merged], ignore_index=True)
+    merged = merged.sort_values(["commodity", "date"], kind="stable").reset_index(drop=True)
+
+    # Forward-fill sentiment so non-news days carry the most recent signal
+    merged[SENTIMENT] = merged.groupby("commodity")[SENTIMENT].ffill()
+
+    # Trim rows before each commodity's first news entry (no prior sentiment to carry forward)
+    return merged.dropna(subset=SENTIMENT)
+
+
+def build_rows(base: pd.DataFrame) -> pd.DataFrame:
+    """Features and targets for every row of ``base``; rows still missing a
+    value (window warm-up, or a last day whose next day has not arrived)
+    are kept as NaN for the caller to drop."""
+    # Lags, returns, rolling stats, news activity and calendar encoding
+    # from the shared registry (backend/services/signal_features.py),
+    # computed per commodity in one pass
+    rows = add_features(base, DAILY_TABLE_FEATURES, by="commodity")
+
+    # Future target
+    rows["next_price"] = rows.groupby("commodity")["price"].shift(-1)
+    rows["next_day_return"] = (rows["next_price"] - rows["price"]) / rows["price"]
+    rows["target_up_down"] = (rows["next_day_return"] > 0).astype(int)
+    return rows
+
+
+def tail_of(base: pd.DataFrame) -> pd.DataFrame:
+    # LOOKBACK days of history plus the last day, which has no target yet
+    return base.groupby("commodity").tail(LOOKBACK + 1).reset_index(drop=True)
+
+
+def full_build(prices_path: str, news_path: str, output: str, dataset: str) -> pd.DataFrame:
+    prices, news = load_inputs(prices_path, news_path)
+    base = base_frame(prices, news)
+    df = build_rows(base).dropna().reset_index(drop=True)
+
+    df.to_parquet(output, index=False)
+    high_water = prices.groupby("commodity")["date"].max().to_dict()
+    PartitionedTable(dataset).write(df, tail_of(base), high_water, replace=True)
+    return df
+
+
+def incremental_update(prices_path: str, news_path: str, dataset: str) -> tuple[pd.DataFrame, list[str]]:
+    """Append the days past the high-water marks; returns the new rows and
+    the part files written."""
+    table = PartitionedTable(dataset)
+    high_water = table.high_water()
+    prices, news = load_inputs(prices_path, news_path, high_water)
+    if prices.empty:
+        return prices, []
+
+    base = base_frame(prices, news, carry=table.tail())
+    rows = build_rows(base)
+    emitted = rows["commodity"].map(table.emitted())
+    new_rows = rows[~(rows["date"] <= emitted)].dropna().reset_index(drop=True)
+
+    high_water.update(prices.groupby("commodity")["date"].max().to_dict())
+    written = table.write(new_rows, tail_of(base), high_water)
+    return new_rows, written
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--incremental", action="store_true", help="Append days past the high-water mark.")
+    mode.add_argument("--compact", action="store_true", help="Merge each commodity-year's part files.")
+    parser.add_argument("--prices", default=PRICE_HISTORY)
+    parser.add_argument("--news", default=NEWS_FEATURES)
+    parser.add_argument("--output", default=OUTPUT)
+    parser.add_argument("--dataset", default=DATASET)
+    args = parser.parse_args()
+
+    if args.compact:
+        removed = PartitionedTable(args.dataset).compact()
+        print(f"Compacted {args.dataset}: {removed} part files merged")
+        return
+
+    if args.incremental and PartitionedTable(args.dataset).exists():
+        t0 = time.perf_counter()
+        new_rows, written = incremental_update(args.prices, args.news, args.dataset)
+        elapsed_ms = (time.perf_counter() - t0) * 1e3
+        print(f"Appended {len(new_rows)} rows to {args.dataset} in {elapsed_ms:.0f} ms")
+        for part in written:
+            print(f"  {part}")
+        return
+
+    df = full_build(args.prices, args.news, args.output, args.dataset)
+
+    print(f"Written {len(df)} rows to {args.output} (partitioned copy: {args.dataset})")
     print(f"Columns: {df.columns.tolist()}")
     print(f"Date range: {df['date'].min().date()} to {df['date'].max().date()}")
     print(df.head(3).to_string())
@@ -1,9 +1,14 @@
 import os
+import sys
+
 import pandas as pd
 import requests
 import yfinance as yf
 from dotenv import load_dotenv
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.services import sentiment_service  # noqa: E402
 
 load_dotenv()
 
@@ -27,9 +32,6 @@ FEATURE_COLUMNS = [
 NEWS_URL = "https://newsapi.org/v2/everything"
 QUERY = '"oil" OR "crude" OR "WTI" OR "Brent" OR "OPEC" OR "refinery" OR "pipeline"'
 
-analyzer = SentimentIntensityAnalyzer()
-
-
 def fetch_newsapi_articles():
     params = {
         "q": QUERY,
@@ -58,13 +60,12 @@ def build_news_features(articles):
             "avg_tone": 0.0
         }
 
-    scores = []
+    texts = []
     for article in articles:
         title = article.get("title") or ""
         description = article.get("description") or ""
-        text = f"{title}. {description}".strip()
-        score = analyzer.polarity_scores(text)["compound"]
-        scores.append(score)
+        texts.append(f"{title}. {description}".strip())
+    scores = sentiment_service.score_texts(texts)
 
     return {
         "article_count": len(articles),
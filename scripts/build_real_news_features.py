@@ -1,81 +1,159 @@
-import pandas as pd
+"""
+build_real_news_features.py
+===========================
+Builds data/processed/news_features.parquet (daily oil-related event counts
+and tone for WTI) from raw GDELT 1.0 daily event exports in data/raw/.
+
+Each export is streamed in chunks that materialise only the five columns
+used, oil-related actors are selected with one vectorised regex match per
+chunk, and every chunk is folded into per-day partial sums straight away —
+so memory stays bounded by the chunk size however many files there are.
+Files are processed in parallel (one process per core by default) and the
+per-day partials merged at the end.  Both plain ``*.CSV`` exports and the
+``*.CSV.zip`` files GDELT publishes are read.
+
+Usage
+-----
+    python scripts/build_real_news_features.py [--raw-dir data/raw]
+        [--output data/processed/news_features.parquet]
+        [--workers N] [--chunksize 200000]
+"""
+
+import argparse
 import glob
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
 
-files = glob.glob("data/raw/*.CSV")
-
-all_data = []
-
-for file in files:
-    print(f"Processing {file}")
-
-    df = pd.read_csv(file, sep="\t", header=None, low_memory=False)
-
-    # GDELT 1.0 Events selected columns
-    # 1  = SQLDATE
-    # 5  = Actor1Name
-    # 15 = Actor2Name
-    # 30 = GoldsteinScale
-    # 31 = NumMentions
-    df = df.iloc[:, [1, 5, 15, 30, 31]].copy()
-    df.columns = ["SQLDATE", "Actor1Name", "Actor2Name", "GoldsteinScale", "NumMentions"]
-
-    df["date"] = pd.to_datetime(df["SQLDATE"], format="%Y%m%d", errors="coerce")
-    df["Actor1Name"] = df["Actor1Name"].astype(str)
-    df["Actor2Name"] = df["Actor2Name"].astype(str)
-    df["GoldsteinScale"] = pd.to_numeric(df["GoldsteinScale"], errors="coerce")
-    df["NumMentions"] = pd.to_numeric(df["NumMentions"], errors="coerce")
-
-    keywords = ["oil", "opec", "energy", "gas", "crude", "petroleum", "refinery", "pipeline"]
-
-    def is_oil_related(text):
-        text = str(text).lower()
-        return any(k in text for k in keywords)
-
-    df = df[
-        df["Actor1Name"].apply(is_oil_related) |
-        df["Actor2Name"].apply(is_oil_related)
-    ].copy()
-
-    if not df.empty:
-        all_data.append(df)
-
-if not all_data:
-    print("No oil-related rows found.")
-    raise SystemExit
-
-df = pd.concat(all_data, ignore_index=True)
-
-df["positive_flag"] = (df["GoldsteinScale"] > 0).astype(int)
-df["negative_flag"] = (df["GoldsteinScale"] < 0).astype(int)
-df["high_impact_flag"] = (df["NumMentions"] >= 20).astype(int)
-
-daily = df.groupby("date").agg(
-    article_count=("NumMentions", "sum"),
-    avg_tone=("GoldsteinScale", "mean"),
-    positive_count=("positive_flag", "sum"),
-    negative_count=("negative_flag", "sum"),
-    high_impact_count=("high_impact_flag", "sum")
-).reset_index()
-
-daily["commodity"] = "WTI"
-daily = daily[
-    [
-        "date",
-        "commodity",
-        "article_count",
-        "avg_tone",
-        "positive_count",
-        "negative_count",
-        "high_impact_count"
-    ]
-].dropna()
-
-daily = daily.sort_values("date")
-
-daily.to_parquet("data/processed/news_features.parquet", index=False)
-
-print("Saved upgraded REAL news_features.parquet")
-print(daily.head())
-print(daily.tail())
-print(daily.columns)
-print(f"Total rows: {len(daily)}")
+# GDELT 1.0 Events selected columns
+# 1  = SQLDATE
+# 5  = Actor1Name
+# 15 = Actor2Name
+# 30 = GoldsteinScale
+# 31 = NumMentions
+COLUMNS = {1: "SQLDATE", 5: "Actor1Name", 15: "Actor2Name", 30: "GoldsteinScale", 31: "NumMentions"}
+
+KEYWORDS = ["oil", "opec", "energy", "gas", "crude", "petroleum", "refinery", "pipeline"]
+OIL_PATTERN = re.compile("|".join(map(re.escape, KEYWORDS)), re.IGNORECASE)
+
+# Per-day partial sums; merged by addition, finalised in finalize().
+PARTIAL_COLUMNS = [
+    "article_count", "tone_sum", "tone_count", "positive_count", "negative_count", "high_impact_count",
+]
+
+
+def list_raw_files(raw_dir: str) -> list[str]:
+    return sorted(glob.glob(os.path.join(raw_dir, "*.CSV")) + glob.glob(os.path.join(raw_dir, "*.CSV.zip")))
+
+
+def aggregate_chunk(df: pd.DataFrame) -> pd.DataFrame:
+    """Filter one chunk to oil-related events and reduce it to per-day partials."""
+    df = df.rename(columns=COLUMNS)
+    oil = (
+        df["Actor1Name"].str.contains(OIL_PATTERN, na=False)
+        | df["Actor2Name"].str.contains(OIL_PATTERN, na=False)
+    )
+    df = df[oil]
+    if df.empty:
+        return pd.DataFrame(columns=PARTIAL_COLUMNS, index=pd.DatetimeIndex([], name="date"))
+
+    tone = pd.to_numeric(df["GoldsteinScale"], errors="coerce")
+    mentions = pd.to_numeric(df["NumMentions"], errors="coerce")
+    parts = pd.DataFrame({
+        "date": pd.to_datetime(df["SQLDATE"], format="%Y%m%d", errors="coerce"),
+        "article_count": mentions,
+        "tone_sum": tone,
+        "tone_count": tone.notna().astype(int),
+        "positive_count": (tone > 0).astype(int),
+        "negative_count": (tone < 0).astype(int),
+        "high_impact_count": (mentions >= 20).astype(int),
+    })
+    return parts.groupby("date").sum(min_count=0)
+
+
+def aggregate_file(path: str, chunksize: int = 200_000) -> pd.DataFrame:
+    """Stream one export and return its per-day partials."""
+    partials = []
+    reader = pd.read_csv(
+        path,
+        sep="\t",
+        header=None,
+        usecols=list(COLUMNS),
+        dtype={1: str, 5: str, 15: str},
+        chunksize=chunksize,
+    )
+    with reader:
+        for chunk in reader:
+            partials.append(aggregate_chunk(chunk))
+            # fold as we go so a huge file never holds more than two partials
+            if len(partials) > 1:
+                partials = [merge_partials(partials)]
+    print(f"Processed {path}")
+    return merge_partials(partials)
+
+
+def merge_partials(partials: list[pd.DataFrame]) -> pd.DataFrame:
+    partials = [p for p in partials if not p.empty]
+    if not partials:
+        return pd.DataFrame(columns=PARTIAL_COLUMNS, index=pd.DatetimeIndex([], name="date"))
+    return pd.concat(partials).groupby(level="date").sum(min_count=0)
+
+
+def finalize(totals: pd.DataFrame) -> pd.DataFrame:
+    daily = totals.reset_index()
+    daily["avg_tone"] = daily["tone_sum"] / daily["tone_count"].where(daily["tone_count"] > 0)
+    daily["commodity"] = "WTI"
+    daily = daily[
+        [
+            "date",
+            "commodity",
+            "article_count",
+            "avg_tone",
+            "positive_count",
+            "negative_count",
+            "high_impact_count"
+        ]
+    ].dropna()
+    for column in ("positive_count", "negative_count", "high_impact_count"):
+        daily[column] = daily[column].astype(int)
+    return daily.sort_values("date").reset_index(drop=True)
+
+
+def build_news_features(files: list[str], workers: int | None = None, chunksize: int = 200_000) -> pd.DataFrame:
+    workers = min(workers or os.cpu_count() or 1, max(len(files), 1))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            partials = list(pool.map(aggregate_file, files, [chunksize] * len(files)))
+    else:
+        partials = [aggregate_file(path, chunksize) for path in files]
+    return finalize(merge_partials(partials))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--raw-dir", default="data/raw")
+    parser.add_argument("--output", default="data/processed/news_features.parquet")
+    parser.add_argument("--workers", type=int, default=None, help="Processes (default: one per core).")
+    parser.add_argument("--chunksize", type=int, default=200_000, help="Rows per chunk.")
+    args = parser.parse_args()
+
+    files = list_raw_files(args.raw_dir)
+    daily = build_news_features(files, args.workers, args.chunksize)
+
+    if daily.empty:
+        print("No oil-related rows found.")
+        raise SystemExit
+
+    daily.to_parquet(args.output, index=False)
+
+    print("Saved upgraded REAL news_features.parquet")
+    print(daily.head())
+    print(daily.tail())
+    print(daily.columns)
+    print(f"Total rows: {len(daily)}")
+
+
+if __name__ == "__main__":
+    main()
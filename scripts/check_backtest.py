@@ -0,0 +1,228 @@
+"""
+check_backtest.py
+=================
+Checks and timing for the walk-forward backtest (backtest.py) on a
+synthetic --years daily table for three commodities, with a throw-away
+feature store and window cache.
+
+  * no window trains on a row whose target reaches its cut-off, and the
+    windows trade every day after the first cut-off exactly once;
+  * a window's positions equal its model refitted by hand on the same rows
+    (train_model.build_model, predict_proba, the --threshold bands);
+  * the vectorised positions, P&L, equity, drawdown, turnover and summary
+    metrics equal a plain per-day loop;
+  * a rerun, or one with another --threshold, fits nothing; after a year
+    of new data only the new windows are fitted, and the windows they
+    share trade identically;
+  * --jobs 2 trades identically to --jobs 1.
+
+Exits non-zero on any failure.
+
+Usage
+-----
+    python scripts/check_backtest.py [--years 10] [--direction-model logistic]
+        [--price-model HistGBM] [--retrain QS] [--jobs N]
+"""
+
+import argparse
+import logging
+import math
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import StandardScaler
+
+SCRIPTS = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, SCRIPTS)
+sys.path.insert(0, os.path.dirname(SCRIPTS))
+
+import backtest  # noqa: E402
+import train_model  # noqa: E402
+from bench_signal_features import synthetic_table  # noqa: E402
+from backend.services import feature_store  # noqa: E402
+
+COMMODITIES = ["WTI", "BRENT", "NATGAS"]
+THRESHOLD = 0.6
+
+
+def base_table(years: int) -> pd.DataFrame:
+    frames = []
+    for i, commodity in enumerate(COMMODITIES):
+        df = synthetic_table(years, seed=i).assign(commodity=commodity)
+        df["next_price"] = df["price"].shift(-1)
+        frames.append(df)
+    return pd.concat(frames, ignore_index=True)
+
+
+def loop_pnl(trades: pd.DataFrame, cost_bps: float) -> pd.DataFrame:
+    """Reference P&L: one day at a time per series."""
+    out = []
+    for _, series in trades.groupby(["model", "commodity"], sort=True):
+        previous, equity, peak = 0, 1.0, 1.0
+        for row in series.itertuples():
+            trade = abs(row.position - previous)
+            pnl = row.position * row.next_return - trade * cost_bps / 1e4
+            equity *= 1 + pnl
+            peak = max(peak, equity)
+            out.append((row.Index, trade, pnl, equity, 1 - equity / peak))
+            previous = row.position
+    return pd.DataFrame(out, columns=["index", "trade", "pnl", "equity", "drawdown"]).set_index("index")
+
+
+def loop_summary(trades: pd.DataFrame) -> dict:
+    out = {}
+    for key, series in trades.groupby(["model", "commodity"], sort=True):
+        calls = [r for r in series.itertuples() if r.position != 0]
+        hits = sum(1 for r in calls if math.copysign(1, r.position) == np.sign(r.next_return))
+        out[key] = {
+            "total_return": series["equity"].iloc[-1] - 1,
+            "max_drawdown": series["drawdown"].max(),
+            "hit_rate": hits / len(calls) if calls else float("nan"),
+            "trades": sum(1 for t in series["trade"] if t > 0),
+        }
+    return out
+
+
+def report(ok: bool, message: str) -> None:
+    print(f"  {'ok  ' if ok else 'FAIL'} {message}")
+    if not ok:
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument(
+        "--direction-model", default="logistic",
+        help="train_model.py --model; forest (its default) takes ~20 s per window per core.",
+    )
+    parser.add_argument("--price-model", default="HistGBM")
+    parser.add_argument("--retrain", default="QS")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    full = base_table(args.years)
+    cut = full["date"].max() - pd.DateOffset(years=1)
+    # the same history a year earlier: next_price unknown on its last day
+    earlier = base_table(args.years)
+    earlier = earlier[earlier["date"] <= cut].copy()
+    earlier.loc[earlier.groupby("commodity")["date"].idxmax(), "next_price"] = np.nan
+
+    with tempfile.TemporaryDirectory() as tmp:
+        feature_store.STORE_DIR = Path(tmp) / "store"
+        cache = os.path.join(tmp, "cache")
+        options = dict(
+            direction_model=args.direction_model, price_model=args.price_model,
+            retrain=args.retrain, threshold=THRESHOLD, cost_bps=5.0,
+        )
+
+        def run(table: pd.DataFrame, cache_dir: str = cache, jobs: int = args.jobs, **overrides):
+            t0 = time.perf_counter()
+            trades, summary, stats = backtest.backtest(
+                {"direction": table, "price": table}, cache_dir=cache_dir, jobs=jobs, **(options | overrides),
+            )
+            return trades, summary, stats, time.perf_counter() - t0
+
+        print(
+            f"{len(COMMODITIES)} commodities × {args.years} years ({len(full)} rows), "
+            f"direction/{args.direction_model} + price/{args.price_model}, retrain {args.retrain}"
+        )
+
+        # ── walk-forward windows ─────────────────────────────────────────
+        replay = backtest.prepare("direction", args.direction_model, full)
+        windows = backtest.walk_forward(replay, args.retrain, 2.0)
+        leak = any(replay.rows["label_date"].iloc[tr].max() >= cutoff for cutoff, tr, _ in windows)
+        tested = np.concatenate([te for _, _, te in windows])
+        after_first = np.flatnonzero(replay.rows["date"] >= windows[0][0])
+        report(
+            not leak and len(tested) == len(np.unique(tested)) and np.array_equal(np.sort(tested), after_first),
+            f"{len(windows)} windows: no training target reaches its cut-off, every later day traded once",
+        )
+
+        t_earlier = run(earlier)
+        trades, summary, stats, cold_s = run(full)
+
+        # ── one window refitted by hand ──────────────────────────────────
+        cutoff, train_idx, test_idx = windows[-1]
+        model = train_model.build_model(args.direction_model, pd.Series(replay.y[train_idx]))
+        if replay.scale:
+            scaler = StandardScaler().fit(replay.X.iloc[train_idx])
+            model.fit(scaler.transform(replay.X.iloc[train_idx]), replay.y[train_idx])
+            prob = model.predict_proba(scaler.transform(replay.X.iloc[test_idx]))[:, 1]
+        else:
+            model.fit(replay.X.iloc[train_idx], replay.y[train_idx])
+            prob = model.predict_proba(replay.X.iloc[test_idx])[:, 1]
+        expected = np.where(prob >= THRESHOLD, 1, np.where(prob <= 1 - THRESHOLD, -1, 0))
+        got = trades[(trades["model"] == f"direction/{args.direction_model}") & (trades["window"] == cutoff)]
+        mine = replay.rows.iloc[test_idx].assign(expected=expected, prob=prob)
+        mine = mine.merge(got, on=["commodity", "date"], suffixes=("", "_bt"))
+        report(
+            len(mine) == len(got) > 0
+            and (mine["position"] == mine["expected"]).all()
+            and np.allclose(mine["signal"], mine["prob"], rtol=0, atol=1e-12),
+            f"window from {cutoff.date()}: positions equal a hand refit on its {len(train_idx)} rows",
+        )
+
+        # ── vectorised P&L and metrics vs a loop ─────────────────────────
+        reference = loop_pnl(trades, options["cost_bps"])
+        worst = float(np.abs(trades[reference.columns].to_numpy() - reference.loc[trades.index].to_numpy()).max())
+        expect = loop_summary(trades)
+        by_key = summary.set_index(["model", "commodity"])
+        metrics_ok = all(
+            np.isclose(by_key.loc[key, metric], value, rtol=1e-9, atol=1e-12, equal_nan=True)
+            for key, values in expect.items() for metric, value in values.items()
+        )
+        report(
+            worst < 1e-9 and metrics_ok,
+            f"P&L, equity, drawdown and summary metrics equal a per-day loop (max diff {worst:.1e})",
+        )
+
+        # ── window cache ─────────────────────────────────────────────────
+        fitted = {s["model"]: s["fitted"] for s in stats}
+        new_windows = {
+            s["model"]: s["windows"] - e["windows"] for s, e in zip(stats, t_earlier[2])
+        }
+        shared = trades["window"] <= t_earlier[0]["window"].max()
+        before = t_earlier[0].set_index(["model", "commodity", "date"])["signal"]
+        now = trades[shared].set_index(["model", "commodity", "date"])["signal"]
+        common = before.index.intersection(now.index)
+        report(
+            fitted == new_windows and len(common) > 0 and now.loc[common].equals(before.loc[common]),
+            f"a year of new data fits only the new windows ({fitted}), shared windows trade identically",
+        )
+
+        again, _, stats_again, warm_s = run(full)
+        report(
+            sum(s["fitted"] for s in stats_again) == 0 and again.equals(trades),
+            "a rerun fits nothing and reproduces every trade",
+        )
+        banded, _, stats_banded, _ = run(full, threshold=0.7)
+        report(
+            sum(s["fitted"] for s in stats_banded) == 0 and banded["signal"].equals(trades["signal"]),
+            "another --threshold fits nothing, only re-bands the same signals",
+        )
+
+        # ── parallel fits ────────────────────────────────────────────────
+        serial = run(full, cache_dir=os.path.join(tmp, "serial"), jobs=1)
+        parallel = run(full, cache_dir=os.path.join(tmp, "parallel"), jobs=2)
+        report(serial[0].equals(parallel[0]), "--jobs 2 trades identically to --jobs 1")
+
+        windows_total = sum(s["windows"] for s in stats)
+        print(f"new year : {cold_s:6.2f} s ({sum(fitted.values())} of {windows_total} windows fitted, the rest cached)")
+        print(f"serial   : {serial[3]:6.2f} s ({windows_total} windows, --jobs 1)")
+        print(f"parallel : {parallel[3]:6.2f} s (--jobs 2, {os.cpu_count()} cores)")
+        print(f"cached   : {warm_s:6.2f} s (every window from the cache)")
+        print()
+        with pd.option_context("display.width", 200, "display.max_columns", None, "display.float_format", "{:.3f}".format):
+            print(summary[["model", "commodity", "days", "total_return", "sharpe", "max_drawdown", "hit_rate", "annual_turnover"]].to_string(index=False))
+    print("\nBacktest checks passed.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+check_feature_store.py
+======================
+Parity check and timing for the feature store
+(backend/services/feature_store.py).
+
+A synthetic panel of --commodities daily series is run through
+``load_features`` into a temporary store.  The script checks, exiting
+non-zero on any failure, that:
+
+  * the stored features match ``add_features(..., by="commodity")``
+    exactly (values, dtypes, column order, row order), both when the
+    snapshot is materialised and when it is read back on a hit;
+  * a changed input invalidates the snapshot instead of being served
+    stale, including an intermediate column (volatility_5, price_ma_5)
+    the base table holds and the features read as-is;
+  * the point-in-time join never hands a row features from a later date:
+    labels dated between stored rows get the previous row, labels before
+    a commodity's first row get nothing;
+  * the serving index returns the newest stored row, and only trusts a row
+    recorded live while its data watermark matches;
+  * recording a live row leaves latest.json to the background flush.
+
+Timings are printed for a materialise, a snapshot hit and a latest-row
+lookup against recomputing that row, and for recording one.
+
+Usage
+-----
+    python scripts/check_feature_store.py [--commodities 10] [--years 8]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+SCRIPTS = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, SCRIPTS)
+sys.path.insert(0, os.path.dirname(SCRIPTS))
+
+from backend.services import feature_store  # noqa: E402
+from backend.services.signal_features import DIRECTION_FEATURES, add_features, compute_features  # noqa: E402
+from bench_signal_features import best_of, synthetic_table  # noqa: E402
+
+
+def panel(commodities: int, years: int) -> pd.DataFrame:
+    frames = [synthetic_table(years, seed).assign(commodity=f"C{seed:02d}") for seed in range(commodities)]
+    # interleaved, as the training tables are after their merges
+    return pd.concat(frames, ignore_index=True).sort_values(["date", "commodity"], kind="stable").reset_index(drop=True)
+
+
+def check(name: str, ok: bool) -> None:
+    print(f"  {'ok  ' if ok else 'FAIL'} {name}")
+    if not ok:
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--commodities", type=int, default=10)
+    parser.add_argument("--years", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    base = panel(args.commodities, args.years)
+    expected = add_features(base, DIRECTION_FEATURES, by="commodity")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        feature_store.STORE_DIR = Path(tmp)
+        print(f"{len(base)} rows, {args.commodities} commodities, {len(DIRECTION_FEATURES)} features")
+
+        t0 = time.perf_counter()
+        materialised = feature_store.load_features("direction", base)
+        cold = time.perf_counter() - t0
+        check("materialise matches add_features", materialised.equals(expected))
+
+        warm = best_of(lambda: feature_store.load_features("direction", base), args.repeat)
+        check("snapshot hit matches add_features", feature_store.load_features("direction", base).equals(expected))
+
+        changed = base.copy()
+        changed.loc[changed.index[-1], "price"] += 1.0
+        check(
+            "changed input rebuilds the snapshot",
+            feature_store.load_features("direction", changed).equals(
+                add_features(changed, DIRECTION_FEATURES, by="commodity")
+            ),
+        )
+        # an intermediate column the base table already holds is read, not
+        # recomputed, so changing it must rebuild the snapshot too
+        for column in ("volatility_5", "price_ma_5"):
+            shifted = base.copy()
+            shifted[column] *= 2.0
+            check(
+                f"changed {column} rebuilds the snapshot",
+                feature_store.load_features("direction", shifted).equals(
+                    add_features(shifted, DIRECTION_FEATURES, by="commodity")
+                ),
+            )
+        feature_store.load_features("direction", base)
+
+        # point-in-time: labels on weekends (never stored) and before the history
+        snapshot = feature_store.read("direction")
+        labels = pd.DataFrame({
+            "commodity": "C00",
+            "date": pd.to_datetime(["2014-12-01", "2015-01-03", "2016-06-04", "2016-06-05", "2020-02-29"]),
+        })
+        joined = feature_store.point_in_time(labels, snapshot)
+        history = snapshot[snapshot["commodity"] == "C00"]
+        leak = False
+        for _, row in joined.iterrows():
+            prior = history[history["date"] <= row["date"]]
+            if prior.empty:
+                leak |= not row[DIRECTION_FEATURES].isna().all()
+            else:
+                want = prior.iloc[-1][DIRECTION_FEATURES].to_numpy(float)
+                leak |= not np.array_equal(row[DIRECTION_FEATURES].to_numpy(float), want, equal_nan=True)
+        check("point-in-time join uses the newest earlier row only", not leak)
+        check("point-in-time join keeps the label order", joined["date"].equals(labels["date"]))
+
+        # serving: the index holds the newest materialised row of each commodity
+        commodity = base["commodity"].iloc[-1]
+        newest = expected[expected["commodity"] == commodity].iloc[-1]
+        stored = feature_store.latest("direction", commodity)
+        check(
+            "latest row is the newest stored row",
+            stored is not None and all(stored.values[n] == float(newest[n]) for n in DIRECTION_FEATURES),
+        )
+        check("materialised rows carry no watermark", stored.watermark is None)
+
+        mark = feature_store.watermark_key((pd.Timestamp("2030-01-02 16:00"), None))
+        path = feature_store._set_dir("direction") / "latest.json"
+        on_disk = path.read_bytes()
+        values = {n: 0.5 for n in DIRECTION_FEATURES}
+        record = best_of(lambda: feature_store.put_latest("direction", commodity, "2030-01-02", values, mark), 200)
+        check(
+            "recording a row updates the index without writing latest.json",
+            feature_store.latest("direction", commodity).watermark == mark and path.read_bytes() == on_disk,
+        )
+        feature_store.flush()
+        feature_store._latest.clear()
+        feature_store._latest_mtime.clear()  # as a fresh process would see it
+        stored = feature_store.latest("direction", commodity)
+        check("recorded row persists with its watermark once flushed", stored.watermark == mark and stored.date == "2030-01-02")
+        feature_store.load_features("direction", changed)
+        check(
+            "re-materialising keeps a newer live row",
+            feature_store.latest("direction", commodity).watermark == mark,
+        )
+
+        one = base[base["commodity"] == commodity]
+        recompute = best_of(lambda: compute_features(one, DIRECTION_FEATURES).dropna().iloc[[-1]], args.repeat)
+        lookup = best_of(lambda: feature_store.latest("direction", commodity), 200)
+
+    print(f"materialise                  : {cold * 1e3:7.1f} ms")
+    print(f"snapshot hit (read + join)   : {warm * 1e3:7.1f} ms")
+    print(f"latest row, recomputed       : {recompute * 1e3:7.2f} ms")
+    print(f"latest row, store lookup     : {lookup * 1e3:7.3f} ms")
+    print(f"latest row, record (put)     : {record * 1e3:7.3f} ms")
+    print("Feature store matches the direct computation.")
+
+
+if __name__ == "__main__":
+    main()
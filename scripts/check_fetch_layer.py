@@ -0,0 +1,182 @@
+"""
+check_fetch_layer.py
+====================
+Exercises the upstream fetch layer (backend/services/http_fetch.py) and the
+parallel seed against a local stub HTTP server standing in for NewsAPI and
+FRED.  No network access or API key is needed.
+
+Checks
+------
+1. seed_database issues all six NewsAPI/FRED requests in parallel: with
+   every stub response delayed by --delay seconds the seed takes about one
+   delay, not six, and uses no synthetic fallback.
+2. The number of in-flight requests per host never exceeds
+   FETCH_MAX_PER_HOST.
+3. A transiently failing endpoint (503, 503, 200) succeeds through the
+   exponential-backoff retry.
+4. A dead endpoint trips the circuit breaker, after which calls fail with
+   CircuitOpenError immediately without reaching the server, and seeding
+   falls back to synthetic data at once.
+
+Usage
+-----
+    python scripts/check_fetch_layer.py [--delay 0.5]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from backend.db import Base  # noqa: E402
+from backend.services import http_cache, http_fetch, news_service, price_service  # noqa: E402
+from backend.services.seed import seed_database  # noqa: E402
+
+
+class Stub:
+    delay = 0.0
+    in_flight = 0
+    max_in_flight = 0
+    hits: dict[str, int] = {}
+    flaky_failures = 2
+    lock = threading.Lock()
+
+
+class Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status: int, body: str, content_type: str = "text/plain") -> None:
+        data = body.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        with Stub.lock:
+            Stub.hits[parts.path] = Stub.hits.get(parts.path, 0) + 1
+            hits = Stub.hits[parts.path]
+            Stub.in_flight += 1
+            Stub.max_in_flight = max(Stub.max_in_flight, Stub.in_flight)
+        try:
+            time.sleep(Stub.delay)
+            if parts.path == "/fred":
+                series = parse_qs(parts.query)["id"][0]
+                today = datetime.utcnow().date()
+                rows = [f"{today - timedelta(days=d)},{70 + d * 0.1:.2f}" for d in range(30, 0, -1)]
+                self._send(200, f"observation_date,{series}\n" + "\n".join(rows))
+            elif parts.path == "/news":
+                now = datetime.utcnow()
+                articles = [
+                    {
+                        "title": f"Oil supply tightens as OPEC cuts output {i}",
+                        "url": f"https://example.com/{i}",
+                        "source": {"name": "Stub"},
+                        "publishedAt": (now - timedelta(hours=i)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+                    }
+                    for i in range(10)
+                ]
+                self._send(200, json.dumps({"status": "ok", "articles": articles}), "application/json")
+            elif parts.path == "/flaky":
+                self._send(503 if hits <= Stub.flaky_failures else 200, "flaky")
+            else:
+                self._send(500, "dead")
+        finally:
+            with Stub.lock:
+                Stub.in_flight -= 1
+
+
+def check(condition: bool, message: str) -> None:
+    print(f"{'ok' if condition else 'FAIL':<4}  {message}")
+    if not condition:
+        raise SystemExit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--delay", type=float, default=0.5, help="Stub response delay in seconds.")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+
+    news_service.NEWS_API_KEY = "stub-key"
+    news_service.NEWS_API_URL = f"{base}/news"
+    price_service.FRED_CSV_URL = f"{base}/fred"
+    http_fetch.FETCH_BACKOFF = 0.05
+    http_fetch.FETCH_MAX_PER_HOST = 4
+    http_fetch.reset()
+    http_cache.ENABLED = False  # every request must reach the stub
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'fetch.db')}")
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(bind=engine)
+
+        # 1 + 2: parallel seed, bounded per host
+        Stub.delay = args.delay
+        with Session() as db:
+            t0 = time.perf_counter()
+            result = seed_database(db)
+            elapsed = time.perf_counter() - t0
+        check(not result["fallback_used"], f"seed used real (stub) data: {result}")
+        check(elapsed < 3 * args.delay, f"6 requests took {elapsed:.2f}s with {args.delay}s per response")
+        check(
+            Stub.max_in_flight <= http_fetch.FETCH_MAX_PER_HOST,
+            f"max in-flight requests per host {Stub.max_in_flight} <= {http_fetch.FETCH_MAX_PER_HOST}",
+        )
+
+        # 3: retry with backoff
+        Stub.delay = 0.0
+        response = http_fetch.fetch("flaky", f"{base}/flaky")
+        check(
+            response.status_code == 200 and Stub.hits["/flaky"] == Stub.flaky_failures + 1,
+            f"transient 503s retried ({Stub.hits['/flaky']} attempts)",
+        )
+
+        # 4: circuit breaker
+        for _ in range(http_fetch.BREAKER_FAILURES):
+            try:
+                http_fetch.fetch("fred", f"{base}/dead")
+            except http_fetch.requests.RequestException:
+                pass
+        hits_before = Stub.hits.get("/dead", 0)
+        t0 = time.perf_counter()
+        try:
+            http_fetch.fetch("fred", f"{base}/dead")
+            tripped = False
+        except http_fetch.CircuitOpenError:
+            tripped = True
+        check(
+            tripped and Stub.hits.get("/dead", 0) == hits_before,
+            f"open circuit fails fast ({(time.perf_counter() - t0) * 1000:.1f} ms, no upstream call)",
+        )
+
+        with Session() as db:
+            t0 = time.perf_counter()
+            result = seed_database(db)
+            elapsed = time.perf_counter() - t0
+        check(result["fallback_used"] and elapsed < args.delay + 1, f"seed with FRED circuit open took {elapsed:.2f}s")
+        engine.dispose()
+
+    server.shutdown()
+    print("Fetch layer checks passed.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+check_forecast.py
+=================
+Parity check and timing for the live price forecasts
+(backend/services/forecast_service.py, served as GET /forecast).
+
+A throw-away SQLite database is seeded with prices (with intraday
+revisions) and headlines for three commodities, reaching a year further
+back than the service's WINDOW_DAYS look-back.  Small stand-in
+price models are published to a temporary model registry, one per
+training target (next_price with a scaler, price_change, next_day_return),
+and every forecast and the feature row behind it are compared against the
+training pipeline run over the full history: the daily frame of
+scripts/build_daily_training_table.py, the price feature set, the deployed
+model and train_price_model's price reconstruction (the only difference is
+SQLite's AVG over headline sentiment vs the pandas mean, ~1e-16).  A new
+price must invalidate the stored feature row.
+
+Exits non-zero if a forecast differs by more than --tolerance.
+
+Usage
+-----
+    python scripts/check_forecast.py [--tolerance 1e-9]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import Ridge
+from sklearn.preprocessing import StandardScaler
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+SCRIPTS = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, SCRIPTS)
+sys.path.insert(0, os.path.dirname(SCRIPTS))
+
+import build_daily_training_table as daily  # noqa: E402
+from backend.db import Base  # noqa: E402
+from backend.models import Headline, PricePoint  # noqa: E402
+from backend.services import feature_store, forecast_service, model_registry  # noqa: E402
+from backend.services.model_registry import ModelRegistry  # noqa: E402
+from backend.services.signal_features import PRICE_FEATURES, add_features  # noqa: E402
+
+COMMODITIES = ["WTI", "BRENT", "NATGAS"]
+DAYS = forecast_service.WINDOW_DAYS + 365
+LEAKAGE = ["next_price", "next_day_return", "target_up_down"]
+
+
+def seed(db, rng: random.Random, start: datetime, days: range) -> tuple[list[dict], list[dict]]:
+    """Insert prices and headlines; return them as the training inputs see them."""
+    prices, news = [], []
+    for commodity in COMMODITIES:
+        level = {"WTI": 70.0, "BRENT": 75.0, "NATGAS": 3.0}[commodity]
+        for day in days:
+            ts = start + timedelta(days=day, hours=16)
+            level *= 1 + rng.gauss(0, 0.02)
+            if rng.random() < 0.3:
+                # an earlier print of the same day, superseded by the close
+                db.add(PricePoint(commodity=commodity, timestamp=ts - timedelta(hours=5), close=level * 0.99))
+            db.add(PricePoint(commodity=commodity, timestamp=ts, close=level))
+            prices.append({"date": pd.Timestamp(ts.date()), "commodity": commodity, "price": level})
+            # headlines on the first day so no row is trimmed before the first news
+            for _ in range(rng.randint(1 if day == days.start else 0, 4)):
+                score = round(rng.uniform(-1, 1), 3)
+                db.add(Headline(
+                    id=str(uuid.uuid4()), published_at=ts - timedelta(hours=rng.randint(1, 12)),
+                    title="check", source="Check", url="https://example.com", commodity=commodity,
+                    sentiment_score=score, event_type="Supply", impact_score=50.0,
+                    pred_label="NEUTRAL", pred_confidence=0.5,
+                ))
+                news.append({"date": pd.Timestamp(ts.date()), "commodity": commodity, "score": score})
+    db.commit()
+    return prices, news
+
+
+def training_rows(prices: list[dict], news: list[dict]) -> pd.DataFrame:
+    """Each commodity's newest row of the price feature table, built the
+    way training builds it."""
+    news_daily = (
+        pd.DataFrame(news).groupby(["date", "commodity"])["score"]
+        .agg(article_count="count", avg_tone="mean").reset_index()
+    )
+    base = daily.base_frame(pd.DataFrame(prices), news_daily)
+    table = add_features(daily.build_rows(base), PRICE_FEATURES, by="commodity")
+    return table.groupby("commodity").tail(1).set_index("commodity")
+
+
+def stand_in_models(columns: list[str]) -> dict:
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(300, len(columns)))
+    y = X[:, :5].sum(axis=1)
+    scaler = StandardScaler().fit(X)
+    return {
+        "next_price": (Ridge().fit(scaler.transform(X), 70 + y), scaler),
+        "price_change": (RandomForestRegressor(n_estimators=20, random_state=0).fit(X, y), None),
+        "next_day_return": (Ridge().fit(X, y / 100), None),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tolerance", type=float, default=1e-9)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=DAYS + 2)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        feature_store.STORE_DIR = Path(tmp) / "store"
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'check.db')}")
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(bind=engine)
+
+        with Session() as db:
+            prices, news = seed(db, rng, start, range(DAYS))
+        expected_rows = training_rows(prices, news)
+        columns = [c for c in expected_rows.select_dtypes("number").columns if c not in LEAKAGE]
+        print(f"{len(COMMODITIES)} commodities, {DAYS} days, {len(columns)} model features")
+
+        worst = 0.0
+        for target, (model, scaler) in stand_in_models(columns).items():
+            model_registry.publish("price", model, columns, scaler=scaler, meta={"target": target}, root=Path(tmp))
+            model_registry._registry = ModelRegistry(Path(tmp), poll=0)
+
+            X = expected_rows.loc[COMMODITIES, columns].to_numpy(np.float64)
+            raw = model.predict(scaler.transform(X) if scaler is not None else X)
+            current = expected_rows.loc[COMMODITIES, "price"].to_numpy()
+            expected = forecast_service.reconstruct_price(raw, current, target)
+
+            with Session() as db:
+                for attempt in ("computed", "stored"):
+                    got = forecast_service.forecast_prices(db, COMMODITIES, strict=True)
+                    # the model input itself, unrounded, and the rounded forecast
+                    served = np.array([[feature_store.latest("price", c).values[n] for n in columns] for c in COMMODITIES])
+                    diff = max(
+                        float(np.max(np.abs(served - X))),
+                        max(abs(got[c]["forecast_price"] - round(e, 4)) for c, e in zip(COMMODITIES, expected)),
+                    )
+                    worst = max(worst, diff)
+                    ok = diff <= args.tolerance and list(got) == COMMODITIES
+                    print(f"  {'ok  ' if ok else 'FAIL'} {target:<16} {attempt:<8} max diff {diff:.1e}")
+                    if not ok:
+                        sys.exit(1)
+
+        # a new day must replace the stored row
+        with Session() as db:
+            more_prices, more_news = seed(db, rng, start, range(DAYS, DAYS + 1))
+            moved = training_rows(prices + more_prices, news + more_news)
+            got = forecast_service.forecast_prices(db, COMMODITIES)
+            ok = all(got[c]["as_of"] == moved.loc[c, "date"].date().isoformat() for c in COMMODITIES)
+            ok &= all(abs(got[c]["current_price"] - round(moved.loc[c, "price"], 4)) <= args.tolerance for c in COMMODITIES)
+            print(f"  {'ok  ' if ok else 'FAIL'} a new price replaces the stored feature row")
+            if not ok:
+                sys.exit(1)
+
+            def timed(clear: bool) -> float:
+                best = float("inf")
+                for _ in range(args.repeat if not clear else max(5, args.repeat // 20)):
+                    if clear:
+                        feature_store._latest.clear()
+                        feature_store._latest_mtime.clear()
+                        for f in feature_store.STORE_DIR.rglob("latest.json"):
+                            f.unlink()
+                    t0 = time.perf_counter()
+                    forecast_service.forecast_prices(db, COMMODITIES)
+                    best = min(best, time.perf_counter() - t0)
+                return best
+
+            computed = timed(clear=True)
+            stored = timed(clear=False)
+
+    n = len(COMMODITIES)
+    print(f"forecast, features computed : {computed * 1e3:6.2f} ms ({computed * 1e3 / n:.2f} ms per commodity)")
+    print(f"forecast, features stored   : {stored * 1e3:6.2f} ms ({stored * 1e3 / n:.2f} ms per commodity)")
+    print(f"Live forecasts match the training pipeline (max diff {worst:.1e}).")
+
+
+if __name__ == "__main__":
+    main()
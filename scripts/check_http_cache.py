@@ -0,0 +1,165 @@
+"""
+check_http_cache.py
+===================
+Exercises the on-disk HTTP response cache (backend/services/http_cache.py)
+against a local stub server that serves a FRED-style CSV with an ``ETag``
+and ``Last-Modified`` header and honours conditional GETs.  The cache is
+written to a temporary directory; no network access is needed.
+
+Checks
+------
+1. A cold fetch reaches the server and stores one compressed blob.
+2. Within the source's freshness window a repeat fetch (and the parsed
+   DataFrame) is served with zero requests to the server and no re-parse.
+3. Once stale, the cache revalidates with a conditional GET; the server's
+   304 re-confirms the cached body without transferring it.
+4. When the upstream body changes, the new body is stored under its own
+   content hash.
+5. With the upstream down, the stale cached copy is served.
+6. A cache write that fails part-way leaves neither a partial file nor a
+   ``.tmp-*`` file behind.
+
+Usage
+-----
+    python scripts/check_http_cache.py [--rows 20000]
+"""
+
+import argparse
+import hashlib
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.services import http_cache, http_fetch, price_service  # noqa: E402
+from backend.services.atomic_io import atomic_write_parquet  # noqa: E402
+
+
+class Stub:
+    body = b""
+    hits: list[int] = []  # status code of every request served
+    down = False
+
+    @classmethod
+    def set_rows(cls, rows: int, offset: float = 0.0) -> None:
+        start = date(2000, 1, 1)
+        lines = [f"{start + timedelta(days=d)},{70 + offset + d * 0.001:.3f}" for d in range(rows)]
+        cls.body = ("observation_date,DCOILWTICO\n" + "\n".join(lines)).encode()
+
+
+class BrokenFrame:
+    """Writes half a file, then fails, like a full disk mid-write."""
+
+    def to_parquet(self, path, index=False):
+        Path(path).write_bytes(b"PAR1")
+        raise OSError("No space left on device")
+
+
+class Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        etag = '"' + hashlib.sha1(Stub.body).hexdigest() + '"'
+        if Stub.down:
+            status, body = 500, b"down"
+        elif self.headers.get("If-None-Match") == etag:
+            status, body = 304, b""
+        else:
+            status, body = 200, Stub.body
+        Stub.hits.append(status)
+        self.send_response(status)
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", "Mon, 01 Jan 2024 00:00:00 GMT")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def check(condition: bool, message: str) -> None:
+    print(f"{'ok' if condition else 'FAIL':<4}  {message}")
+    if not condition:
+        raise SystemExit(1)
+
+
+def timed_fetch():
+    t0 = time.perf_counter()
+    df = price_service.fetch_fred_series_csv("DCOILWTICO")
+    return df, (time.perf_counter() - t0) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20_000, help="Rows in the stub CSV.")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    price_service.FRED_CSV_URL = f"http://127.0.0.1:{server.server_port}/fred"
+    http_fetch.FETCH_BACKOFF = 0.01
+    http_fetch.reset()
+    Stub.set_rows(args.rows)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        http_cache.CACHE_DIR = Path(tmp)
+        http_cache.ENABLED = True
+        os.environ["HTTP_CACHE_TTL_FRED"] = "3600"
+
+        # 1: cold
+        cold, cold_ms = timed_fetch()
+        blobs = list(Path(tmp, "blobs").rglob("*.gz"))
+        check(Stub.hits == [200] and len(blobs) == 1, f"cold fetch hit the server once ({cold_ms:.1f} ms, {len(cold)} rows)")
+        ratio = blobs[0].stat().st_size / len(Stub.body)
+        check(ratio < 0.5, f"blob stored gzip-compressed ({ratio:.0%} of {len(Stub.body):,} bytes)")
+
+        # 2: warm, within the freshness window
+        parses = []
+        original_parse = price_service._parse_fred_csv
+        price_service._parse_fred_csv = lambda content: parses.append(1) or original_parse(content)
+        warm, warm_ms = timed_fetch()
+        check(
+            len(Stub.hits) == 1 and not parses and warm.equals(cold),
+            f"warm fetch: 0 requests, no CSV parse, identical frame ({warm_ms:.1f} ms vs {cold_ms:.1f} ms cold)",
+        )
+
+        # 3: stale -> conditional GET -> 304
+        os.environ["HTTP_CACHE_TTL_FRED"] = "0"
+        revalidated, _ = timed_fetch()
+        check(Stub.hits[1:] == [304] and revalidated.equals(cold), "stale entry revalidated with a 304, body reused")
+
+        # 4: upstream changed
+        Stub.set_rows(args.rows, offset=1.0)
+        changed, _ = timed_fetch()
+        blobs = list(Path(tmp, "blobs").rglob("*.gz"))
+        check(
+            Stub.hits[2:] == [200] and len(blobs) == 2 and not changed.equals(cold),
+            "changed upstream body stored under a new content hash",
+        )
+
+        # 5: upstream down
+        Stub.down = True
+        stale, _ = timed_fetch()
+        check(Stub.hits[-1] == 500 and stale.equals(changed), "upstream down: stale cached copy served")
+        price_service._parse_fred_csv = original_parse
+
+        # 6: failed write
+        target = Path(tmp, "parsed", "broken.parquet")
+        try:
+            atomic_write_parquet(target, BrokenFrame())
+        except OSError:
+            pass
+        leftovers = list(target.parent.glob(".tmp-*"))
+        check(not target.exists() and not leftovers, "failed write left no partial or temp file")
+
+    server.shutdown()
+    print("HTTP cache checks passed.")
+
+
+if __name__ == "__main__":
+    main()
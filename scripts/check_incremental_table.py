@@ -0,0 +1,96 @@
+"""
+check_incremental_table.py
+==========================
+Parity check and timing for the incremental daily training-table builder
+(scripts/build_daily_training_table.py --incremental).
+
+The real price history and news features are copied to a temporary
+directory, with a perturbed BRENT copy added so the check covers more than
+one commodity.  The partitioned table is built from everything before the
+last --days trading days, those days are then appended one at a time as
+they would arrive, and the result must match a full build of all the data
+(same rows, columns and dtypes; values within --tolerance).  Appends are
+timed against the full rebuild.
+
+Usage
+-----
+    python scripts/check_incremental_table.py [--days 30] [--tolerance 1e-9]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+SCRIPTS = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, SCRIPTS)
+sys.path.insert(0, os.path.dirname(SCRIPTS))
+
+import build_daily_training_table as builder  # noqa: E402
+from training_tables import PartitionedTable  # noqa: E402
+
+
+def inputs() -> tuple[pd.DataFrame, pd.DataFrame]:
+    prices = pd.read_parquet(builder.PRICE_HISTORY)
+    news = pd.read_parquet(builder.NEWS_FEATURES)
+    rng = np.random.default_rng(0)
+    brent_prices = prices.assign(commodity="BRENT", price=prices["price"] * 1.05 + rng.normal(0, 0.3, len(prices)))
+    brent_news = news.assign(commodity="BRENT", avg_tone=news["avg_tone"] + 0.1)
+    return pd.concat([prices, brent_prices], ignore_index=True), pd.concat([news, brent_news], ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=30, help="Trading days appended one at a time.")
+    parser.add_argument("--tolerance", type=float, default=1e-9)
+    args = parser.parse_args()
+
+    prices, news = inputs()
+    days = np.sort(prices["date"].unique())
+    cutoff = days[-args.days - 1]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        prices_path = os.path.join(tmp, "price_history.parquet")
+        news_path = os.path.join(tmp, "news_features.parquet")
+        output = os.path.join(tmp, "daily_training_table.parquet")
+        dataset = os.path.join(tmp, "daily_training_table")
+
+        def publish(through):
+            prices[prices["date"] <= through].to_parquet(prices_path, index=False)
+            news[news["date"] <= through].to_parquet(news_path, index=False)
+
+        publish(cutoff)
+        builder.full_build(prices_path, news_path, output, dataset)
+
+        timings = []
+        for day in days[-args.days:]:
+            publish(day)
+            t0 = time.perf_counter()
+            builder.incremental_update(prices_path, news_path, dataset)
+            timings.append(time.perf_counter() - t0)
+        incremental = PartitionedTable(dataset).read()
+        parts = len(PartitionedTable(dataset).state()["parts"])
+
+        t0 = time.perf_counter()
+        full = builder.full_build(prices_path, news_path, output, os.path.join(tmp, "rebuilt"))
+        rebuild = time.perf_counter() - t0
+        full = full.sort_values(["commodity", "date"], kind="stable").reset_index(drop=True)
+
+    pd.testing.assert_frame_equal(incremental, full, rtol=args.tolerance, atol=args.tolerance)
+    numeric = full.select_dtypes("number").columns
+    worst = float(np.nanmax(np.abs(incremental[numeric].to_numpy(float) - full[numeric].to_numpy(float))))
+
+    print(f"{len(full)} rows, {full['commodity'].nunique()} commodities; {args.days} days appended as {parts} parts")
+    print(f"max abs difference vs full build : {worst:.1e}  (tolerance {args.tolerance:g})")
+    print(f"full rebuild                     : {rebuild * 1e3:.0f} ms")
+    print(f"append one day (median / max)    : {statistics.median(timings) * 1e3:.0f} / {max(timings) * 1e3:.0f} ms")
+    print("Incremental table matches the full build.")
+
+
+if __name__ == "__main__":
+    main()
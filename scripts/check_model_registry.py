@@ -0,0 +1,187 @@
+"""
+check_model_registry.py
+=======================
+Checks and timings for the model registry
+(backend/services/model_registry.py), run against a temporary registry.
+
+  * a request keeps the version it was handed while a newer one is
+    published and swapped in, and later requests get the new version;
+  * under concurrent readers and repeated publishes every prediction comes
+    from exactly one published version (never a half-loaded one) and no
+    request errors;
+  * a version that fails to load is skipped and the old one keeps serving;
+  * without a published version the flat files in models/ are served;
+  * load time with and without memory-mapping, and the latency a first
+    request sees with and without ``warm_up()``.
+
+Exits non-zero on any failure.
+
+Usage
+-----
+    python scripts/check_model_registry.py [--trees 300] [--readers 4]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.services import model_registry  # noqa: E402
+from backend.services.model_registry import ModelRegistry  # noqa: E402
+
+FEATURES = [f"f{i}" for i in range(20)]
+
+
+def check(name: str, ok: bool) -> None:
+    print(f"  {'ok  ' if ok else 'FAIL'} {name}")
+    if not ok:
+        sys.exit(1)
+
+
+def fit(trees: int, seed: int) -> RandomForestClassifier:
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(2000, len(FEATURES)))
+    y = (X[:, 0] + rng.normal(0, 1, len(X)) > 0).astype(int)
+    return RandomForestClassifier(n_estimators=trees, max_depth=12, random_state=seed, n_jobs=1).fit(X, y)
+
+
+def wait_for_swap(registry: ModelRegistry, name: str, version: str, timeout: float = 60) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if registry.get(name).version == version:
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--trees", type=int, default=300)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--publishes", type=int, default=3)
+    args = parser.parse_args()
+
+    rows = np.random.default_rng(99).normal(size=(8, len(FEATURES)))
+    models = [fit(args.trees, seed) for seed in range(args.publishes + 1)]
+    expected = [m.predict_proba(rows)[:, 1] for m in models]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        v1 = model_registry.publish("direction", models[0], FEATURES, meta={"seed": 0}, root=root)
+
+        # ── Load time ────────────────────────────────────────────────────
+        timings = {}
+        for label, mode in (("memory-mapped", "r"), ("read into memory", None)):
+            best = float("inf")
+            for _ in range(3):
+                loaded = ModelRegistry(root, poll=0, mmap_mode=mode).get("direction")
+                best = min(best, loaded.load_ms)
+            timings[label] = best
+            check(f"{label} load predicts like the fitted model",
+                  np.array_equal(loaded.model.predict_proba(rows)[:, 1], expected[0]))
+
+        # ── Pinning and swap ─────────────────────────────────────────────
+        print("swap")
+        registry = ModelRegistry(root, poll=0, mmap_mode="r")
+        pinned = registry.get("direction")
+        v2 = model_registry.publish("direction", models[1], FEATURES, meta={"seed": 1}, root=root)
+        check("the request after a publish is still served the old version", registry.get("direction").version == v1)
+        check("the new version is swapped in", wait_for_swap(registry, "direction", v2))
+        check("a pinned request keeps predicting with its version",
+              pinned.version == v1 and np.array_equal(pinned.model.predict_proba(rows)[:, 1], expected[0]))
+        check("meta and feature names travel with the version",
+              registry.get("direction").meta["seed"] == 1 and registry.get("direction").feature_names == FEATURES)
+
+        # ── Concurrent readers ───────────────────────────────────────────
+        by_version = {v1: expected[0], v2: expected[1]}
+        stop = threading.Event()
+        errors, mismatches, served = [], [], []
+
+        def reader():
+            while not stop.is_set():
+                try:
+                    loaded = registry.get("direction")
+                    probs = loaded.model.predict_proba(rows)[:, 1]
+                except Exception as exc:  # noqa: BLE001
+                    errors.append(exc)
+                    return
+                served.append(loaded.version)
+                if not np.array_equal(probs, by_version[loaded.version]):
+                    mismatches.append(loaded.version)
+
+        threads = [threading.Thread(target=reader) for _ in range(args.readers)]
+        for t in threads:
+            t.start()
+        for i in range(2, args.publishes + 1):
+            version = model_registry.publish("direction", models[i], FEATURES, meta={"seed": i}, root=root)
+            by_version[version] = expected[i]
+            wait_for_swap(registry, "direction", version)
+        time.sleep(0.2)
+        stop.set()
+        for t in threads:
+            t.join()
+        check(f"{len(served)} concurrent requests across {len(set(served))} versions, no errors", not errors)
+        check("every prediction matches the version it was served by", not mismatches)
+        check("old versions are pruned to MODEL_REGISTRY_KEEP",
+              len([p for p in (root / "direction").iterdir() if p.is_dir()]) <= model_registry.KEEP_VERSIONS)
+
+        # ── Broken version ───────────────────────────────────────────────
+        print("failure")
+        live = registry.get("direction").version
+        broken = root / "direction" / "99999999T000000Z-broken"
+        broken.mkdir()
+        (broken / "meta.json").write_text('{"features": []}')
+        (broken / "model.joblib").write_bytes(b"not a pickle")
+        (root / "direction" / "CURRENT").write_text(broken.name)
+        registry.get("direction")
+        deadline = time.monotonic() + 10
+        while registry.status()["direction"]["loading"] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        check("a version that fails to load leaves the old one serving", registry.get("direction").version == live)
+
+        # ── Warm-up ──────────────────────────────────────────────────────
+        (root / "direction" / "CURRENT").write_text(live)
+        cold = ModelRegistry(root, poll=0)
+        t0 = time.perf_counter()
+        cold.get("direction")
+        first_cold = time.perf_counter() - t0
+        warm = ModelRegistry(root, poll=0)
+        for thread in warm.warm_up(["direction"]):
+            thread.join()
+        t0 = time.perf_counter()
+        warm.get("direction")
+        first_warm = time.perf_counter() - t0
+        warm.poll = model_registry.POLL_SECONDS
+        t0 = time.perf_counter()
+        for _ in range(10000):
+            warm.get("direction")
+        steady = (time.perf_counter() - t0) / 10000
+
+        # ── Legacy files ─────────────────────────────────────────────────
+        print("legacy")
+        legacy = ModelRegistry(root / "empty", poll=0)
+        if legacy.current_version("direction") is None:
+            print("  skip no models/prediction_model.joblib to fall back to")
+        else:
+            loaded = legacy.get("direction")
+            check("without a published version the flat files are served",
+                  loaded.version.startswith("legacy-") and len(loaded.feature_names) > 0)
+
+    print(f"load, memory-mapped          : {timings['memory-mapped']:7.1f} ms ({args.trees} trees)")
+    print(f"load, read into memory       : {timings['read into memory']:7.1f} ms")
+    print(f"first request, cold          : {first_cold * 1e3:7.1f} ms")
+    print(f"first request, after warm-up : {first_warm * 1e3:7.3f} ms")
+    print(f"get(), steady state          : {steady * 1e6:7.2f} us")
+    print("Model registry checks passed.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+check_query_plans.py
+====================
+Query-plan regression check for the SQLite schema.
+
+Every hot read path (headline lists, price ranges, /kpis, /prediction-history,
+/analytics/sentiment-price and the prediction feature builders) is executed
+against a throw-away database created from ``backend.models`` plus the
+migrations in ``backend/migrations.py``.  The SQL each one emits is captured
+and re-run through ``EXPLAIN QUERY PLAN``; the script exits non-zero if any
+plan full-scans a table or an index, builds a temp B-tree to sort or
+group, or searches headlines / price_points on commodity alone without a
+LIMIT (or a single-row MIN()/MAX()) to bound it, i.e. reads the
+commodity's whole history.
+
+Usage
+-----
+    python scripts/check_query_plans.py [--verbose]
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import tempfile
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, event  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from backend.db import Base  # noqa: E402
+from backend.migrations import run_migrations  # noqa: E402
+from backend.models import Headline, PricePoint  # noqa: E402
+from backend.services import feature_state, kpi_service, news_service, price_service  # noqa: E402
+from backend.services.headline_rollup import get_prediction_history  # noqa: E402
+from backend.services.prediction_service import _build_feature_df_from_db, get_model_prediction_history  # noqa: E402
+
+TABLES = ("headlines", "price_points", "daily_headline_stats", "model_predictions")
+# Time-ordered tables: a search on commodity alone reads its whole history
+# unless a LIMIT stops it along the (commodity, time) index.
+TIME_SERIES = ("headlines", "price_points")
+
+FULL_SCAN = re.compile(rf"^SCAN ({'|'.join(TABLES)})\b")
+COMMODITY_ONLY = re.compile(rf"^SEARCH ({'|'.join(TIME_SERIES)}) USING (COVERING )?INDEX \S+ \(commodity=\?\)$")
+
+CASES = {
+    "get_headlines": lambda db: news_service.get_headlines(db, "WTI", limit=50),
+    "get_headlines(since)": lambda db: news_service.get_headlines(
+        db, "WTI", limit=50, since=datetime.utcnow() - timedelta(days=3)
+    ),
+    "get_prices_for_range": lambda db: price_service.get_prices_for_range(db, "WTI", "7d"),
+    "get_prices_for_range(fallback)": lambda db: price_service.get_prices_for_range(db, "STALE", "7d"),
+    "kpis headline stats": lambda db: kpi_service._headline_stats(
+        db, ["WTI", "BRENT"], datetime.utcnow() - timedelta(hours=24)
+    ),
+    "prediction-history": lambda db: get_prediction_history(db, "WTI", 30),
+    "prediction-history(model)": lambda db: get_model_prediction_history(db, "WTI", 30),
+    "sentiment-price": lambda db: news_service.compute_sentiment_vs_price_change(db, "WTI"),
+    "feature watermark": lambda db: feature_state.data_watermark(db, "WTI"),
+    "feature state rebuild": lambda db: feature_state._rebuild(
+        db, "WTI", datetime.utcnow() - timedelta(days=feature_state.WINDOW_DAYS), (None, None)
+    ),
+    "pandas feature frame": lambda db: _build_feature_df_from_db(db, "WTI"),
+}
+
+
+def populate(db, days: int = 120, per_day: int = 6, seed: int = 3) -> None:
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    for commodity, offset in (("WTI", 0), ("BRENT", 0), ("NATGAS", 0), ("STALE", 400)):
+        for day in range(days, 0, -1):
+            ts = now - timedelta(days=day + offset)
+            db.add(PricePoint(commodity=commodity, timestamp=ts, close=round(rng.uniform(60, 80), 2)))
+            for _ in range(per_day):
+                db.add(
+                    Headline(
+                        id=str(uuid.uuid4()),
+                        published_at=ts - timedelta(minutes=rng.randint(0, 1439)),
+                        title="plan check",
+                        source="Check",
+                        url="https://example.com",
+                        commodity=commodity,
+                        sentiment_score=round(rng.uniform(-1, 1), 3),
+                        event_type="Supply",
+                        impact_score=round(rng.uniform(0, 100), 1),
+                        pred_label=rng.choice(["UP", "DOWN", "NEUTRAL"]),
+                        pred_confidence=0.6,
+                    )
+                )
+    db.commit()
+
+
+def plan_problems(plan: list[str], statement: str) -> list[str]:
+    """Return the plan lines that read more than a bounded index range:
+    a table or full-index scan, a temp sort, or more commodity-only
+    searches of a time series than the statement has LIMITs to stop them."""
+    problems = [
+        line for line in plan
+        if "TEMP B-TREE" in line or FULL_SCAN.match(line.strip())
+    ]
+    unbounded = [line for line in plan if COMMODITY_ONLY.match(line.strip())]
+    # A LIMIT, or a lone MIN()/MAX() (SQLite's one-row min/max lookup),
+    # stops one such search after a bounded number of index entries.
+    bounds = len(re.findall(r"\bLIMIT\b", statement, re.IGNORECASE))
+    bounds += len(re.findall(r"\b(?:min|max)\(\w+\.\w+\)\s+AS\s+\w+\s+FROM\b", statement, re.IGNORECASE))
+    if len(unbounded) > bounds:
+        problems += unbounded
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--verbose", action="store_true", help="Print every captured plan.")
+    args = parser.parse_args()
+
+    failures = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'plans.db')}")
+        Base.metadata.create_all(bind=engine)
+        run_migrations(engine)
+        Session = sessionmaker(bind=engine)
+        with Session() as db:
+            populate(db)
+
+        with engine.connect() as conn:
+            conn.exec_driver_sql("ANALYZE")
+
+        captured: list[tuple[str, object]] = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith(("SELECT", "WITH")):
+                captured.append((statement, parameters))
+
+        event.listen(engine, "before_cursor_execute", capture)
+        for name, case in CASES.items():
+            captured.clear()
+            with Session() as db:
+                case(db)
+            statements = list(captured)
+
+            with engine.connect() as conn:
+                for statement, parameters in statements:
+                    rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+                    plan = [row[-1] for row in rows]
+                    problems = plan_problems(plan, statement)
+                    status = "FAIL" if problems else "ok"
+                    print(f"{status:<4}  {name}")
+                    if problems or args.verbose:
+                        print("      " + " ".join(statement.split())[:160])
+                        for line in plan:
+                            print(f"        {line}")
+                    failures += bool(problems)
+        event.remove(engine, "before_cursor_execute", capture)
+        engine.dispose()
+
+    if failures:
+        raise SystemExit(f"{failures} hot query plan(s) fall back to a full scan or temp B-tree")
+    print("All hot query plans use indexes.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+check_score_history.py
+======================
+Checks and timing for the history backfill (scripts/score_history.py),
+run against a throw-away database and model registry.
+
+A synthetic --years daily table for three commodities is scored by a
+stand-in direction forest trained on the deployed model's feature list:
+
+  * every stored probability equals ``predict_proba`` over the same rows
+    computed by the shared feature library, with the threshold bands of
+    the live /predict path;
+  * ``--resume`` after a complete run scores nothing, and after an
+    interrupted one only the missing days;
+  * a --start/--end rescoring touches only that range, in place;
+  * the pinned version is loaded uncompiled, without becoming the
+    process's served model;
+  * one process per commodity stores the same rows as a serial run;
+  * /prediction-history?source=model returns the newest days, oldest first.
+
+Exits non-zero on any failure.
+
+Usage
+-----
+    python scripts/check_score_history.py [--years 10] [--trees 100]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+
+SCRIPTS = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(SCRIPTS)
+# Before any backend import, so this process and its workers use them;
+# spawned workers re-run this module and must keep the parent's directory.
+TMP = os.environ.setdefault("CHECK_SCORE_HISTORY_DIR", tempfile.mkdtemp(prefix="check-score-history-"))
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(TMP, 'check.db')}"
+os.environ["MODEL_REGISTRY_DIR"] = os.path.join(TMP, "registry")
+sys.path.insert(0, SCRIPTS)
+sys.path.insert(0, ROOT)
+
+import score_history  # noqa: E402
+from bench_signal_features import synthetic_table  # noqa: E402
+from backend.db import engine  # noqa: E402
+from backend.models import ModelPrediction  # noqa: E402
+from backend.services import model_registry, signal_features  # noqa: E402
+from backend.services.prediction_service import direction_bands, get_model_prediction_history  # noqa: E402
+from sqlalchemy import delete, select  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+COMMODITIES = ["WTI", "BRENT", "NATGAS"]
+THRESHOLD = 0.6
+
+
+def stored() -> pd.DataFrame:
+    table = ModelPrediction.__table__
+    with engine.connect() as conn:
+        rows = conn.execute(select(table).order_by(table.c.commodity, table.c.date)).mappings().all()
+    return pd.DataFrame(rows, columns=[c.key for c in table.columns])
+
+
+def expected(table: pd.DataFrame, model, names: list[str]) -> pd.DataFrame:
+    frames = []
+    for commodity, base in table.groupby("commodity", sort=True):
+        base = base.reset_index(drop=True)
+        rows = pd.concat([base[["date"]], signal_features.compute_features(base, names)], axis=1).dropna()
+        prob = model.predict_proba(rows[names])[:, 1]
+        label, confidence = direction_bands(prob, THRESHOLD)
+        frames.append(pd.DataFrame({
+            "commodity": commodity,
+            "date": rows["date"].dt.strftime("%Y-%m-%d"),
+            "probability_up": prob,
+            "prediction": label,
+            "confidence": confidence,
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def report(ok: bool, message: str) -> None:
+    print(f"  {'ok  ' if ok else 'FAIL'} {message}")
+    if not ok:
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--trees", type=int, default=100)
+    args = parser.parse_args()
+
+    with open(os.path.join(ROOT, "models", "feature_names.json")) as f:
+        names = json.load(f)
+    table = pd.concat(
+        [synthetic_table(args.years, seed=i).assign(commodity=c) for i, c in enumerate(COMMODITIES)],
+        ignore_index=True,
+    )
+    path = os.path.join(TMP, "table.parquet")
+    table.to_parquet(path, index=False)
+
+    # a stand-in direction model on the deployed feature list
+    train = table[table["commodity"] == "WTI"].reset_index(drop=True)
+    features = signal_features.compute_features(train, names)
+    target = (train["price"].shift(-3) / train["price"] - 1 > 0.01).astype(int)
+    keep = features.notna().all(axis=1)
+    model = RandomForestClassifier(n_estimators=args.trees, random_state=0, n_jobs=1)
+    model.fit(features[keep], target[keep])
+    model_registry.publish("direction", model, names, meta={"threshold": THRESHOLD})
+
+    want = expected(table, model, names)
+    print(f"{len(COMMODITIES)} commodities × {args.years} years, {len(want)} scoreable days, {len(names)} features")
+
+    t0 = time.perf_counter()
+    results = score_history.score_history(path, workers=1)
+    serial_s = time.perf_counter() - t0
+    got = stored()
+    diff = float(np.abs(got["probability_up"].to_numpy() - want["probability_up"].to_numpy()).max())
+    report(
+        len(got) == len(want) and diff == 0.0
+        and (got[["commodity", "date", "prediction"]].to_numpy() == want[["commodity", "date", "prediction"]].to_numpy()).all()
+        and np.allclose(got["confidence"], want["confidence"], rtol=0, atol=0),
+        f"stored output matches predict_proba on every day (max diff {diff:.1e})",
+    )
+
+    pinned = model_registry.load_version("direction", model_registry.current_version("direction"), compile_trees=False)
+    report(
+        model_registry.status()["direction"]["version"] is None and pinned.predictor is pinned.model,
+        "scoring loads its pinned version uncompiled and leaves the served model alone",
+    )
+
+    again = score_history.score_history(path, resume=True, workers=1)
+    report(sum(r["days"] for r in again) == 0, "--resume after a complete run scores nothing")
+
+    # an interrupted run: BRENT's last 300 days never written
+    cut = want[want["commodity"] == "BRENT"]["date"].iloc[-300]
+    with engine.begin() as conn:
+        conn.execute(delete(ModelPrediction.__table__).where(
+            ModelPrediction.commodity == "BRENT", ModelPrediction.date >= cut,
+        ))
+    resumed = score_history.score_history(path, resume=True, workers=1)
+    after = stored()
+    report(
+        {r["commodity"]: r["days"] for r in resumed} == {"WTI": 0, "BRENT": 300, "NATGAS": 0}
+        and after["probability_up"].equals(got["probability_up"]),
+        "--resume after an interrupted run scores only the missing 300 days",
+    )
+
+    ranged = score_history.score_history(path, ["NATGAS"], start="2018-01-01", end="2018-12-31", workers=1)
+    in_range = want[(want["commodity"] == "NATGAS") & want["date"].between("2018-01-01", "2018-12-31")]
+    report(
+        ranged[0]["days"] == len(in_range) and len(stored()) == len(want),
+        f"--start/--end rescoring touches only its {len(in_range)} days, in place",
+    )
+
+    with engine.begin() as conn:
+        conn.execute(delete(ModelPrediction.__table__))
+    t0 = time.perf_counter()
+    score_history.score_history(path, workers=len(COMMODITIES))
+    parallel_s = time.perf_counter() - t0
+    report(stored()["probability_up"].equals(got["probability_up"]), "one process per commodity stores the same rows")
+
+    with Session(engine) as db:
+        history = get_model_prediction_history(db, "WTI", 30)
+    newest = want[want["commodity"] == "WTI"].tail(30)
+    report(
+        [h["date"] for h in history] == newest["date"].tolist()
+        and [h["dominant_prediction"] for h in history] == newest["prediction"].tolist(),
+        "/prediction-history?source=model returns the newest days, oldest first",
+    )
+
+    days = sum(r["days"] for r in results)
+    print(f"serial   : {serial_s:6.2f} s ({days / serial_s:,.0f} days/s, includes model load per commodity)")
+    print(f"parallel : {parallel_s:6.2f} s ({len(COMMODITIES)} workers, {os.cpu_count()} cores)")
+    print("History scoring checks passed.")
+
+
+if __name__ == "__main__":
+    main()
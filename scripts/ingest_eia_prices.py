@@ -1,8 +1,14 @@
+import json
 import os
-import requests
+import sys
+
 import pandas as pd
 from dotenv import load_dotenv
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.services import http_cache  # noqa: E402
+
 load_dotenv()
 
 EIA_API_KEY = os.getenv("EIA_API_KEY")
@@ -11,7 +17,11 @@ if not EIA_API_KEY:
 
 BASE_URL = "https://api.eia.gov/v2/petroleum/pri/spt/data/"
 
+def _parse_rows(content):
+    return pd.DataFrame(json.loads(content).get("response", {}).get("data", []))
+
 def fetch_rows(offset=0, length=5000):
+    """One page of spot prices as a DataFrame (cached on disk, see http_cache)."""
     params = {
         "api_key": EIA_API_KEY,
         "data[0]": "value",
@@ -21,9 +31,8 @@ def fetch_rows(offset=0, length=5000):
         "sort[0][column]": "period",
         "sort[0][direction]": "desc",
     }
-    r = requests.get(BASE_URL, params=params, timeout=30)
-    r.raise_for_status()
-    return r.json()
+    response = http_cache.fetch("eia", BASE_URL, params=params, timeout=30)
+    return http_cache.cached_frame(response, "eia-page", _parse_rows)
 
 def get_wti_rows(max_pages=10):
     matches = []
@@ -32,13 +41,10 @@ def get_wti_rows(max_pages=10):
 
     for page in range(max_pages):
         print(f"Checking page {page + 1}...")
-        data = fetch_rows(offset=offset, length=length)
-        rows = data.get("response", {}).get("data", [])
-        if not rows:
+        df = fetch_rows(offset=offset, length=length)
+        if df.empty:
             break
 
-        df = pd.DataFrame(rows)
-
         mask = (
             df["series-description"].astype(str).str.contains(
                 "WTI - Cushing, Oklahoma|Cushing, Oklahoma WTI|WTI",
@@ -56,7 +62,7 @@ def get_wti_rows(max_pages=10):
             print(found[["period", "series", "series-description", "value", "units"]].head(10).to_string())
             matches.append(found)
 
-        if len(rows) < length:
+        if len(df) < length:
             break
 
         offset += length
@@ -0,0 +1,213 @@
+"""
+load_test.py
+============
+Concurrent load test for the SIGNAL API in its two database modes:
+
+    sync   the original setup: sync SQLAlchemy engine with SQLite's default
+           pragmas, every query on FastAPI's threadpool
+    async  ASYNC_DB=1: aiosqlite engine, WAL + tuned pragmas, feature
+           building and model inference on the compute executor
+
+For each mode a throw-away SQLite database is filled with synthetic prices
+and headlines, a uvicorn server is started against it, and a pool of
+client threads polls /headlines, /kpis and /predict the way the dashboard
+does.  A background writer keeps inserting headlines during the run, which
+is what makes SQLite writer locks show up in read latency.  Per-endpoint
+p50/p99 latency, error counts and overall throughput are printed per mode.
+
+Usage
+-----
+    python scripts/load_test.py [--modes sync async] [--concurrency 32]
+                                [--requests 1500] [--write-interval 0.05]
+"""
+
+import argparse
+import os
+import random
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import numpy as np
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from backend.db import Base  # noqa: E402
+from backend.models import Headline, PricePoint  # noqa: E402
+
+COMMODITIES = ["WTI", "BRENT", "NATGAS"]
+ENDPOINTS = ["/headlines?commodity={c}&limit=50", "/kpis?commodity={c}", "/predict?commodity={c}"]
+MODES = {
+    "sync": {"ASYNC_DB": "0", "SQLITE_TUNING": "0"},
+    "async": {"ASYNC_DB": "1", "SQLITE_TUNING": "1"},
+}
+
+
+def populate(path: str, days: int, per_day: int, seed: int = 11) -> None:
+    rng = random.Random(seed)
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    now = datetime.utcnow()
+    with sessionmaker(bind=engine)() as db:
+        for commodity in COMMODITIES:
+            price = 70.0
+            for day in range(days, 0, -1):
+                price = max(5.0, price + rng.gauss(0, 1.2))
+                ts = (now - timedelta(days=day)).replace(hour=16, minute=0, second=0, microsecond=0)
+                db.add(PricePoint(commodity=commodity, timestamp=ts, close=round(price, 2)))
+                for _ in range(per_day):
+                    db.add(new_headline(rng, commodity, now - timedelta(days=day, minutes=rng.randint(0, 1439))))
+        db.commit()
+    engine.dispose()
+
+
+def new_headline(rng: random.Random, commodity: str, published_at: datetime) -> Headline:
+    return Headline(
+        id=str(uuid.uuid4()),
+        published_at=published_at,
+        title=f"{commodity} load-test headline",
+        source="LoadTest",
+        url="https://example.com",
+        commodity=commodity,
+        sentiment_score=round(rng.uniform(-1, 1), 3),
+        event_type="Supply",
+        impact_score=round(rng.uniform(0, 100), 1),
+        pred_label=rng.choice(["UP", "DOWN", "NEUTRAL"]),
+        pred_confidence=0.6,
+    )
+
+
+def writer(path: str, interval: float, stop: threading.Event) -> int:
+    """Insert one headline every ``interval`` seconds until ``stop`` is set."""
+    rng = random.Random(5)
+    conn = sqlite3.connect(path, timeout=30)
+    written = 0
+    while not stop.wait(interval):
+        conn.execute(
+            "INSERT INTO headlines (id, published_at, title, source, url, commodity, sentiment_score, "
+            "event_type, impact_score, pred_label, pred_confidence) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                str(uuid.uuid4()),
+                datetime.utcnow().isoformat(sep=" "),
+                "load-test write",
+                "LoadTest",
+                "https://example.com",
+                rng.choice(COMMODITIES),
+                round(rng.uniform(-1, 1), 3),
+                "Supply",
+                50.0,
+                "NEUTRAL",
+                0.5,
+            ),
+        )
+        conn.commit()
+        written += 1
+    conn.close()
+    return written
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(db_path: str, mode: str) -> tuple[subprocess.Popen, str]:
+    port = free_port()
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{db_path}", **MODES[mode])
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT,
+        env=env,
+    )
+    base = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            if requests.get(f"{base}/health", timeout=1).ok:
+                return proc, base
+        except requests.ConnectionError:
+            time.sleep(0.1)
+    proc.terminate()
+    raise SystemExit(f"{mode} server did not start")
+
+
+def run_mode(mode: str, args) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "load.db")
+        populate(db_path, args.days, args.per_day)
+        proc, base = start_server(db_path, mode)
+        session = requests.Session()
+        session.mount("http://", requests.adapters.HTTPAdapter(pool_maxsize=args.concurrency))
+
+        urls = [base + e.format(c=c) for e in ENDPOINTS for c in COMMODITIES]
+        for url in urls:  # warm-up: model load, feature state, caches
+            session.get(url, timeout=60)
+
+        def call(i: int) -> tuple[str, float, bool]:
+            url = urls[i % len(urls)]
+            t0 = time.perf_counter()
+            try:
+                ok = session.get(url, timeout=60).status_code < 500
+            except requests.RequestException:
+                ok = False
+            return url.split("?")[0][len(base):], time.perf_counter() - t0, ok
+
+        stop = threading.Event()
+        write_thread = None
+        written = [0]
+        if args.write_interval > 0:
+            write_thread = threading.Thread(
+                target=lambda: written.__setitem__(0, writer(db_path, args.write_interval, stop))
+            )
+            write_thread.start()
+
+        try:
+            t0 = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+                samples = list(pool.map(call, range(args.requests)))
+            elapsed = time.perf_counter() - t0
+        finally:
+            stop.set()
+            if write_thread is not None:
+                write_thread.join()
+            proc.terminate()
+            proc.wait(timeout=10)
+
+    print(f"\n[{mode}] {args.requests} requests, concurrency {args.concurrency}, "
+          f"{written[0]} background writes, {args.requests / elapsed:.0f} req/s")
+    print(f"{'endpoint':<12} {'p50 (ms)':>9} {'p99 (ms)':>9} {'errors':>7}")
+    for endpoint in sorted({s[0] for s in samples}):
+        latencies = np.array([s[1] for s in samples if s[0] == endpoint]) * 1000
+        errors = sum(1 for s in samples if s[0] == endpoint and not s[2])
+        print(f"{endpoint:<12} {np.percentile(latencies, 50):>9.1f} {np.percentile(latencies, 99):>9.1f} {errors:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", nargs="+", choices=list(MODES), default=list(MODES))
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=1500)
+    parser.add_argument("--days", type=int, default=90, help="Days of history per commodity.")
+    parser.add_argument("--per-day", type=int, default=20, help="Headlines per commodity per day.")
+    parser.add_argument("--write-interval", type=float, default=0.05,
+                        help="Seconds between background headline inserts (0 disables).")
+    args = parser.parse_args()
+
+    for mode in args.modes:
+        run_mode(mode, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+rebuild_headline_stats.py
+=========================
+Rebuild (or verify) the ``daily_headline_stats`` rollup that backs
+/prediction-history.
+
+The rollup is maintained incrementally on every ORM headline write; run
+this after bulk deletes, writes made outside SQLAlchemy, or restoring an
+old database.  ``--check`` only compares the stored rollup with a fresh
+aggregate of ``headlines`` and exits non-zero on any drift.
+
+Usage
+-----
+    python scripts/rebuild_headline_stats.py [--commodity WTI] [--check]
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.db import Base, engine  # noqa: E402
+from backend.services.headline_rollup import find_drift, rebuild_daily_headline_stats  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--commodity", help="Only this commodity (default: all).")
+    parser.add_argument("--check", action="store_true", help="Verify instead of rebuilding.")
+    args = parser.parse_args()
+    commodity = args.commodity.upper() if args.commodity else None
+
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        if args.check:
+            drift = find_drift(conn, commodity)
+            for line in drift:
+                print(line)
+            if drift:
+                raise SystemExit(f"{len(drift)} day(s) out of date — rerun without --check")
+            print("daily_headline_stats matches headlines.")
+        else:
+            days = rebuild_daily_headline_stats(conn, commodity)
+            print(f"Rebuilt {days} commodity-day rows.")
+
+
+if __name__ == "__main__":
+    main()
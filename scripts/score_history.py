@@ -0,0 +1,222 @@
+"""
+score_history.py
+================
+Backfill the direction model's per-day output over the whole feature
+history into the ``model_predictions`` table, so /prediction-history
+(``source=model``) can chart real model output for years of data.
+
+Each commodity's base rows are read from the training table, the model's
+columns are computed in one vectorised pass through the shared feature
+library (backend/services/signal_features.py), and the rows are run
+through the model --batch-size at a time: one ``predict_proba`` call and
+one upsert transaction per batch.  The estimator itself is called, not its
+compiled serving form — at these batch sizes its native predict loop is the
+faster one.
+
+Every run is pinned to the model version that is live when it starts.
+Rows are keyed on (model, commodity, date), so rescoring a range replaces
+it in place, and a run stopped part-way keeps every finished batch:
+``--resume`` picks each commodity up after the newest day already scored
+by the same model version.  Commodities are scored in parallel, one
+process each (--workers).
+
+Usage
+-----
+    python scripts/score_history.py [--table data/processed/model_training_table.parquet]
+        [--commodities WTI,BRENT] [--start 2015-01-01] [--end 2024-12-31] [--resume]
+        [--threshold 0.75] [--batch-size 50000] [--workers N]
+"""
+
+import argparse
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import pandas as pd
+from sqlalchemy import func, select
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.db import Base, engine  # noqa: E402
+from backend.migrations import run_migrations  # noqa: E402
+from backend.models import ModelPrediction  # noqa: E402
+from backend.services import model_registry, signal_features  # noqa: E402
+from backend.services.bulk_ingest import upsert_model_predictions  # noqa: E402
+from backend.services.prediction_service import direction_bands  # noqa: E402
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+log = logging.getLogger(__name__)
+
+MODEL = "direction"
+DEFAULT_TABLE = "data/processed/model_training_table.parquet"
+
+
+def scored_through(commodity: str, version: str) -> str | None:
+    """Newest day of ``commodity`` already scored by ``version``."""
+    table = ModelPrediction.__table__
+    with engine.connect() as conn:
+        return conn.execute(
+            select(func.max(table.c.date)).where(
+                table.c.model == MODEL,
+                table.c.commodity == commodity,
+                table.c.model_version == version,
+            )
+        ).scalar()
+
+
+def feature_rows(
+    table: str,
+    commodity: str,
+    feature_names: list[str],
+    start: str | None,
+    end: str | None,
+) -> pd.DataFrame:
+    """``date`` plus the model's columns for every complete row of
+    ``commodity`` dated in [start, end].
+
+    Features are computed over all history up to ``end``, so rolling
+    windows are warm at ``start``.
+    """
+    filters = [("commodity", "==", commodity)]
+    if end is not None:
+        filters.append(("date", "<=", pd.Timestamp(end)))
+    base = pd.read_parquet(table, filters=filters)
+    base = base.sort_values("date", kind="stable").reset_index(drop=True)
+    try:
+        features = signal_features.compute_features(base, feature_names)
+    except KeyError as exc:
+        raise ValueError(f"Missing features for model input: {exc}") from exc
+    frame = pd.concat([base[["date"]], features], axis=1).dropna(subset=feature_names)
+    if start is not None:
+        frame = frame[frame["date"] >= pd.Timestamp(start)]
+    return frame.reset_index(drop=True)
+
+
+def score_commodity(
+    table: str,
+    commodity: str,
+    version: str,
+    threshold: float,
+    start: str | None = None,
+    end: str | None = None,
+    resume: bool = False,
+    batch_size: int = 50_000,
+) -> dict:
+    """Score one commodity with model ``version`` and upsert the results."""
+    t0 = time.perf_counter()
+    # the estimator as trained: compiling pays off per request, not per batch
+    loaded = model_registry.load_version(MODEL, version, compile_trees=False)
+    if resume:
+        done = scored_through(commodity, version)
+        if done is not None:
+            after = (pd.Timestamp(done) + pd.Timedelta(days=1)).date().isoformat()
+            start = max(start, after) if start else after
+
+    frame = feature_rows(table, commodity, loaded.feature_names, start, end)
+    days = frame["date"].dt.strftime("%Y-%m-%d").to_numpy()
+    written = 0
+    for lo in range(0, len(frame), batch_size):
+        X = frame.iloc[lo:lo + batch_size][loaded.feature_names]
+        if loaded.scaler is not None:
+            X = pd.DataFrame(loaded.scaler.transform(X), columns=loaded.feature_names)
+        prob_up = loaded.model.predict_proba(X)[:, 1]
+        label, confidence = direction_bands(prob_up, threshold)
+        now = datetime.utcnow()
+        rows = [
+            {
+                "model": MODEL,
+                "commodity": commodity,
+                "date": day,
+                "model_version": version,
+                "probability_up": p,
+                "prediction": lab,
+                "confidence": conf,
+                "threshold": threshold,
+                "scored_at": now,
+            }
+            for day, p, lab, conf in zip(
+                days[lo:lo + batch_size], prob_up.tolist(), label.tolist(), confidence.tolist()
+            )
+        ]
+        # One transaction per batch: an interrupted run keeps what it finished.
+        with engine.begin() as conn:
+            written += upsert_model_predictions(conn, rows)
+        log.info("%s: scored %d / %d days", commodity, written, len(frame))
+
+    return {
+        "commodity": commodity,
+        "days": written,
+        "first": days[0] if len(days) else None,
+        "last": days[-1] if len(days) else None,
+        "seconds": round(time.perf_counter() - t0, 2),
+    }
+
+
+def score_history(
+    table: str = DEFAULT_TABLE,
+    commodities: list[str] | None = None,
+    start: str | None = None,
+    end: str | None = None,
+    resume: bool = False,
+    threshold: float | None = None,
+    batch_size: int = 50_000,
+    workers: int | None = None,
+) -> list[dict]:
+    """Score every commodity in ``table`` (or just ``commodities``)."""
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    version = model_registry.current_version(MODEL)
+    if version is None:
+        raise FileNotFoundError(f"No trained {MODEL!r} model.  Run `python train_model.py` first.")
+    loaded = model_registry.load_version(MODEL, version, compile_trees=False)
+    if threshold is None:
+        threshold = float(loaded.meta.get("threshold", 0.75))
+    if commodities is None:
+        commodities = sorted(pd.read_parquet(table, columns=["commodity"])["commodity"].unique())
+    log.info(
+        "Scoring %s with %s model %s (threshold %.2f)",
+        ", ".join(commodities), MODEL, loaded.version, threshold,
+    )
+
+    jobs = [(table, c, loaded.version, threshold, start, end, resume, batch_size) for c in commodities]
+    workers = min(workers or os.cpu_count() or 1, len(jobs))
+    if workers > 1:
+        # spawn, not fork: no SQLite connection is shared with the workers.
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            return list(pool.map(score_commodity, *zip(*jobs)))
+    return [score_commodity(*job) for job in jobs]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--table", default=DEFAULT_TABLE, help="Base feature table (Parquet).")
+    parser.add_argument("--commodities", help="Comma-separated (default: every commodity in --table).")
+    parser.add_argument("--start", help="First day to score, YYYY-MM-DD.")
+    parser.add_argument("--end", help="Last day to score, YYYY-MM-DD.")
+    parser.add_argument("--resume", action="store_true", help="Skip days already scored by this model version.")
+    parser.add_argument(
+        "--threshold", type=float, default=None,
+        help="UP/DOWN confidence threshold (default: the one the model was trained with, else 0.75).",
+    )
+    parser.add_argument("--batch-size", type=int, default=50_000, help="Rows per predict call and transaction.")
+    parser.add_argument("--workers", type=int, default=None, help="Processes (default: one per core).")
+    args = parser.parse_args()
+
+    commodities = [c.strip().upper() for c in args.commodities.split(",")] if args.commodities else None
+    t0 = time.perf_counter()
+    results = score_history(
+        args.table, commodities, args.start, args.end, args.resume,
+        args.threshold, args.batch_size, args.workers,
+    )
+    for r in results:
+        print(f"{r['commodity']:<8} {r['days']:>7} days  {r['first'] or '-'} → {r['last'] or '-'}  {r['seconds']:.2f}s")
+    total = sum(r["days"] for r in results)
+    print(f"Scored {total} commodity-days in {time.perf_counter() - t0:.1f}s.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,17 @@
+import json
 import logging
 import os
 import argparse
+import time
 import joblib
 import pandas as pd
 from sklearn.linear_model import LogisticRegression
 from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
 from sklearn.metrics import classification_report, accuracy_score
 from sklearn.model_selection import TimeSeriesSplit
-from sklearn.preprocessing import StandardScaler
-from tabpfn import TabPFNClassifier
-from xgboost import XGBClassifier
+
+from backend.services import feature_store, model_registry
+from training_harness import TrainingHarness, peak_rss_mb
 
 logging.basicConfig(
     level=logging.INFO,
@@ -17,6 +19,9 @@ logging.basicConfig(
 )
 log = logging.getLogger(__name__)
 
+# Periods ahead the UP/DOWN target looks (future_return_3).
+TARGET_HORIZON = 3
+
 
 def drop_nan_with_log(df: pd.DataFrame, subset=None, stage: str = "") -> pd.DataFrame:
     """Drop rows with NaN values and log how many were removed."""
@@ -28,38 +33,16 @@ def drop_nan_with_log(df: pd.DataFrame, subset=None, stage: str = "") -> pd.Data
     return df
 
 
-def main():
-    parser = argparse.ArgumentParser()
-    parser.add_argument(
-        "--model", type=str, default="forest",
-        choices=["gradient", "logistic", "forest", "tabpfn", "xgboost"],
-    )
-    parser.add_argument(
-        "--threshold", type=float, default=0.75,
-        help=(
-            "Confidence threshold (0.50–0.95). Predictions with p > threshold are "
-            "classified as UP; predictions with p < (1 - threshold) are classified "
-            "as DOWN; everything else is labelled uncertain and excluded from the "
-            "confident-only accuracy report. Also used as the decision boundary for "
-            "full-test accuracy (conservative toward the majority class). Default: 0.75."
-        ),
-    )
-    args = parser.parse_args()
-
-    parquet_path = "data/processed/model_training_table.parquet"
-    if not os.path.exists(parquet_path):
-        raise FileNotFoundError(f"Could not find {parquet_path}")
-
-    df = pd.read_parquet(parquet_path)
-    log.info("Raw data loaded: %d rows, %d columns", *df.shape)
-    log.info("Columns: %s", df.columns.tolist())
-
+def build_dataset(df: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame, pd.Series]:
+    """Target, features and the clean feature matrix for the base table
+    ``df``; returns ``(df, X, y)``, row-aligned on ``df``'s index."""
     # ------------------------------------------------------------------ #
     # 1. Compute target BEFORE feature engineering so NaN rows from       #
     #    shift(-3) are removed first, preventing NaN from propagating     #
     #    into rolling/lag features computed on adjacent rows.             #
     # ------------------------------------------------------------------ #
-    df["future_return_3"] = df["price"].shift(-3) / df["price"] - 1
+    # Per commodity, so a series' tail never looks into the next one.
+    df["future_return_3"] = df.groupby("commodity")["price"].shift(-TARGET_HORIZON) / df["price"] - 1
 
     # Drop rows where the target horizon extends beyond available data.
     # Must happen BEFORE computing target_up_down so that NaN is not
@@ -71,78 +54,12 @@ def main():
 
     # ------------------------------------------------------------------ #
     # 2. Feature engineering on clean (no trailing NaN) data             #
+    #    Downside pressure, momentum, sentiment rolling features, MACD,  #
+    #    RSI, calendar encoding and sentiment × technical interactions — #
+    #    see backend/services/signal_features.py (shared with serving),  #
+    #    computed per commodity and read through the feature store.      #
     # ------------------------------------------------------------------ #
-
-    # Downside pressure features
-    df["neg_tone_flag"] = (df["avg_tone"] < 0).astype(int)
-    df["strong_neg_tone"] = (df["avg_tone"] < -0.5).astype(int)
-
-    # Volatility direction signal
-    df["volatility_spike"] = (df["volatility_5"] > df["volatility_5"].rolling(5).mean()).astype(int)
-
-    # Price drop signal
-    df["down_momentum"] = (df["price"] < df["price_lag_1"]).astype(int)
-
-    # Price difference features
-    df["price_diff_1"] = df["price"] - df["price_lag_1"]
-    df["price_diff_2"] = df["price_lag_1"] - df["price_lag_2"]
-
-    # Sentiment rolling features
-    df["tone_ma_3"] = df["avg_tone"].rolling(3).mean()
-    df["tone_x_volatility"] = df["avg_tone"] * df["volatility_5"]
-
-    # Short-term momentum
-    df["return_1"] = df["price"].pct_change()
-    df["return_2"] = df["price"].pct_change(2)
-
-    # Trend strength
-    df["trend_strength"] = df["price_ma_3"] - df["price_ma_5"]
-
-    # Acceleration
-    df["acceleration"] = df["return_1"] - df["return_2"]
-
-    # Sentiment change
-    df["tone_change"] = df["avg_tone"] - df["avg_tone"].shift(1)
-
-    # 3-period momentum
-    df["momentum_3"] = df["price"] - df["price_lag_2"]
-
-    # Stationary ratio features (price position relative to moving averages)
-    df["price_vs_ma5"] = df["price"] / df["price_ma_5"] - 1
-    df["ma3_vs_ma5"] = df["price_ma_3"] / df["price_ma_5"] - 1
-
-    # ------------------------------------------------------------------ #
-    # EWM-based technical indicators (no NaN row loss from windowing)     #
-    # ------------------------------------------------------------------ #
-
-    # MACD (Moving Average Convergence Divergence)
-    _ema12 = df["price"].ewm(span=12, adjust=False).mean()
-    _ema26 = df["price"].ewm(span=26, adjust=False).mean()
-    df["macd"] = _ema12 - _ema26
-    df["macd_signal"] = df["macd"].ewm(span=9, adjust=False).mean()
-    df["macd_hist"] = df["macd"] - df["macd_signal"]
-    df["price_vs_ema12"] = _ema12 / df["price"] - 1
-    df["ema12_vs_ema26"] = _ema12 / _ema26 - 1
-
-    # RSI (Relative Strength Index) using Wilder EWM smoothing
-    _delta = df["price"].diff()
-    _avg_gain = _delta.clip(lower=0).ewm(com=13, adjust=False).mean()
-    _avg_loss = (-_delta.clip(upper=0)).ewm(com=13, adjust=False).mean()
-    df["rsi"] = 100 - (100 / (1 + _avg_gain / _avg_loss.replace(0, float("nan"))))
-    df["rsi_norm"] = (df["rsi"] - 50) / 50   # centred on 0; negative = oversold
-    df["rsi_overbought"] = (df["rsi"] > 70).astype(int)
-    df["rsi_oversold"] = (df["rsi"] < 30).astype(int)
-
-    # Cyclical calendar encoding (captures oil-price seasonality)
-    df["date"] = pd.to_datetime(df["date"])
-    import math as _math
-    df["month_sin"] = df["date"].dt.month.apply(lambda m: _math.sin(2 * _math.pi * m / 12))
-    df["month_cos"] = df["date"].dt.month.apply(lambda m: _math.cos(2 * _math.pi * m / 12))
-
-    # Sentiment × technical interaction features
-    df["macd_x_tone"] = df["macd_hist"] * df["avg_tone"]
-    df["rsi_x_tone"] = df["rsi_norm"] * df["avg_tone"]
-    df["macd_x_vol"] = df["macd_hist"] * df["volatility_5"]
+    df = feature_store.load_features("direction", df)
 
     log.info("After feature engineering: %d rows, %d columns", *df.shape)
     log.info("Missing values per column:\n%s", df.isna().sum().to_string())
@@ -181,99 +98,39 @@ def main():
     log.info("Feature matrix shape: %s", X.shape)
     log.info("Target distribution:\n%s", y.value_counts().to_string())
 
-    # ------------------------------------------------------------------ #
-    # 5. Cross-validation with time-series split                          #
-    # ------------------------------------------------------------------ #
-    tscv = TimeSeriesSplit(n_splits=5)
-    scores = []
-
-    for fold, (train_idx, test_idx) in enumerate(tscv.split(X)):
-        X_train_cv, X_test_cv = X.iloc[train_idx], X.iloc[test_idx]
-        y_train_cv, y_test_cv = y.iloc[train_idx], y.iloc[test_idx]
-
-        if args.model == "gradient":
-            cv_model = GradientBoostingClassifier(
-                n_estimators=300,
-                learning_rate=0.03,
-                max_depth=3,
-                random_state=42,
-            )
-        elif args.model == "logistic":
-            scaler_cv = StandardScaler()
-            X_train_cv = scaler_cv.fit_transform(X_train_cv)
-            X_test_cv = scaler_cv.transform(X_test_cv)
-            cv_model = LogisticRegression(max_iter=1000, class_weight="balanced")
-        elif args.model == "forest":
-            cv_model = RandomForestClassifier(
-                n_estimators=500,
-                random_state=42,
-                class_weight={0: 1, 1: 2},
-            )
-        elif args.model == "tabpfn":
-            cv_model = TabPFNClassifier(device="cpu", ignore_pretraining_limits=True)
-        elif args.model == "xgboost":
-            pos_cv = int((y_train_cv == 1).sum())
-            neg_cv = int((y_train_cv == 0).sum())
-            if pos_cv == 0:
-                log.warning("Fold %d: no positive-class samples in training split; scale_pos_weight set to 1.", fold + 1)
-            cv_model = XGBClassifier(
-                n_estimators=300,
-                learning_rate=0.03,
-                max_depth=3,
-                subsample=0.8,
-                colsample_bytree=0.8,
-                scale_pos_weight=neg_cv / max(pos_cv, 1),
-                random_state=42,
-                eval_metric="logloss",
-                verbosity=0,
-            )
-
-        cv_model.fit(X_train_cv, y_train_cv)
-        acc = accuracy_score(y_test_cv, cv_model.predict(X_test_cv))
-        scores.append(acc)
-        log.info("  Fold %d: train=%d, test=%d, acc=%.4f", fold + 1, len(train_idx), len(test_idx), acc)
-
-    log.info("Cross-Validation Accuracy Scores: %s", scores)
-    log.info("Average CV Accuracy: %.4f", sum(scores) / len(scores))
+    return df, X, y
 
-    # ------------------------------------------------------------------ #
-    # 6. Final train / test split (last fold)                             #
-    # ------------------------------------------------------------------ #
-    train_idx, test_idx = list(tscv.split(X))[-1]
-    X_train, X_test = X.iloc[train_idx], X.iloc[test_idx]
-    y_train, y_test = y.iloc[train_idx], y.iloc[test_idx]
 
-    # ------------------------------------------------------------------ #
-    # 7. Select and configure model; apply scaler for logistic regression #
-    # ------------------------------------------------------------------ #
-    scaler = None
-
-    if args.model == "gradient":
-        model = GradientBoostingClassifier(
+def build_model(name: str, y_train: pd.Series, label: str = ""):
+    """Return an unfitted classifier for ``--model name``."""
+    if name == "gradient":
+        return GradientBoostingClassifier(
             n_estimators=300,
             learning_rate=0.03,
             max_depth=3,
             random_state=42,
         )
-    elif args.model == "logistic":
-        scaler = StandardScaler()
-        X_train = scaler.fit_transform(X_train)
-        X_test = scaler.transform(X_test)
-        model = LogisticRegression(max_iter=1000, class_weight="balanced")
-    elif args.model == "forest":
-        model = RandomForestClassifier(
+    if name == "logistic":
+        return LogisticRegression(max_iter=1000, class_weight="balanced")
+    if name == "forest":
+        return RandomForestClassifier(
             n_estimators=500,
             random_state=42,
             class_weight={0: 1, 1: 2},
         )
-    elif args.model == "tabpfn":
-        model = TabPFNClassifier(device="cpu", ignore_pretraining_limits=True)
-    elif args.model == "xgboost":
+    if name == "tabpfn":
+        # Optional heavyweight dependency: only needed for this model.
+        from tabpfn import TabPFNClassifier
+
+        return TabPFNClassifier(device="cpu", ignore_pretraining_limits=True)
+    if name == "xgboost":
+        from xgboost import XGBClassifier
+
         pos_n = int((y_train == 1).sum())
         neg_n = int((y_train == 0).sum())
         if pos_n == 0:
-            log.warning("No positive-class samples in training set; scale_pos_weight set to 1.")
-        model = XGBClassifier(
+            log.warning("%sNo positive-class samples in training split; scale_pos_weight set to 1.", label)
+        return XGBClassifier(
             n_estimators=300,
             learning_rate=0.03,
             max_depth=3,
@@ -284,14 +141,88 @@ def main():
             eval_metric="logloss",
             verbosity=0,
         )
+    raise ValueError(f"Unknown model type: {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--model", type=str, default="forest",
+        choices=["gradient", "logistic", "forest", "tabpfn", "xgboost"],
+    )
+    parser.add_argument(
+        "--threshold", type=float, default=0.75,
+        help=(
+            "Confidence threshold (0.50–0.95). Predictions with p > threshold are "
+            "classified as UP; predictions with p < (1 - threshold) are classified "
+            "as DOWN; everything else is labelled uncertain and excluded from the "
+            "confident-only accuracy report. Also used as the decision boundary for "
+            "full-test accuracy (conservative toward the majority class). Default: 0.75."
+        ),
+    )
+    parser.add_argument(
+        "--dtype", choices=["float64", "float32"], default="float64",
+        help="Precision of the shared feature matrix (default: float64).",
+    )
+    args = parser.parse_args()
+    started = time.perf_counter()
+
+    parquet_path = "data/processed/model_training_table.parquet"
+    if not os.path.exists(parquet_path):
+        raise FileNotFoundError(f"Could not find {parquet_path}")
+
+    df = pd.read_parquet(parquet_path)
+    log.info("Raw data loaded: %d rows, %d columns", *df.shape)
+    log.info("Columns: %s", df.columns.tolist())
+
+    df, X, y = build_dataset(df)
 
     # ------------------------------------------------------------------ #
-    # 8. Train and evaluate                                               #
+    # 5. Cross-validation with time-series split                          #
+    #    Fold matrices (standardised once per fold for logistic) come     #
+    #    from the shared training harness.                                #
     # ------------------------------------------------------------------ #
-    log.info("Training %s model...", args.model)
-    model.fit(X_train, y_train)
+    tscv = TimeSeriesSplit(n_splits=5)
+    splits = list(tscv.split(X))
+    scores = []
+
+    with TrainingHarness(X, splits, dtype=args.dtype, scale=args.model == "logistic") as harness:
+        log.info(
+            "Training harness: %s %s feature matrix, %.1f MB of memory-mapped fold arrays",
+            harness.shape, harness.dtype, harness.nbytes / 2**20,
+        )
 
-    probs = model.predict_proba(X_test)[:, 1]
+        for fold, (train_idx, test_idx) in enumerate(splits, start=1):
+            y_train_cv, y_test_cv = y.iloc[train_idx], y.iloc[test_idx]
+
+            scaler = None
+            if args.model == "logistic":
+                scaler, X_train_cv, X_test_cv = harness.scaled(fold)
+            else:
+                X_train_cv, X_test_cv = (harness.frame(a) for a in harness.fold(fold))
+
+            model = build_model(args.model, y_train_cv, f"Fold {fold}: ")
+            model.fit(X_train_cv, y_train_cv)
+            acc = accuracy_score(y_test_cv, model.predict(X_test_cv))
+            scores.append(acc)
+            log.info("  Fold %d: train=%d, test=%d, acc=%.4f", fold, len(train_idx), len(test_idx), acc)
+
+        log.info("Cross-Validation Accuracy Scores: %s", scores)
+        log.info("Average CV Accuracy: %.4f", sum(scores) / len(scores))
+
+        # ------------------------------------------------------------------ #
+        # 6. Final train / test split (last fold)                             #
+        # 7. The last fold's model and scaler (logistic only) are the final   #
+        #    ones: same split, same configuration — no refit needed.          #
+        # ------------------------------------------------------------------ #
+        X_test, y_train, y_test = X_test_cv, y_train_cv, y_test_cv
+
+        # ------------------------------------------------------------------ #
+        # 8. Evaluate                                                         #
+        # ------------------------------------------------------------------ #
+        log.info("Trained %s model on %d rows", args.model, len(y_train))
+
+        probs = model.predict_proba(X_test)[:, 1]
     log.info("Sample probabilities (first 10): %s", probs[:10].tolist())
 
     # ------------------------------------------------------------------ #
@@ -366,6 +297,25 @@ def main():
         joblib.dump(scaler, scaler_path)
         log.info("Scaler saved to %s", scaler_path)
 
+    # Serving computes exactly these columns, in this order.
+    features_path = "models/feature_names.json"
+    with open(features_path, "w") as f:
+        json.dump(X.columns.tolist(), f, indent=2)
+    log.info("Feature names saved to %s", features_path)
+
+    # The API serves from the registry and swaps this version in live.
+    version = model_registry.publish(
+        "direction", model, X.columns.tolist(), scaler=scaler,
+        meta={"model_type": args.model, "threshold": args.threshold},
+    )
+    log.info("Published to the model registry as direction/%s", version)
+
+    own_mb, child_mb = peak_rss_mb()
+    log.info(
+        "Runtime %.1fs | peak RSS %.0f MB (largest child process %.0f MB)",
+        time.perf_counter() - started, own_mb, child_mb,
+    )
+
 
 if __name__ == "__main__":
     main()
@@ -15,6 +15,10 @@ Model architecture
 Usage
 -----
     python train_price_model.py [--target {next_price,price_change,next_day_return,future_price_3}]
+                                [--jobs N] [--dtype {float64,float32}]
+                                [--tune [--tune-trials 27] [--tune-eta 3]
+                                        [--tune-models XGBoost,LightGBM,...]
+                                        [--tune-store PATH]]
 
     Recommended for improved R²:
         python train_price_model.py --target price_change
@@ -29,15 +33,21 @@ Target modes
 Outputs
 -------
   models/price_forecast_model.joblib   — best regression model (never overwrites prediction_model.joblib)
+  models/registry/price/<version>/     — the same model, published for the API (backend/services/model_registry.py)
   outputs/price_predictions.csv        — actual vs predicted prices with error columns
 """
 
 import argparse
+import hashlib
+import inspect
 import json
 import logging
 import math
 import os
+import time
 import warnings
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 import joblib
 import numpy as np
@@ -54,6 +64,12 @@ from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 from sklearn.model_selection import TimeSeriesSplit
 from sklearn.preprocessing import StandardScaler
 from sklearn.pipeline import make_pipeline
+from threadpoolctl import threadpool_limits
+
+from backend.services import feature_store, model_registry
+from backend.services.signal_features import PRICE_FEATURES, add_features
+from training_harness import TrainingHarness, peak_rss_mb
+from training_tables import PartitionedTable
 
 # Optional XGBoost
 try:
@@ -64,7 +80,7 @@ except ImportError:
 
 # Optional LightGBM
 try:
-    from lightgbm import LGBMRegressor
+    from lightgbm import LGBMRegressor, early_stopping as lgb_early_stopping
     LIGHTGBM_AVAILABLE = True
 except ImportError:
     LIGHTGBM_AVAILABLE = False
@@ -137,171 +153,607 @@ def reconstruct_price(
 
 
 # ---------------------------------------------------------------------------
-# Feature engineering (mirrors train_model.py — no shared state with it)
+# Feature engineering (shared registry: backend/services/signal_features.py)
 # ---------------------------------------------------------------------------
 
 def engineer_features(df: pd.DataFrame) -> pd.DataFrame:
     """
     Apply rich technical and sentiment feature engineering.
     All computations are purely backward-looking — no future information leaks.
+    Columns the training table already provides (lags, returns, moving
+    averages, volatilities) are kept as they are.  Rolling windows, EWMs
+    and lags are computed per commodity, so WTI and BRENT never share one.
     """
-    # --- Downside pressure flags ---
-    df["neg_tone_flag"]   = (df["avg_tone"] < 0).astype(int)
-    df["strong_neg_tone"] = (df["avg_tone"] < -0.5).astype(int)
-
-    # --- Volatility spike flag ---
-    if "volatility_5" in df.columns:
-        df["volatility_spike"] = (
-            df["volatility_5"] > df["volatility_5"].rolling(5).mean()
-        ).astype(int)
-
-    # --- Price momentum features ---
-    if "price_lag_1" in df.columns:
-        df["down_momentum"] = (df["price"] < df["price_lag_1"]).astype(int)
-    if "price_lag_1" in df.columns:
-        df["price_diff_1"] = df["price"] - df["price_lag_1"]
-    if "price_lag_1" in df.columns and "price_lag_2" in df.columns:
-        df["price_diff_2"] = df["price_lag_1"] - df["price_lag_2"]
-
-    # --- Ensure return columns exist ---
-    if "return_1" not in df.columns:
-        df["return_1"] = df["price"].pct_change(1)
-    if "return_2" not in df.columns:
-        df["return_2"] = df["price"].pct_change(2)
-    if "return_3" not in df.columns:
-        df["return_3"] = df["price"].pct_change(3)
-    if "return_5" not in df.columns:
-        df["return_5"] = df["price"].pct_change(5)
-    if "return_10" not in df.columns:
-        df["return_10"] = df["price"].pct_change(10)
-
-    # --- Ensure rolling MA / volatility columns exist ---
-    if "price_ma_3" not in df.columns:
-        df["price_ma_3"] = df["price"].rolling(3).mean()
-    if "price_ma_5" not in df.columns:
-        df["price_ma_5"] = df["price"].rolling(5).mean()
-    if "price_ma_10" not in df.columns:
-        df["price_ma_10"] = df["price"].rolling(10).mean()
-    if "price_ma_20" not in df.columns:
-        df["price_ma_20"] = df["price"].rolling(20).mean()
-    if "volatility_5" not in df.columns:
-        df["volatility_5"] = df["return_1"].rolling(5).std()
-    if "volatility_10" not in df.columns:
-        df["volatility_10"] = df["return_1"].rolling(10).std()
-    if "volatility_20" not in df.columns:
-        df["volatility_20"] = df["return_1"].rolling(20).std()
-
-    # --- Sentiment rolling features ---
-    df["tone_ma_3"]  = df["avg_tone"].rolling(3).mean()
-    df["tone_x_volatility"] = df["avg_tone"] * df["volatility_5"]
-    if "tone_ma_5" not in df.columns:
-        df["tone_ma_5"]  = df["avg_tone"].rolling(5).mean()
-    if "tone_ma_10" not in df.columns:
-        df["tone_ma_10"] = df["avg_tone"].rolling(10).mean()
-
-    # --- Trend and acceleration ---
-    df["trend_strength"] = df["price_ma_3"] - df["price_ma_5"]
-    df["trend_10"]       = df["price_ma_5"] - df["price_ma_10"]
-    df["acceleration"]   = df["return_1"] - df["return_2"]
-
-    # --- Sentiment change ---
-    df["tone_change"] = df["avg_tone"] - df["avg_tone"].shift(1)
-
-    # --- 3-period and 5-period momentum (price units) ---
-    if "price_lag_2" in df.columns:
-        df["momentum_3"] = df["price"] - df["price_lag_2"]
-    if "price_lag_4" in df.columns:
-        df["momentum_5"] = df["price"] - df["price_lag_4"]
-    elif "price_lag_2" in df.columns:
-        df["momentum_5"] = df["price"].diff(4)
-
-    # --- Price position relative to moving averages (stationary ratios) ---
-    df["price_vs_ma5"]  = df["price"] / df["price_ma_5"] - 1
-    df["ma3_vs_ma5"]    = df["price_ma_3"] / df["price_ma_5"] - 1
-    df["price_vs_ma10"] = df["price"] / df["price_ma_10"] - 1
-    df["price_vs_ma20"] = df["price"] / df["price_ma_20"] - 1
-
-    # --- Bollinger Bands (20-day) ---
-    _bb_std = df["price"].rolling(20).std()
-    df["bb_upper"]    = df["price_ma_20"] + 2 * _bb_std
-    df["bb_lower"]    = df["price_ma_20"] - 2 * _bb_std
-    df["bb_width"]    = (df["bb_upper"] - df["bb_lower"]) / df["price_ma_20"]
-    df["bb_position"] = (df["price"] - df["bb_lower"]) / (df["bb_upper"] - df["bb_lower"] + 1e-9)
-
-    # --- EWM-based indicators (no NaN row loss) ---
-
-    # MACD
-    _ema12           = df["price"].ewm(span=12, adjust=False).mean()
-    _ema26           = df["price"].ewm(span=26, adjust=False).mean()
-    df["macd"]        = _ema12 - _ema26
-    df["macd_signal"] = df["macd"].ewm(span=9, adjust=False).mean()
-    df["macd_hist"]   = df["macd"] - df["macd_signal"]
-    df["price_vs_ema12"] = _ema12 / df["price"] - 1
-    df["ema12_vs_ema26"] = _ema12 / _ema26 - 1
-
-    # RSI (Wilder EWM smoothing)
-    _delta    = df["price"].diff()
-    _avg_gain = _delta.clip(lower=0).ewm(com=13, adjust=False).mean()
-    _avg_loss = (-_delta.clip(upper=0)).ewm(com=13, adjust=False).mean()
-    df["rsi"]          = 100 - (100 / (1 + _avg_gain / _avg_loss.replace(0, float("nan"))))
-    df["rsi_norm"]     = (df["rsi"] - 50) / 50   # centred on 0
-    df["rsi_overbought"] = (df["rsi"] > 70).astype(int)
-    df["rsi_oversold"]   = (df["rsi"] < 30).astype(int)
-
-    # Stochastic oscillator (14-day) — %K
-    _lo14 = df["price"].rolling(14).min()
-    _hi14 = df["price"].rolling(14).max()
-    df["stoch_k"] = 100 * (df["price"] - _lo14) / (_hi14 - _lo14 + 1e-9)
-    df["stoch_d"] = df["stoch_k"].rolling(3).mean()
-
-    # --- Cyclical calendar encoding ---
-    df["date"] = pd.to_datetime(df["date"])
-    df["month_sin"] = df["date"].dt.month.apply(lambda m: math.sin(2 * math.pi * m / 12))
-    df["month_cos"] = df["date"].dt.month.apply(lambda m: math.cos(2 * math.pi * m / 12))
-
-    # Day-of-week (0=Mon … 4=Fri) — oil markets exhibit weekly seasonality
-    if "dow_sin" not in df.columns:
-        _dow = df["date"].dt.dayofweek
-        df["dow_sin"] = _dow.apply(lambda d: math.sin(2 * math.pi * d / 5))
-        df["dow_cos"] = _dow.apply(lambda d: math.cos(2 * math.pi * d / 5))
-
-    # --- Sentiment × technical interaction features ---
-    df["macd_x_tone"] = df["macd_hist"] * df["avg_tone"]
-    df["rsi_x_tone"]  = df["rsi_norm"]  * df["avg_tone"]
-    df["macd_x_vol"]  = df["macd_hist"] * df["volatility_5"]
-    df["rsi_x_vol"]   = df["rsi_norm"]  * df["volatility_5"]
-
-    # --- Commodity dummy (WTI=1, BRENT=0) ---
     if "commodity" in df.columns:
-        df["is_wti"] = (df["commodity"] == "WTI").astype(int)
-
-    return df
+        # materialised once per input table in the shared feature store
+        return feature_store.load_features("price", df)
+    return add_features(df, [n for n in PRICE_FEATURES if n != "is_wti"])
 
 
 # ---------------------------------------------------------------------------
-# Main training routine
+# Candidate models
 # ---------------------------------------------------------------------------
 
-def main():
-    parser = argparse.ArgumentParser(
-        description="Train the Price Forecast Engine (regression model)."
-    )
-    parser.add_argument(
-        "--target",
-        type=str,
-        default="next_price",
-        choices=["next_price", "price_change", "next_day_return", "future_price_3"],
-        help=(
-            "Regression target.  "
-            "'next_price'      = absolute price of next trading day (original, default).  "
-            "'price_change'    = Δprice (next−current); evaluated on reconstructed abs price.  "
-            "'next_day_return' = %% return; evaluated on reconstructed abs price.  "
-            "'future_price_3'  = absolute price 3 periods ahead.  "
-            "Recommended for improved R²: --target price_change"
+def make_models(n_jobs: int = -1, params: dict[str, dict] | None = None) -> dict:
+    """
+    All candidate models.  Linear models (Ridge/Lasso/ElasticNet) are fed
+    StandardScaler output by the caller; tree models work on raw features.
+    LassoCV/ElasticNetCV use cv=3 (a simple integer) to avoid over-splitting
+    the small per-fold training sets.
+
+    ``n_jobs`` is the thread count for the multi-threaded learners (RF,
+    XGBoost, LightGBM); the CV scheduler sets it to its per-task share of
+    the core budget.  ``params`` maps model names to hyperparameter
+    overrides (e.g. the winners of a ``--tune`` search).
+    """
+    candidates = {
+        "Ridge": RidgeCV(
+            alphas=[0.0001, 0.001, 0.01, 0.1, 1, 10, 100, 1000, 10000],
         ),
+        "Lasso": LassoCV(
+            alphas=[0.0001, 0.001, 0.01, 0.1, 1, 10],
+            cv=3,
+            max_iter=10000,
+        ),
+        "ElasticNet": ElasticNetCV(
+            l1_ratio=[0.1, 0.3, 0.5, 0.7, 0.9, 0.95, 1.0],
+            alphas=[0.0001, 0.001, 0.01, 0.1, 1, 10],
+            cv=3,
+            max_iter=10000,
+        ),
+        # Huber regression — robust to large oil-price outlier days
+        "Huber": HuberRegressor(
+            epsilon=1.35,
+            alpha=0.01,
+            max_iter=300,
+        ),
+        "RandomForest": RandomForestRegressor(
+            n_estimators=500,
+            max_depth=5,
+            min_samples_leaf=5,
+            max_features=0.4,
+            random_state=42,
+            n_jobs=n_jobs,
+        ),
+        "GradientBoosting": GradientBoostingRegressor(
+            n_estimators=300,
+            learning_rate=0.03,
+            max_depth=3,
+            min_samples_leaf=5,
+            subsample=0.8,
+            max_features=0.5,
+            random_state=42,
+        ),
+        # HistGradientBoosting — fast, handles NaN natively, great with many features
+        "HistGBM": HistGradientBoostingRegressor(
+            max_iter=300,
+            learning_rate=0.03,
+            max_depth=4,
+            min_samples_leaf=10,
+            l2_regularization=1.0,
+            random_state=42,
+        ),
+    }
+    if XGBOOST_AVAILABLE:
+        candidates["XGBoost"] = XGBRegressor(
+            n_estimators=300,
+            learning_rate=0.03,
+            max_depth=3,
+            min_child_weight=5,
+            subsample=0.8,
+            colsample_bytree=0.6,
+            reg_alpha=0.1,
+            reg_lambda=2.0,
+            random_state=42,
+            verbosity=0,
+            n_jobs=n_jobs,
+        )
+    else:
+        log.warning("XGBoost not installed — skipping XGBRegressor.")
+
+    if LIGHTGBM_AVAILABLE:
+        candidates["LightGBM"] = LGBMRegressor(
+            n_estimators=300,
+            learning_rate=0.03,
+            max_depth=4,
+            num_leaves=20,
+            min_child_samples=15,
+            subsample=0.8,
+            colsample_bytree=0.6,
+            reg_alpha=0.1,
+            reg_lambda=2.0,
+            random_state=42,
+            verbosity=-1,
+            n_jobs=n_jobs,
+        )
+    else:
+        log.warning("LightGBM not installed — skipping LGBMRegressor.")
+
+    # Stacking: best linear + best tree models → Ridge meta-learner
+    stack_base = [
+        ("ridge", make_pipeline(
+            StandardScaler(),
+            RidgeCV(alphas=[0.01, 0.1, 1, 10, 100]),
+        )),
+        ("histgbm", HistGradientBoostingRegressor(
+            max_iter=200, learning_rate=0.05, max_depth=3,
+            min_samples_leaf=10, l2_regularization=1.0, random_state=42,
+        )),
+    ]
+    if LIGHTGBM_AVAILABLE:
+        stack_base.append(("lgbm", LGBMRegressor(
+            n_estimators=200, learning_rate=0.05, max_depth=3,
+            num_leaves=15, min_child_samples=15, subsample=0.8,
+            colsample_bytree=0.6, reg_alpha=0.1, reg_lambda=2.0,
+            random_state=42, verbosity=-1, n_jobs=n_jobs,
+        )))
+    elif XGBOOST_AVAILABLE:
+        stack_base.append(("xgb", XGBRegressor(
+            n_estimators=200, learning_rate=0.05, max_depth=3,
+            subsample=0.8, colsample_bytree=0.6, random_state=42,
+            verbosity=0, n_jobs=n_jobs,
+        )))
+    candidates["Stacking"] = StackingRegressor(
+        estimators=stack_base,
+        final_estimator=RidgeCV(alphas=[0.01, 0.1, 1, 10, 100]),
+        cv=3,
+        n_jobs=1,  # the scheduler parallelises across (fold, model) tasks instead
     )
-    args = parser.parse_args()
 
+    for name, overrides in (params or {}).items():
+        if name in candidates:
+            candidates[name].set_params(**overrides)
+
+    return candidates
+
+
+# ---------------------------------------------------------------------------
+# Parallel cross-validation
+# ---------------------------------------------------------------------------
+#
+# Every (fold, model) fit is an independent task.  run_cv() spreads them over
+# a process pool sized from a core budget (--jobs) and gives each task an
+# equal share of threads, capped with threadpoolctl, so RF/XGBoost/LightGBM
+# and OpenMP/BLAS inside HistGBM or the linear models cannot oversubscribe
+# the machine.  Fold matrices (and their standardised versions, computed once
+# per fold for all linear models) come from a TrainingHarness, which workers
+# memory-map rather than receiving copies.  Models fitted on the last fold
+# are returned: that fold is exactly the holdout split, so they double as the
+# holdout models.
+
+# Rough relative fit cost; the slowest tasks are started first.
+_COST_HINT = {
+    "Stacking": 10, "RandomForest": 8, "GradientBoosting": 6, "ElasticNet": 5,
+    "XGBoost": 4, "LightGBM": 3, "HistGBM": 3, "Lasso": 2, "Huber": 1, "Ridge": 1,
+}
+
+_cv_data: dict = {}
+
+
+def _init_cv_worker(
+    harness: TrainingHarness,
+    y: np.ndarray,
+    prices: np.ndarray,
+    target_mode: str,
+    threads: int,
+    params: dict[str, dict] | None = None,
+) -> None:
+    _cv_data.update(
+        harness=harness, y=y, prices=prices, target_mode=target_mode, threads=threads, params=params,
+    )
+
+
+def fit_fold_model(name: str, fold: int, train_idx: np.ndarray, test_idx: np.ndarray, keep_model: bool) -> dict:
+    """Fit one candidate on one fold; return its metrics (and the model if asked)."""
+    harness, y, prices = _cv_data["harness"], _cv_data["y"], _cv_data["prices"]
+    target_mode, threads = _cv_data["target_mode"], _cv_data["threads"]
+    t0, cpu0 = time.perf_counter(), time.process_time()
+
+    price_te = prices[test_idx]
+    scaler = None
+    if name in LINEAR_MODELS:
+        scaler, X_tr, X_te = harness.scaled(fold)
+    else:
+        X_tr, X_te = harness.fold(fold)
+
+    with threadpool_limits(limits=threads):
+        mdl = make_models(n_jobs=threads, params=_cv_data["params"])[name]
+        mdl.fit(X_tr, y[train_idx])
+        preds_abs = reconstruct_price(mdl.predict(X_te), price_te, target_mode)
+
+    return {
+        "fold": fold,
+        "name": name,
+        "metrics": regression_metrics(reconstruct_price(y[test_idx], price_te, target_mode), preds_abs),
+        "predictions_abs": preds_abs,
+        "model": mdl if keep_model else None,
+        "scaler": scaler if keep_model else None,
+        "seconds": time.perf_counter() - t0,
+        "cpu_seconds": time.process_time() - cpu0,
+    }
+
+
+def run_cv(
+    harness: TrainingHarness,
+    y: np.ndarray,
+    prices: np.ndarray,
+    splits: list,
+    model_names: list[str],
+    target_mode: str,
+    jobs: int,
+    params: dict[str, dict] | None = None,
+) -> tuple[dict, float, int, int]:
+    """
+    Run every (fold, model) task within a budget of ``jobs`` cores, with
+    optional per-model hyperparameter overrides ``params``.
+
+    Returns ``({(fold, name): result}, wall_seconds, processes, threads_per_task)``.
+    Folds are numbered from 1; only the last fold's results keep their model.
+    """
+    last_fold = len(splits)
+    tasks = [
+        (name, fold, train_idx, test_idx, fold == last_fold)
+        for fold, (train_idx, test_idx) in enumerate(splits, start=1)
+        for name in model_names
+    ]
+    # Longest first: costly models, and later (larger) folds within a model.
+    tasks.sort(key=lambda t: (_COST_HINT.get(t[0], 1), t[1]), reverse=True)
+
+    processes = max(1, min(jobs, len(tasks)))
+    threads = max(1, jobs // processes)
+    t0 = time.perf_counter()
+    if processes == 1:
+        _init_cv_worker(harness, y, prices, target_mode, threads, params)
+        results = [fit_fold_model(*task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=processes,
+            initializer=_init_cv_worker,
+            initargs=(harness, y, prices, target_mode, threads, params),
+        ) as pool:
+            results = list(pool.map(fit_fold_model, *zip(*tasks)))
+    wall = time.perf_counter() - t0
+    return {(r["fold"], r["name"]): r for r in results}, wall, processes, threads
+
+
+# ---------------------------------------------------------------------------
+# Hyperparameter search (--tune)
+# ---------------------------------------------------------------------------
+#
+# Successive halving over the time-series folds.  Each tuned model starts
+# with --tune-trials configurations (the first is always the hand-set one in
+# make_models()); every rung scores the survivors on more folds and keeps the
+# best 1/eta of them.  Folds are used newest first, and the last fold is left
+# out of the search entirely: it is the holdout that picks the final model.
+#
+# GBMs are fitted with their native early stopping against the most recent
+# EARLY_STOPPING_FRACTION of each training window, and the winning
+# configuration's tree count is the median early-stopping point.  Every
+# (model, configuration, fold) result is appended to a JSONL trial store as
+# soon as it finishes, so an interrupted search resumes where it stopped.
+
+SEARCH_SPACES = {
+    "Huber": {
+        "epsilon": ("float", 1.1, 2.0),
+        "alpha": ("log", 1e-4, 1.0),
+    },
+    "RandomForest": {
+        "max_depth": ("int", 3, 12),
+        "min_samples_leaf": ("int", 1, 20),
+        "max_features": ("float", 0.2, 1.0),
+    },
+    "GradientBoosting": {
+        "learning_rate": ("log", 0.01, 0.2),
+        "max_depth": ("int", 2, 5),
+        "min_samples_leaf": ("int", 3, 30),
+        "subsample": ("float", 0.5, 1.0),
+        "max_features": ("float", 0.3, 1.0),
+    },
+    "HistGBM": {
+        "learning_rate": ("log", 0.01, 0.2),
+        "max_depth": ("int", 2, 8),
+        "min_samples_leaf": ("int", 5, 50),
+        "l2_regularization": ("log", 1e-3, 10.0),
+    },
+    "XGBoost": {
+        "learning_rate": ("log", 0.01, 0.2),
+        "max_depth": ("int", 2, 8),
+        "min_child_weight": ("log", 1.0, 20.0),
+        "subsample": ("float", 0.5, 1.0),
+        "colsample_bytree": ("float", 0.3, 1.0),
+        "reg_alpha": ("log", 1e-3, 10.0),
+        "reg_lambda": ("log", 1e-2, 10.0),
+    },
+    "LightGBM": {
+        "learning_rate": ("log", 0.01, 0.2),
+        "max_depth": ("int", 3, 8),
+        "num_leaves": ("int", 7, 63),
+        "min_child_samples": ("int", 5, 50),
+        "colsample_bytree": ("float", 0.3, 1.0),
+        "reg_alpha": ("log", 1e-3, 10.0),
+        "reg_lambda": ("log", 1e-2, 10.0),
+    },
+}
+
+# Boosting-round parameter of each early-stopped model.
+ROUNDS_PARAM = {
+    "GradientBoosting": "n_estimators",
+    "HistGBM": "max_iter",
+    "XGBoost": "n_estimators",
+    "LightGBM": "n_estimators",
+}
+GBM_MAX_ROUNDS = 2000
+EARLY_STOPPING_ROUNDS = 50
+EARLY_STOPPING_FRACTION = 0.2
+
+DEFAULT_TRIAL_STORE = "outputs/tuning/price_model_trials.jsonl"
+
+
+def sample_configs(name: str, n_trials: int, seed: int) -> list[dict]:
+    """``n_trials`` configurations for ``name``: the default, then random draws.
+
+    Draws depend only on (seed, name), so a longer search extends a shorter
+    one and a resumed search regenerates the same configurations.
+    """
+    rng = np.random.default_rng([seed, zlib.crc32(name.encode())])
+    configs = [{}]
+    while len(configs) < n_trials:
+        config = {}
+        for param, (kind, low, high) in SEARCH_SPACES[name].items():
+            if kind == "int":
+                config[param] = int(rng.integers(low, high + 1))
+            elif kind == "log":
+                config[param] = float(f"{math.exp(rng.uniform(math.log(low), math.log(high))):.4g}")
+            else:
+                config[param] = round(float(rng.uniform(low, high)), 4)
+        configs.append(config)
+    return configs
+
+
+def config_key(params: dict) -> str:
+    return hashlib.sha1(json.dumps(params, sort_keys=True).encode()).hexdigest()[:12]
+
+
+def halving_budgets(n_folds: int, eta: int) -> list[int]:
+    """Folds scored at each rung, e.g. 4 folds, eta=3 → [1, 4]; eta=2 → [1, 2, 4]."""
+    rungs = int(math.log(n_folds, eta) + 1e-9) + 1
+    return sorted({max(1, round(n_folds / eta ** k)) for k in range(rungs)})
+
+
+class TrialStore:
+    """Append-only JSONL of per-fold trial results for one study.
+
+    A study is identified by the data, folds, target and search space, so
+    results from a different feature set are never reused; lines from other
+    studies are kept but ignored.
+    """
+
+    def __init__(self, path: str, study: str):
+        self.path = path
+        self.study = study
+        self.results: dict[tuple[str, str, int], dict] = {}
+        if os.path.exists(path):
+            with open(path) as fh:
+                for line in fh:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # torn last line of an interrupted run
+                    if record.get("study") == study:
+                        self.results[(record["model"], record["config"], record["fold"])] = record
+        self.resumed = len(self.results)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._fh = open(path, "a+")
+        self._fh.seek(0, os.SEEK_END)
+        if self._fh.tell():
+            self._fh.seek(self._fh.tell() - 1)
+            if self._fh.read(1) != "\n":
+                self._fh.write("\n")
+
+    def add(self, record: dict) -> None:
+        record = {"study": self.study, **record}
+        self._fh.write(json.dumps(record) + "\n")
+        self._fh.flush()
+        self.results[(record["model"], record["config"], record["fold"])] = record
+
+    def close(self) -> None:
+        self._fh.close()
+
+
+def _fit_early_stopped(name: str, mdl, X_fit, y_fit, X_val, y_val) -> int:
+    """Fit a GBM with early stopping on (X_val, y_val); return the best round count."""
+    mdl.set_params(**{ROUNDS_PARAM[name]: GBM_MAX_ROUNDS})
+    if name == "XGBoost":
+        mdl.set_params(early_stopping_rounds=EARLY_STOPPING_ROUNDS)
+        mdl.fit(X_fit, y_fit, eval_set=[(X_val, y_val)], verbose=False)
+        return mdl.best_iteration + 1
+    if name == "LightGBM":
+        # eval_set is deprecated from LightGBM 4.7 in favour of eval_X/eval_y
+        if "eval_X" in inspect.signature(mdl.fit).parameters:
+            eval_data = {"eval_X": X_val, "eval_y": y_val}
+        else:
+            eval_data = {"eval_set": [(X_val, y_val)]}
+        mdl.fit(
+            X_fit, y_fit, **eval_data,
+            callbacks=[lgb_early_stopping(EARLY_STOPPING_ROUNDS, verbose=False)],
+        )
+        return max(mdl.best_iteration_, 1)
+    if name == "HistGBM":
+        mdl.set_params(early_stopping=True, n_iter_no_change=EARLY_STOPPING_ROUNDS, scoring="loss")
+        mdl.fit(X_fit, y_fit, X_val=X_val, y_val=y_val)
+        # validation_score_[0] is the score before the first iteration
+        return max(int(np.argmax(mdl.validation_score_)), 1)
+
+    # GradientBoostingRegressor's own early stopping holds out a random
+    # sample; a monitor keeps the validation window chronological.
+    # The validation prediction is accumulated one stage at a time (squared
+    # error: init estimate plus learning_rate × each tree).
+    best = {"loss": np.inf, "rounds": 1}
+    X_val_f32 = np.asarray(X_val, dtype=np.float32)
+    pred = None
+
+    def monitor(i, est, _locals):
+        nonlocal pred
+        if pred is None:
+            pred = est.init_.predict(X_val).astype(float)
+        pred += est.learning_rate * est.estimators_[i, 0].predict(X_val_f32)
+        loss = mean_squared_error(y_val, pred)
+        if loss < best["loss"]:
+            best.update(loss=loss, rounds=i + 1)
+        return i + 1 - best["rounds"] >= EARLY_STOPPING_ROUNDS
+
+    mdl.fit(X_fit, y_fit, monitor=monitor)
+    return best["rounds"]
+
+
+def fit_trial(name: str, params: dict, fold: int, train_idx: np.ndarray, test_idx: np.ndarray) -> dict:
+    """Score one configuration on one fold (RMSE in $/bbl)."""
+    harness, y, prices = _cv_data["harness"], _cv_data["y"], _cv_data["prices"]
+    target_mode, threads = _cv_data["target_mode"], _cv_data["threads"]
+    t0 = time.perf_counter()
+
+    if name in LINEAR_MODELS:
+        _, X_tr, X_te = harness.scaled(fold)
+    else:
+        X_tr, X_te = harness.fold(fold)
+    y_tr = y[train_idx]
+    price_te = prices[test_idx]
+
+    rounds = None
+    with threadpool_limits(limits=threads):
+        mdl = make_models(n_jobs=threads, params={name: params})[name]
+        if name in ROUNDS_PARAM:
+            n_val = max(1, int(len(y_tr) * EARLY_STOPPING_FRACTION))
+            rounds = _fit_early_stopped(
+                name, mdl, X_tr[:-n_val], y_tr[:-n_val], X_tr[-n_val:], y_tr[-n_val:],
+            )
+        else:
+            mdl.fit(X_tr, y_tr)
+        preds_abs = reconstruct_price(mdl.predict(X_te), price_te, target_mode)
+
+    y_te_abs = reconstruct_price(y[test_idx], price_te, target_mode)
+    return {
+        "model": name,
+        "config": config_key(params),
+        "params": params,
+        "fold": fold,
+        "rmse": regression_metrics(y_te_abs, preds_abs)["RMSE"],
+        "rounds": rounds,
+        "seconds": round(time.perf_counter() - t0, 3),
+    }
+
+
+def tune_hyperparameters(
+    harness: TrainingHarness,
+    y: np.ndarray,
+    prices: np.ndarray,
+    splits: list,
+    model_names: list[str],
+    target_mode: str,
+    jobs: int,
+    n_trials: int = 27,
+    eta: int = 3,
+    store_path: str = DEFAULT_TRIAL_STORE,
+    seed: int = 42,
+) -> dict[str, dict]:
+    """
+    Successive-halving search for each model in ``model_names``.
+
+    Returns ``{name: {"params": overrides, "rmse": mean RMSE, "folds": n}}``
+    for the winning configuration of each model; ``params`` feeds straight
+    into ``make_models(params=...)``.
+    """
+    study = hashlib.sha1(json.dumps({
+        "target": target_mode,
+        "data": hashlib.sha1(np.ascontiguousarray(harness.matrix).tobytes()).hexdigest(),
+        "columns": harness.columns,
+        "y": hashlib.sha1(np.ascontiguousarray(y).tobytes()).hexdigest(),
+        "splits": [[int(tr[-1]), int(te[0]), int(te[-1])] for tr, te in splits],
+        "space": SEARCH_SPACES,
+        "early_stopping": [GBM_MAX_ROUNDS, EARLY_STOPPING_ROUNDS, EARLY_STOPPING_FRACTION],
+    }, sort_keys=True).encode()).hexdigest()[:16]
+    store = TrialStore(store_path, study)
+    log.info(
+        "Hyperparameter search: study %s, %d stored results reused from %s",
+        study, store.resumed, store_path,
+    )
+
+    folds = list(range(len(splits) - 1, 0, -1))  # newest first; holdout fold excluded
+    budgets = halving_budgets(len(folds), eta)
+    alive = {name: sample_configs(name, n_trials, seed) for name in model_names}
+
+    def mean_rmse(name: str, params: dict, rung_folds: list[int]) -> float:
+        key = config_key(params)
+        return float(np.mean([store.results[(name, key, f)]["rmse"] for f in rung_folds]))
+
+    try:
+        for rung, budget in enumerate(budgets):
+            rung_folds = folds[:budget]
+            todo = [
+                (name, params, fold, *splits[fold - 1])
+                for name, configs in alive.items()
+                for params in configs
+                for fold in rung_folds
+                if (name, config_key(params), fold) not in store.results
+            ]
+            todo.sort(key=lambda t: (_COST_HINT.get(t[0], 1), t[2]), reverse=True)
+            processes = max(1, min(jobs, len(todo)))
+            threads = max(1, jobs // processes)
+
+            t0 = time.perf_counter()
+            if processes == 1:
+                _init_cv_worker(harness, y, prices, target_mode, threads)
+                for task in todo:
+                    store.add(fit_trial(*task))
+            else:
+                with ProcessPoolExecutor(
+                    max_workers=processes,
+                    initializer=_init_cv_worker,
+                    initargs=(harness, y, prices, target_mode, threads),
+                ) as pool:
+                    for future in as_completed([pool.submit(fit_trial, *task) for task in todo]):
+                        store.add(future.result())
+
+            n_configs = sum(len(configs) for configs in alive.values())
+            log.info(
+                "  Rung %d: %d configs × %d fold(s) — %d fits in %.1fs, %d from the store",
+                rung, n_configs, budget, len(todo), time.perf_counter() - t0,
+                n_configs * budget - len(todo),
+            )
+            keep = 1 if rung == len(budgets) - 1 else None
+            for name, configs in alive.items():
+                ranked = sorted(configs, key=lambda p: mean_rmse(name, p, rung_folds))
+                alive[name] = ranked[:keep or max(1, math.ceil(len(ranked) / eta))]
+    finally:
+        store.close()
+
+    final_folds = folds[:budgets[-1]]
+    best = {}
+    for name, (winner,) in alive.items():
+        params = dict(winner)
+        if name in ROUNDS_PARAM:
+            rounds = [store.results[(name, config_key(winner), f)]["rounds"] for f in final_folds]
+            params[ROUNDS_PARAM[name]] = int(np.median(rounds))
+        best[name] = {
+            "params": params,
+            "rmse": mean_rmse(name, winner, final_folds),
+            "folds": len(final_folds),
+        }
+    return best
+
+
+# ---------------------------------------------------------------------------
+# Training data
+# ---------------------------------------------------------------------------
+
+# Periods ahead each --target looks; training rows closer than this to a
+# cut-off know prices past it (backtest.py embargoes them).
+TARGET_HORIZON = {"next_price": 1, "price_change": 1, "next_day_return": 1, "future_price_3": 3}
+
+
+def load_training_table() -> pd.DataFrame:
+    """The daily training table (partitioned, else single-file), falling
+    back to the weekly direction table."""
     # ------------------------------------------------------------------
     # 1. Load data
     # ------------------------------------------------------------------
@@ -310,9 +762,14 @@ def main():
     # original table so the script still works in environments that haven't regenerated
     # the data.  The direction model (prediction_model.joblib) uses the original
     # model_training_table.parquet and is never affected by this choice.
+    # The partitioned copy is the one `--incremental` keeps current.
+    daily_dataset = PartitionedTable("data/processed/daily_training_table")
     daily_path = "data/processed/daily_training_table.parquet"
     weekly_path = "data/processed/model_training_table.parquet"
-    if os.path.exists(daily_path):
+    if daily_dataset.exists():
+        parquet_path = daily_dataset.root
+        log.info("Using partitioned daily training table: %s", parquet_path)
+    elif os.path.exists(daily_path):
         parquet_path = daily_path
         log.info("Using daily training table: %s", parquet_path)
     elif os.path.exists(weekly_path):
@@ -328,20 +785,26 @@ def main():
             "Run scripts/build_daily_training_table.py first."
         )
 
-    df = pd.read_parquet(parquet_path)
+    df = daily_dataset.read() if parquet_path == daily_dataset.root else pd.read_parquet(parquet_path)
     log.info("Raw data loaded: %d rows × %d columns", *df.shape)
     log.info("Columns: %s", df.columns.tolist())
+    return df
+
 
+def build_dataset(df: pd.DataFrame, target: str) -> tuple[pd.DataFrame, pd.DataFrame, np.ndarray, str]:
+    """Regression target ``target`` and the clean feature matrix for the
+    base table ``df``; returns ``(df, X, y, target_col)``, where ``X`` keeps
+    ``df``'s index for the rows that survive NaN removal."""
     # ------------------------------------------------------------------
     # 2. Build regression target
     #    All leakage columns must be declared BEFORE X is assembled so
     #    they are reliably excluded from the feature matrix.
     # ------------------------------------------------------------------
-    if args.target == "next_price":
+    if target == "next_price":
         target_col = "next_price"
         log.info("Target: next_price (absolute price of next trading day)")
 
-    elif args.target == "price_change":
+    elif target == "price_change":
         df["price_change"] = df["next_price"] - df["price"]
         target_col = "price_change"
         log.info(
@@ -349,7 +812,7 @@ def main():
             "all metrics shown on reconstructed absolute price"
         )
 
-    elif args.target == "next_day_return":
+    elif target == "next_day_return":
         if "next_day_return" not in df.columns:
             raise KeyError(
                 "'next_day_return' column not found in parquet — "
@@ -426,6 +889,85 @@ def main():
     y = combined.pop("__target__").values
     X = combined
     log.info("Final clean dataset: %d rows × %d feature columns", *X.shape)
+    return df, X, y, target_col
+
+
+# ---------------------------------------------------------------------------
+# Main training routine
+# ---------------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Train the Price Forecast Engine (regression model)."
+    )
+    parser.add_argument(
+        "--target",
+        type=str,
+        default="next_price",
+        choices=["next_price", "price_change", "next_day_return", "future_price_3"],
+        help=(
+            "Regression target.  "
+            "'next_price'      = absolute price of next trading day (original, default).  "
+            "'price_change'    = Δprice (next−current); evaluated on reconstructed abs price.  "
+            "'next_day_return' = %% return; evaluated on reconstructed abs price.  "
+            "'future_price_3'  = absolute price 3 periods ahead.  "
+            "Recommended for improved R²: --target price_change"
+        ),
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help=(
+            "Core budget for cross-validation (default: all cores).  (fold, model) "
+            "fits run in parallel processes that share it, so multi-threaded "
+            "learners never oversubscribe.  --jobs 1 runs serially in-process."
+        ),
+    )
+    parser.add_argument(
+        "--dtype",
+        choices=["float64", "float32"],
+        default="float64",
+        help=(
+            "Precision of the shared feature matrix (default: float64).  float32 "
+            "halves its memory; linear-model results then differ in the last digits."
+        ),
+    )
+    parser.add_argument(
+        "--tune",
+        action="store_true",
+        help=(
+            "Search hyperparameters (successive halving over the CV folds, "
+            "holdout fold excluded) before the final cross-validation; the "
+            "winning configurations are the ones evaluated and saved."
+        ),
+    )
+    parser.add_argument(
+        "--tune-trials", type=int, default=27,
+        help="Configurations per tuned model, including the default (default: 27).",
+    )
+    parser.add_argument(
+        "--tune-eta", type=int, default=3,
+        help="Halving rate: each rung keeps the best 1/eta configurations (default: 3).",
+    )
+    parser.add_argument(
+        "--tune-models", default=None,
+        help=f"Comma-separated models to tune (default: {','.join(SEARCH_SPACES)}).",
+    )
+    parser.add_argument(
+        "--tune-store", default=DEFAULT_TRIAL_STORE,
+        help=(
+            "JSONL trial store; results already in it are reused, so an "
+            f"interrupted search resumes (default: {DEFAULT_TRIAL_STORE})."
+        ),
+    )
+    args = parser.parse_args()
+    if args.tune_eta < 2:
+        parser.error("--tune-eta must be at least 2")
+    started = time.perf_counter()
+
+    df = load_training_table()
+    df, X, y, target_col = build_dataset(df, args.target)
 
     # 'price' column is in X as a feature and also used here to reconstruct
     # absolute prices from change/return predictions and for the LastPrice baseline.
@@ -438,127 +980,6 @@ def main():
     # ------------------------------------------------------------------
     tscv = TimeSeriesSplit(n_splits=5)
 
-    # Define all candidate models.  Linear models (Ridge/Lasso/ElasticNet) use
-    # StandardScaler internally; tree models work on raw features.
-    # make_models() is a closure so LassoCV/ElasticNetCV can use cv=3 (a simple
-    # integer) to avoid over-splitting the small per-fold training sets.
-    def make_models():
-        candidates = {
-            "Ridge": RidgeCV(
-                alphas=[0.0001, 0.001, 0.01, 0.1, 1, 10, 100, 1000, 10000],
-            ),
-            "Lasso": LassoCV(
-                alphas=[0.0001, 0.001, 0.01, 0.1, 1, 10],
-                cv=3,
-                max_iter=10000,
-            ),
-            "ElasticNet": ElasticNetCV(
-                l1_ratio=[0.1, 0.3, 0.5, 0.7, 0.9, 0.95, 1.0],
-                alphas=[0.0001, 0.001, 0.01, 0.1, 1, 10],
-                cv=3,
-                max_iter=10000,
-            ),
-            # Huber regression — robust to large oil-price outlier days
-            "Huber": HuberRegressor(
-                epsilon=1.35,
-                alpha=0.01,
-                max_iter=300,
-            ),
-            "RandomForest": RandomForestRegressor(
-                n_estimators=500,
-                max_depth=5,
-                min_samples_leaf=5,
-                max_features=0.4,
-                random_state=42,
-                n_jobs=-1,
-            ),
-            "GradientBoosting": GradientBoostingRegressor(
-                n_estimators=300,
-                learning_rate=0.03,
-                max_depth=3,
-                min_samples_leaf=5,
-                subsample=0.8,
-                max_features=0.5,
-                random_state=42,
-            ),
-            # HistGradientBoosting — fast, handles NaN natively, great with many features
-            "HistGBM": HistGradientBoostingRegressor(
-                max_iter=300,
-                learning_rate=0.03,
-                max_depth=4,
-                min_samples_leaf=10,
-                l2_regularization=1.0,
-                random_state=42,
-            ),
-        }
-        if XGBOOST_AVAILABLE:
-            candidates["XGBoost"] = XGBRegressor(
-                n_estimators=300,
-                learning_rate=0.03,
-                max_depth=3,
-                min_child_weight=5,
-                subsample=0.8,
-                colsample_bytree=0.6,
-                reg_alpha=0.1,
-                reg_lambda=2.0,
-                random_state=42,
-                verbosity=0,
-                n_jobs=-1,
-            )
-        else:
-            log.warning("XGBoost not installed — skipping XGBRegressor.")
-
-        if LIGHTGBM_AVAILABLE:
-            candidates["LightGBM"] = LGBMRegressor(
-                n_estimators=300,
-                learning_rate=0.03,
-                max_depth=4,
-                num_leaves=20,
-                min_child_samples=15,
-                subsample=0.8,
-                colsample_bytree=0.6,
-                reg_alpha=0.1,
-                reg_lambda=2.0,
-                random_state=42,
-                verbosity=-1,
-                n_jobs=-1,
-            )
-        else:
-            log.warning("LightGBM not installed — skipping LGBMRegressor.")
-
-        # Stacking: best linear + best tree models → Ridge meta-learner
-        stack_base = [
-            ("ridge", make_pipeline(
-                StandardScaler(),
-                RidgeCV(alphas=[0.01, 0.1, 1, 10, 100]),
-            )),
-            ("histgbm", HistGradientBoostingRegressor(
-                max_iter=200, learning_rate=0.05, max_depth=3,
-                min_samples_leaf=10, l2_regularization=1.0, random_state=42,
-            )),
-        ]
-        if LIGHTGBM_AVAILABLE:
-            stack_base.append(("lgbm", LGBMRegressor(
-                n_estimators=200, learning_rate=0.05, max_depth=3,
-                num_leaves=15, min_child_samples=15, subsample=0.8,
-                colsample_bytree=0.6, reg_alpha=0.1, reg_lambda=2.0,
-                random_state=42, verbosity=-1, n_jobs=-1,
-            )))
-        elif XGBOOST_AVAILABLE:
-            stack_base.append(("xgb", XGBRegressor(
-                n_estimators=200, learning_rate=0.05, max_depth=3,
-                subsample=0.8, colsample_bytree=0.6, random_state=42,
-                verbosity=0, n_jobs=-1,
-            )))
-        candidates["Stacking"] = StackingRegressor(
-            estimators=stack_base,
-            final_estimator=RidgeCV(alphas=[0.01, 0.1, 1, 10, 100]),
-            cv=3,
-            n_jobs=1,  # avoid nested parallelism issues
-        )
-
-        return candidates
-
     model_names = list(make_models().keys())
     # ALL_NAMES includes "LastPrice" (naïve random-walk baseline) first.
     ALL_NAMES = ["LastPrice"] + model_names
@@ -567,16 +988,44 @@ def main():
     log.info("Starting %d-fold time-series cross-validation...", tscv.n_splits)
     log.info("Models: %s", ALL_NAMES)
 
-    for fold, (train_idx, test_idx) in enumerate(tscv.split(X), start=1):
-        X_tr, X_te = X.iloc[train_idx].values, X.iloc[test_idx].values
-        y_tr, y_te = y[train_idx], y[test_idx]
+    splits = list(tscv.split(X))
+    with TrainingHarness(
+        X, splits, dtype=args.dtype, scale=any(name in LINEAR_MODELS for name in model_names),
+    ) as harness:
+        log.info(
+            "Training harness: %s %s feature matrix, %.1f MB of memory-mapped fold arrays",
+            harness.shape, harness.dtype, harness.nbytes / 2**20,
+        )
+        tuned_params = None
+        if args.tune:
+            tune_names = (
+                args.tune_models.split(",") if args.tune_models else list(SEARCH_SPACES)
+            )
+            tune_names = [name for name in tune_names if name in model_names]
+            tuned = tune_hyperparameters(
+                harness, y, price_series, splits, tune_names, args.target, max(1, args.jobs),
+                n_trials=args.tune_trials, eta=args.tune_eta, store_path=args.tune_store,
+            )
+            log.info("\nTuned configurations (mean RMSE on the search folds):")
+            for name, result in tuned.items():
+                log.info(
+                    "  %-18s | RMSE=%.3f over %d folds | %s",
+                    name, result["rmse"], result["folds"], result["params"] or "defaults",
+                )
+            tuned_params = {name: result["params"] for name, result in tuned.items()}
+
+        fold_results, cv_wall, processes, threads = run_cv(
+            harness, y, price_series, splits, model_names, args.target, max(1, args.jobs),
+            params=tuned_params,
+        )
 
+    for fold, (train_idx, test_idx) in enumerate(splits, start=1):
         # Current prices for the test fold — used for reconstruction and
         # the LastPrice (naïve random-walk) baseline.
         price_te = price_series[test_idx]
 
         # Actual next prices in absolute $/bbl for all metric computations.
-        y_te_abs = reconstruct_price(y_te, price_te, args.target)
+        y_te_abs = reconstruct_price(y[test_idx], price_te, args.target)
 
         # --- LastPrice baseline: predict tomorrow = today ---
         last_metrics = regression_metrics(y_te_abs, price_te)
@@ -588,17 +1037,8 @@ def main():
             last_metrics["MAPE (%)"], last_metrics["R²"],
         )
 
-        for name, mdl in make_models().items():
-            if name in LINEAR_MODELS:
-                sc = StandardScaler()
-                X_tr_fit = sc.fit_transform(X_tr)
-                X_te_fit = sc.transform(X_te)
-            else:
-                X_tr_fit, X_te_fit = X_tr, X_te
-
-            mdl.fit(X_tr_fit, y_tr)
-            preds_abs = reconstruct_price(mdl.predict(X_te_fit), price_te, args.target)
-            metrics = regression_metrics(y_te_abs, preds_abs)
+        for name in model_names:
+            metrics = fold_results[(fold, name)]["metrics"]
             cv_results[name].append(metrics)
             log.info(
                 "  Fold %d | %-18s | MAE=%.3f  RMSE=%.3f  MAPE=%.2f%%  R²=%.4f",
@@ -606,6 +1046,22 @@ def main():
                 metrics["MAPE (%)"], metrics["R²"],
             )
 
+    # Wall-clock per model (summed over folds) and overall parallel speedup,
+    # taken as CPU-seconds of fitting per wall-clock second.
+    folds = range(1, len(splits) + 1)
+    fit_seconds = {name: sum(fold_results[(f, name)]["seconds"] for f in folds) for name in model_names}
+    cpu_seconds = sum(r["cpu_seconds"] for r in fold_results.values())
+    log.info(
+        "\nCross-validation timing (%d processes × %d threads per fit):", processes, threads,
+    )
+    for name in sorted(model_names, key=fit_seconds.get, reverse=True):
+        log.info("  %-18s | %7.2fs over %d folds", name, fit_seconds[name], len(splits))
+    log.info(
+        "  Total: %.2f CPU-s of fitting in %.2fs wall-clock → %.1f× speedup "
+        "(holdout reuses fold %d models; no refit)",
+        cpu_seconds, cv_wall, cpu_seconds / cv_wall, len(splits),
+    )
+
     # Aggregate CV results (mean across folds).
     log.info("\nCross-validation summary (mean across %d folds):", tscv.n_splits)
     cv_summary = {}
@@ -630,10 +1086,9 @@ def main():
     # 6. Final holdout evaluation (last TimeSeriesSplit fold)
     #    This mimics real-world deployment: the model is trained on all
     #    past data and evaluated on the most recent unseen observations.
+    #    That split is the last CV fold, so its fitted models are reused.
     # ------------------------------------------------------------------
-    last_train_idx, last_test_idx = list(tscv.split(X))[-1]
-    X_train = X.iloc[last_train_idx].values
-    X_test  = X.iloc[last_test_idx].values
+    last_train_idx, last_test_idx = splits[-1]
     y_train = y[last_train_idx]
     y_test  = y[last_test_idx]
     price_test = price_series[last_test_idx]
@@ -668,20 +1123,13 @@ def main():
         holdout_results["LastPrice"]["R²"],
     )
 
-    for name, mdl in make_models().items():
-        if name in LINEAR_MODELS:
-            sc = StandardScaler()
-            X_tr_fit = sc.fit_transform(X_train)
-            X_te_fit = sc.transform(X_test)
-            scalers[name] = sc
-        else:
-            X_tr_fit, X_te_fit = X_train, X_test
-
-        mdl.fit(X_tr_fit, y_train)
-        preds_abs = reconstruct_price(mdl.predict(X_te_fit), price_test, args.target)
-        metrics = regression_metrics(y_test_abs, preds_abs)
-        holdout_results[name] = {**metrics, "predictions_abs": preds_abs}
-        trained_models[name]  = mdl
+    for name in model_names:
+        fitted = fold_results[(len(splits), name)]
+        if fitted["scaler"] is not None:
+            scalers[name] = fitted["scaler"]
+        metrics = fitted["metrics"]
+        holdout_results[name] = {**metrics, "predictions_abs": fitted["predictions_abs"]}
+        trained_models[name]  = fitted["model"]
         log.info(
             "  Holdout %-18s | MAE=%.3f  RMSE=%.3f  MAPE=%.2f%%  R²=%.4f",
             name, metrics["MAE"], metrics["RMSE"],
@@ -769,6 +1217,7 @@ def main():
         "features": X.columns.tolist(),
         "target": args.target,
         "target_col": target_col,
+        "params": (tuned_params or {}).get(best_name, {}),
     }
     if best_name in LINEAR_MODELS and best_name in scalers:
         save_bundle["scaler"] = scalers[best_name]
@@ -776,6 +1225,11 @@ def main():
 
     joblib.dump(save_bundle, model_save_path)
     log.info("Best model ('%s') saved to %s", best_name, model_save_path)
+    version = model_registry.publish(
+        "price", best_model, save_bundle["features"], scaler=save_bundle.get("scaler"),
+        meta={k: save_bundle[k] for k in ("target", "target_col", "params")} | {"model_name": best_name},
+    )
+    log.info("Published to the model registry as price/%s", version)
 
     # Confirm classifier is untouched.
     if os.path.exists("models/prediction_model.joblib"):
@@ -925,6 +1379,11 @@ def main():
     print("=" * 70)
     print(f"\nFull predictions written to: {csv_path}")
     print(f"Model saved to             : {model_save_path}")
+    own_mb, worker_mb = peak_rss_mb()
+    print(
+        f"Runtime {time.perf_counter() - started:.1f}s  |  peak RSS {own_mb:.0f} MB"
+        f" (largest child process {worker_mb:.0f} MB)"
+    )
     print("\nPrice Forecast Engine training complete.")
 
 
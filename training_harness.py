@@ -0,0 +1,145 @@
+"""
+training_harness.py
+===================
+Shared cross-validation data layer for train_model.py and
+train_price_model.py.
+
+The feature frame is converted once to a single float64 (or float32)
+column-major NumPy array, and every fold's train/test matrices — plus, when
+linear models are trained, their standardised versions — are materialised
+once into a scratch directory as ``.npy`` files.  Everything is opened as a
+read-only memory map, so worker processes share the same pages instead of
+each holding (or re-slicing) private copies, and each fold is scaled once
+for all linear models rather than once per model.
+
+Column-major layout matches ``DataFrame.iloc[idx].values``, so fits are
+bit-identical to the pandas-slicing loops this replaces.
+
+    with TrainingHarness(X, splits, scale=True) as harness:
+        X_train, X_test = harness.fold(1)
+        scaler, X_train_s, X_test_s = harness.scaled(1)
+"""
+
+from __future__ import annotations
+
+import os
+import platform
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import StandardScaler
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+class TrainingHarness:
+    """Feature matrix and per-fold arrays, materialised once and memory-mapped.
+
+    Folds are numbered from 1, in ``splits`` order.  Instances pickle as
+    their paths and fitted scalers only, so they can be handed to process
+    pool workers; the owning process removes the scratch directory on
+    ``close()``.
+    """
+
+    def __init__(
+        self,
+        X: pd.DataFrame | np.ndarray,
+        splits: list,
+        dtype: str | np.dtype = np.float64,
+        scale: bool = False,
+        workdir: str | None = None,
+    ):
+        self.columns = list(X.columns) if isinstance(X, pd.DataFrame) else None
+        self.dtype = np.dtype(dtype)
+        self.n_folds = len(splits)
+        self.scalers: dict[int, StandardScaler] = {}
+        self._dir = tempfile.mkdtemp(prefix="training-harness-", dir=workdir)
+        self._owner = os.getpid()
+        self._maps: dict[str, np.ndarray] = {}
+
+        matrix = np.asfortranarray(np.asarray(X, dtype=self.dtype))
+        self.shape = matrix.shape
+        self._save("X", matrix)
+        for fold, (train_idx, test_idx) in enumerate(splits, start=1):
+            X_train = np.asfortranarray(matrix[train_idx])
+            X_test = np.asfortranarray(matrix[test_idx])
+            self._save(f"train-{fold}", X_train)
+            self._save(f"test-{fold}", X_test)
+            if scale:
+                # Fitted on a named frame when available, so a saved scaler
+                # accepts the DataFrames the backend passes at inference.
+                scaler = StandardScaler()
+                self._save(f"train-{fold}-scaled", scaler.fit_transform(self.frame(X_train)))
+                self._save(f"test-{fold}-scaled", scaler.transform(self.frame(X_test)))
+                self.scalers[fold] = scaler
+
+    # ── Arrays ───────────────────────────────────────────────────────────
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """The whole feature matrix."""
+        return self._load("X")
+
+    def fold(self, fold: int) -> tuple[np.ndarray, np.ndarray]:
+        """``(X_train, X_test)`` for one fold."""
+        return self._load(f"train-{fold}"), self._load(f"test-{fold}")
+
+    def scaled(self, fold: int) -> tuple[StandardScaler, np.ndarray, np.ndarray]:
+        """``(scaler, X_train_scaled, X_test_scaled)`` for one fold."""
+        if fold not in self.scalers:
+            raise ValueError("TrainingHarness was built without scale=True")
+        return self.scalers[fold], self._load(f"train-{fold}-scaled"), self._load(f"test-{fold}-scaled")
+
+    def frame(self, array: np.ndarray) -> pd.DataFrame | np.ndarray:
+        """Wrap ``array`` with the feature names (no copy), for estimators
+        that should record ``feature_names_in_``."""
+        if self.columns is None:
+            return array
+        return pd.DataFrame(array, columns=self.columns, copy=False)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(os.path.getsize(os.path.join(self._dir, name)) for name in os.listdir(self._dir))
+
+    def _save(self, name: str, array: np.ndarray) -> None:
+        np.save(os.path.join(self._dir, f"{name}.npy"), array)
+
+    def _load(self, name: str) -> np.ndarray:
+        if name not in self._maps:
+            self._maps[name] = np.load(os.path.join(self._dir, f"{name}.npy"), mmap_mode="r")
+        return self._maps[name]
+
+    # ── Lifecycle ────────────────────────────────────────────────────────
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_maps"] = {}  # reopened lazily in each worker process
+        return state
+
+    def close(self) -> None:
+        self._maps.clear()
+        if os.getpid() == self._owner:
+            shutil.rmtree(self._dir, ignore_errors=True)
+
+    def __enter__(self) -> TrainingHarness:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def peak_rss_mb() -> tuple[float, float]:
+    """Peak resident set size of this process and of its largest reaped
+    child (e.g. a pool worker), in MB; ``(nan, nan)`` where unsupported."""
+    if resource is None:
+        return float("nan"), float("nan")
+    # ru_maxrss is kilobytes on Linux, bytes on macOS.
+    unit = 1024 * 1024 if platform.system() == "Darwin" else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / unit
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / unit
+    return own, children
@@ -0,0 +1,178 @@
+"""
+training_tables.py
+==================
+Append-only Parquet storage for training tables, partitioned by commodity
+and year:
+
+    data/processed/daily_training_table/
+        WTI/2024/part-20240102-20241231.parquet
+        WTI/2025/part-20250102-20250603.parquet
+        WTI/2025/part-20250604-20250604.parquet
+        _state.json      schema, committed parts, per-commodity marks
+        _tail-3.parquet  the trailing input rows the next update looks back on
+
+An update only ever adds part files (one per commodity-year it touches), so
+appending a trading day writes a few kilobytes instead of rewriting the
+table; ``compact()`` folds each year's parts back into one file.  The state
+file is replaced atomically after the parts and the new tail are written,
+and names the parts and tail that make up the table, so an interrupted
+update leaves the previous table intact.  Read through
+``PartitionedTable.read()``.
+
+    table = PartitionedTable("data/processed/daily_training_table")
+    table.write(rows, tail, high_water, replace=True)   # full build
+    table.write(new_rows, tail, high_water)             # incremental append
+    df = table.read()
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+
+class PartitionedTable:
+    """A training table stored as ``<root>/<commodity>/<year>/part-*.parquet``.
+
+    Rows are keyed by ``(commodity, date)``.  Two marks are kept per
+    commodity: ``high_water``, the last input date consumed, and
+    ``emitted``, the last date written to the table (rows whose target
+    needs a later day stay out until that day arrives).
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self._state_path = os.path.join(root, "_state.json")
+
+    def exists(self) -> bool:
+        return os.path.exists(self._state_path)
+
+    def state(self) -> dict:
+        with open(self._state_path) as fh:
+            return json.load(fh)
+
+    # ── Marks ────────────────────────────────────────────────────────────
+
+    def high_water(self) -> dict[str, pd.Timestamp]:
+        return self._marks("high_water")
+
+    def emitted(self) -> dict[str, pd.Timestamp]:
+        return self._marks("emitted")
+
+    def _marks(self, key: str) -> dict[str, pd.Timestamp]:
+        if not self.exists():
+            return {}
+        return {c: pd.Timestamp(m[key]) for c, m in self.state()["commodities"].items() if m.get(key)}
+
+    def tail(self) -> pd.DataFrame | None:
+        if not self.exists() or not self.state().get("tail"):
+            return None
+        return pd.read_parquet(os.path.join(self.root, self.state()["tail"]))
+
+    # ── Read / write ─────────────────────────────────────────────────────
+
+    def read(self) -> pd.DataFrame:
+        """The whole table, sorted by commodity and date."""
+        state = self.state()
+        if not state["parts"]:
+            return pd.DataFrame(columns=state["columns"])
+        paths = [os.path.join(self.root, p) for p in state["parts"]]
+        df = pq.read_table(paths).to_pandas()
+        return df[state["columns"]].sort_values(["commodity", "date"], kind="stable").reset_index(drop=True)
+
+    def write(
+        self,
+        rows: pd.DataFrame,
+        tail: pd.DataFrame,
+        high_water: dict[str, pd.Timestamp],
+        replace: bool = False,
+    ) -> list[str]:
+        """Append ``rows`` (or, with ``replace``, make them the whole table),
+        store ``tail`` for the next update and advance the marks.  Returns
+        the part files written."""
+        if replace and os.path.exists(self.root):
+            shutil.rmtree(self.root)
+        os.makedirs(self.root, exist_ok=True)
+        if self.exists():
+            state = self.state()
+        else:
+            state = {
+                "columns": list(rows.columns),
+                "dtypes": {c: str(t) for c, t in rows.dtypes.items()},
+                "parts": [],
+                "tail": None,
+                "generation": 0,
+                "commodities": {},
+            }
+        if list(rows.columns) != state["columns"]:
+            raise ValueError("Columns differ from the stored table; rebuild it instead of appending")
+        # one schema across parts, whatever dtypes this batch happened to infer
+        mismatched = {c: t for c, t in state["dtypes"].items() if str(rows[c].dtype) != t}
+        if mismatched:
+            rows = rows.astype(mismatched)
+
+        written = self._write_parts(rows)
+        state["parts"].extend(written)
+
+        emitted = rows.groupby("commodity")["date"].max() if len(rows) else pd.Series(dtype=object)
+        for commodity in set(high_water) | set(emitted.index):
+            marks = state["commodities"].setdefault(commodity, {})
+            if commodity in high_water:
+                marks["high_water"] = high_water[commodity].isoformat()
+            if commodity in emitted.index:
+                marks["emitted"] = emitted[commodity].isoformat()
+
+        previous_tail = state["tail"]
+        state["generation"] += 1
+        state["tail"] = f"_tail-{state['generation']}.parquet"
+        tail.to_parquet(os.path.join(self.root, state["tail"]), index=False)
+        self._save_state(state)
+        if previous_tail:
+            os.remove(os.path.join(self.root, previous_tail))
+        return written
+
+    def compact(self) -> int:
+        """Merge each commodity-year's parts into one file; returns how many
+        part files were removed."""
+        state = self.state()
+        groups: dict[str, list[str]] = {}
+        for part in state["parts"]:
+            groups.setdefault(os.path.dirname(part), []).append(part)
+
+        parts, obsolete = [], []
+        for members in groups.values():
+            if len(members) == 1:
+                parts.extend(members)
+                continue
+            df = pq.read_table([os.path.join(self.root, p) for p in members]).to_pandas()
+            df = df.sort_values("date", kind="stable").reset_index(drop=True)
+            parts.extend(self._write_parts(df))
+            obsolete.extend(members)
+
+        state["parts"] = parts
+        self._save_state(state)
+        for part in obsolete:
+            if part not in parts:
+                os.remove(os.path.join(self.root, part))
+        return len(obsolete)
+
+    def _write_parts(self, rows: pd.DataFrame) -> list[str]:
+        written = []
+        if rows.empty:
+            return written
+        for (commodity, year), part in rows.groupby(["commodity", rows["date"].dt.year], sort=True):
+            name = f"part-{part['date'].min():%Y%m%d}-{part['date'].max():%Y%m%d}.parquet"
+            relative = os.path.join(str(commodity), str(year), name)
+            os.makedirs(os.path.join(self.root, os.path.dirname(relative)), exist_ok=True)
+            part.to_parquet(os.path.join(self.root, relative), index=False)
+            written.append(relative)
+        return written
+
+    def _save_state(self, state: dict) -> None:
+        with open(self._state_path + ".tmp", "w") as fh:
+            json.dump(state, fh, indent=2)
+        os.replace(self._state_path + ".tmp", self._state_path)